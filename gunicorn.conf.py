@@ -65,6 +65,15 @@ def post_worker_init(worker):
     """Called just after a worker has initialized the application."""
     pass
 
+def worker_exit(server, worker):
+    """Called just after a worker has been exited, in the worker process."""
+    try:
+        from modules.core.audit_sink import audit_sink
+        if not audit_sink.shutdown(timeout=graceful_timeout - 5):
+            worker.log.warning("Audit sink not fully drained; remaining events kept in WAL")
+    except Exception as e:
+        worker.log.error("Audit sink flush failed: %s", e)
+
 def worker_abort(worker):
     """Called when a worker received the SIGABRT signal."""
     pass
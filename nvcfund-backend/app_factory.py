@@ -66,6 +66,11 @@ def create_app(config_name=None):
     # Register modular blueprints
     register_all_modules(app)
     
+    # Schema creation and migrations run in scripts/bootstrap_database.py; workers
+    # only compare the recorded schema fingerprint with the models registered above
+    from modules.core.schema_version import verify_schema_version
+    verify_schema_version(app)
+    
     # Add a basic root route for health checks and API discovery
     @app.route('/')
     def root():
@@ -109,12 +114,22 @@ def initialize_dynamic_websocket_handlers(app, socketio):
         logger.warning("Modules directory not found, skipping dynamic WebSocket handler loading.")
         return
 
-    for module_name in os.listdir(modules_dir):
+    # In lazy mode the route manifest already lists the handler modules, so skip the directory scan
+    module_names = None
+    if app.config.get('LAZY_BLUEPRINTS'):
+        from modules.core.lazy_blueprints import load_route_manifest
+        manifest = load_route_manifest(app)
+        if manifest is not None:
+            module_names = [name.split('.')[1] for name in manifest.data.get('websocket_modules', [])]
+    
+    discovered = []
+    for module_name in module_names if module_names is not None else os.listdir(modules_dir):
         module_path = os.path.join(modules_dir, module_name)
         if os.path.isdir(module_path):
             # Convention: Look for a 'websocket_handlers.py' file in each module
             handler_file_path = os.path.join(module_path, 'websocket_handlers.py')
             if os.path.exists(handler_file_path):
+                discovered.append(f"modules.{module_name}.websocket_handlers")
                 try:
                     # Dynamically import the module
                     spec = importlib.util.spec_from_file_location(
@@ -129,6 +144,9 @@ def initialize_dynamic_websocket_handlers(app, socketio):
                         logger.info(f"Initialized WebSocket handlers for module: {module_name}")
                 except Exception as e:
                     logger.error(f"Error initializing WebSocket handlers for module '{module_name}': {e}")
+    
+    # Recorded into the route manifest by scripts/build_route_manifest.py
+    app.extensions['websocket_handler_modules'] = discovered
 
 def configure_app(app, config_name):
     """Configure Flask application settings"""
@@ -158,6 +176,10 @@ def initialize_extensions(app):
     # Initialize database
     db.init_app(app)
     
+    # Initialize asynchronous audit sink (writer thread starts lazily per worker)
+    from modules.core.audit_sink import audit_sink
+    audit_sink.init_app(app)
+    
     # Initialize login manager
     login_manager.init_app(app)
     login_manager.login_message = 'Please log in to access this page.'
@@ -192,7 +214,13 @@ def initialize_extensions(app):
     app.config.setdefault('WTF_CSRF_CHECK_DEFAULT', True)
     
     # Initialize SocketIO
-    socketio.init_app(app, cors_allowed_origins="*", logger=True, engineio_logger=True)
+    socketio.init_app(app, cors_allowed_origins="*", logger=True, engineio_logger=True,
+                      message_queue=app.config.get('SOCKETIO_MESSAGE_QUEUE'))
+    
+    # Shared streaming scheduler used by module socket handlers
+    from modules.core.streaming_hub import streaming_hub
+    streaming_hub.init_app(app, socketio)
+    
     # Dynamically initialize WebSocket handlers for all modules
     initialize_dynamic_websocket_handlers(app, socketio)
     
@@ -202,8 +230,20 @@ def initialize_extensions(app):
     # Initialize rate limiter
     rate_limiter.init_app(app)
     
+    # Initialize shared token bucket limiter used by the security middleware
+    from modules.core.rate_limiter import token_limiter
+    token_limiter.init_app(app)
+    
+    # Pooled, rate-limited HTTP clients for provider integrations (buckets live in token_limiter)
+    from modules.core.integration_http import integration_http
+    integration_http.init_app(app)
+    
     # Initialize session interface
-    session_interface.init_app(app)
+    if app.config.get('SESSION_TYPE') == 'tiered':
+        from modules.core.session_store import session_store
+        session_store.init_app(app)
+    else:
+        session_interface.init_app(app)
     
     # Initialize CORS with global access configuration
     cors_origins = app.config.get('CORS_ORIGINS', '*')
@@ -216,29 +256,6 @@ def initialize_extensions(app):
          supports_credentials=True,  # Allow cookies/sessions across origins
          allow_headers=['Content-Type', 'Authorization', 'X-Requested-With', 'X-CSRF-Token'],
          methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'PATCH'])
-    
-    # Create database tables and apply migrations
-    with app.app_context():
-        try:
-            # Create new tables
-            db.create_all()
-            logger.info("Database tables created successfully")
-            
-            # Apply automatic migrations for existing tables
-            try:
-                from modules.core.database_migration import database_migration
-                migration_success = database_migration.check_and_apply_migrations()
-                
-                if migration_success:
-                    logger.info("Database migrations applied successfully")
-                else:
-                    logger.warning("Some database migrations failed - check logs")
-            except ImportError:
-                logger.info("Database migration module not available - skipping migrations")
-                
-        except Exception as e:
-            logger.error(f"Database initialization error: {e}")
-            logger.info("Continuing without database - some features may not work")
 
 def configure_security_headers(app):
     """Configure security headers for all API responses"""
@@ -27,9 +27,14 @@ class Config:
         "pool_pre_ping": True,
     }
     
-    # Session Management
-    SESSION_TYPE = 'filesystem'
-    SESSION_FILE_DIR = 'flask_session'
+    # Session Management: 'tiered' keeps sessions in Redis (SESSION_REDIS_URL, else REDIS_URL)
+    # behind a per-process LRU whose entries are checked against a version in Redis on every load;
+    # SESSION_STORE = 'local' is the in-process stand-in for tests
+    SESSION_TYPE = os.environ.get('SESSION_TYPE', 'tiered')
+    SESSION_STORE = os.environ.get('SESSION_STORE', 'redis')
+    SESSION_REDIS_URL = os.environ.get('SESSION_REDIS_URL')
+    SESSION_LOCAL_CACHE_SIZE = int(os.environ.get('SESSION_LOCAL_CACHE_SIZE', '10000'))
+    SESSION_LOCAL_CACHE_TTL = float(os.environ.get('SESSION_LOCAL_CACHE_TTL', '2'))
     SESSION_PERMANENT = False
     SESSION_USE_SIGNER = True
     SESSION_KEY_PREFIX = 'nvc_banking:'
@@ -44,11 +49,74 @@ class Config:
     # Cache Configuration
     CACHE_TYPE = 'simple'
     CACHE_DEFAULT_TIMEOUT = 300
+    # L2 (Redis) entries: 'auto' picks zstd, then lz4, then zlib depending on what is installed
+    CACHE_COMPRESSION = os.environ.get('CACHE_COMPRESSION', 'auto')
+    CACHE_COMPRESSION_THRESHOLD = int(os.environ.get('CACHE_COMPRESSION_THRESHOLD', '1024'))
     
     # Rate Limiting
-    RATELIMIT_STORAGE_URI = 'memory://'
+    # Use a redis:// URI in production so limits are shared across gunicorn workers
+    RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI', 'memory://')
     RATELIMIT_DEFAULT = '1000 per hour'
     
+    # Socket.IO message queue (redis://) so room emits and streaming ticks span all workers
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    
+    # Directory for per-worker memory-mapped performance metrics merged by the admin dashboard
+    PERFORMANCE_METRICS_DIR = os.environ.get('PERFORMANCE_METRICS_DIR')
+    
+    # Monthly statement job: keyset chunk size, send workers and resume checkpoints (defaults to instance/)
+    STATEMENT_CHUNK_SIZE = int(os.environ.get('STATEMENT_CHUNK_SIZE', '500'))
+    STATEMENT_WORKERS = int(os.environ.get('STATEMENT_WORKERS', '8'))
+    STATEMENT_CHECKPOINT_DIR = os.environ.get('STATEMENT_CHECKPOINT_DIR')
+    
+    # Lazy blueprint loading: import module routes on the first request under their URL prefix.
+    # Needs a route manifest from scripts/build_route_manifest.py (defaults to <app root>/route_manifest.json)
+    LAZY_BLUEPRINTS = os.environ.get('LAZY_BLUEPRINTS', 'false').lower() == 'true'
+    ROUTE_MANIFEST_PATH = os.environ.get('ROUTE_MANIFEST_PATH')
+    
+    # Exchange quotes: rate matrix refresh interval (seconds) and the pivots tried, in order, for cross rates
+    FX_RATE_MATRIX_TTL = float(os.environ.get('FX_RATE_MATRIX_TTL', '5'))
+    FX_PIVOT_CURRENCIES = os.environ.get('FX_PIVOT_CURRENCIES', 'USD,NVCT').split(',')
+    
+    # Provider HTTP clients (Binance, Etherscan, Polygonscan, CoinGecko): keep-alive pool per provider,
+    # circuit breaker, fan-out threads and deadline. <PROVIDER>_BASE_URL points a provider at a mock server
+    # (scripts/mock_provider_server.py); <PROVIDER>_RATE_LIMIT sets requests/second for paid API tiers
+    INTEGRATION_HTTP_POOL_SIZE = int(os.environ.get('INTEGRATION_HTTP_POOL_SIZE', '10'))
+    INTEGRATION_CIRCUIT_FAILURES = int(os.environ.get('INTEGRATION_CIRCUIT_FAILURES', '5'))
+    INTEGRATION_CIRCUIT_RESET = float(os.environ.get('INTEGRATION_CIRCUIT_RESET', '30'))
+    INTEGRATION_FANOUT_WORKERS = int(os.environ.get('INTEGRATION_FANOUT_WORKERS', '16'))
+    INTEGRATION_FANOUT_TIMEOUT = float(os.environ.get('INTEGRATION_FANOUT_TIMEOUT', '15'))
+    INTEGRATION_BASE_URLS = {
+        name: os.environ[f'{name.upper()}_BASE_URL']
+        for name in ('etherscan', 'polygonscan', 'binance', 'coingecko')
+        if os.environ.get(f'{name.upper()}_BASE_URL')
+    }
+    INTEGRATION_RATE_LIMITS = {
+        name: int(os.environ[f'{name.upper()}_RATE_LIMIT'])
+        for name in ('etherscan', 'polygonscan', 'binance', 'coingecko')
+        if os.environ.get(f'{name.upper()}_RATE_LIMIT')
+    }
+    
+    # Etherscan/Polygonscan response cache (per-action TTL tiers, block-keyed balances);
+    # provider errors are cached this many seconds
+    EXPLORER_CACHE_ENABLED = os.environ.get('EXPLORER_CACHE_ENABLED', 'true').lower() == 'true'
+    EXPLORER_CACHE_NEGATIVE_TTL = int(os.environ.get('EXPLORER_CACHE_NEGATIVE_TTL', '60'))
+    
+    # Local token transfer index behind the token analytics endpoints. Each worker syncs
+    # tracked contracts in a background thread unless a dedicated scripts/sync_token_index.py
+    # --loop process does it; PAGE_RATE caps its explorer pages per second. Contracts are
+    # tracked only from TOKEN_INDEX_CONTRACTS ('provider:0x...' list), the sync script or the admin API
+    TOKEN_INDEX_BACKGROUND_SYNC = os.environ.get('TOKEN_INDEX_BACKGROUND_SYNC', 'true').lower() == 'true'
+    TOKEN_INDEX_SYNC_INTERVAL = float(os.environ.get('TOKEN_INDEX_SYNC_INTERVAL', '30'))
+    TOKEN_INDEX_PAGE_SIZE = int(os.environ.get('TOKEN_INDEX_PAGE_SIZE', '1000'))
+    TOKEN_INDEX_PAGE_RATE = int(os.environ.get('TOKEN_INDEX_PAGE_RATE', '2'))
+    TOKEN_INDEX_MAX_CONTRACTS = int(os.environ.get('TOKEN_INDEX_MAX_CONTRACTS', '100'))
+    TOKEN_INDEX_CONTRACTS = os.environ.get('TOKEN_INDEX_CONTRACTS', '').split(',')
+    
+    # Schema fingerprint mismatch at boot: 'enforce' refuses to start, 'warn' logs,
+    # 'bootstrap' creates/migrates inline. Deploys run scripts/bootstrap_database.py first
+    SCHEMA_BOOT_MODE = os.environ.get('SCHEMA_BOOT_MODE', 'enforce')
+    
     # CSRF Protection
     WTF_CSRF_ENABLED = True
     WTF_CSRF_TIME_LIMIT = 3600
@@ -87,6 +155,9 @@ class DevelopmentConfig(Config):
     DEBUG = True
     TESTING = False
 
+    # Keep single-process dev/test runs self-migrating
+    SCHEMA_BOOT_MODE = os.environ.get('SCHEMA_BOOT_MODE', 'bootstrap')
+
     # Database - Use PostgreSQL with vault-managed credentials
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'postgresql://nvcfund_web1@localhost:5432/nvcfund_db')
     
@@ -123,6 +194,9 @@ class TestingConfig(Config):
     TESTING = True
     DEBUG = False
 
+    # Keep single-process dev/test runs self-migrating
+    SCHEMA_BOOT_MODE = os.environ.get('SCHEMA_BOOT_MODE', 'bootstrap')
+
     # Use PostgreSQL test database with vault-managed credentials
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL')
     
@@ -141,8 +215,7 @@ class TestingConfig(Config):
     MAIL_SUPPRESS_SEND = True
     
     # Session configuration for testing
-    SESSION_TYPE = 'filesystem'
-    SESSION_FILE_DIR = 'test_sessions'
+    SESSION_STORE = 'local'
     PERMANENT_SESSION_LIFETIME = timedelta(minutes=30)
     
     # Logging
@@ -161,6 +234,7 @@ class TestingConfig(Config):
     
     # Disable external API calls during testing
     EXTERNAL_API_ENABLED = False
+    TOKEN_INDEX_BACKGROUND_SYNC = False
 
 
 class ProductionConfig(Config):
@@ -3,26 +3,22 @@ Accounts Management WebSocket Handlers
 Real-time data streaming for accounts dashboard with granular drill-down capabilities
 """
 
-import asyncio
-import json
 import random
 from datetime import datetime, timedelta
 from typing import Dict, Any, List
-import threading
-import time
-from flask_socketio import emit, join_room, leave_room
+from flask_socketio import emit
+
+from modules.core.streaming_hub import streaming_hub
 
 class AccountsWebSocketHandler:
     """Handles real-time WebSocket connections for accounts management"""
     
     def __init__(self, socketio):
         self.socketio = socketio
-        self.connected_clients = set()
-        self.streaming_thread = None
-        self.is_streaming = False
         
-        # Register event handlers
+        # Register event handlers and streaming topics
         self.register_handlers()
+        self.register_streams()
         
     def register_handlers(self):
         """Register WebSocket event handlers"""
@@ -30,33 +26,18 @@ class AccountsWebSocketHandler:
         @self.socketio.on('join_accounts_stream')
         def handle_join_accounts_stream():
             """Handle client joining accounts real-time stream"""
-            room = 'accounts_stream'
-            join_room(room)
-            self.connected_clients.add(room)
-            
-            # Send initial data
-            initial_data = self.get_current_metrics()
-            emit('accounts_metrics_update', initial_data)
-            
-            # Start streaming if not already started
-            if not self.is_streaming:
-                self.start_streaming()
-                
-            print(f"Client joined accounts stream. Active clients: {len(self.connected_clients)}")
+            # The hub sends the latest snapshot on subscribe and keeps a single
+            # producer running for all clients, whichever worker they are on
+            streaming_hub.subscribe('accounts.metrics')
+            streaming_hub.subscribe('accounts.charts')
+            print(f"Client joined accounts stream. Active clients: {len(streaming_hub.topics['accounts.metrics'].subscribers)}")
             
         @self.socketio.on('leave_accounts_stream')
         def handle_leave_accounts_stream():
             """Handle client leaving accounts stream"""
-            room = 'accounts_stream'
-            leave_room(room)
-            if room in self.connected_clients:
-                self.connected_clients.remove(room)
-                
-            # Stop streaming if no clients
-            if not self.connected_clients:
-                self.stop_streaming()
-                
-            print(f"Client left accounts stream. Active clients: {len(self.connected_clients)}")
+            streaming_hub.unsubscribe('accounts.metrics')
+            streaming_hub.unsubscribe('accounts.charts')
+            print(f"Client left accounts stream. Active clients: {len(streaming_hub.topics['accounts.metrics'].subscribers)}")
             
         @self.socketio.on('request_accounts_data')
         def handle_request_accounts_data():
@@ -104,48 +85,21 @@ class AccountsWebSocketHandler:
             except Exception as e:
                 print(f"Error handling more activities request: {e}")
     
-    def start_streaming(self):
-        """Start real-time data streaming"""
-        if self.is_streaming:
-            return
-            
-        self.is_streaming = True
-        self.streaming_thread = threading.Thread(target=self._streaming_worker, daemon=True)
-        self.streaming_thread.start()
-        print("Accounts real-time streaming started")
+    def register_streams(self):
+        """Register the accounts dashboard topics with the shared streaming hub"""
+        streaming_hub.register_topic('accounts.metrics', self._produce_metrics, interval=15)
+        streaming_hub.register_topic('accounts.charts', self._produce_charts, interval=60)
         
-    def stop_streaming(self):
-        """Stop real-time data streaming"""
-        self.is_streaming = False
-        if self.streaming_thread:
-            self.streaming_thread = None
-        print("Accounts real-time streaming stopped")
+    def _produce_metrics(self) -> Dict[str, Any]:
+        """Metrics every tick plus a new activity 30% of the time"""
+        produced = {'accounts_metrics_update': self.get_current_metrics()}
+        if random.random() > 0.7:
+            produced['accounts_activity_update'] = [self.generate_random_activity()]
+        return produced
+        
+    def _produce_charts(self) -> Dict[str, Any]:
+        return {'accounts_chart_update': self.get_chart_data()}
         
-    def _streaming_worker(self):
-        """Background worker for streaming real-time data"""
-        while self.is_streaming:
-            try:
-                if self.connected_clients:
-                    # Stream metrics every 30 seconds
-                    metrics = self.get_current_metrics()
-                    self.socketio.emit('accounts_metrics_update', metrics, room='accounts_stream')
-                    
-                    # Stream new activities every 15 seconds
-                    if random.random() > 0.7:  # 30% chance of new activity
-                        activity = self.generate_random_activity()
-                        self.socketio.emit('accounts_activity_update', activity, room='accounts_stream')
-                    
-                    # Stream chart updates every 60 seconds
-                    if int(time.time()) % 60 == 0:
-                        chart_data = self.get_chart_data()
-                        self.socketio.emit('accounts_chart_update', chart_data, room='accounts_stream')
-                
-                time.sleep(15)  # Stream every 15 seconds
-                
-            except Exception as e:
-                print(f"Error in accounts streaming worker: {e}")
-                time.sleep(5)
-                
     def get_current_metrics(self) -> Dict[str, Any]:
         """Get current real-time metrics"""
         base_time = datetime.utcnow()
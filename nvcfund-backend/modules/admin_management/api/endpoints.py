@@ -347,12 +347,14 @@ def get_audit_logs():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 50, type=int)
         log_type = request.args.get('type', 'all')
+        cursor = request.args.get('cursor')
         
         audit_data = admin_service.get_audit_logs(
             admin_user_id=current_user.id,
             page=page,
             per_page=per_page,
-            log_type=log_type
+            log_type=log_type,
+            cursor=cursor
         )
         
         logger.info(f"Audit logs API accessed", extra={
@@ -0,0 +1,473 @@
+"""
+Log Query Engine
+Sparse block index (time range, level bitmap) over log files with mmap reads, cursor pages, tail and follow
+"""
+
+import calendar
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Line formats understood by the viewer, compiled once
+LOG_LINE_PATTERNS = [
+    # Standard format: TIMESTAMP - LEVEL - MESSAGE
+    re.compile(r'^(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}[.,]\d+).*? - (\w+) - (.+)$'),
+    # ISO format: [TIMESTAMP] LEVEL [context] message
+    re.compile(r'^\[(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}[.,]\d+)\] (\w+) (.+)$'),
+    # Simple format: TIMESTAMP LEVEL MESSAGE
+    re.compile(r'^(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}[.,]\d+) (\w+): (.+)$'),
+]
+
+# Bit per level in the block bitmaps; any other level shares the last bit
+LEVEL_BITS = {'DEBUG': 1, 'INFO': 2, 'WARNING': 4, 'ERROR': 8, 'CRITICAL': 16}
+OTHER_LEVEL_BIT = 32
+
+
+def parse_log_fields(line: str) -> Tuple[str, str, str]:
+    """(timestamp string, level, message) of a log line; unknown formats are INFO with the whole line"""
+    for pattern in LOG_LINE_PATTERNS:
+        match = pattern.match(line)
+        if match:
+            return match.group(1), match.group(2).upper(), match.group(3)
+    return '', 'INFO', line
+
+
+_day_epochs: Dict[str, int] = {}
+
+
+def timestamp_epoch(timestamp: str) -> Optional[int]:
+    """Whole-second UTC epoch of a ``YYYY-MM-DD[T ]HH:MM:SS...`` prefix without building datetimes"""
+    if len(timestamp) < 19:
+        return None
+    day = timestamp[:10]
+    base = _day_epochs.get(day)
+    if base is None:
+        try:
+            base = calendar.timegm(datetime.strptime(day, '%Y-%m-%d').timetuple())
+        except ValueError:
+            return None
+        if len(_day_epochs) > 4096:
+            _day_epochs.clear()
+        _day_epochs[day] = base
+    try:
+        return base + int(timestamp[11:13]) * 3600 + int(timestamp[14:16]) * 60 + int(timestamp[17:19])
+    except ValueError:
+        return None
+
+
+def parse_filter_time(value: Optional[str]) -> Optional[int]:
+    """UTC epoch of an ISO-8601 filter bound (naive values are taken as UTC, like the log timestamps)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return calendar.timegm(parsed.timetuple())
+
+
+@dataclass
+class LogQuery:
+    """Filter parameters parsed once per request instead of once per line"""
+    level: str = ''
+    search: str = ''
+    start: Optional[int] = None
+    end: Optional[int] = None
+    limit: int = 1000
+
+    @classmethod
+    def from_filters(cls, filters: Optional[Dict[str, Any]]) -> 'LogQuery':
+        filters = filters or {}
+        try:
+            limit = int(filters.get('max_lines', 1000))
+        except (TypeError, ValueError):
+            limit = 1000
+        return cls(
+            level=(filters.get('level') or '').upper(),
+            search=(filters.get('search') or '').lower(),
+            start=parse_filter_time(filters.get('start_time')),
+            end=parse_filter_time(filters.get('end_time')),
+            limit=max(1, min(limit, 10000))
+        )
+
+    @property
+    def level_bit(self) -> int:
+        return LEVEL_BITS.get(self.level, OTHER_LEVEL_BIT) if self.level else 0
+
+    def matches(self, line: str) -> Optional[Tuple[str, str, str]]:
+        """Parsed fields if ``line`` passes the filters (lines without a timestamp pass time filters)"""
+        if self.search and self.search not in line.lower():
+            return None
+        fields = parse_log_fields(line)
+        if self.level and fields[1] != self.level:
+            return None
+        if self.start is not None or self.end is not None:
+            epoch = timestamp_epoch(fields[0])
+            if epoch is not None:
+                if self.start is not None and epoch < self.start:
+                    return None
+                if self.end is not None and epoch > self.end:
+                    return None
+        return fields
+
+
+@dataclass
+class LogFileIndex:
+    """
+    Sparse index of one log file: a block every ``block_lines`` lines or
+    ``block_bytes`` bytes with its byte offset, first line number, time
+    bounds, level bitmap and whether it has lines without a timestamp.
+    """
+    inode: int = 0
+    indexed_size: int = 0
+    line_count: int = 0
+    ordered: bool = True
+    offsets: List[int] = field(default_factory=list)
+    first_lines: List[int] = field(default_factory=list)
+    min_times: List[Optional[int]] = field(default_factory=list)
+    max_times: List[Optional[int]] = field(default_factory=list)
+    level_masks: List[int] = field(default_factory=list)
+    untimed: List[bool] = field(default_factory=list)
+
+    def block_range(self, block: int, size: int) -> Tuple[int, int]:
+        end = self.offsets[block + 1] if block + 1 < len(self.offsets) else size
+        return self.offsets[block], end
+
+    def candidate_blocks(self, query: LogQuery) -> List[int]:
+        """Blocks that can contain matches; bisects time bounds when block times are ordered"""
+        blocks = range(len(self.offsets))
+        if (query.start is not None or query.end is not None) and self.ordered and not any(self.untimed) \
+                and all(t is not None for t in self.min_times):
+            low = 0 if query.start is None else max(bisect_left(self.max_times, query.start), 0)
+            high = len(self.offsets) if query.end is None else bisect_right(self.min_times, query.end)
+            blocks = range(low, high)
+        candidates = []
+        level_bit = query.level_bit
+        for block in blocks:
+            if level_bit and not self.level_masks[block] & level_bit:
+                continue
+            if not self.untimed[block] and self.min_times[block] is not None:
+                if query.start is not None and self.max_times[block] < query.start:
+                    continue
+                if query.end is not None and self.min_times[block] > query.end:
+                    continue
+            candidates.append(block)
+        return candidates
+
+
+class LogQueryEngine:
+    """
+    Query log files through persisted sparse indexes.
+
+    An index is stored under ``<base>/.index`` mirroring the log path and is
+    extended incrementally as the file grows (logs are append-only); a file
+    whose inode changed or that shrank was rotated and is re-indexed. Reads
+    go through ``mmap`` and only touch blocks whose time bounds and level
+    bitmap can match. Results come back in pages with an opaque
+    ``offset:line`` cursor.
+    """
+
+    INDEX_DIR = '.index'
+
+    def __init__(self, base_log_dir: Path, block_lines: int = 1024, block_bytes: int = 256 * 1024):
+        self.base_log_dir = Path(base_log_dir)
+        self.block_lines = block_lines
+        self.block_bytes = block_bytes
+        self._indexes: Dict[Path, LogFileIndex] = {}
+        self._lock = threading.Lock()
+
+    # === INDEX ===
+
+    def _index_path(self, path: Path) -> Path:
+        return self.base_log_dir / self.INDEX_DIR / (str(path.relative_to(self.base_log_dir)) + '.json')
+
+    def _load_index(self, path: Path) -> Optional[LogFileIndex]:
+        index = self._indexes.get(path)
+        if index is not None:
+            return index
+        try:
+            with open(self._index_path(path), 'r', encoding='utf-8') as handle:
+                return LogFileIndex(**json.load(handle))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _save_index(self, path: Path, index: LogFileIndex):
+        index_path = self._index_path(path)
+        try:
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = index_path.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as handle:
+                json.dump(asdict(index), handle, separators=(',', ':'))
+            os.replace(temp_path, index_path)
+        except OSError as e:
+            logger.warning(f"Could not persist log index for {path}: {e}")
+
+    def get_index(self, path: Path) -> LogFileIndex:
+        """Index covering every complete line of ``path``, built or extended as needed"""
+        stat = path.stat()
+        with self._lock:
+            index = self._load_index(path)
+            if index is None or index.inode != stat.st_ino or index.indexed_size > stat.st_size:
+                index = LogFileIndex(inode=stat.st_ino)
+            if index.indexed_size < stat.st_size:
+                self._extend(path, index, stat.st_size)
+                self._save_index(path, index)
+            self._indexes[path] = index
+            return index
+
+    def _extend(self, path: Path, index: LogFileIndex, size: int):
+        """Index complete lines from ``index.indexed_size`` up to ``size``"""
+        with open(path, 'rb') as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            position = index.indexed_size
+            if index.offsets:
+                block_lines = index.line_count - index.first_lines[-1]
+                block_start = index.offsets[-1]
+            else:
+                block_lines, block_start = 0, position
+            previous_max = index.max_times[-2] if len(index.max_times) > 1 else None
+
+            while position < size:
+                newline = mm.find(b'\n', position, size)
+                if newline < 0:
+                    break  # Partial last line: indexed once it is complete
+                if not index.offsets or block_lines >= self.block_lines or position - block_start >= self.block_bytes:
+                    if index.offsets:
+                        previous_max = index.max_times[-1]
+                    index.offsets.append(position)
+                    index.first_lines.append(index.line_count + 1)
+                    index.min_times.append(None)
+                    index.max_times.append(None)
+                    index.level_masks.append(0)
+                    index.untimed.append(False)
+                    block_lines, block_start = 0, position
+
+                line = mm[position:newline].decode('utf-8', errors='ignore').strip()
+                if line:
+                    timestamp, level, _ = parse_log_fields(line)
+                    index.level_masks[-1] |= LEVEL_BITS.get(level, OTHER_LEVEL_BIT)
+                    epoch = timestamp_epoch(timestamp)
+                    if epoch is None:
+                        index.untimed[-1] = True
+                    else:
+                        if index.min_times[-1] is None or epoch < index.min_times[-1]:
+                            index.min_times[-1] = epoch
+                            if previous_max is not None and epoch < previous_max:
+                                index.ordered = False
+                        if index.max_times[-1] is None or epoch > index.max_times[-1]:
+                            index.max_times[-1] = epoch
+                index.line_count += 1
+                block_lines += 1
+                position = newline + 1
+            index.indexed_size = position
+
+    # === QUERIES ===
+
+    @staticmethod
+    def _open(path: Path):
+        handle = open(path, 'rb')
+        try:
+            return handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            handle.close()
+            return None, None
+
+    @staticmethod
+    def parse_cursor(cursor: Optional[str]) -> Tuple[int, int]:
+        """(byte offset, line number) from an ``offset:line`` cursor"""
+        if not cursor:
+            return 0, 1
+        try:
+            offset, line_number = str(cursor).split(':', 1)
+            return max(int(offset), 0), max(int(line_number), 1)
+        except ValueError:
+            return 0, 1
+
+    def _scan(self, mm, start: int, end: int, line_number: int,
+              query: LogQuery) -> Iterator[Tuple[int, int, int, str, Tuple[str, str, str]]]:
+        """Yield (offset, next offset, line number, line, fields) of matching lines in [start, end)"""
+        position = start
+        while position < end:
+            newline = mm.find(b'\n', position, end)
+            stop = end if newline < 0 else newline
+            line = mm[position:stop].decode('utf-8', errors='ignore').strip()
+            if line:
+                fields = query.matches(line)
+                if fields:
+                    yield position, stop + 1, line_number, line, fields
+            line_number += 1
+            position = stop + 1
+
+    def iter_matches(self, path: Path, query: LogQuery,
+                     cursor: Optional[str] = None) -> Iterator[Tuple[str, int, str, Tuple[str, str, str]]]:
+        """Yield (cursor after the line, line number, line, fields) for every match from ``cursor`` on"""
+        index = self.get_index(path)
+        handle, mm = self._open(path)
+        if mm is None:
+            return
+        try:
+            offset, line_number = self.parse_cursor(cursor)
+            size = index.indexed_size
+            for block in index.candidate_blocks(query):
+                block_start, block_end = index.block_range(block, size)
+                if block_end <= offset:
+                    continue
+                if block_start >= offset:
+                    start, number = block_start, index.first_lines[block]
+                else:
+                    start, number = offset, line_number
+                for _, next_offset, number, line, fields in self._scan(mm, start, block_end, number, query):
+                    yield f"{next_offset}:{number + 1}", number, line, fields
+        finally:
+            mm.close()
+            handle.close()
+
+    def page(self, path: Path, query: LogQuery, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Up to ``query.limit`` matches from ``cursor`` plus the cursor of the next page"""
+        matches = []
+        next_cursor = None
+        for line_cursor, number, line, fields in self.iter_matches(path, query, cursor):
+            if len(matches) == query.limit:
+                break
+            matches.append((number, line, fields))
+            next_cursor = line_cursor
+        else:
+            next_cursor = None
+        return {'matches': matches, 'next_cursor': next_cursor, 'total_lines': self.get_index(path).line_count}
+
+    def tail(self, path: Path, query: LogQuery) -> Dict[str, Any]:
+        """Last ``query.limit`` matches, reading candidate blocks from the end of the file"""
+        index = self.get_index(path)
+        handle, mm = self._open(path)
+        matches: List[Tuple[int, str, Tuple[str, str, str]]] = []
+        if mm is not None:
+            try:
+                for block in reversed(index.candidate_blocks(query)):
+                    block_start, block_end = index.block_range(block, index.indexed_size)
+                    found = [(number, line, fields) for _, _, number, line, fields
+                             in self._scan(mm, block_start, block_end, index.first_lines[block], query)]
+                    matches[:0] = found[-(query.limit - len(matches)):]
+                    if len(matches) >= query.limit:
+                        break
+            finally:
+                mm.close()
+                handle.close()
+        return {
+            'matches': matches,
+            'follow_cursor': f"{index.indexed_size}:{index.line_count + 1}",
+            'total_lines': index.line_count
+        }
+
+    def read_appended(self, path: Path, cursor: str) -> Tuple[List[Tuple[int, str]], str]:
+        """Complete lines written after ``cursor`` (restarting from the top after a rotation)"""
+        offset, line_number = self.parse_cursor(cursor)
+        size = path.stat().st_size
+        if size < offset:
+            offset, line_number = 0, 1
+        if size == offset:
+            return [], cursor
+        with open(path, 'rb') as handle:
+            handle.seek(offset)
+            chunk = handle.read(size - offset)
+        complete = chunk.rfind(b'\n') + 1
+        lines = []
+        for raw in chunk[:complete].split(b'\n')[:-1]:
+            lines.append((line_number, raw.decode('utf-8', errors='ignore').strip()))
+            line_number += 1
+        return lines, f"{offset + complete}:{line_number}"
+
+
+class LogFollower:
+    """
+    ``tail -f`` over Socket.IO for many clients.
+
+    One background task polls each followed file once per interval, reads
+    only the bytes appended since the last poll and emits the lines matching
+    each client's own filters to that client.
+    """
+
+    def __init__(self, engine: LogQueryEngine, interval: float = 1.0):
+        self.engine = engine
+        self.interval = interval
+        self.socketio = None
+        # path -> {sid: (query, namespace, event)}
+        self._followers: Dict[Path, Dict[str, Tuple[LogQuery, str, str]]] = {}
+        self._cursors: Dict[Path, str] = {}
+        self._lock = threading.Lock()
+        self._running = False
+
+    def follow(self, socketio, sid: str, path: Path, query: LogQuery, cursor: str,
+               namespace: str = '/', event: str = 'log_lines'):
+        with self._lock:
+            self.socketio = socketio
+            self._unfollow(sid)
+            self._followers.setdefault(path, {})[sid] = (query, namespace, event)
+            self._cursors.setdefault(path, cursor)
+            if self._running:
+                return
+            self._running = True
+        socketio.start_background_task(self._poll)
+
+    def unfollow(self, sid: str):
+        with self._lock:
+            self._unfollow(sid)
+
+    def _unfollow(self, sid: str):
+        for path in list(self._followers):
+            self._followers[path].pop(sid, None)
+            if not self._followers[path]:
+                del self._followers[path]
+                self._cursors.pop(path, None)
+
+    def _poll(self):
+        try:
+            while True:
+                with self._lock:
+                    manager = self.socketio.server.manager
+                    for path, clients in list(self._followers.items()):
+                        for sid, (_, namespace, _) in list(clients.items()):
+                            if not manager.is_connected(sid, namespace):
+                                self._unfollow(sid)
+                    if not self._followers:
+                        self._running = False
+                        break
+                    work = [(path, self._cursors[path], dict(clients)) for path, clients in self._followers.items()]
+
+                for path, cursor, clients in work:
+                    try:
+                        lines, next_cursor = self.engine.read_appended(path, cursor)
+                    except OSError as e:
+                        logger.warning(f"Log follow read failed for {path}: {e}")
+                        continue
+                    with self._lock:
+                        if path in self._cursors:
+                            self._cursors[path] = next_cursor
+                    if not lines:
+                        continue
+                    for sid, (query, namespace, event) in clients.items():
+                        matched = []
+                        for number, line in lines:
+                            fields = query.matches(line) if line else None
+                            if fields:
+                                matched.append({'line_number': number, 'timestamp': fields[0],
+                                                'level': fields[1], 'message': fields[2], 'raw_line': line})
+                        if matched:
+                            self.socketio.emit(event, {'file_path': str(path.relative_to(self.engine.base_log_dir)),
+                                                       'lines': matched, 'cursor': next_cursor},
+                                               room=sid, namespace=namespace)
+                self.socketio.sleep(self.interval)
+        except Exception as e:
+            logger.error(f"Log follower stopped: {e}")
+            with self._lock:
+                self._running = False
@@ -7,11 +7,12 @@ import os
 import json
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from enum import Enum
-import re
 import logging
 
+from .log_index import LogFollower, LogQuery, LogQueryEngine, parse_log_fields
+
 logger = logging.getLogger(__name__)
 
 class LogLevel(Enum):
@@ -39,6 +40,8 @@ class LogViewerService:
     
     def __init__(self, base_log_dir: str = "logs"):
         self.base_log_dir = Path(base_log_dir)
+        self.query_engine = LogQueryEngine(self.base_log_dir)
+        self.follower = LogFollower(self.query_engine)
         
         # RBAC permissions for log categories
         self.role_permissions = {
@@ -145,41 +148,65 @@ class LogViewerService:
         
         return sorted(log_files, key=lambda x: x['modified'], reverse=True)
     
-    def read_log_content(self, user_role: str, file_path: str, 
-                        filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Read and filter log content based on user permissions and filters"""
+    def _resolve_log_file(self, user_role: str, file_path: str) -> Tuple[Optional[Path], Optional[str], Optional[str]]:
+        """Validate access to a log file; returns (full path, category, error)"""
         # Parse file path to extract category
-        path_parts = Path(file_path).parts
+        path_parts = Path(file_path or '').parts
         if len(path_parts) < 4:
-            return {'error': 'Invalid file path'}
+            return None, None, 'Invalid file path'
         
         category = path_parts[3]  # Year/Month/Day/Category structure
         
         if category not in self.get_user_log_categories(user_role):
-            return {'error': 'Access denied to this log category'}
+            return None, None, 'Access denied to this log category'
         
-        full_path = self.base_log_dir / file_path
+        full_path = (self.base_log_dir / file_path).resolve()
+        category_dir = (self.base_log_dir / Path(*path_parts[:4])).resolve()
+        if category_dir not in full_path.parents:
+            return None, None, 'Invalid file path'
         if not full_path.exists() or not full_path.is_file():
-            return {'error': 'Log file not found'}
+            return None, None, 'Log file not found'
+        
+        return self.base_log_dir / file_path, category, None
+    
+    def read_log_content(self, user_role: str, file_path: str, 
+                        filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Read and filter log content based on user permissions and filters.
+        
+        Returns one page of at most ``max_lines`` matches; pass the returned
+        ``next_cursor`` as ``filters['cursor']`` for the next page, or set
+        ``filters['tail']`` for the last matches and a ``follow_cursor``.
+        """
+        full_path, category, error = self._resolve_log_file(user_role, file_path)
+        if error:
+            return {'error': error}
         
         try:
-            filtered_lines = []
-            with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                # Process file line-by-line to avoid high memory usage
-                for line in f:
-                    parsed_line = self._parse_and_filter_line(line, filters or {})
-                    if parsed_line:
-                        filtered_lines.append(parsed_line)
+            filters = filters or {}
+            query = LogQuery.from_filters(filters)
+            if filters.get('tail'):
+                result = self.query_engine.tail(full_path, query)
+            else:
+                result = self.query_engine.page(full_path, query, filters.get('cursor'))
+            
+            filtered_lines = [
+                self._build_line(line_number, line, fields)
+                for line_number, line, fields in result['matches']
+            ]
+            stat = full_path.stat()
             
             return {
                 'content': filtered_lines,
-                'total_lines': len(lines),
+                'total_lines': result['total_lines'],
                 'filtered_lines': len(filtered_lines),
+                'next_cursor': result.get('next_cursor'),
+                'follow_cursor': result.get('follow_cursor'),
                 'file_info': {
                     'name': full_path.name,
-                    'size': full_path.stat().st_size,
+                    'size': stat.st_size,
                     'category': category,
-                    'modified': datetime.fromtimestamp(full_path.stat().st_mtime).isoformat()
+                    'modified': datetime.fromtimestamp(stat.st_mtime).isoformat()
                 }
             }
         
@@ -187,98 +214,69 @@ class LogViewerService:
             logger.error(f"Error reading log file {file_path}: {e}")
             return {'error': f'Error reading log file: {str(e)}'}
     
-    def _parse_and_filter_line(self, line: str, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Parse and apply filters to a single log line."""
-        line = line.strip()
-        if not line:
-            return None
-
-        # Extract filter parameters
-        log_level = filters.get('level', '').upper()
-        search_term = filters.get('search', '').lower()
-        start_time = filters.get('start_time')
-        end_time = filters.get('end_time')
-        max_lines = int(filters.get('max_lines', 1000))
-        
-        # Convert time filters to datetime objects
-        start_dt = None
-        end_dt = None
-        if start_time:
-            try:
-                start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-            except:
-                pass
-        if end_time:
-            try:
-                end_dt = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
-            except:
-                pass
+    def iter_log_content(self, user_role: str, file_path: str,
+                         filters: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Stream every matching line (for exports); raises PermissionError/FileNotFoundError on bad paths"""
+        full_path, _, error = self._resolve_log_file(user_role, file_path)
+        if error:
+            raise (FileNotFoundError if error == 'Log file not found' else PermissionError)(error)
         
-        # Parse log line
-        parsed_line = self._parse_log_line(line, 0) # line_num is not critical here
-
-        # Apply level filter
-        if log_level and parsed_line['level'] != log_level:
-            return None
-
-        # Apply search filter
-        if search_term and search_term not in line.lower():
-            return None
-
-        # Apply time filters
-        if start_dt and parsed_line['timestamp_dt'] and parsed_line['timestamp_dt'] < start_dt:
-            return None
-        if end_dt and parsed_line['timestamp_dt'] and parsed_line['timestamp_dt'] > end_dt:
-            return None
-
-        return parsed_line
+        query = LogQuery.from_filters(filters)
+        for _, line_number, line, fields in self.query_engine.iter_matches(full_path, query):
+            yield self._build_line(line_number, line, fields)
     
-    def _parse_log_line(self, line: str, line_num: int) -> Dict[str, Any]:
-        """Parse a log line into structured data"""
-        # Common log patterns
-        patterns = [
-            # Standard format: TIMESTAMP - LEVEL - MESSAGE
-            r'^(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}[.,]\d+).*? - (\w+) - (.+)$',
-            # ISO format: [TIMESTAMP] LEVEL [context] message
-            r'^\[(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}[.,]\d+)\] (\w+) (.+)$',
-            # Simple format: TIMESTAMP LEVEL MESSAGE
-            r'^(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}[.,]\d+) (\w+): (.+)$'
-        ]
-        
-        timestamp_str = ""
-        level = "INFO"
-        message = line
-        timestamp_dt = None
-        
-        for pattern in patterns:
-            match = re.match(pattern, line)
-            if match:
-                timestamp_str = match.group(1)
-                level = match.group(2).upper()
-                message = match.group(3)
-                
-                # Parse timestamp
-                try:
-                    # Handle different timestamp formats
-                    timestamp_str_clean = timestamp_str.replace(',', '.')
-                    if 'T' in timestamp_str_clean:
-                        timestamp_dt = datetime.fromisoformat(timestamp_str_clean.replace('Z', '+00:00'))
-                    else:
-                        timestamp_dt = datetime.strptime(timestamp_str_clean[:19], '%Y-%m-%d %H:%M:%S')
-                except:
-                    pass
-                break
+    def follow_log(self, socketio, sid: str, user_role: str, file_path: str,
+                   filters: Optional[Dict[str, Any]] = None, namespace: str = '/') -> Dict[str, Any]:
+        """Send the tail of a log file and stream new matching lines to ``sid`` as they are written"""
+        full_path, _, error = self._resolve_log_file(user_role, file_path)
+        if error:
+            return {'error': error}
         
+        query = LogQuery.from_filters(filters)
+        result = self.query_engine.tail(full_path, query)
+        self.follower.follow(socketio, sid, full_path, query, result['follow_cursor'], namespace=namespace)
+        content = [self._build_line(*match) for match in result['matches']]
+        for line in content:
+            line.pop('timestamp_dt')  # Socket.IO payloads must be plain JSON
+        return {
+            'content': content,
+            'total_lines': result['total_lines'],
+            'cursor': result['follow_cursor']
+        }
+    
+    def unfollow_log(self, sid: str):
+        """Stop streaming log lines to ``sid``"""
+        self.follower.unfollow(sid)
+    
+    def _build_line(self, line_num: int, line: str, fields: Tuple[str, str, str]) -> Dict[str, Any]:
+        """Structured line from already-parsed fields"""
+        timestamp_str, level, message = fields
         return {
             'line_number': line_num,
             'timestamp': timestamp_str,
-            'timestamp_dt': timestamp_dt,
+            'timestamp_dt': self._parse_timestamp(timestamp_str),
             'level': level,
             'message': message,
             'raw_line': line,
             'severity_class': self._get_severity_class(level)
         }
     
+    def _parse_timestamp(self, timestamp_str: str) -> Optional[datetime]:
+        if not timestamp_str:
+            return None
+        try:
+            # Handle different timestamp formats
+            timestamp_str_clean = timestamp_str.replace(',', '.')
+            if 'T' in timestamp_str_clean:
+                return datetime.fromisoformat(timestamp_str_clean.replace('Z', '+00:00'))
+            return datetime.strptime(timestamp_str_clean[:19], '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            return None
+    
+    def _parse_log_line(self, line: str, line_num: int) -> Dict[str, Any]:
+        """Parse a log line into structured data"""
+        return self._build_line(line_num, line, parse_log_fields(line))
+    
     def _get_severity_class(self, level: str) -> str:
         """Get CSS class for log level severity"""
         severity_map = {
@@ -9,13 +9,14 @@ import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from collections import deque, defaultdict
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, render_template, jsonify, request, g
 from flask_login import login_required
 from modules.core.security_decorators import require_role
 from modules.core.performance import perf_monitor
 from modules.core.caching_strategy import cache, CacheMaintenance
 from modules.core.database_optimization import ConnectionPoolOptimizer
 from modules.core.extensions import db
+from modules.core.metrics_store import MetricsStore
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,17 +26,14 @@ performance_bp = Blueprint('performance', __name__, url_prefix='/admin/performan
 class PerformanceCollector:
     """Collects and stores performance metrics"""
     
-    def __init__(self, max_samples: int = 1000):
-        self.max_samples = max_samples
-        self.metrics = {
-            'response_times': deque(maxlen=max_samples),
-            'query_counts': deque(maxlen=max_samples),
-            'cache_hit_rates': deque(maxlen=max_samples),
-            'memory_usage': deque(maxlen=max_samples),
-            'cpu_usage': deque(maxlen=max_samples),
-            'active_connections': deque(maxlen=max_samples),
-            'error_rates': deque(maxlen=max_samples)
-        }
+    METRICS = (
+        'response_times', 'query_counts', 'cache_hit_rates', 'memory_usage',
+        'cpu_usage', 'active_connections', 'error_rates'
+    )
+    
+    def __init__(self, shared_dir: Optional[str] = None):
+        # Fixed-size second/minute/hour rollups instead of per-sample dicts
+        self.store = MetricsStore(self.METRICS, latency_metric='response_times', shared_dir=shared_dir)
         self.slow_queries = deque(maxlen=100)
         self.error_log = deque(maxlen=100)
         self.alerts = deque(maxlen=50)
@@ -47,30 +45,15 @@ class PerformanceCollector:
     
     def add_request_metric(self, response_time: float, query_count: int, cache_hit_rate: float, error: bool = False):
         """Add request-level metrics"""
+        self.store.record({
+            'response_times': response_time,
+            'query_counts': query_count,
+            'cache_hit_rates': cache_hit_rate,
+            'error_rates': 1 if error else 0
+        })
+        
+        # Check for performance alerts
         with self.lock:
-            timestamp = datetime.utcnow()
-            
-            self.metrics['response_times'].append({
-                'timestamp': timestamp,
-                'value': response_time
-            })
-            
-            self.metrics['query_counts'].append({
-                'timestamp': timestamp,
-                'value': query_count
-            })
-            
-            self.metrics['cache_hit_rates'].append({
-                'timestamp': timestamp,
-                'value': cache_hit_rate
-            })
-            
-            self.metrics['error_rates'].append({
-                'timestamp': timestamp,
-                'value': 1 if error else 0
-            })
-            
-            # Check for performance alerts
             self._check_alerts(response_time, query_count, cache_hit_rate)
     
     def add_slow_query(self, query: str, duration: float, timestamp: datetime = None):
@@ -95,8 +78,6 @@ class PerformanceCollector:
         """Background thread to collect system metrics"""
         while True:
             try:
-                timestamp = datetime.utcnow()
-                
                 # System metrics
                 memory_percent = psutil.virtual_memory().percent
                 cpu_percent = psutil.cpu_percent(interval=1)
@@ -105,24 +86,15 @@ class PerformanceCollector:
                 db_stats = ConnectionPoolOptimizer.monitor_connection_usage()
                 active_connections = db_stats.get('checked_out', 0)
                 
-                with self.lock:
-                    self.metrics['memory_usage'].append({
-                        'timestamp': timestamp,
-                        'value': memory_percent
-                    })
-                    
-                    self.metrics['cpu_usage'].append({
-                        'timestamp': timestamp,
-                        'value': cpu_percent
-                    })
-                    
-                    self.metrics['active_connections'].append({
-                        'timestamp': timestamp,
-                        'value': active_connections
-                    })
+                self.store.record({
+                    'memory_usage': memory_percent,
+                    'cpu_usage': cpu_percent,
+                    'active_connections': active_connections
+                })
                 
                 # Check system alerts
-                self._check_system_alerts(memory_percent, cpu_percent, active_connections)
+                with self.lock:
+                    self._check_system_alerts(memory_percent, cpu_percent, active_connections)
                 
                 time.sleep(30)  # Collect every 30 seconds
                 
@@ -190,28 +162,11 @@ class PerformanceCollector:
         """Get performance metrics summary for the last N minutes"""
         cutoff_time = datetime.utcnow() - timedelta(minutes=minutes)
         
+        # Rollups give average/min/max/count and response time p50/p95/p99
+        # across all workers without touching individual samples
+        summary = self.store.summary(minutes * 60)
+        
         with self.lock:
-            summary = {}
-            
-            for metric_name, metric_data in self.metrics.items():
-                recent_data = [
-                    item['value'] for item in metric_data 
-                    if item['timestamp'] >= cutoff_time
-                ]
-                
-                if recent_data:
-                    summary[metric_name] = {
-                        'current': recent_data[-1] if recent_data else 0,
-                        'average': sum(recent_data) / len(recent_data),
-                        'min': min(recent_data),
-                        'max': max(recent_data),
-                        'count': len(recent_data)
-                    }
-                else:
-                    summary[metric_name] = {
-                        'current': 0, 'average': 0, 'min': 0, 'max': 0, 'count': 0
-                    }
-            
             # Recent slow queries
             recent_slow_queries = [
                 query for query in self.slow_queries 
@@ -229,28 +184,22 @@ class PerformanceCollector:
                 alert for alert in self.alerts 
                 if alert['timestamp'] >= cutoff_time
             ]
-            
-            summary['slow_queries'] = recent_slow_queries
-            summary['errors'] = recent_errors
-            summary['alerts'] = recent_alerts
-            
-            return summary
+        
+        summary['slow_queries'] = recent_slow_queries
+        summary['errors'] = recent_errors
+        summary['alerts'] = recent_alerts
+        
+        return summary
     
     def get_time_series_data(self, metric_name: str, minutes: int = 60) -> List[Dict]:
-        """Get time series data for a specific metric"""
-        cutoff_time = datetime.utcnow() - timedelta(minutes=minutes)
-        
-        with self.lock:
-            if metric_name in self.metrics:
-                return [
-                    {
-                        'timestamp': item['timestamp'].isoformat(),
-                        'value': item['value']
-                    }
-                    for item in self.metrics[metric_name]
-                    if item['timestamp'] >= cutoff_time
-                ]
-            return []
+        """Get time series data for a specific metric (one averaged point per rollup bucket)"""
+        return [
+            {
+                'timestamp': datetime.utcfromtimestamp(point['epoch']).isoformat(),
+                'value': point['value']
+            }
+            for point in self.store.time_series(metric_name, minutes * 60)
+        ]
 
 # Global performance collector
 performance_collector = PerformanceCollector()
@@ -453,6 +402,9 @@ def setup_performance_monitoring(app):
     """Setup performance monitoring for the application"""
     app.register_blueprint(performance_bp)
     
+    # Directory for per-worker memory-mapped metric buffers merged by the dashboard
+    performance_collector.store.configure(app.config.get('PERFORMANCE_METRICS_DIR'))
+    
     # Hook into request lifecycle
     @app.before_request
     def before_request():
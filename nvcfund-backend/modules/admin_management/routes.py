@@ -1547,12 +1547,14 @@ def api_audit_logs():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 50, type=int)
         log_type = request.args.get('type', 'all')
+        cursor = request.args.get('cursor')
         
         audit_data = admin_service.get_audit_logs(
             admin_user_id=current_user.id,
             page=page,
             per_page=per_page,
-            log_type=log_type
+            log_type=log_type,
+            cursor=cursor
         )
         
         logger.info(f"Audit logs API accessed", extra={
@@ -1573,6 +1575,44 @@ def api_audit_logs():
         })
         return jsonify({'success': False, 'error': 'Unable to load audit logs'}), 500
 
+@admin_management_bp.route('/api/audit/logs/export')
+@login_required
+@admin_required
+@secure_banking_route()
+def api_audit_logs_export():
+    """Stream all matching audit logs as CSV without loading them into memory"""
+    from flask import Response, stream_with_context
+    import csv
+    import io
+
+    log_type = request.args.get('type', 'all')
+    columns = ['id', 'timestamp', 'event_type', 'severity', 'user_id', 'ip_address', 'description']
+
+    logger.info(f"Audit logs export started", extra={
+        'user_id': current_user.id,
+        'action': 'AUDIT_LOGS_EXPORT',
+        'app_module': 'admin_management',
+        'log_type': log_type
+    })
+
+    def generate_csv():
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        for row in admin_service.iter_audit_logs(log_type):
+            writer.writerow(row)
+            if output.tell() > 64 * 1024:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+        yield output.getvalue()
+
+    response = Response(stream_with_context(generate_csv()), mimetype='text/csv')
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename=audit_logs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    )
+    return response
+
 # System Administration Routes (Migrated from Legacy Admin System)
 
 @admin_management_bp.route('/system/health')
@@ -2283,9 +2323,10 @@ def logs_api_content():
 def logs_api_export():
     """API endpoint for log export"""
     try:
-        from flask import make_response
+        from flask import Response, stream_with_context
         import csv
         import io
+        import itertools
         
         user_role = current_user.role.value if hasattr(current_user.role, 'value') else str(current_user.role)
         data = request.form
@@ -2297,30 +2338,33 @@ def logs_api_export():
             import json
             filters = json.loads(filters)
         
-        content_data = log_viewer_service.read_log_content(user_role, file_path, filters)
-        
-        if 'error' in content_data:
-            flash(f"Export failed: {content_data['error']}", 'error')
+        try:
+            lines = log_viewer_service.iter_log_content(user_role, file_path, filters)
+            first_line = next(lines, None)
+        except (PermissionError, FileNotFoundError) as e:
+            flash(f"Export failed: {e}", 'error')
             return redirect(url_for('admin_management.log_viewer'))
         
-        # Create CSV output
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['Line Number', 'Timestamp', 'Level', 'Message'])
-        
-        for line in content_data['content']:
-            writer.writerow([
-                line['line_number'],
-                line['timestamp'],
-                line['level'],
-                line['message']
-            ])
-        
-        response_content = output.getvalue()
-        output.close()
-        
-        response = make_response(response_content)
-        response.headers['Content-Type'] = 'text/csv'
+        def generate_csv():
+            # Stream rows as the index-driven scan finds them instead of buffering every match
+            output = io.StringIO()
+            writer = csv.writer(output)
+            writer.writerow(['Line Number', 'Timestamp', 'Level', 'Message'])
+            if first_line is not None:
+                for line in itertools.chain([first_line], lines):
+                    writer.writerow([
+                        line['line_number'],
+                        line['timestamp'],
+                        line['level'],
+                        line['message']
+                    ])
+                    if output.tell() > 64 * 1024:
+                        yield output.getvalue()
+                        output.seek(0)
+                        output.truncate()
+            yield output.getvalue()
+        
+        response = Response(stream_with_context(generate_csv()), mimetype='text/csv')
         response.headers['Content-Disposition'] = f'attachment; filename=logs_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
         
         return response
@@ -10,6 +10,7 @@ from sqlalchemy import func
 from sqlalchemy.orm import joinedload, subqueryload
 
 from modules.core.database import get_db_session
+from modules.core.pagination import InvalidCursorError, keyset_paginate
 from modules.auth.models import User
 from modules.security_center.models import SecurityEvent
 from modules.auth.models import KYCVerification
@@ -466,8 +467,14 @@ class AdminManagementService:
             logger.error(f"Error updating configuration: {e}")
             return {'success': False, 'error': 'Failed to update configuration'}
     
-    def get_audit_logs(self, admin_user_id: int, page: int = 1, per_page: int = 50, log_type: str = 'all') -> Dict[str, Any]:
-        """Get audit logs with pagination"""
+    def get_audit_logs(self, admin_user_id: int, page: int = 1, per_page: int = 50, log_type: str = 'all',
+                       cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get audit logs with pagination.
+        
+        With ``cursor`` (an empty string requests the first page) pages are
+        keyset seeks over (event_timestamp, id) and no total is counted.
+        """
         try:
             with get_db_session() as db:
                 query = db.query(SecurityEvent)
@@ -475,38 +482,43 @@ class AdminManagementService:
                 if log_type != 'all':
                     query = query.filter(SecurityEvent.event_type == log_type)
                 
-                # Pagination
-                total = query.count()
-                logs = query.order_by(SecurityEvent.event_timestamp.desc()).offset(
-                    (page - 1) * per_page
-                ).limit(per_page).all()
+                if cursor is not None:
+                    result = keyset_paginate(
+                        query, SecurityEvent.event_timestamp, SecurityEvent.id,
+                        cursor=cursor or None, per_page=per_page
+                    )
+                    logs = result.items
+                    pagination = result.pagination()
+                else:
+                    # Pagination
+                    total = query.count()
+                    logs = query.order_by(SecurityEvent.event_timestamp.desc(), SecurityEvent.id.desc()).offset(
+                        (page - 1) * per_page
+                    ).limit(per_page).all()
+                    pagination = {
+                        'page': page,
+                        'per_page': per_page,
+                        'total': total,
+                        'pages': (total + per_page - 1) // per_page
+                    }
                 
-                logs_data = []
-                for log in logs:
-                    logs_data.append({
-                        'id': log.id,
-                        'timestamp': log.event_timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                        'event_type': log.event_type,
-                        'description': log.description,
-                        'user_id': log.user_id,
-                        'ip_address': log.ip_address,
-                        'severity': getattr(log, 'severity', 'info')
-                    })
+                logs_data = [self._audit_log_row(log) for log in logs]
                 
                 return {
                     'audit_title': 'System Audit Logs',
                     'logs': logs_data,
-                    'pagination': {
-                        'page': page,
-                        'per_page': per_page,
-                        'total': total,
-                        'pages': (total + per_page - 1) // per_page
-                    },
+                    'pagination': pagination,
                     'log_types': ['all', 'authentication', 'authorization', 'transaction', 'security'],
                     'current_type': log_type,
                     'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')
                 }
                 
+        except InvalidCursorError:
+            return {
+                'audit_title': 'System Audit Logs',
+                'error': 'Invalid cursor',
+                'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')
+            }
         except Exception as e:
             logger.error(f"Error getting audit logs: {e}")
             return {
@@ -515,6 +527,38 @@ class AdminManagementService:
                 'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')
             }
     
+    def iter_audit_logs(self, log_type: str = 'all', batch_size: int = 1000):
+        """
+        Stream every matching audit log row, newest first, in keyset batches
+        for exports. Each batch runs in its own short session, so nothing is
+        held open while the client reads the response.
+        """
+        cursor = None
+        while True:
+            with get_db_session() as db:
+                query = db.query(SecurityEvent)
+                if log_type != 'all':
+                    query = query.filter(SecurityEvent.event_type == log_type)
+                page = keyset_paginate(query, SecurityEvent.event_timestamp, SecurityEvent.id, cursor=cursor,
+                                       per_page=batch_size, max_per_page=batch_size)
+                rows = [self._audit_log_row(log) for log in page.items]
+            yield from rows
+            if not page.has_more:
+                return
+            cursor = page.next_cursor
+    
+    @staticmethod
+    def _audit_log_row(log) -> Dict[str, Any]:
+        return {
+            'id': log.id,
+            'timestamp': log.event_timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            'event_type': log.event_type,
+            'description': log.description,
+            'user_id': log.user_id,
+            'ip_address': log.source_ip,
+            'severity': getattr(log, 'severity', 'info')
+        }
+    
     def get_module_health(self) -> Dict[str, Any]:
         """Get module health status"""
         try:
@@ -3,7 +3,7 @@ Admin Management Module Socket Handlers
 Real-time data streaming for admin dashboard and granular drill-downs
 """
 
-from flask import current_app
+from flask import current_app, request
 from flask_login import current_user
 from flask_socketio import emit, join_room, leave_room, disconnect
 import logging
@@ -14,6 +14,7 @@ import psutil
 import json
 
 from .services import AdminManagementService
+from .log_viewer import log_viewer_service
 
 logger = logging.getLogger(__name__)
 
@@ -61,6 +62,8 @@ class AdminManagementSocketHandler:
         @self.socketio.on('disconnect', namespace='/admin-management')
         def handle_disconnect():
             """Handle client disconnection"""
+            log_viewer_service.unfollow_log(request.sid)
+            
             if current_user.is_authenticated:
                 room = f"admin_{current_user.id}"
                 leave_room(room)
@@ -149,6 +152,33 @@ class AdminManagementSocketHandler:
                 del self.streaming_threads[room]
                 logger.info(f"Stopped real-time monitoring for admin user {current_user.id}")
     
+        @self.socketio.on('follow_log', namespace='/admin-management')
+        def handle_follow_log(data):
+            """Send the tail of a log file, then stream newly written matching lines (tail -f)"""
+            if not current_user.is_authenticated:
+                return
+            
+            try:
+                data = data or {}
+                user_role = current_user.role.value if hasattr(current_user.role, 'value') else str(current_user.role)
+                result = log_viewer_service.follow_log(
+                    self.socketio, request.sid, user_role, data.get('file_path'),
+                    data.get('filters', {}), namespace='/admin-management'
+                )
+                if 'error' in result:
+                    emit('error', {'message': result['error']})
+                    return
+                emit('log_tail', result)
+                
+            except Exception as e:
+                logger.error(f"Error following log file: {e}")
+                emit('error', {'message': 'Failed to follow log file'})
+        
+        @self.socketio.on('unfollow_log', namespace='/admin-management')
+        def handle_unfollow_log():
+            """Stop streaming log lines to this client"""
+            log_viewer_service.unfollow_log(request.sid)
+    
     def send_initial_dashboard_data(self, room):
         """Send initial dashboard data to connected client"""
         try:
@@ -0,0 +1,371 @@
+"""
+Banking Ledger Engine
+Atomic double-entry posting of transfers onto BankAccount balances and Transaction legs
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func
+from sqlalchemy.exc import IntegrityError
+
+from modules.core.extensions import db
+from .models import (
+    BankAccount, BankAccountStatus, Transaction, TransactionStatus, TransactionType, TransferIdempotencyKey
+)
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+
+@dataclass
+class TransferInstruction:
+    """One transfer to post; accounts are ids or account numbers"""
+    from_account: Any
+    to_account: Any
+    amount: Any
+    initiated_by: int
+    currency: Optional[str] = None
+    description: str = ''
+    reference_number: Optional[str] = None
+    channel: Optional[str] = None
+    owner_id: Optional[int] = None  # When set, the debited account must belong to this user
+
+
+@dataclass
+class PostingResult:
+    """Outcome of one instruction: completed, duplicate (already posted) or rejected"""
+    reference_number: str
+    status: str
+    amount: Optional[Decimal] = None
+    currency: Optional[str] = None
+    from_account_id: Optional[int] = None
+    to_account_id: Optional[int] = None
+    debit_transaction_id: Optional[str] = None
+    credit_transaction_id: Optional[str] = None
+    from_balance: Optional[Decimal] = None
+    to_balance: Optional[Decimal] = None
+    error: Optional[str] = None
+    posted_at: Optional[datetime] = None
+
+    @property
+    def success(self) -> bool:
+        return self.status in ('completed', 'duplicate')
+
+
+class LedgerEngine:
+    """
+    Posts transfers as two ``Transaction`` legs (a debit on the source account
+    and a credit on the destination, both with positive amounts and the same
+    ``reference_number``) and moves ``BankAccount`` balances in the same
+    database transaction.
+
+    Concurrency: every account an instruction batch touches is locked with one
+    ``SELECT ... FOR UPDATE`` ordered by id, so two batches always acquire
+    overlapping locks in the same order and cannot deadlock. Idempotency keys
+    are checked after the locks are held and claimed in
+    ``transfer_idempotency_keys`` in the same transaction; its unique index
+    rejects a second posting of a key even when the two requests locked
+    different accounts, and the losing chunk is replayed once so the retry
+    is answered as a duplicate. Balance changes are applied as
+    ``current_balance = current_balance + delta`` so no update can be lost
+    even on databases without row locks.
+    """
+
+    def __init__(self, batch_size: int = 500):
+        self.batch_size = batch_size
+
+    def post_transfer(self, instruction: TransferInstruction, session=None) -> PostingResult:
+        """Post a single transfer atomically"""
+        return self.post_batch([instruction], session=session)[0]
+
+    def post_batch(self, instructions: Sequence[TransferInstruction], session=None) -> List[PostingResult]:
+        """
+        Post many transfers with one lock acquisition and commit per chunk of
+        ``batch_size``. Invalid instructions are rejected individually; the
+        valid ones in the chunk still post.
+        """
+        session = session or db.session
+        results = []
+        for start in range(0, len(instructions), self.batch_size):
+            results.extend(self._post_chunk(session, instructions[start:start + self.batch_size]))
+        return results
+
+    # === POSTING ===
+
+    def _post_chunk(self, session, instructions: Sequence[TransferInstruction]) -> List[PostingResult]:
+        prepared = [self._prepare(instruction) for instruction in instructions]
+        for attempt in range(2):
+            try:
+                results = self._post_prepared(session, prepared)
+                break
+            except IntegrityError as e:
+                session.rollback()
+                if attempt:
+                    return self._rolled_back(prepared, e)
+                # A concurrent request committed one of the keys first; replaying reads it as posted
+                logger.warning(f"Ledger idempotency key claimed concurrently, replaying chunk: {e.orig}")
+            except Exception as e:
+                session.rollback()
+                return self._rolled_back(prepared, e)
+
+        completed = sum(1 for result in results if result.status == 'completed')
+        if completed:
+            logger.info(f"Ledger posted {completed}/{len(instructions)} transfers")
+        return results
+
+    def _rolled_back(self, prepared: List[Tuple[TransferInstruction, Optional[PostingResult]]],
+                     error: Exception) -> List[PostingResult]:
+        logger.error(f"Ledger posting failed, {len(prepared)} instructions rolled back: {error}")
+        return [
+            rejected if rejected is not None else PostingResult(
+                reference_number=instruction.reference_number, status='rejected',
+                error='Ledger posting failed; no funds were moved'
+            )
+            for instruction, rejected in prepared
+        ]
+
+    def _post_prepared(self, session, prepared: List[Tuple[TransferInstruction, Optional[PostingResult]]]
+                       ) -> List[PostingResult]:
+        """Lock, validate and post the valid instructions in one transaction"""
+        results: List[Optional[PostingResult]] = [error for _, error in prepared]
+        accounts = self._lock_accounts(session, [
+            ref for (instruction, error) in prepared if error is None
+            for ref in (instruction.from_account, instruction.to_account)
+        ])
+        references = [instruction.reference_number for instruction, error in prepared if error is None]
+        posted = self._existing_postings(session, references)
+        daily_debits = self._daily_debits(session, [
+            accounts[instruction.from_account].id for instruction, error in prepared
+            if error is None and instruction.from_account in accounts
+        ])
+
+        now = datetime.utcnow()
+        balances = {account.id: account.current_balance or ZERO for account in accounts.values()}
+        deltas: Dict[int, Decimal] = defaultdict(lambda: ZERO)
+        legs = []
+        keys = []
+        for i, (instruction, error) in enumerate(prepared):
+            if error is not None:
+                continue
+            result = self._apply(instruction, accounts, posted, daily_debits, balances, now)
+            results[i] = result
+            if result.status != 'completed':
+                continue
+            posted[result.reference_number] = result
+            deltas[result.from_account_id] -= result.amount
+            deltas[result.to_account_id] += result.amount
+            legs.extend(self._legs(instruction, result, now))
+            keys.append(self._idempotency_key(result, now))
+
+        if legs:
+            session.add_all(legs)
+            session.add_all(keys)
+            for account_id in sorted(deltas):
+                delta = deltas[account_id]
+                session.query(BankAccount).filter(BankAccount.id == account_id).update({
+                    BankAccount.current_balance: BankAccount.current_balance + delta,
+                    BankAccount.available_balance: func.coalesce(
+                        BankAccount.available_balance, BankAccount.current_balance) + delta,
+                    BankAccount.last_activity: now,
+                }, synchronize_session=False)
+        session.commit()
+        return results
+
+    def _prepare(self, instruction: TransferInstruction) -> Tuple[TransferInstruction, Optional[PostingResult]]:
+        """Normalise amount, account references and idempotency key; reject malformed input early"""
+        reference = instruction.reference_number or f"TRF-{uuid.uuid4().hex[:20].upper()}"
+        instruction.reference_number = str(reference)[:50]
+
+        def reject(message: str):
+            return instruction, PostingResult(reference_number=instruction.reference_number,
+                                              status='rejected', error=message)
+
+        try:
+            amount = Decimal(str(instruction.amount))
+        except (InvalidOperation, TypeError, ValueError):
+            return reject('Invalid amount')
+        if not amount.is_finite() or amount <= 0:
+            return reject('Amount must be positive')
+        if amount != amount.quantize(CENT):
+            return reject('Amount cannot have more than two decimal places')
+        instruction.amount = amount
+
+        instruction.from_account = self._account_ref(instruction.from_account)
+        instruction.to_account = self._account_ref(instruction.to_account)
+        if instruction.from_account is None or instruction.to_account is None:
+            return reject('Source and destination accounts are required')
+        if instruction.from_account == instruction.to_account:
+            return reject('Cannot transfer to the same account')
+        return instruction, None
+
+    @staticmethod
+    def _account_ref(value: Any) -> Any:
+        """Integer ids stay ints; anything else is treated as an account number"""
+        if value is None or value == '':
+            return None
+        if isinstance(value, int):
+            return value
+        value = str(value).strip()
+        return int(value) if value.isdigit() else value
+
+    def _apply(self, instruction: TransferInstruction, accounts: Dict[Any, BankAccount],
+               posted: Dict[str, PostingResult], daily_debits: Dict[int, Decimal],
+               balances: Dict[int, Decimal], now: datetime) -> PostingResult:
+        """Validate one instruction against locked state and reserve its balance movement"""
+        reference = instruction.reference_number
+
+        def reject(message: str) -> PostingResult:
+            return PostingResult(reference_number=reference, status='rejected', error=message)
+
+        source = accounts.get(instruction.from_account)
+        destination = accounts.get(instruction.to_account)
+        if source is None or destination is None:
+            return reject('Account not found')
+        if instruction.owner_id is not None and source.account_holder_id != instruction.owner_id:
+            return reject('Source account does not belong to the requesting user')
+
+        original = posted.get(reference)
+        if original is not None:
+            if (original.from_account_id, original.to_account_id, original.amount) != \
+                    (source.id, destination.id, instruction.amount):
+                return reject('Reference number already used for a different transfer')
+            return PostingResult(**{**original.__dict__, 'status': 'duplicate'})
+
+        if source.id == destination.id:
+            return reject('Cannot transfer to the same account')
+        for account in (source, destination):
+            if (account.status or BankAccountStatus.ACTIVE.value) != BankAccountStatus.ACTIVE.value:
+                return reject(f"Account {account.account_number} is {account.status}")
+
+        currency = (instruction.currency or source.currency or 'USD').upper()
+        if (source.currency or 'USD') != currency or (destination.currency or 'USD') != currency:
+            return reject('Currency mismatch between accounts')
+
+        amount = instruction.amount
+        floor = (source.minimum_balance or ZERO) - (source.overdraft_limit or ZERO)
+        if balances[source.id] - amount < floor:
+            return reject('Insufficient funds')
+        limit = source.daily_transfer_limit
+        if limit and daily_debits.get(source.id, ZERO) + amount > limit:
+            return reject('Daily transfer limit exceeded')
+
+        balances[source.id] -= amount
+        balances[destination.id] += amount
+        daily_debits[source.id] = daily_debits.get(source.id, ZERO) + amount
+        return PostingResult(
+            reference_number=reference, status='completed', amount=amount, currency=currency,
+            from_account_id=source.id, to_account_id=destination.id,
+            debit_transaction_id=str(uuid.uuid4()), credit_transaction_id=str(uuid.uuid4()),
+            from_balance=balances[source.id], to_balance=balances[destination.id], posted_at=now
+        )
+
+    @staticmethod
+    def _legs(instruction: TransferInstruction, result: PostingResult, now: datetime) -> List[Transaction]:
+        common = dict(
+            transaction_type=TransactionType.TRANSFER.value, amount=result.amount, currency=result.currency,
+            from_account_id=result.from_account_id, to_account_id=result.to_account_id,
+            status=TransactionStatus.COMPLETED.value, reference_number=result.reference_number,
+            description=instruction.description, initiated_by=instruction.initiated_by,
+            channel=instruction.channel, created_at=now, initiated_at=now, processed_at=now, completed_at=now
+        )
+        return [
+            Transaction(transaction_id=result.debit_transaction_id, account_id=result.from_account_id, **common),
+            Transaction(transaction_id=result.credit_transaction_id, account_id=result.to_account_id, **common),
+        ]
+
+    @staticmethod
+    def _idempotency_key(result: PostingResult, now: datetime) -> TransferIdempotencyKey:
+        return TransferIdempotencyKey(
+            reference_number=result.reference_number, from_account_id=result.from_account_id,
+            to_account_id=result.to_account_id, amount=result.amount, currency=result.currency,
+            debit_transaction_id=result.debit_transaction_id, credit_transaction_id=result.credit_transaction_id,
+            created_at=now
+        )
+
+    # === QUERIES ===
+
+    def _lock_accounts(self, session, refs: List[Any]) -> Dict[Any, BankAccount]:
+        """Lock every referenced account in ascending id order; returns ref -> account"""
+        numbers = {ref for ref in refs if isinstance(ref, str)}
+        ids = {ref for ref in refs if isinstance(ref, int)}
+        if numbers:
+            ids.update(account_id for account_id, in session.query(BankAccount.id).filter(
+                BankAccount.account_number.in_(numbers)
+            ))
+        if not ids:
+            return {}
+
+        locked = session.query(BankAccount).filter(
+            BankAccount.id.in_(sorted(ids))
+        ).order_by(BankAccount.id).with_for_update().populate_existing().all()
+
+        accounts: Dict[Any, BankAccount] = {}
+        for account in locked:
+            accounts[account.id] = account
+            accounts[account.account_number] = account
+        return accounts
+
+    def _existing_postings(self, session, references: List[str]) -> Dict[str, PostingResult]:
+        """
+        Already-posted transfers for these idempotency keys, from the key
+        table or, for transfers posted before it existed, their debit legs
+        """
+        if not references:
+            return {}
+        references = set(references)
+        posted = {
+            key.reference_number: PostingResult(
+                reference_number=key.reference_number, status='completed', amount=key.amount,
+                currency=key.currency, from_account_id=key.from_account_id, to_account_id=key.to_account_id,
+                debit_transaction_id=key.debit_transaction_id, credit_transaction_id=key.credit_transaction_id,
+                posted_at=key.created_at
+            )
+            for key in session.query(TransferIdempotencyKey).filter(
+                TransferIdempotencyKey.reference_number.in_(references)
+            )
+        }
+        legacy = references - set(posted)
+        if not legacy:
+            return posted
+        debit_legs = session.query(Transaction).filter(
+            and_(
+                Transaction.reference_number.in_(legacy),
+                Transaction.transaction_type == TransactionType.TRANSFER.value,
+                Transaction.account_id == Transaction.from_account_id
+            )
+        ).all()
+        for leg in debit_legs:
+            posted[leg.reference_number] = PostingResult(
+                reference_number=leg.reference_number, status='completed', amount=leg.amount,
+                currency=leg.currency, from_account_id=leg.from_account_id, to_account_id=leg.to_account_id,
+                debit_transaction_id=leg.transaction_id, posted_at=leg.completed_at
+            )
+        return posted
+
+    def _daily_debits(self, session, account_ids: List[int]) -> Dict[int, Decimal]:
+        """Transfer debits already posted today (UTC) per account"""
+        if not account_ids:
+            return {}
+        start_of_day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        rows = session.query(Transaction.account_id, func.sum(Transaction.amount)).filter(
+            and_(
+                Transaction.account_id.in_(set(account_ids)),
+                Transaction.account_id == Transaction.from_account_id,
+                Transaction.transaction_type == TransactionType.TRANSFER.value,
+                Transaction.status == TransactionStatus.COMPLETED.value,
+                Transaction.created_at >= start_of_day
+            )
+        ).group_by(Transaction.account_id).all()
+        return {account_id: total or ZERO for account_id, total in rows}
+
+
+# Shared engine used by BankingService
+ledger_engine = LedgerEngine()
@@ -179,11 +179,32 @@ class Transaction(db.Model):
         Index('idx_transaction_status', 'status'),
         Index('idx_transaction_created', 'created_at'),
         Index('idx_transaction_reference', 'reference_number'),
+        # Keyset pagination: WHERE account_id = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC
+        Index('idx_transaction_account_created_id', 'account_id', 'created_at', 'id'),
     )
 
     def __repr__(self):
         return f'<Transaction {self.transaction_id}: {self.transaction_type} ${self.amount}>'
 
+class TransferIdempotencyKey(db.Model):
+    """Reference number claimed by a posted transfer; the unique key stops it being posted twice"""
+    __tablename__ = 'transfer_idempotency_keys'
+
+    id = Column(Integer, primary_key=True)
+    reference_number = Column(String(50), unique=True, nullable=False)
+
+    # The transfer the key was first used for, so a retry can be told apart from a reuse
+    from_account_id = Column(Integer, ForeignKey('bank_accounts.id'), nullable=False)
+    to_account_id = Column(Integer, ForeignKey('bank_accounts.id'), nullable=False)
+    amount = Column(Numeric(15, 2), nullable=False)
+    currency = Column(String(3), nullable=False)
+    debit_transaction_id = Column(String(36), nullable=False)
+    credit_transaction_id = Column(String(36), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<TransferIdempotencyKey {self.reference_number}>'
+
 class DigitalAssetAccount(db.Model):
     """Digital asset accounts for cryptocurrency and tokens"""
     __tablename__ = 'digital_asset_accounts'
@@ -599,7 +599,7 @@ def process_send_transfer():
             flash('Invalid transfer amount.', 'error')
             return redirect(url_for('banking.transfers'))
 
-        result = banking_service.process_transfer(transfer_data)
+        result = banking_service.process_transfer(current_user.id, transfer_data)
 
         if result['success']:
             flash(f'Transfer initiated successfully. Reference: {result["transfer"]["transfer_id"]}', 'success')
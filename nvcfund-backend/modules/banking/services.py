@@ -9,6 +9,8 @@ from datetime import datetime, timedelta
 import uuid
 import logging
 
+from .ledger import PostingResult, TransferInstruction, ledger_engine
+
 logger = logging.getLogger(__name__)
 
 class BankingService:
@@ -86,36 +88,79 @@ class BankingService:
     
     # Transfer Services
     def process_transfer(self, user_id: int, transfer_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process money transfer between accounts"""
+        """Process money transfer between accounts through the double-entry ledger"""
         try:
-            transfer_id = str(uuid.uuid4())
-            
             # Validate transfer data
             required_fields = ['from_account', 'to_account', 'amount']
             for field in required_fields:
                 if field not in transfer_data:
                     return {'success': False, 'error': f'Missing required field: {field}'}
             
-            # In production, validate account ownership and balance
-            transfer_record = {
-                'transfer_id': transfer_id,
-                'from_account': transfer_data['from_account'],
-                'to_account': transfer_data['to_account'],
-                'amount': Decimal(str(transfer_data['amount'])),
-                'currency': transfer_data.get('currency', 'USD'),
-                'description': transfer_data.get('description', ''),
-                'status': 'Completed',
-                'created_at': datetime.now(),
-                'user_id': user_id
-            }
-            
-            self.logger.info(f"Transfer processed: {transfer_id}")
-            return {'success': True, 'transfer': transfer_record, 'transaction_id': transfer_id}
+            result = ledger_engine.post_transfer(self._transfer_instruction(user_id, transfer_data))
+            return self._transfer_response(user_id, transfer_data, result)
             
         except Exception as e:
             self.logger.error(f"Error processing transfer: {str(e)}")
             return {'success': False, 'error': str(e)}
     
+    def process_bulk_transfers(self, user_id: int, transfers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Post many transfers with batched locking and commits; each transfer succeeds or fails on its own"""
+        try:
+            instructions = [self._transfer_instruction(user_id, transfer_data) for transfer_data in transfers]
+            results = ledger_engine.post_batch(instructions)
+            responses = [
+                self._transfer_response(user_id, transfer_data, result)
+                for transfer_data, result in zip(transfers, results)
+            ]
+            succeeded = sum(1 for response in responses if response['success'])
+            self.logger.info(f"Bulk transfer for user {user_id}: {succeeded}/{len(transfers)} posted")
+            return {
+                'success': succeeded == len(transfers),
+                'posted': succeeded,
+                'failed': len(transfers) - succeeded,
+                'results': responses
+            }
+        except Exception as e:
+            self.logger.error(f"Error processing bulk transfers: {str(e)}")
+            return {'success': False, 'error': str(e)}
+    
+    def _transfer_instruction(self, user_id: int, transfer_data: Dict[str, Any]) -> TransferInstruction:
+        return TransferInstruction(
+            from_account=transfer_data.get('from_account'),
+            to_account=transfer_data.get('to_account'),
+            amount=transfer_data.get('amount'),
+            initiated_by=user_id,
+            currency=transfer_data.get('currency'),
+            description=transfer_data.get('description', ''),
+            # Client-supplied idempotency key, so a retried submit never posts twice
+            reference_number=transfer_data.get('reference_number') or transfer_data.get('idempotency_key'),
+            channel=transfer_data.get('channel', 'online'),
+            owner_id=user_id
+        )
+    
+    def _transfer_response(self, user_id: int, transfer_data: Dict[str, Any], result: PostingResult) -> Dict[str, Any]:
+        if not result.success:
+            return {'success': False, 'error': result.error, 'reference_number': result.reference_number}
+        
+        transfer_record = {
+            'transfer_id': result.reference_number,
+            'from_account': transfer_data.get('from_account'),
+            'to_account': transfer_data.get('to_account'),
+            'amount': result.amount,
+            'currency': result.currency,
+            'description': transfer_data.get('description', ''),
+            'status': 'Completed',
+            'created_at': result.posted_at,
+            'user_id': user_id,
+            'debit_transaction_id': result.debit_transaction_id,
+            'credit_transaction_id': result.credit_transaction_id,
+            'from_balance': result.from_balance,
+            'duplicate': result.status == 'duplicate'
+        }
+        
+        self.logger.info(f"Transfer processed: {result.reference_number} ({result.status})")
+        return {'success': True, 'transfer': transfer_record, 'transaction_id': result.reference_number}
+    
     def get_transfer_history(self, user_id: int, limit: int = 50) -> List[Dict[str, Any]]:
         """Get transfer history for user"""
         try:
@@ -16,6 +16,7 @@ import logging
 import redis
 import os
 from ipaddress import ip_address, ip_network
+from modules.core.rate_limiter import RateLimitRule, token_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -133,30 +134,18 @@ def check_rate_limit(user_role: str = 'public', endpoint: str = 'default') -> bo
         
         # Create rate limit key
         rate_key = f"rate_limit:{client_ip}:{user_id}:{endpoint}"
-        minute_key = f"{rate_key}:minute"
-        hour_key = f"{rate_key}:hour"
         
         limits = security_manager.rate_limits.get(user_role, security_manager.rate_limits['public'])
         
-        # Simple in-memory rate limiting (replace with Redis in production)
-        current_time = int(time.time())
-        minute_window = current_time // 60
-        hour_window = current_time // 3600
+        # Shared token buckets so limits hold across all gunicorn workers
+        result = token_limiter.hit(rate_key, (
+            RateLimitRule('minute', limits['requests_per_minute'], 60),
+            RateLimitRule('hour', limits['requests_per_hour'], 3600)
+        ))
         
-        # Check minute limits
-        minute_count = getattr(g, f'rate_{minute_window}_{minute_key}', 0) + 1
-        setattr(g, f'rate_{minute_window}_{minute_key}', minute_count)
-        
-        if minute_count > limits['requests_per_minute']:
-            logger.warning(f"Rate limit exceeded for {client_ip}: {minute_count} requests/minute")
-            return False
-        
-        # Check hour limits
-        hour_count = getattr(g, f'rate_{hour_window}_{hour_key}', 0) + 1
-        setattr(g, f'rate_{hour_window}_{hour_key}', hour_count)
-        
-        if hour_count > limits['requests_per_hour']:
-            logger.warning(f"Hourly rate limit exceeded for {client_ip}: {hour_count} requests/hour")
+        if not result.allowed:
+            logger.warning(f"Rate limit exceeded for {client_ip}: {result.rule.limit} requests/{result.rule.name}")
+            g.rate_limit_retry_after = int(result.retry_after) + 1
             return False
         
         return True
@@ -263,7 +252,7 @@ def api_rate_limit(tier: str = 'public'):
                 return jsonify({
                     'error': 'Rate limit exceeded',
                     'code': 'RATE_LIMIT_EXCEEDED',
-                    'retry_after': 60
+                    'retry_after': getattr(g, 'rate_limit_retry_after', 60)
                 }), 429
             
             return f(*args, **kwargs)
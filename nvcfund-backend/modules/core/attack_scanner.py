@@ -0,0 +1,260 @@
+"""
+Compiled Attack Pattern Scanner
+Literal prefilter over all attack signatures with chunked streaming and time budgets
+"""
+
+import re
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
+
+def _ignorecase_table() -> Dict[int, int]:
+    """
+    Map every character to one representative of the characters
+    ``re.IGNORECASE`` treats as equal to it, one character for one.
+
+    Mirrors the engine rather than ``str.casefold``, which expands some
+    characters (``ß`` -> ``ss``, ``İ`` -> ``i̇``) that the engine matches
+    one for one, e.g. ``re.search('admin', 'admİn', re.I)``.
+    """
+    import sys
+    import _sre
+    try:
+        from re._casefix import _EXTRA_CASES as extra_cases
+    except ImportError:  # Python < 3.11
+        from sre_compile import _ignorecase_fixes as extra_cases
+    lower = {}
+    for code in range(sys.maxunicode + 1):
+        folded = _sre.unicode_tolower(code)
+        if folded != code:
+            lower[code] = folded
+    canonical = {}
+    for code, equivalents in extra_cases.items():
+        representative = min(code, *equivalents)
+        for equivalent in (code, *equivalents):
+            if equivalent != representative:
+                canonical[equivalent] = representative
+    table = {code: canonical.get(folded, folded) for code, folded in lower.items()}
+    table.update({code: representative for code, representative in canonical.items() if code not in table})
+    return table
+
+
+_IGNORECASE_TABLE = _ignorecase_table()
+
+
+def _fold(text: str) -> str:
+    """Fold case the way ``re.IGNORECASE`` compares characters (ASCII text is just lowercased)"""
+    if text.isascii():
+        return text.lower()
+    return text.translate(_IGNORECASE_TABLE)
+
+
+def required_literals(pattern: str, flags: int = 0) -> Optional[FrozenSet[str]]:
+    """
+    Return literals of which at least one must occur in any match of ``pattern``.
+
+    ``None`` means no such literal could be derived and the pattern must always
+    run. Among the candidate literal sets in a sequence the one whose shortest
+    member is longest is chosen, as it filters best.
+    """
+    def walk(items) -> Optional[FrozenSet[str]]:
+        candidates = []
+        run = []
+
+        def flush():
+            if run:
+                candidates.append(frozenset([_fold(''.join(run))]))
+                run.clear()
+
+        for op, av in items:
+            if op is sre_parse.LITERAL:
+                run.append(chr(av))
+                continue
+            flush()
+            inner = None
+            if op is sre_parse.SUBPATTERN:
+                inner = walk(av[-1])
+            elif op is sre_parse.BRANCH:
+                branches = [walk(branch) for branch in av[1]]
+                if all(branches):
+                    inner = frozenset().union(*branches)
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+                inner = walk(av[2])
+            if inner:
+                candidates.append(inner)
+        flush()
+
+        if not candidates:
+            return None
+        return max(candidates, key=lambda literals: min(len(literal) for literal in literals))
+
+    try:
+        return walk(sre_parse.parse(pattern, flags))
+    except Exception:
+        return None
+
+
+@dataclass
+class ScanResult:
+    """Matches found in a scan plus timing information"""
+    matches: List[Dict[str, Any]] = field(default_factory=list)
+    truncated: bool = False
+    elapsed_ms: float = 0.0
+    prefilter_hit: bool = False
+
+
+class AttackPatternScanner:
+    """
+    Two-stage scanner for the attack signature catalogue.
+
+    Every signature is compiled once and reduced to the literals any of its
+    matches must contain. Stage one case-folds the content once and checks
+    which of those literals occur (plain substring search); stage two runs
+    only the signatures whose literals were found. Skipping is exact, so the
+    output is identical to running every pattern with ``re.finditer``.
+    """
+
+    # Characters kept before each streaming window so \b and lookbehinds see real context
+    CONTEXT_CHARS = 16
+
+    def __init__(self, attack_patterns: Dict[str, List[str]], risk_scores: Dict[str, int] = None,
+                 flags: int = re.IGNORECASE | re.MULTILINE, max_match_length: int = 512):
+        self.risk_scores = risk_scores or {}
+        self.max_match_length = max_match_length
+        self.signatures: List[Tuple[str, str, re.Pattern, Optional[FrozenSet[str]]]] = [
+            (attack_type, pattern, re.compile(pattern, flags), required_literals(pattern, flags))
+            for attack_type, patterns in attack_patterns.items()
+            for pattern in patterns
+        ]
+        self.literals = sorted({literal for *_, literals in self.signatures if literals for literal in literals})
+
+    def _candidates(self, content: str) -> List[int]:
+        """Indexes of signatures whose required literals occur in ``content``"""
+        folded = _fold(content)
+        present = {literal for literal in self.literals if literal in folded}
+        return [
+            index for index, (*_, literals) in enumerate(self.signatures)
+            if literals is None or not literals.isdisjoint(present)
+        ]
+
+    def scan(self, content: str, time_budget_ms: Optional[float] = None, offset: int = 0,
+             report_from: int = 0, report_until: Optional[int] = None,
+             cursors: Optional[List[int]] = None) -> ScanResult:
+        """
+        Scan ``content`` and return every signature match.
+
+        ``time_budget_ms`` bounds the second stage; when it runs out the result
+        is marked ``truncated`` and contains the matches found so far.
+        ``report_from``/``report_until`` restrict reported match starts to a
+        slice of ``content`` and ``cursors`` carries each signature's absolute
+        resume position between windows (used by the streaming scanner).
+        """
+        started = time.perf_counter()
+        result = ScanResult()
+        if not content:
+            return result
+
+        candidates = self._candidates(content[max(0, report_from - self.CONTEXT_CHARS):])
+        if not candidates:
+            result.elapsed_ms = (time.perf_counter() - started) * 1000
+            return result
+
+        result.prefilter_hit = True
+        deadline = started + time_budget_ms / 1000 if time_budget_ms else None
+        for index in candidates:
+            attack_type, pattern, compiled, _ = self.signatures[index]
+            if deadline and time.perf_counter() > deadline:
+                result.truncated = True
+                break
+            position = report_from if cursors is None else max(report_from, cursors[index] - offset)
+            for match in compiled.finditer(content, position):
+                start, end = match.span()
+                if report_until is not None and start >= report_until:
+                    break
+                if cursors is not None:
+                    # Resume after this match in the next window, like finditer would
+                    cursors[index] = end + offset if end > start else end + offset + 1
+                result.matches.append({
+                    'type': attack_type,
+                    'pattern': pattern,
+                    'match': match.group(),
+                    'position': (start + offset, end + offset),
+                    'risk_score': self.risk_scores.get(attack_type, 5)
+                })
+
+        result.elapsed_ms = (time.perf_counter() - started) * 1000
+        return result
+
+    def scan_stream(self, chunks: Iterable[str], time_budget_ms: Optional[float] = None) -> ScanResult:
+        """
+        Scan content delivered in chunks without holding the whole body.
+
+        Each window keeps the last ``max_match_length`` characters of the
+        previous one, so signatures spanning a chunk boundary are still found.
+        Matches starting in that tail are deferred to the next window, which
+        sees their full context, so nothing is reported twice.
+        """
+        started = time.perf_counter()
+        deadline = started + time_budget_ms / 1000 if time_budget_ms else None
+        result = ScanResult()
+        window = ''
+        window_offset = 0   # absolute offset of ``window[0]``
+        reported_upto = 0   # every match starting before this offset is reported
+        cursors = [0] * len(self.signatures)
+
+        def scan_window(final: bool) -> bool:
+            nonlocal reported_upto
+            limit = len(window) if final else len(window) - self.max_match_length
+            report_from = reported_upto - window_offset
+            if limit <= report_from:
+                return True
+            budget_ms = None
+            if deadline:
+                budget_ms = (deadline - time.perf_counter()) * 1000
+                if budget_ms <= 0:
+                    result.truncated = True
+                    return False
+            partial = self.scan(window, budget_ms, window_offset, report_from, limit, cursors)
+            result.matches.extend(partial.matches)
+            result.prefilter_hit = result.prefilter_hit or partial.prefilter_hit
+            result.truncated = partial.truncated
+            reported_upto = window_offset + limit
+            return not partial.truncated
+
+        for chunk in chunks:
+            window += chunk
+            if not scan_window(final=False):
+                break
+            keep = min(len(window), self.max_match_length + self.CONTEXT_CHARS)
+            window_offset += len(window) - keep
+            window = window[len(window) - keep:]
+        else:
+            scan_window(final=True)
+
+        result.elapsed_ms = (time.perf_counter() - started) * 1000
+        return result
+
+
+def iter_text_chunks(stream, chunk_size: int = 64 * 1024, encoding: str = 'utf-8') -> Iterable[str]:
+    """Decode a binary stream into text chunks for ``scan_stream``"""
+    import codecs
+    decoder = codecs.getincrementaldecoder(encoding)(errors='ignore')
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+            return
+        text = decoder.decode(data)
+        if text:
+            yield text
@@ -0,0 +1,364 @@
+"""
+Asynchronous Batched Audit Sink
+Moves audit database writes off the request thread with a write-ahead log for durability
+"""
+
+import atexit
+import fcntl
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriteAheadLog:
+    """
+    Per-worker append-only spill files for audit rows.
+
+    Every worker owns one directory under ``base_dir`` and holds an exclusive
+    ``flock`` on it while alive. Rows are appended to numbered segment files
+    before they are queued; a segment is deleted once it is closed and all of
+    its rows are committed. Directories whose lock can be acquired belong to
+    dead workers and are replayed on startup.
+    """
+
+    LOCK_FILE = '.lock'
+
+    def __init__(self, base_dir: str, segment_max_rows: int = 5000, fsync: bool = False):
+        self.base_dir = Path(base_dir)
+        self.segment_max_rows = segment_max_rows
+        self.fsync = fsync
+        self.directory = self.base_dir / f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock_handle = open(self.directory / self.LOCK_FILE, 'w')
+        fcntl.flock(self._lock_handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._lock = threading.Lock()
+        self._segment = 0
+        self._handle = None
+        # segment -> [written, committed, closed]
+        self._segments: Dict[int, List[int]] = {}
+        self._open_segment()
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.directory / f"{segment:08d}.wal"
+
+    def _open_segment(self):
+        self._segment += 1
+        self._handle = open(self._segment_path(self._segment), 'a', encoding='utf-8')
+        self._segments[self._segment] = [0, 0, 0]
+
+    def append(self, row: Dict[str, Any]) -> int:
+        """Persist a row and return the segment it was written to"""
+        line = json.dumps(row, default=str, separators=(',', ':'))
+        with self._lock:
+            segment = self._segment
+            self._handle.write(line + '\n')
+            self._handle.flush()
+            if self.fsync:
+                os.fsync(self._handle.fileno())
+            state = self._segments[segment]
+            state[0] += 1
+            if state[0] >= self.segment_max_rows:
+                self._handle.close()
+                state[2] = 1
+                self._open_segment()
+            return segment
+
+    def mark_committed(self, segments: List[int]):
+        """Record committed rows and delete fully committed closed segments"""
+        with self._lock:
+            for segment in segments:
+                state = self._segments.get(segment)
+                if state is not None:
+                    state[1] += 1
+            for segment, (written, committed, closed) in list(self._segments.items()):
+                if closed and committed >= written:
+                    self._segment_path(segment).unlink(missing_ok=True)
+                    del self._segments[segment]
+
+    def close(self, fully_committed: bool):
+        """Close the WAL and remove it when nothing is pending"""
+        with self._lock:
+            if self._handle and not self._handle.closed:
+                self._handle.close()
+            if fully_committed:
+                for segment in list(self._segments):
+                    self._segment_path(segment).unlink(missing_ok=True)
+                self._segments.clear()
+                (self.directory / self.LOCK_FILE).unlink(missing_ok=True)
+                try:
+                    self.directory.rmdir()
+                except OSError:
+                    pass
+            self._lock_handle.close()
+
+    def recover_orphans(self) -> Iterator[Tuple[Path, List[Dict[str, Any]]]]:
+        """Yield rows left behind by workers that exited without flushing"""
+        for directory in sorted(self.base_dir.iterdir()):
+            if directory == self.directory or not directory.is_dir():
+                continue
+            lock_path = directory / self.LOCK_FILE
+            try:
+                handle = open(lock_path, 'a')
+            except OSError:
+                continue
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()  # Owner is still alive
+                continue
+            try:
+                rows = []
+                for segment_path in sorted(directory.glob('*.wal')):
+                    with open(segment_path, encoding='utf-8') as segment_file:
+                        for line in segment_file:
+                            try:
+                                rows.append(json.loads(line))
+                            except json.JSONDecodeError:
+                                logger.warning(f"Skipping torn audit WAL line in {segment_path}")
+                yield directory, rows
+            finally:
+                handle.close()
+
+    @staticmethod
+    def discard(directory: Path):
+        """Remove a recovered WAL directory"""
+        for path in directory.iterdir():
+            path.unlink(missing_ok=True)
+        try:
+            directory.rmdir()
+        except OSError:
+            pass
+
+
+class AsyncAuditSink:
+    """
+    Bounded queue drained by a background writer doing multi-row inserts.
+
+    ``submit`` never touches the database: rows are spilled to the WAL and
+    queued. The writer flushes when ``batch_size`` rows are pending or
+    ``flush_interval`` seconds have passed. When the queue is full the caller
+    blocks for up to ``put_timeout`` seconds and then writes its row inline,
+    which throttles producers instead of dropping events.
+
+    A batch the database rejects is retried row by row; rows that still fail
+    for a reason other than a lost connection are moved to a quarantine file
+    so one bad row cannot hold its whole batch (and the WAL) hostage.
+    """
+
+    def __init__(self, batch_size: int = 200, flush_interval: float = 0.5,
+                 max_queue_size: int = 10000, put_timeout: float = 0.05,
+                 wal_dir: str = 'logs/audit/wal', max_retries: int = 5,
+                 quarantine_dir: str = 'logs/audit/quarantine'):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self.put_timeout = put_timeout
+        self.wal_dir = wal_dir
+        self.max_retries = max_retries
+        self.quarantine_dir = quarantine_dir
+        self.app = None
+        self.stats = {'queued': 0, 'written': 0, 'batches': 0, 'inline_writes': 0,
+                      'failed_batches': 0, 'recovered': 0, 'row_fallbacks': 0, 'quarantined': 0}
+        self._pid = None
+        self._queue: Optional[queue.Queue] = None
+        self._wal: Optional[AuditWriteAheadLog] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def init_app(self, app):
+        """Bind the sink to an application; the writer starts lazily in each worker"""
+        self.app = app
+        self.batch_size = app.config.get('AUDIT_SINK_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('AUDIT_SINK_FLUSH_INTERVAL', self.flush_interval)
+        self.max_queue_size = app.config.get('AUDIT_SINK_MAX_QUEUE', self.max_queue_size)
+        self.wal_dir = app.config.get('AUDIT_SINK_WAL_DIR', self.wal_dir)
+        self.quarantine_dir = app.config.get('AUDIT_SINK_QUARANTINE_DIR', self.quarantine_dir)
+        app.extensions['audit_sink'] = self
+        atexit.register(self.shutdown)
+
+    @property
+    def enabled(self) -> bool:
+        return self.app is not None
+
+    def _ensure_started(self):
+        """Start the writer in the current process (safe across gunicorn forks)"""
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self.max_queue_size)
+            self._stop = threading.Event()
+            self._wal = AuditWriteAheadLog(self.wal_dir)
+            self._thread = threading.Thread(target=self._writer_loop, name='audit-sink-writer', daemon=True)
+            self._thread.start()
+
+    def submit(self, row: Dict[str, Any]):
+        """Queue an ``audit_logs`` row for asynchronous insertion"""
+        self._ensure_started()
+        segment = self._wal.append(row)
+        try:
+            self._queue.put((row, segment), timeout=self.put_timeout)
+            self.stats['queued'] += 1
+        except queue.Full:
+            # Backpressure: the caller pays for its own write while the writer catches up
+            self.stats['inline_writes'] += 1
+            if not self._write_rows([row]):
+                self._wal.mark_committed([segment])
+
+    def _writer_loop(self):
+        batch: List[Tuple[Dict[str, Any], int]] = []
+        deadline = time.monotonic() + self.flush_interval
+        self._recover()
+        while True:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+                # Drain whatever is already waiting without blocking
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            stopping = self._stop.is_set()
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline or stopping):
+                self._flush_batch(batch)
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+            if stopping and self._queue.empty() and not batch:
+                return
+
+    def _flush_batch(self, batch: List[Tuple[Dict[str, Any], int]]):
+        for attempt in range(self.max_retries):
+            pending = set(self._write_rows([row for row, _ in batch]))
+            self._wal.mark_committed([segment for index, (_, segment) in enumerate(batch) if index not in pending])
+            batch = [entry for index, entry in enumerate(batch) if index in pending]
+            if not batch:
+                return
+            time.sleep(min(2 ** attempt * 0.1, 5.0))
+        # Rows stay in the WAL and are replayed by the next worker that starts
+        self.stats['failed_batches'] += 1
+        logger.error(f"Audit sink dropped a batch of {len(batch)} rows after {self.max_retries} attempts; kept in WAL")
+
+    def _write_rows(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        Insert rows with a single multi-row INSERT, falling back to one INSERT
+        per row when the database rejects the batch. Rejected rows are
+        quarantined; returns the indexes of rows left unwritten by a
+        connection failure, which are worth retrying.
+        """
+        try:
+            self._insert(rows)
+            self.stats['batches'] += 1
+            return []
+        except Exception as e:
+            if self._is_transient(e):
+                logger.error(f"Audit sink batch insert failed: {e}")
+                return list(range(len(rows)))
+            logger.warning(f"Audit sink batch insert rejected, retrying {len(rows)} rows one by one: {e}")
+        self.stats['row_fallbacks'] += 1
+        for index, row in enumerate(rows):
+            try:
+                self._insert([row])
+            except Exception as e:
+                if self._is_transient(e):
+                    logger.error(f"Audit sink row insert failed: {e}")
+                    return list(range(index, len(rows)))
+                self._quarantine(row, e)
+        return []
+
+    def _insert(self, rows: List[Dict[str, Any]]):
+        from .extensions import db
+        from .models import AuditLog
+
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(AuditLog.__table__.insert(), [self._to_db_row(row) for row in rows])
+        self.stats['written'] += len(rows)
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """Lost connections and timeouts; anything else is a problem with the rows themselves"""
+        from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError, TimeoutError as PoolTimeout
+
+        if isinstance(error, (OperationalError, InterfaceError, PoolTimeout)):
+            return True
+        return isinstance(error, DBAPIError) and error.connection_invalidated
+
+    def _quarantine(self, row: Dict[str, Any], error: Exception):
+        """Set a rejected row aside (outside the WAL directory, so it is never replayed)"""
+        self.stats['quarantined'] += 1
+        logger.error(f"Audit row {row.get('log_id')} rejected by the database, quarantined: {error}")
+        directory = Path(self.quarantine_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        entry = {'row': row, 'error': str(error), 'quarantined_at': datetime.utcnow().isoformat()}
+        with open(directory / f"{os.getpid()}.jsonl", 'a', encoding='utf-8') as handle:
+            handle.write(json.dumps(entry, default=str, separators=(',', ':')) + '\n')
+
+    @staticmethod
+    def _to_db_row(row: Dict[str, Any]) -> Dict[str, Any]:
+        created_at = row.get('created_at')
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        return {**row, 'created_at': created_at}
+
+    def _recover(self):
+        """Replay WAL rows from workers that died before flushing"""
+        try:
+            from .extensions import db
+            from .models import AuditLog
+
+            for directory, rows in self._wal.recover_orphans():
+                if rows:
+                    log_ids = [row['log_id'] for row in rows]
+                    with self.app.app_context():
+                        existing = set()
+                        for start in range(0, len(log_ids), 1000):
+                            chunk = log_ids[start:start + 1000]
+                            existing.update(
+                                log_id for (log_id,) in db.session.query(AuditLog.log_id)
+                                .filter(AuditLog.log_id.in_(chunk)).all()
+                            )
+                        db.session.remove()
+                    pending = [row for row in rows if row['log_id'] not in existing]
+                    for start in range(0, len(pending), self.batch_size):
+                        # Rejected rows are quarantined; only a connection failure stops the replay
+                        if self._write_rows(pending[start:start + self.batch_size]):
+                            raise RuntimeError(f"could not replay {directory}")
+                    self.stats['recovered'] += len(pending)
+                    logger.info(f"Recovered {len(pending)} audit rows from {directory}")
+                self._wal.discard(directory)
+        except Exception as e:
+            logger.error(f"Audit WAL recovery failed: {e}")
+
+    def shutdown(self, timeout: float = 10.0) -> bool:
+        """Flush pending rows and stop the writer; returns True when fully drained"""
+        if self._pid != os.getpid() or not self._thread:
+            return True
+        self._stop.set()
+        self._thread.join(timeout)
+        drained = not self._thread.is_alive() and self._queue.empty()
+        self._wal.close(fully_committed=drained and self.stats['failed_batches'] == 0)
+        self._thread = None
+        if not drained:
+            logger.warning("Audit sink shutdown timed out; pending rows remain in the WAL")
+        return drained
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'pending': self._queue.qsize() if self._queue else 0}
+
+
+# Global audit sink instance (bound in app_factory, flushed from gunicorn's worker_exit)
+audit_sink = AsyncAuditSink()
@@ -0,0 +1,206 @@
+"""
+Cache Value Codec
+Versioned binary encoding for L2 cache entries: msgpack with typed extensions and optional compression
+"""
+
+import datetime as dt
+import json
+import logging
+import pickle
+import struct
+import zlib
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional, Tuple
+from uuid import UUID
+
+import msgpack
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+logger = logging.getLogger(__name__)
+
+# Header: magic, format version, serializer id, compression id
+HEADER = struct.Struct('>2sBBB')
+MAGIC = b'\xcaN'
+FORMAT_VERSION = 1
+
+SERIALIZER_MSGPACK = 1
+SERIALIZER_PICKLE = 2
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+COMPRESSION_LZ4 = 3
+
+# msgpack extension type codes; never renumber, cached entries outlive deploys
+EXT_DECIMAL = 1
+EXT_DATETIME = 2
+EXT_DATE = 3
+EXT_TIME = 4
+EXT_UUID = 5
+EXT_SET = 6
+
+
+class CacheCodecError(ValueError):
+    """Raised when a cache entry cannot be decoded"""
+
+
+class MsgpackSerializer:
+    """msgpack with lossless extensions for Decimal, date/time and UUID values"""
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=self._default, use_bin_type=True)
+
+    def loads(self, payload: bytes) -> Any:
+        try:
+            return msgpack.unpackb(payload, ext_hook=self._ext_hook, raw=False, strict_map_key=False)
+        except TypeError:
+            # Tuple dict keys pack as arrays and only unpack hashably as tuples
+            return msgpack.unpackb(payload, ext_hook=self._ext_hook, raw=False, strict_map_key=False,
+                                   use_list=False)
+
+    def _default(self, obj: Any):
+        if isinstance(obj, Decimal):
+            return msgpack.ExtType(EXT_DECIMAL, str(obj).encode('ascii'))
+        if isinstance(obj, dt.datetime):
+            return msgpack.ExtType(EXT_DATETIME, obj.isoformat().encode('ascii'))
+        if isinstance(obj, dt.date):
+            return msgpack.ExtType(EXT_DATE, obj.isoformat().encode('ascii'))
+        if isinstance(obj, dt.time):
+            return msgpack.ExtType(EXT_TIME, obj.isoformat().encode('ascii'))
+        if isinstance(obj, UUID):
+            return msgpack.ExtType(EXT_UUID, obj.bytes)
+        if isinstance(obj, (set, frozenset)):
+            return msgpack.ExtType(EXT_SET, self.dumps(list(obj)))
+        raise TypeError(f"Cannot msgpack {type(obj).__name__}")
+
+    def _ext_hook(self, code: int, data: bytes):
+        decoder = self._decoders.get(code)
+        return decoder(self, data) if decoder else msgpack.ExtType(code, data)
+
+    _decoders = {
+        EXT_DECIMAL: lambda self, data: Decimal(data.decode('ascii')),
+        EXT_DATETIME: lambda self, data: dt.datetime.fromisoformat(data.decode('ascii')),
+        EXT_DATE: lambda self, data: dt.date.fromisoformat(data.decode('ascii')),
+        EXT_TIME: lambda self, data: dt.time.fromisoformat(data.decode('ascii')),
+        EXT_UUID: lambda self, data: UUID(bytes=data),
+        EXT_SET: lambda self, data: set(self.loads(data)),
+    }
+
+
+class PickleSerializer:
+    """Fallback for values msgpack cannot represent (arbitrary objects)"""
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, payload: bytes) -> Any:
+        return pickle.loads(payload)
+
+
+def _compressors() -> Dict[int, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    compressors = {COMPRESSION_ZLIB: (lambda data: zlib.compress(data, 6), zlib.decompress)}
+    if zstandard is not None:
+        compressors[COMPRESSION_ZSTD] = (zstandard.ZstdCompressor(level=3).compress,
+                                         lambda data: zstandard.ZstdDecompressor().decompress(data))
+    if lz4_frame is not None:
+        compressors[COMPRESSION_LZ4] = (lz4_frame.compress, lz4_frame.decompress)
+    return compressors
+
+
+COMPRESSION_NAMES = {'none': COMPRESSION_NONE, 'zlib': COMPRESSION_ZLIB,
+                     'zstd': COMPRESSION_ZSTD, 'lz4': COMPRESSION_LZ4}
+
+
+class CacheCodec:
+    """
+    Encodes cache values as ``header + payload`` bytes.
+
+    The header records the format version, serializer and compression, so
+    entries written by any configuration decode correctly and the defaults
+    can change without flushing Redis. Payloads at or above
+    ``compression_threshold`` bytes are compressed when that saves space.
+    Entries without a header are treated as the legacy JSON / hex-pickle
+    strings written before this codec existed.
+    """
+
+    def __init__(self, compression: str = 'auto', compression_threshold: int = 1024):
+        self.serializers = {SERIALIZER_MSGPACK: MsgpackSerializer(), SERIALIZER_PICKLE: PickleSerializer()}
+        self.compressors = _compressors()
+        self.compression_threshold = compression_threshold
+        self.compression = self._resolve_compression(compression)
+
+    def _resolve_compression(self, name: str) -> int:
+        if name == 'auto':
+            for candidate in (COMPRESSION_ZSTD, COMPRESSION_LZ4, COMPRESSION_ZLIB):
+                if candidate in self.compressors:
+                    return candidate
+        compression = COMPRESSION_NAMES.get(name)
+        if compression is None:
+            raise ValueError(f"Unknown cache compression: {name}")
+        if compression != COMPRESSION_NONE and compression not in self.compressors:
+            logger.warning(f"Cache compression '{name}' is not installed, falling back to zlib")
+            return COMPRESSION_ZLIB
+        return compression
+
+    def register_serializer(self, serializer_id: int, serializer):
+        """Plug in an additional serializer (object with dumps/loads) under a new header id"""
+        if serializer_id in self.serializers:
+            raise ValueError(f"Serializer id {serializer_id} is already registered")
+        self.serializers[serializer_id] = serializer
+
+    def encode(self, value: Any, serializer_id: int = SERIALIZER_MSGPACK) -> bytes:
+        try:
+            payload = self.serializers[serializer_id].dumps(value)
+        except (TypeError, ValueError, OverflowError):
+            serializer_id = SERIALIZER_PICKLE
+            payload = self.serializers[serializer_id].dumps(value)
+
+        compression = COMPRESSION_NONE
+        if self.compression != COMPRESSION_NONE and len(payload) >= self.compression_threshold:
+            compressed = self.compressors[self.compression][0](payload)
+            if len(compressed) < len(payload):
+                payload, compression = compressed, self.compression
+
+        return HEADER.pack(MAGIC, FORMAT_VERSION, serializer_id, compression) + payload
+
+    def decode(self, data: Optional[bytes]) -> Any:
+        if data is None:
+            return None
+        if isinstance(data, str):
+            return self.decode_legacy(data)
+        if len(data) < HEADER.size or data[:2] != MAGIC:
+            return self.decode_legacy(data.decode('utf-8', errors='replace'))
+
+        _, version, serializer_id, compression = HEADER.unpack_from(data)
+        if version != FORMAT_VERSION:
+            raise CacheCodecError(f"Unsupported cache entry version {version}")
+        payload = data[HEADER.size:]
+        if compression != COMPRESSION_NONE:
+            decompress = self.compressors.get(compression)
+            if decompress is None:
+                raise CacheCodecError(f"Cache entry compressed with unavailable codec {compression}")
+            payload = decompress[1](payload)
+        serializer = self.serializers.get(serializer_id)
+        if serializer is None:
+            raise CacheCodecError(f"Unknown cache serializer {serializer_id}")
+        return serializer.loads(payload)
+
+    @staticmethod
+    def decode_legacy(value: str) -> Any:
+        """Entries written as JSON or hex-encoded pickle strings"""
+        try:
+            return json.loads(value)
+        except (json.JSONDecodeError, TypeError):
+            try:
+                return pickle.loads(bytes.fromhex(value))
+            except Exception:
+                return value
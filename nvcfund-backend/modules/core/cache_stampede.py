@@ -0,0 +1,336 @@
+"""
+Cache Stampede Protection
+Single-flight recomputation, probabilistic early expiration and stale-while-revalidate for cache decorators
+"""
+
+import logging
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+# Marker for values written by StampedeGuard; anything else in the cache is a plain legacy value
+ENVELOPE_MARKER = '__swr__'
+LOCK_PREFIX = 'lock:recompute:'
+
+# Release the recompute lock only if this caller still owns it
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class CacheKeyStats:
+    """Thread-safe hit/miss/refresh/latency counters per decorated cache key prefix"""
+
+    EVENTS = ('hits', 'misses', 'stale_hits', 'early_refreshes', 'background_refreshes',
+              'coalesced', 'peer_waits', 'errors')
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, name: str) -> Dict[str, float]:
+        entry = self._stats.get(name)
+        if entry is None:
+            entry = self._stats.setdefault(name, {
+                **{event: 0 for event in self.EVENTS},
+                'computes': 0, 'compute_seconds': 0.0, 'max_compute_seconds': 0.0
+            })
+        return entry
+
+    def record(self, name: str, event: str):
+        with self._lock:
+            self._entry(name)[event] += 1
+
+    def record_compute(self, name: str, seconds: float):
+        with self._lock:
+            entry = self._entry(name)
+            entry['computes'] += 1
+            entry['compute_seconds'] += seconds
+            entry['max_compute_seconds'] = max(entry['max_compute_seconds'], seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            stats = {name: dict(entry) for name, entry in self._stats.items()}
+        report = {}
+        for name, entry in sorted(stats.items()):
+            lookups = entry['hits'] + entry['stale_hits'] + entry['misses']
+            computes = entry['computes']
+            report[name] = {
+                **{event: int(entry[event]) for event in self.EVENTS},
+                'computes': int(computes),
+                'hit_rate': round((entry['hits'] + entry['stale_hits']) / lookups * 100, 2) if lookups else 0,
+                'avg_compute_ms': round(entry['compute_seconds'] / computes * 1000, 3) if computes else 0,
+                'max_compute_ms': round(entry['max_compute_seconds'] * 1000, 3)
+            }
+        return report
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+class _Flight:
+    """One in-process recomputation that concurrent callers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class StampedeGuard:
+    """
+    Wraps a cache store's get/set with stampede protection.
+
+    - Misses are single-flight: one thread per process computes while the
+      others wait for its result, and a Redis ``SET NX`` lock extends this
+      across workers (losers poll the cache until the holder has written).
+    - Entries carry their logical expiry and compute time, and are refreshed
+      early with the XFetch probability ``-delta * beta * ln(rand)``, so hot
+      keys are normally recomputed by one caller before they expire.
+    - With ``stale_ttl`` set, entries stay in the store that long past their
+      expiry; expired entries are served immediately while a single
+      background refresh runs.
+    """
+
+    def __init__(self, getter: Callable[[str], Any], setter: Callable[[str, Any, int, Optional[List[str]]], Any],
+                 lock_client: Callable[[], Any] = None, stats: CacheKeyStats = None,
+                 lock_timeout: float = 10.0, poll_interval: float = 0.05, refresh_workers: int = 4):
+        self._get = getter
+        self._set = setter
+        self._lock_client = lock_client or (lambda: None)
+        self.stats = stats or key_stats
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.refresh_workers = refresh_workers
+        self._flights: Dict[str, _Flight] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = os.getpid()
+        self._release_script = None
+
+    def fetch(self, key: str, compute: Callable[[], Any], timeout: int, name: str,
+              tags: Optional[List[str]] = None, stale_ttl: int = 0, beta: float = 1.0) -> Any:
+        """Cached value for ``key``, computing it at most once per expiry across callers"""
+        if self._pid != os.getpid():
+            self._after_fork()
+        entry = self._read(key)
+        if entry is None:
+            self.stats.record(name, 'misses')
+            return self._compute_single_flight(key, compute, timeout, name, tags, stale_ttl)
+
+        if not self._is_envelope(entry):
+            self.stats.record(name, 'hits')
+            return entry
+
+        remaining = entry['exp'] - time.time()
+        if remaining <= 0:
+            # Only reachable with stale_ttl: the store keeps entries that long past expiry
+            self.stats.record(name, 'stale_hits')
+            self._refresh_in_background(key, compute, timeout, name, tags, stale_ttl)
+            return entry['v']
+
+        self.stats.record(name, 'hits')
+        if beta > 0 and remaining <= -entry['delta'] * beta * math.log(1.0 - random.random()):
+            self.stats.record(name, 'early_refreshes')
+            if stale_ttl:
+                self._refresh_in_background(key, compute, timeout, name, tags, stale_ttl)
+            else:
+                self._refresh_now(key, compute, timeout, name, tags, stale_ttl)
+        return entry['v']
+
+    # === RECOMPUTATION ===
+
+    def _compute_single_flight(self, key, compute, timeout, name, tags, stale_ttl):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            self.stats.record(name, 'coalesced')
+            if flight.done.wait(self.lock_timeout + 1):
+                if flight.error is not None:
+                    raise flight.error
+                return flight.value
+            return compute()
+
+        try:
+            token = self._acquire(key)
+            try:
+                if token is None:
+                    value = self._wait_for_peer(key, name)
+                    if value is not _MISSING:
+                        flight.value = value
+                        return value
+                flight.value = self._compute_and_store(key, compute, timeout, name, tags, stale_ttl)
+                return flight.value
+            finally:
+                self._release(key, token)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            flight.done.set()
+            with self._lock:
+                self._flights.pop(key, None)
+
+    def _refresh_now(self, key, compute, timeout, name, tags, stale_ttl):
+        """Early refresh by whichever caller wins the lock; everyone else keeps the current value"""
+        with self._lock:
+            if key in self._refreshing or key in self._flights:
+                return
+            self._refreshing.add(key)
+        try:
+            token = self._acquire(key)
+            if token is None:
+                return
+            try:
+                self._compute_and_store(key, compute, timeout, name, tags, stale_ttl)
+            finally:
+                self._release(key, token)
+        except Exception as e:
+            self.stats.record(name, 'errors')
+            logger.error(f"Early cache refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _refresh_in_background(self, key, compute, timeout, name, tags, stale_ttl):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        app = current_app._get_current_object() if has_app_context() else None
+
+        def refresh():
+            try:
+                token = self._acquire(key)
+                if token is None:
+                    return
+                try:
+                    self.stats.record(name, 'background_refreshes')
+                    if app is not None:
+                        with app.app_context():
+                            self._compute_and_store(key, compute, timeout, name, tags, stale_ttl)
+                    else:
+                        self._compute_and_store(key, compute, timeout, name, tags, stale_ttl)
+                finally:
+                    self._release(key, token)
+            except Exception as e:
+                self.stats.record(name, 'errors')
+                logger.error(f"Background cache refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        try:
+            self._refresh_executor().submit(refresh)
+        except RuntimeError:
+            # Interpreter shutting down; the stale value is still served
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _compute_and_store(self, key, compute, timeout, name, tags, stale_ttl):
+        started = time.perf_counter()
+        value = compute()
+        delta = time.perf_counter() - started
+        self.stats.record_compute(name, delta)
+        if value is not None:
+            envelope = {ENVELOPE_MARKER: 1, 'v': value, 'exp': time.time() + timeout, 'delta': round(delta, 6)}
+            self._set(key, envelope, timeout + stale_ttl, tags)
+        return value
+
+    def _wait_for_peer(self, key, name):
+        """Another worker holds the lock: poll for its result until it finishes or the lock lapses"""
+        self.stats.record(name, 'peer_waits')
+        client = self._lock_client()
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            entry = self._read(key)
+            if entry is not None:
+                return entry['v'] if self._is_envelope(entry) else entry
+            try:
+                if client is not None and not client.exists(LOCK_PREFIX + key):
+                    break
+            except Exception:
+                break
+        return _MISSING
+
+    # === LOCKING ===
+
+    def _acquire(self, key: str) -> Optional[str]:
+        """Lock token, '' when there is no shared store to lock in, or None if another worker holds it"""
+        client = self._lock_client()
+        if client is None:
+            return ''
+        token = uuid.uuid4().hex
+        try:
+            if client.set(LOCK_PREFIX + key, token, nx=True, px=int(self.lock_timeout * 1000)):
+                return token
+            return None
+        except Exception as e:
+            logger.warning(f"Recompute lock unavailable for {key}, computing locally: {e}")
+            return ''
+
+    def _release(self, key: str, token: Optional[str]):
+        if not token:
+            return
+        client = self._lock_client()
+        try:
+            if self._release_script is None:
+                self._release_script = client.register_script(RELEASE_LOCK_SCRIPT)
+            self._release_script(keys=[LOCK_PREFIX + key], args=[token], client=client)
+        except Exception as e:
+            logger.warning(f"Failed to release recompute lock for {key}: {e}")
+
+    # === HELPERS ===
+
+    def _read(self, key: str) -> Any:
+        try:
+            return self._get(key)
+        except Exception as e:
+            logger.error(f"Cache read error for {key}: {e}")
+            return None
+
+    @staticmethod
+    def _is_envelope(entry: Any) -> bool:
+        return isinstance(entry, dict) and entry.get(ENVELOPE_MARKER) == 1 and 'exp' in entry
+
+    def _after_fork(self):
+        # Threads do not survive fork: drop the parent's in-flight bookkeeping and pool
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._refreshing = set()
+        self._executor = None
+        self._pid = os.getpid()
+
+    def _refresh_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.refresh_workers,
+                                                        thread_name_prefix='cache-refresh')
+        return self._executor
+
+
+_MISSING = object()
+
+# Shared per-key statistics for all decorated caches
+key_stats = CacheKeyStats()
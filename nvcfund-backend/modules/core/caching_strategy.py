@@ -4,9 +4,11 @@ Implements multi-level caching with Redis, application cache, and database query
 """
 
 import json
-import pickle
+import os
+import threading
 import time
 import functools
+import uuid
 from typing import Any, Dict, List, Optional, Union, Callable
 from datetime import datetime, timedelta
 from flask import current_app, request, g
@@ -14,6 +16,9 @@ from flask_caching import Cache
 import redis
 import logging
 
+from modules.core.cache_codec import CacheCodec
+from modules.core.cache_stampede import StampedeGuard, key_stats
+
 logger = logging.getLogger(__name__)
 
 class CacheConfig:
@@ -38,16 +43,54 @@ class CacheConfig:
     API_PREFIX = 'api'
     SESSION_PREFIX = 'session'
     
-    # Cache invalidation patterns
-    INVALIDATION_PATTERNS = {
-        'user_data': ['user:{user_id}:*', 'dashboard:{user_id}:*'],
-        'account_data': ['account:{account_id}:*', 'user:{user_id}:accounts:*'],
-        'transaction_data': ['transaction:{account_id}:*', 'account:{account_id}:*'],
-        'system_data': ['system:*', 'config:*']
+    # Cache invalidation tags; keys under these prefixes register their
+    # "<prefix>:<id>" and "<prefix>:<id>:<section>" tags automatically
+    INVALIDATION_TAGS = {
+        'user_data': ['user:{user_id}', 'dashboard:{user_id}'],
+        'account_data': ['account:{account_id}', 'user:{user_id}:accounts'],
+        'transaction_data': ['transaction:{account_id}', 'account:{account_id}']
     }
+    TAGGED_PREFIXES = (USER_PREFIX, ACCOUNT_PREFIX, TRANSACTION_PREFIX, DASHBOARD_PREFIX, SESSION_PREFIX)
+    
+    # Namespaces invalidated wholesale by bumping a generation counter;
+    # keys in them are built with MultiLevelCache.namespaced_key
+    SYSTEM_NAMESPACES = ('system', 'config')
+    
+    # Redis layout for tag sets, generation counters and cross-worker L1 invalidation
+    TAG_KEY_PREFIX = 'cache:tag:'
+    GENERATION_KEY_PREFIX = 'cache:gen:'
+    INVALIDATION_CHANNEL = 'cache:invalidate'
+    TAG_TTL = DAILY_CACHE        # Tag sets outlive their members; stale members are harmless
+    GENERATION_TTL = 5           # Seconds a worker trusts its generation map between broadcasts
+
+# Atomically read and drop tag sets together with every key registered under them
+INVALIDATE_TAGS_SCRIPT = """
+local deleted = {}
+for _, tag in ipairs(KEYS) do
+    local members = redis.call('SMEMBERS', tag)
+    for i = 1, #members, 500 do
+        redis.call('UNLINK', unpack(members, i, math.min(i + 499, #members)))
+    end
+    for _, member in ipairs(members) do
+        deleted[#deleted + 1] = member
+    end
+    redis.call('UNLINK', tag)
+end
+return deleted
+"""
 
 class MultiLevelCache:
-    """Multi-level caching system with L1 (memory) and L2 (Redis) cache"""
+    """
+    Multi-level caching system with L1 (memory) and L2 (Redis) cache.
+    
+    Invalidation never scans the keyspace:
+    - tags: ``set(..., tags=[...])`` adds the key to a Redis set per tag and
+      ``invalidate_tags`` drops the sets and their members in one script;
+    - namespaces: ``namespaced_key`` embeds a generation counter that
+      ``bump_namespace`` increments, orphaning every old key at once.
+    Each invalidation is published on a Redis channel so every worker drops
+    the affected entries from its own L1 cache.
+    """
     
     def __init__(self, app=None):
         self.app = app
@@ -59,8 +102,18 @@ class MultiLevelCache:
             'l2_hits': 0,
             'l2_misses': 0,
             'sets': 0,
-            'deletes': 0
+            'deletes': 0,
+            'tag_invalidations': 0,
+            'namespace_bumps': 0,
+            'invalidations_received': 0
         }
+        self.codec = CacheCodec()
+        self._invalidate_tags_script = None
+        self._generations: Dict[str, tuple] = {}
+        self._local_tags: Dict[str, set] = {}  # L1-only tag index when Redis is unavailable
+        self._origin = None
+        self._listener_pid = None
+        self._listener_lock = threading.Lock()
         
         if app:
             self.init_app(app)
@@ -74,37 +127,159 @@ class MultiLevelCache:
         app.config.setdefault('CACHE_DEFAULT_TIMEOUT', CacheConfig.MEDIUM_CACHE)
         self.l1_cache.init_app(app)
         
-        # Configure L2 cache (Redis)
+        # Configure L2 cache (Redis); values are codec-encoded bytes
+        self.codec = CacheCodec(
+            compression=app.config.get('CACHE_COMPRESSION', 'auto'),
+            compression_threshold=app.config.get('CACHE_COMPRESSION_THRESHOLD', 1024)
+        )
         redis_url = app.config.get('REDIS_URL', 'redis://localhost:6379/0')
         try:
-            self.l2_cache = redis.from_url(redis_url, decode_responses=True)
+            self.l2_cache = redis.from_url(redis_url, decode_responses=False)
             self.l2_cache.ping()  # Test connection
+            self._invalidate_tags_script = self.l2_cache.register_script(INVALIDATE_TAGS_SCRIPT)
+            self._ensure_listener()
             logger.info("Redis cache initialized successfully")
         except Exception as e:
             logger.warning(f"Redis cache initialization failed: {e}")
             self.l2_cache = None
     
-    def _serialize_value(self, value: Any) -> str:
-        """Serialize value for Redis storage"""
+    # === CROSS-WORKER L1 INVALIDATION ===
+    
+    def _ensure_listener(self):
+        """Start this process's invalidation subscriber (once per forked worker)"""
+        if self.l2_cache is None or self._listener_pid == os.getpid():
+            return
+        with self._listener_lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+            self._origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+            self._generations.clear()
+            threading.Thread(target=self._listen, name='cache-invalidation', daemon=True).start()
+    
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.l2_cache.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CacheConfig.INVALIDATION_CHANNEL)
+                for message in pubsub.listen():
+                    self._apply_invalidation(json.loads(message['data']))
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener reconnecting: {e}")
+                # Broadcasts may have been missed; L1 entries are short-lived, so just drop them
+                self.l1_cache.clear()
+                self._generations.clear()
+                time.sleep(1)
+    
+    def _apply_invalidation(self, message: Dict[str, Any]):
+        if message.get('origin') == self._origin:
+            return
+        self.stats['invalidations_received'] += 1
+        for key in message.get('keys', ()):
+            self.l1_cache.delete(key)
+        for namespace, generation in message.get('generations', {}).items():
+            self._generations[namespace] = (generation, time.monotonic())
+    
+    def _broadcast(self, keys: List[str] = None, generations: Dict[str, int] = None):
+        if self.l2_cache is None or not (keys or generations):
+            return
         try:
-            return json.dumps(value, default=str)
-        except (TypeError, ValueError):
-            # Fallback to pickle for complex objects
-            return pickle.dumps(value).hex()
+            self.l2_cache.publish(CacheConfig.INVALIDATION_CHANNEL, json.dumps({
+                'origin': self._origin,
+                'keys': keys or [],
+                'generations': generations or {}
+            }))
+        except Exception as e:
+            logger.error(f"Cache invalidation broadcast error: {e}")
     
-    def _deserialize_value(self, value: str) -> Any:
-        """Deserialize value from Redis storage"""
+    # === TAGS AND NAMESPACES ===
+    
+    @staticmethod
+    def derive_tags(key: str) -> List[str]:
+        """Implicit tags for keys like ``user:42:accounts:list`` -> user:42, user:42:accounts"""
+        parts = key.split(':')
+        if len(parts) < 3 or parts[0] not in CacheConfig.TAGGED_PREFIXES:
+            return []
+        tags = [f"{parts[0]}:{parts[1]}"]
+        if len(parts) >= 4:
+            tags.append(f"{parts[0]}:{parts[1]}:{parts[2]}")
+        return tags
+    
+    def invalidate_tags(self, *tags: str) -> int:
+        """Delete every key registered under any of ``tags``, in L2 and all workers' L1"""
+        tags = [tag for tag in tags if tag]
+        if not tags:
+            return 0
+        self.stats['tag_invalidations'] += 1
+        
+        if self.l2_cache is None:
+            keys = set()
+            for tag in tags:
+                keys.update(self._local_tags.pop(tag, ()))
+            for key in keys:
+                self.l1_cache.delete(key)
+            return len(keys)
+        
         try:
-            return json.loads(value)
-        except (json.JSONDecodeError, TypeError):
-            # Try pickle deserialization
+            self._ensure_listener()
+            keys = [key.decode() for key in
+                    self._invalidate_tags_script(keys=[CacheConfig.TAG_KEY_PREFIX + tag for tag in tags])]
+            for key in keys:
+                self.l1_cache.delete(key)
+            self._broadcast(keys=keys)
+            return len(keys)
+        except Exception as e:
+            logger.error(f"Cache tag invalidation error: {e}")
+            return 0
+    
+    def generation(self, namespace: str) -> int:
+        """Current generation of a namespace (cached per worker, refreshed by broadcasts)"""
+        cached = self._generations.get(namespace)
+        if cached is not None and time.monotonic() - cached[1] < CacheConfig.GENERATION_TTL:
+            return cached[0]
+        generation = cached[0] if cached else 0
+        if self.l2_cache is not None:
             try:
-                return pickle.loads(bytes.fromhex(value))
-            except Exception:
-                return value
+                self._ensure_listener()
+                generation = int(self.l2_cache.get(CacheConfig.GENERATION_KEY_PREFIX + namespace) or 0)
+            except Exception as e:
+                logger.error(f"Cache generation lookup error: {e}")
+        self._generations[namespace] = (generation, time.monotonic())
+        return generation
+    
+    def namespaced_key(self, namespace: str, key: str) -> str:
+        """Key inside a generation namespace; bump_namespace makes all such keys unreachable"""
+        return f"{namespace}:v{self.generation(namespace)}:{key}"
+    
+    def bump_namespace(self, namespace: str) -> int:
+        """O(1) invalidation of a whole namespace; old entries expire on their own TTL"""
+        self.stats['namespace_bumps'] += 1
+        if self.l2_cache is None:
+            generation = self.generation(namespace) + 1
+        else:
+            try:
+                self._ensure_listener()
+                generation = int(self.l2_cache.incr(CacheConfig.GENERATION_KEY_PREFIX + namespace))
+            except Exception as e:
+                logger.error(f"Cache namespace bump error: {e}")
+                return self.generation(namespace)
+            self._broadcast(generations={namespace: generation})
+        self._generations[namespace] = (generation, time.monotonic())
+        return generation
+    
+    def _serialize_value(self, value: Any) -> bytes:
+        """Serialize value for Redis storage"""
+        return self.codec.encode(value)
+    
+    def _deserialize_value(self, value: bytes) -> Any:
+        """Deserialize value from Redis storage"""
+        return self.codec.decode(value)
     
     def get(self, key: str) -> Any:
         """Get value from cache (L1 first, then L2)"""
+        # Read-only workers must still hear other workers' invalidations
+        self._ensure_listener()
+        
         # Try L1 cache first
         value = self.l1_cache.get(key)
         if value is not None:
@@ -131,9 +306,10 @@ class MultiLevelCache:
         self.stats['l2_misses'] += 1
         return None
     
-    def set(self, key: str, value: Any, timeout: int = None) -> bool:
-        """Set value in both cache levels"""
+    def set(self, key: str, value: Any, timeout: int = None, tags: List[str] = None) -> bool:
+        """Set value in both cache levels, registering it under ``tags`` plus the tags implied by its key"""
         timeout = timeout or CacheConfig.MEDIUM_CACHE
+        tags = set(tags or ()).union(self.derive_tags(key))
         
         try:
             # Set in L1 cache
@@ -141,8 +317,18 @@ class MultiLevelCache:
             
             # Set in L2 cache (Redis)
             if self.l2_cache:
+                self._ensure_listener()
                 serialized_value = self._serialize_value(value)
-                self.l2_cache.setex(key, timeout, serialized_value)
+                pipe = self.l2_cache.pipeline(transaction=False)
+                pipe.setex(key, timeout, serialized_value)
+                for tag in tags:
+                    tag_key = CacheConfig.TAG_KEY_PREFIX + tag
+                    pipe.sadd(tag_key, key)
+                    pipe.expire(tag_key, max(timeout, CacheConfig.TAG_TTL))
+                pipe.execute()
+            else:
+                for tag in tags:
+                    self._local_tags.setdefault(tag, set()).add(key)
             
             self.stats['sets'] += 1
             return True
@@ -157,9 +343,11 @@ class MultiLevelCache:
             # Delete from L1 cache
             self.l1_cache.delete(key)
             
-            # Delete from L2 cache
+            # Delete from L2 cache and from every other worker's L1
             if self.l2_cache:
+                self._ensure_listener()
                 self.l2_cache.delete(key)
+                self._broadcast(keys=[key])
             
             self.stats['deletes'] += 1
             return True
@@ -169,23 +357,39 @@ class MultiLevelCache:
             return False
     
     def delete_pattern(self, pattern: str) -> int:
-        """Delete keys matching pattern (Redis only)"""
+        """
+        Delete keys matching pattern (Redis only).
+        
+        Kept for ad-hoc maintenance; walks the keyspace with incremental SCAN
+        rather than a blocking KEYS. Application invalidation should use
+        invalidate_tags or bump_namespace.
+        """
         if not self.l2_cache:
             return 0
         
         try:
-            keys = self.l2_cache.keys(pattern)
-            if keys:
-                deleted = self.l2_cache.delete(*keys)
-                # Also try to delete from L1 cache
-                for key in keys:
-                    self.l1_cache.delete(key)
-                return deleted
-            return 0
+            self._ensure_listener()
+            deleted = 0
+            batch = []
+            for key in self.l2_cache.scan_iter(match=pattern, count=1000):
+                batch.append(key.decode())
+                if len(batch) >= 500:
+                    deleted += self._delete_batch(batch)
+                    batch = []
+            if batch:
+                deleted += self._delete_batch(batch)
+            return deleted
         except Exception as e:
             logger.error(f"Cache pattern delete error: {e}")
             return 0
     
+    def _delete_batch(self, keys: List[str]) -> int:
+        deleted = self.l2_cache.unlink(*keys)
+        for key in keys:
+            self.l1_cache.delete(key)
+        self._broadcast(keys=keys)
+        return deleted
+    
     def clear(self) -> bool:
         """Clear both cache levels"""
         try:
@@ -214,12 +418,20 @@ class MultiLevelCache:
             'l1_hit_rate': round(l1_hit_rate, 2),
             'l2_hit_rate': round(l2_hit_rate, 2),
             'overall_hit_rate': round(overall_hit_rate, 2),
-            'total_requests': total_requests
+            'total_requests': total_requests,
+            'keys': key_stats.snapshot()
         }
 
 # Global cache instance
 cache = MultiLevelCache()
 
+# Stampede protection for decorated functions backed by the global cache
+cache_guard = StampedeGuard(
+    getter=lambda key: cache.get(key),
+    setter=lambda key, value, timeout, tags: cache.set(key, value, timeout, tags=tags),
+    lock_client=lambda: cache.l2_cache
+)
+
 class CacheManager:
     """High-level cache management utilities"""
     
@@ -231,21 +443,26 @@ class CacheManager:
         return ":".join(key_parts)
     
     @staticmethod
-    def invalidate_user_cache(user_id: int):
+    def invalidate_user_cache(user_id: int) -> int:
         """Invalidate all cache entries for a user"""
-        patterns = CacheConfig.INVALIDATION_PATTERNS['user_data']
-        for pattern in patterns:
-            cache.delete_pattern(pattern.format(user_id=user_id))
+        tags = CacheConfig.INVALIDATION_TAGS['user_data']
+        return cache.invalidate_tags(*[tag.format(user_id=user_id) for tag in tags])
     
     @staticmethod
-    def invalidate_account_cache(account_id: int, user_id: int = None):
+    def invalidate_account_cache(account_id: int, user_id: int = None) -> int:
         """Invalidate cache entries for an account"""
-        patterns = CacheConfig.INVALIDATION_PATTERNS['account_data']
-        for pattern in patterns:
-            if '{user_id}' in pattern and user_id:
-                cache.delete_pattern(pattern.format(account_id=account_id, user_id=user_id))
-            else:
-                cache.delete_pattern(pattern.format(account_id=account_id))
+        tags = [
+            tag.format(account_id=account_id, user_id=user_id)
+            for tag in CacheConfig.INVALIDATION_TAGS['account_data']
+            if '{user_id}' not in tag or user_id
+        ]
+        return cache.invalidate_tags(*tags)
+    
+    @staticmethod
+    def invalidate_system_cache():
+        """Invalidate system and configuration entries by bumping their namespaces"""
+        for namespace in CacheConfig.SYSTEM_NAMESPACES:
+            cache.bump_namespace(namespace)
     
     @staticmethod
     def warm_user_cache(user_id: int):
@@ -272,33 +489,35 @@ class CacheManager:
         except Exception as e:
             logger.error(f"Cache warming failed for user {user_id}: {e}")
 
-def cached(timeout: int = None, key_prefix: str = None, unless: Callable = None):
-    """Advanced caching decorator with invalidation support"""
+def cached(timeout: int = None, key_prefix: str = None, unless: Callable = None, tags: Callable = None,
+           stale_ttl: int = 0, beta: float = 1.0):
+    """
+    Advanced caching decorator with invalidation and stampede protection.
+    
+    ``tags`` is called with the function's arguments and returns the tags the
+    result is registered under, e.g. ``tags=lambda user_id, **_: [f'user:{user_id}']``.
+    Concurrent misses are coalesced into one call; ``beta`` tunes early
+    refresh (0 disables it) and ``stale_ttl`` serves an expired result for
+    that many seconds while it is refreshed in the background.
+    """
     def decorator(func):
+        prefix = key_prefix or f"{func.__module__}.{func.__name__}"
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             # Check unless condition
             if unless and unless():
                 return func(*args, **kwargs)
             
-            # Generate cache key
-            prefix = key_prefix or f"{func.__module__}.{func.__name__}"
             cache_key = f"{prefix}:{CacheManager.generate_key(*args, **kwargs)}"
-            
-            # Try to get from cache
-            cached_result = cache.get(cache_key)
-            if cached_result is not None:
-                return cached_result
-            
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result, timeout or CacheConfig.MEDIUM_CACHE)
-            
-            return result
+            return cache_guard.fetch(
+                cache_key, lambda: func(*args, **kwargs), timeout or CacheConfig.MEDIUM_CACHE, prefix,
+                tags=tags(*args, **kwargs) if tags else None, stale_ttl=stale_ttl, beta=beta
+            )
         
         # Add cache invalidation method
         wrapper.invalidate = lambda *args, **kwargs: cache.delete(
-            f"{key_prefix or func.__module__}.{func.__name__}:{CacheManager.generate_key(*args, **kwargs)}"
+            f"{prefix}:{CacheManager.generate_key(*args, **kwargs)}"
         )
         
         return wrapper
@@ -371,29 +590,33 @@ class SessionCache:
     @staticmethod
     def clear_user_session(user_id: int) -> int:
         """Clear all session cache for a user"""
-        pattern = f"{CacheConfig.SESSION_PREFIX}:{user_id}:*"
-        return cache.delete_pattern(pattern)
+        return cache.invalidate_tags(f"{CacheConfig.SESSION_PREFIX}:{user_id}")
 
 class QueryCache:
     """Database query result caching"""
     
     @staticmethod
-    def cache_query_result(query_hash: str, result: Any, timeout: int = None):
+    def _key(query_hash: str, tables: List[str] = None) -> str:
+        """Embed the generation of every table the query reads, so a table write orphans it"""
+        tables = sorted(tables or ['_untracked'])
+        generations = ','.join(f"{table}.{cache.generation(f'query:{table}')}" for table in tables)
+        return f"query:{generations}:{query_hash}"
+    
+    @staticmethod
+    def cache_query_result(query_hash: str, result: Any, timeout: int = None, tables: List[str] = None):
         """Cache database query result"""
-        cache_key = f"query:{query_hash}"
-        cache.set(cache_key, result, timeout or CacheConfig.MEDIUM_CACHE)
+        cache.set(QueryCache._key(query_hash, tables), result, timeout or CacheConfig.MEDIUM_CACHE)
     
     @staticmethod
-    def get_cached_query_result(query_hash: str) -> Any:
+    def get_cached_query_result(query_hash: str, tables: List[str] = None) -> Any:
         """Get cached database query result"""
-        cache_key = f"query:{query_hash}"
-        return cache.get(cache_key)
+        return cache.get(QueryCache._key(query_hash, tables))
     
     @staticmethod
     def invalidate_table_cache(table_name: str):
-        """Invalidate all cached queries for a table"""
-        pattern = f"query:*{table_name}*"
-        cache.delete_pattern(pattern)
+        """Invalidate all cached queries for a table (and queries cached without a table list)"""
+        cache.bump_namespace(f'query:{table_name}')
+        cache.bump_namespace('query:_untracked')
 
 def setup_caching(app):
     """Setup caching for Flask application"""
@@ -413,7 +636,7 @@ def setup_caching(app):
             # Warm system-wide cache
             try:
                 # Cache system configuration
-                system_key = f"{CacheConfig.API_PREFIX}:system:config"
+                system_key = cache.namespaced_key('system', f"{CacheConfig.API_PREFIX}:config")
                 system_config = {'version': '2.0.0', 'maintenance': False}
                 cache.set(system_key, system_config, CacheConfig.DAILY_CACHE)
                 
@@ -6,11 +6,11 @@ Implements comprehensive audit trails for banking compliance
 import json
 import logging
 import os
-from datetime import datetime, timezone
+import uuid
+from datetime import date, datetime, timezone
 from typing import Dict, Any, Optional
 from enum import Enum
 from pathlib import Path
-import threading
 from flask import request, g
 from flask_login import current_user
 
@@ -63,7 +63,6 @@ class CentralizedAuditLogger:
     
     def __init__(self):
         self.setup_audit_logging()
-        self._lock = threading.Lock()
         
     def setup_audit_logging(self):
         """Setup centralized audit logging configuration"""
@@ -175,52 +174,51 @@ class CentralizedAuditLogger:
         """
         
         try:
-            with self._lock:
-                # Generate correlation ID if not provided
-                if not correlation_id:
-                    correlation_id = self._generate_correlation_id()
-                
-                # Collect request context
-                request_context = self._get_request_context()
-                
-                # Collect user context
-                user_context = self._get_user_context()
-                
-                # Build audit record
-                audit_record = {
-                    'correlation_id': correlation_id,
-                    'timestamp': datetime.now(timezone.utc).isoformat(),
-                    'event_type': event_type.value,
-                    'severity': severity.value,
-                    'description': description,
-                    'resource': resource,
-                    'resource_id': resource_id,
-                    'user_context': user_context,
-                    'request_context': request_context,
-                    'additional_data': additional_data or {},
-                    'compliance_flags': self._get_compliance_flags(event_type),
-                    'retention_period': self._get_retention_period(event_type)
-                }
-                
-                # Log the audit record
-                log_level = self._get_log_level(severity)
-                audit_message = self._format_audit_message(audit_record)
-                
-                audit_logger.log(log_level, audit_message)
-                
-                # Log to appropriate severity-specific log
-                if severity == AuditSeverity.CRITICAL:
-                    audit_logger.critical(f"CRITICAL | {audit_message}")
-                elif event_type in [AuditEventType.LOGIN_FAILED, AuditEventType.SECURITY_INCIDENT, AuditEventType.SUSPICIOUS_ACTIVITY]:
-                    audit_logger.warning(f"SECURITY | {audit_message}")
-                elif event_type in [AuditEventType.TRANSACTION_CREATE, AuditEventType.FUNDS_TRANSFER, AuditEventType.TRANSACTION_MODIFY]:
-                    audit_logger.info(f"TRANSACTION | {audit_message}")
-                
-                # Store in database
-                self._store_audit_record(audit_record)
-                
-                return correlation_id
-                
+            # Generate correlation ID if not provided
+            if not correlation_id:
+                correlation_id = self._generate_correlation_id()
+            
+            # Collect request context
+            request_context = self._get_request_context()
+            
+            # Collect user context
+            user_context = self._get_user_context()
+            
+            # Build audit record
+            audit_record = {
+                'correlation_id': correlation_id,
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'event_type': event_type.value,
+                'severity': severity.value,
+                'description': description,
+                'resource': resource,
+                'resource_id': resource_id,
+                'user_context': user_context,
+                'request_context': request_context,
+                'additional_data': additional_data or {},
+                'compliance_flags': self._get_compliance_flags(event_type),
+                'retention_period': self._get_retention_period(event_type)
+            }
+            
+            # Log the audit record (serialized once and reused for storage)
+            log_level = self._get_log_level(severity)
+            audit_message = self._format_audit_message(audit_record)
+            
+            audit_logger.log(log_level, audit_message)
+            
+            # Log to appropriate severity-specific log
+            if severity == AuditSeverity.CRITICAL:
+                audit_logger.critical(f"CRITICAL | {audit_message}")
+            elif event_type in [AuditEventType.LOGIN_FAILED, AuditEventType.SECURITY_INCIDENT, AuditEventType.SUSPICIOUS_ACTIVITY]:
+                audit_logger.warning(f"SECURITY | {audit_message}")
+            elif event_type in [AuditEventType.TRANSACTION_CREATE, AuditEventType.FUNDS_TRANSFER, AuditEventType.TRANSACTION_MODIFY]:
+                audit_logger.info(f"TRANSACTION | {audit_message}")
+            
+            # Store in database
+            self._store_audit_record(audit_record, audit_message)
+            
+            return correlation_id
+            
         except Exception as e:
             # Ensure audit logging failures don't break the application
             try:
@@ -231,7 +229,6 @@ class CentralizedAuditLogger:
     
     def _generate_correlation_id(self) -> str:
         """Generate unique correlation ID for event tracking"""
-        import uuid
         return f"AUDIT_{datetime.now().strftime('%Y%m%d')}_{uuid.uuid4().hex[:8].upper()}"
     
     def _get_request_context(self) -> Dict[str, Any]:
@@ -331,7 +328,7 @@ class CentralizedAuditLogger:
         try:
             # Create a serializable copy of the audit record
             serializable_record = self._make_serializable(audit_record)
-            return json.dumps(serializable_record, ensure_ascii=False, separators=(',', ':'))
+            return json.dumps(serializable_record, ensure_ascii=False, separators=(',', ':'), default=str)
         except Exception as e:
             # Fallback to basic string representation
             return f"AUDIT_FORMAT_ERROR: {str(audit_record)[:500]}..."
@@ -351,23 +348,31 @@ class CentralizedAuditLogger:
         else:
             return obj
     
-    def _store_audit_record(self, audit_record: dict):
-        """Store audit record in database"""
+    def _store_audit_record(self, audit_record: dict, serialized_record: str = None):
+        """Store audit record in database via the asynchronous audit sink"""
         try:
-            from .models import AuditLog
-            from . import db
+            from .audit_sink import audit_sink
             
-            # Create database audit log entry
-            db_audit_log = AuditLog(
-                event_type=audit_record['event_type'],
-                event_description=audit_record['description'],
-                user_id=audit_record['user_context'].get('user_id'),
-                session_id=audit_record['request_context'].get('session_id', ''),
-                user_ip=audit_record['request_context'].get('ip_address', ''),
-                additional_data=json.dumps(audit_record, default=str)
-            )
+            row = {
+                'log_id': str(uuid.uuid4()),
+                'event_type': audit_record['event_type'],
+                'event_description': audit_record['description'],
+                'user_id': audit_record['user_context'].get('user_id'),
+                'session_id': audit_record['request_context'].get('session_id') or '',
+                'user_ip': audit_record['request_context'].get('ip_address') or '',
+                'additional_data': serialized_record or json.dumps(audit_record, default=str),
+                'created_at': datetime.utcnow()
+            }
+            
+            if audit_sink.enabled:
+                audit_sink.submit(row)
+                return
+            
+            # No application bound (scripts, shell): write synchronously
+            from .extensions import db
+            from .models import AuditLog
             
-            db.session.add(db_audit_log)
+            db.session.add(AuditLog(**row))
             db.session.commit()
             
         except Exception as e:
@@ -15,6 +15,16 @@ class DatabaseMigration:
     Automatic database migration system for handling schema changes
     """
     
+    # Applied in order by the bootstrap command; the names feed the schema fingerprint
+    MIGRATION_STEPS = (
+        '_migrate_users_table',
+        '_migrate_kyc_verifications_table',
+        '_migrate_communications_tables',
+        '_migrate_security_events_table',
+        '_migrate_logs_tables',
+        '_ensure_pagination_indexes',
+    )
+    
     def __init__(self):
         self.migrations_applied = []
         
@@ -24,16 +34,8 @@ class DatabaseMigration:
         """
         try:
             with db.engine.connect() as connection:
-                # Check and apply User table migrations
-                self._migrate_users_table(connection)
-                
-                # Check and apply KYC verifications table migrations
-                self._migrate_kyc_verifications_table(connection)
-                
-                # Check and apply other table migrations
-                self._migrate_communications_tables(connection)
-                self._migrate_security_events_table(connection)
-                self._migrate_logs_tables(connection)
+                for step in self.MIGRATION_STEPS:
+                    getattr(self, step)(connection)
                 
                 logger.info(f"Database migrations completed. Applied: {len(self.migrations_applied)}")
                 return True
@@ -398,6 +400,30 @@ class DatabaseMigration:
             # Add future column migrations here if needed
             logger.info(f"{table_name} table exists and is up to date")
 
+    def _ensure_pagination_indexes(self, connection):
+        """Composite indexes behind keyset pagination; create_all() does not add them to existing tables"""
+        indexes = [
+            ('transactions', 'idx_transaction_account_created_id', 'account_id, created_at, id'),
+            ('exchange_transactions', 'idx_exchange_tx_user_created_id', 'user_id, created_at, id'),
+            ('security_events', 'idx_security_event_timestamp_id', 'event_timestamp, id'),
+            ('security_events', 'idx_security_event_type_timestamp_id', 'event_type, event_timestamp, id'),
+        ]
+        
+        inspector = inspect(connection)
+        for table_name, index_name, columns in indexes:
+            try:
+                if not inspector.has_table(table_name):
+                    continue
+                if index_name in {index['name'] for index in inspector.get_indexes(table_name)}:
+                    continue
+                connection.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns})"))
+                connection.commit()
+                self.migrations_applied.append(f"{table_name}.{index_name}")
+                logger.info(f"Applied migration: Add {index_name} on {table_name}")
+            except Exception as e:
+                connection.rollback()
+                logger.warning(f"Index migration failed for {table_name}.{index_name}: {e}")
+    
     def get_migration_status(self) -> Dict[str, Any]:
         """Get status of all database migrations"""
         try:
@@ -20,6 +20,8 @@ import logging
 import os
 from dataclasses import dataclass, asdict
 import threading
+from modules.core.rate_limiter import RateLimitRule, token_limiter
+from modules.core.attack_scanner import AttackPatternScanner
 
 logger = logging.getLogger(__name__)
 
@@ -52,10 +54,14 @@ class EnterpriseSecurityManager:
         self.security_events = []
         self.blocked_ips = set()
         self.suspicious_ips = set()
-        self.rate_limit_cache = {}
+        self.rate_limiter = token_limiter
         self.session_tracking = {}
         self.attack_patterns = self._init_attack_patterns()
         self.security_rules = self._init_security_rules()
+        self.attack_scanner = AttackPatternScanner(
+            self.attack_patterns,
+            {attack_type: self._calculate_attack_risk(attack_type) for attack_type in self.attack_patterns}
+        )
         self._lock = threading.RLock()
         
     def _init_threat_intelligence(self) -> ThreatIntelligence:
@@ -241,6 +247,7 @@ class EnterpriseSecurityManager:
                 'max_request_size': 10 * 1024 * 1024,  # 10MB
                 'max_json_depth': 10,
                 'max_array_length': 1000,
+                'scan_time_budget_ms': 50,
                 'blocked_file_extensions': [
                     '.exe', '.bat', '.cmd', '.com', '.scr', '.pif',
                     '.vbs', '.js', '.jar', '.php', '.asp', '.jsp'
@@ -306,29 +313,39 @@ class EnterpriseSecurityManager:
             logger.error(f"IP reputation check failed: {e}")
             return True, "Unable to verify IP reputation"
     
-    def detect_attack_patterns(self, content: str) -> List[Dict[str, Any]]:
+    def detect_attack_patterns(self, content: str, time_budget_ms: float = None) -> List[Dict[str, Any]]:
         """Detect attack patterns in request content"""
-        detected_attacks = []
-        
         try:
-            for attack_type, patterns in self.attack_patterns.items():
-                for pattern in patterns:
-                    matches = re.finditer(pattern, content, re.IGNORECASE | re.MULTILINE)
-                    for match in matches:
-                        detected_attacks.append({
-                            'type': attack_type,
-                            'pattern': pattern,
-                            'match': match.group(),
-                            'position': match.span(),
-                            'risk_score': self._calculate_attack_risk(attack_type)
-                        })
+            if time_budget_ms is None:
+                time_budget_ms = self.security_rules['content_security']['scan_time_budget_ms']
+            
+            result = self.attack_scanner.scan(content, time_budget_ms)
+            if result.truncated:
+                logger.warning(f"Attack pattern scan exceeded {time_budget_ms}ms budget "
+                               f"({len(content)} chars, {len(result.matches)} matches so far)")
             
-            return detected_attacks
+            return result.matches
             
         except Exception as e:
             logger.error(f"Attack pattern detection failed: {e}")
             return []
     
+    def detect_attack_patterns_stream(self, chunks, time_budget_ms: float = None) -> List[Dict[str, Any]]:
+        """Detect attack patterns in content delivered as text chunks (large bodies)"""
+        try:
+            if time_budget_ms is None:
+                time_budget_ms = self.security_rules['content_security']['scan_time_budget_ms']
+            
+            result = self.attack_scanner.scan_stream(chunks, time_budget_ms)
+            if result.truncated:
+                logger.warning(f"Streaming attack pattern scan exceeded {time_budget_ms}ms budget")
+            
+            return result.matches
+            
+        except Exception as e:
+            logger.error(f"Streaming attack pattern detection failed: {e}")
+            return []
+    
     def _calculate_attack_risk(self, attack_type: str) -> int:
         """Calculate risk score for attack type"""
         risk_scores = {
@@ -341,12 +358,8 @@ class EnterpriseSecurityManager:
         return risk_scores.get(attack_type, 5)
     
     def check_rate_limit(self, ip: str, user_id: str = None, endpoint: str = 'default') -> Tuple[bool, Dict[str, Any]]:
-        """Enhanced rate limiting with multiple tiers"""
+        """Enhanced rate limiting with multiple tiers backed by the shared token bucket limiter"""
         try:
-            current_time = int(time.time())
-            minute_window = current_time // 60
-            hour_window = current_time // 3600
-            
             # Determine rate limit tier
             tier = 'public'
             if current_user.is_authenticated:
@@ -357,73 +370,30 @@ class EnterpriseSecurityManager:
                     tier = 'authenticated'
             
             limits = self.security_rules['rate_limits'][tier]
+            minute_rule = RateLimitRule('minute', limits['requests_per_minute'], 60)
+            hour_rule = RateLimitRule('hour', limits['requests_per_hour'], 3600)
             
-            # Create unique keys
-            minute_key = f"rate:{ip}:{user_id}:{endpoint}:{minute_window}"
-            hour_key = f"rate:{ip}:{user_id}:{endpoint}:{hour_window}"
+            result = self.rate_limiter.hit(f"rate:{ip}:{user_id}:{endpoint}", (minute_rule, hour_rule))
             
-            # Check current counts
-            minute_count = self.rate_limit_cache.get(minute_key, 0) + 1
-            hour_count = self.rate_limit_cache.get(hour_key, 0) + 1
-            
-            # Update cache
-            self.rate_limit_cache[minute_key] = minute_count
-            self.rate_limit_cache[hour_key] = hour_count
-            
-            # Clean old entries (simple cleanup)
-            if len(self.rate_limit_cache) > 10000:
-                self._cleanup_rate_limit_cache()
-            
-            # Check limits
-            if minute_count > limits['requests_per_minute']:
-                return False, {
-                    'reason': 'Minute limit exceeded',
-                    'limit': limits['requests_per_minute'],
-                    'count': minute_count,
-                    'reset_time': (minute_window + 1) * 60
-                }
-            
-            if hour_count > limits['requests_per_hour']:
+            if not result.allowed:
+                reason = 'Minute limit exceeded' if result.rule is minute_rule else 'Hour limit exceeded'
                 return False, {
-                    'reason': 'Hour limit exceeded',
-                    'limit': limits['requests_per_hour'],
-                    'count': hour_count,
-                    'reset_time': (hour_window + 1) * 3600
+                    'reason': reason,
+                    'limit': result.rule.limit,
+                    'count': result.used(result.rule) + 1,
+                    'reset_time': int(time.time() + result.retry_after) + 1
                 }
             
             return True, {
                 'tier': tier,
-                'minute_count': minute_count,
-                'hour_count': hour_count,
+                'minute_count': result.used(minute_rule),
+                'hour_count': result.used(hour_rule),
                 'limits': limits
             }
             
         except Exception as e:
             logger.error(f"Rate limit check failed: {e}")
             return True, {'error': str(e)}
-    
-    def _cleanup_rate_limit_cache(self):
-        """Clean up old rate limit cache entries"""
-        current_time = int(time.time())
-        current_minute = current_time // 60
-        current_hour = current_time // 3600
-        
-        # Remove entries older than 2 hours
-        keys_to_remove = []
-        for key in self.rate_limit_cache:
-            try:
-                parts = key.split(':')
-                if len(parts) >= 5:
-                    window = int(parts[-1])
-                    if 'minute' in key and window < current_minute - 120:
-                        keys_to_remove.append(key)
-                    elif 'hour' in key and window < current_hour - 2:
-                        keys_to_remove.append(key)
-            except (ValueError, IndexError):
-                keys_to_remove.append(key)
-        
-        for key in keys_to_remove:
-            del self.rate_limit_cache[key]
 
 # Global security manager instance
 security_manager = EnterpriseSecurityManager()
@@ -643,7 +613,7 @@ def get_security_status() -> Dict[str, Any]:
         'recent_events': len([e for e in security_manager.security_events 
                             if datetime.fromisoformat(e.timestamp) > datetime.utcnow() - timedelta(hours=1)]),
         'active_sessions': len(security_manager.session_tracking),
-        'rate_limit_cache_size': len(security_manager.rate_limit_cache),
+        'rate_limiter': security_manager.rate_limiter.get_stats(),
         'threat_intelligence_loaded': True,
         'attack_patterns_count': sum(len(patterns) for patterns in security_manager.attack_patterns.values()),
         'security_level': 'ENTERPRISE_GRADE'
@@ -0,0 +1,388 @@
+"""
+Integration HTTP Client
+Pooled keep-alive sessions, shared token buckets, circuit breakers and concurrent fan-out for provider APIs
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from modules.core.rate_limiter import RateLimitRule, token_limiter
+
+logger = logging.getLogger(__name__)
+
+
+def _explorer_throttled(response: requests.Response) -> bool:
+    """Etherscan-style APIs answer 200 with ``"result": "Max rate limit reached"`` when throttling"""
+    return response.status_code == 200 and b'rate limit reached' in response.content[:256].lower()
+
+
+def _binance_banned(response: requests.Response) -> bool:
+    """Binance answers 418 once an IP keeps sending requests after a 429"""
+    return response.status_code == 418
+
+
+@dataclass(frozen=True)
+class ProviderConfig:
+    """How to reach one provider and how hard it may be called"""
+    name: str
+    base_url: str
+    rules: Tuple[RateLimitRule, ...]
+    timeout: float = 10.0
+    # Seconds to stop calling the provider after it reports throttling without a Retry-After
+    throttle_pause: float = 1.0
+    is_throttled: Optional[Callable[[requests.Response], bool]] = None
+
+
+# Published limits per API key. Buckets live in token_limiter, so with a Redis
+# backend they are shared by every worker using the same key. Binance's
+# per-minute limit is request weight: callers pass each endpoint's weight.
+PROVIDERS: Dict[str, ProviderConfig] = {
+    'etherscan': ProviderConfig('etherscan', 'https://api.etherscan.io',
+                                (RateLimitRule('second', 5, 1),), is_throttled=_explorer_throttled),
+    'polygonscan': ProviderConfig('polygonscan', 'https://api.polygonscan.com',
+                                  (RateLimitRule('second', 5, 1),), is_throttled=_explorer_throttled),
+    'binance': ProviderConfig('binance', 'https://api.binance.com',
+                              (RateLimitRule('second', 20, 1), RateLimitRule('minute', 1200, 60, weighted=True)),
+                              is_throttled=_binance_banned),
+    'coingecko': ProviderConfig('coingecko', 'https://api.coingecko.com',
+                                (RateLimitRule('minute', 30, 60),), throttle_pause=60.0),
+}
+
+
+class IntegrationUnavailable(requests.exceptions.RequestException):
+    """A provider call refused locally, without touching the network"""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ProviderRateLimited(IntegrationUnavailable):
+    """No token left in the provider's bucket, or the provider asked us to back off"""
+
+
+class CircuitOpen(IntegrationUnavailable):
+    """The provider kept failing; calls are refused until the breaker's reset timeout"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker. After ``failure_threshold`` connection
+    errors or 5xx responses in a row the circuit opens and calls fail fast
+    for ``reset_timeout`` seconds; then a single probe call is let through
+    and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> float:
+        """0 when a call may proceed, otherwise seconds until the next probe"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0.0
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == self.OPEN and remaining <= 0:
+                self.state = self.HALF_OPEN
+                return 0.0
+            # Half-open: the probe is already in flight
+            return max(remaining, 0.001)
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def release_probe(self):
+        """The half-open probe never reached the provider; let the next call probe instead"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic() - self.reset_timeout
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opens += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class ProviderClient:
+    """
+    HTTP client for one provider.
+
+    Requests reuse keep-alive connections from a per-process
+    ``requests.Session``. Each call takes a token from the provider's shared
+    bucket first. Without a token it raises ProviderRateLimited straight
+    away instead of sleeping in the request thread. Fan-out workers may wait
+    for a token until their batch deadline. 429 responses (and throttling
+    reported in the body) block the bucket for the provider's Retry-After.
+    """
+
+    def __init__(self, config: ProviderConfig, pool_size: int = 10, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, limiter=None, wait_budget: Callable[[], float] = None):
+        self.config = config
+        self.pool_size = pool_size
+        self.limiter = limiter or token_limiter
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.wait_budget = wait_budget or (lambda: 0.0)
+        self.limit_key = f"integration:{config.name}"
+        self._session: Optional[requests.Session] = None
+        self._session_pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'server_errors': 0, 'rate_limited': 0,
+                      'provider_throttled': 0, 'circuit_rejected': 0, 'total_ms': 0.0}
+
+    @property
+    def session(self) -> requests.Session:
+        # Pooled sockets must not be shared with a forked worker
+        if self._session is None or self._session_pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._session_pid != os.getpid():
+                    session = requests.Session()
+                    # One immediate retry for a keep-alive connection the provider already closed
+                    retries = Retry(total=1, connect=1, read=0, status=0, other=0, backoff_factor=0)
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, max_retries=retries)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session, self._session_pid = session, os.getpid()
+        return self._session
+
+    def get(self, path: str = '', weight: int = 1, **kwargs) -> requests.Response:
+        return self.request('GET', path, weight=weight, **kwargs)
+
+    def post(self, path: str = '', weight: int = 1, **kwargs) -> requests.Response:
+        return self.request('POST', path, weight=weight, **kwargs)
+
+    def request(self, method: str, path: str = '', weight: int = 1, **kwargs) -> requests.Response:
+        """
+        Send a request to ``base_url + path`` (or an absolute URL) through
+        the limiter and breaker. ``weight`` is what the call costs against
+        weighted buckets. Inside a fan-out a throttled call is sent once more
+        after the provider's back-off if the deadline allows it; request
+        threads get the throttled response back straight away.
+        """
+        url = path if path.startswith(('http://', 'https://')) else f"{self.config.base_url}{path}"
+        kwargs.setdefault('timeout', self.config.timeout)
+        for attempt in range(2):
+            response = self._send(method, url, weight, kwargs)
+            if not self._throttled(response):
+                return response
+            retry_after = self._retry_after(response)
+            self.stats['provider_throttled'] += 1
+            self.limiter.block(self.limit_key, retry_after)
+            if attempt or self.wait_budget() <= retry_after:
+                return response
+        return response
+
+    def _send(self, method: str, url: str, weight: int, kwargs: Dict[str, Any]) -> requests.Response:
+        retry_after = self.breaker.allow()
+        if retry_after:
+            self.stats['circuit_rejected'] += 1
+            raise CircuitOpen(f"{self.config.name} circuit open", retry_after)
+        try:
+            self._acquire(weight)
+        except ProviderRateLimited:
+            self.breaker.release_probe()
+            raise
+
+        started = time.perf_counter()
+        self.stats['requests'] += 1
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            self.stats['errors'] += 1
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.release_probe()
+            raise
+        finally:
+            self.stats['total_ms'] += (time.perf_counter() - started) * 1000
+
+        if response.status_code >= 500:
+            self.stats['server_errors'] += 1
+            self.breaker.record_failure()
+        else:
+            # A throttled provider is up; that is the limiter's business, not the breaker's
+            self.breaker.record_success()
+        return response
+
+    def _throttled(self, response: requests.Response) -> bool:
+        return response.status_code == 429 or bool(self.config.is_throttled and self.config.is_throttled(response))
+
+    def _acquire(self, weight: int = 1):
+        deadline = time.monotonic() + self.wait_budget()
+        while True:
+            wait = self.limiter.blocked_until(self.limit_key) - time.time()
+            if wait <= 0:
+                result = self.limiter.hit(self.limit_key, self.config.rules, weight)
+                if result.allowed:
+                    return
+                wait = result.retry_after
+            if time.monotonic() + wait > deadline:
+                self.stats['rate_limited'] += 1
+                raise ProviderRateLimited(f"{self.config.name} rate limit reached", wait)
+            time.sleep(wait)
+
+    def _retry_after(self, response: requests.Response) -> float:
+        try:
+            return max(float(response.headers.get('Retry-After', '')), 0.1)
+        except ValueError:
+            return self.config.throttle_pause
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'avg_ms': round(self.stats['total_ms'] / self.stats['requests'], 2) if self.stats['requests'] else 0.0,
+            'circuit': self.breaker.state,
+            'circuit_opens': self.breaker.opens
+        }
+
+
+class _FanOutState(threading.local):
+    deadline: Optional[float] = None
+    in_pool = False
+    patience = 0.0
+
+
+class IntegrationHttp:
+    """Registry of provider clients plus the shared fan-out executor"""
+
+    def __init__(self):
+        self.providers: Dict[str, ProviderConfig] = dict(PROVIDERS)
+        self.pool_size = 10
+        self.failure_threshold = 5
+        self.reset_timeout = 30.0
+        self.fanout_workers = 16
+        self.fanout_timeout = 15.0
+        self._clients: Dict[str, ProviderClient] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._state = _FanOutState()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.pool_size = app.config.get('INTEGRATION_HTTP_POOL_SIZE', self.pool_size)
+        self.failure_threshold = app.config.get('INTEGRATION_CIRCUIT_FAILURES', self.failure_threshold)
+        self.reset_timeout = app.config.get('INTEGRATION_CIRCUIT_RESET', self.reset_timeout)
+        self.fanout_workers = app.config.get('INTEGRATION_FANOUT_WORKERS', self.fanout_workers)
+        self.fanout_timeout = app.config.get('INTEGRATION_FANOUT_TIMEOUT', self.fanout_timeout)
+        base_urls = app.config.get('INTEGRATION_BASE_URLS') or {}
+        rate_limits = app.config.get('INTEGRATION_RATE_LIMITS') or {}
+        for name, provider in PROVIDERS.items():
+            rules = provider.rules
+            if name in rate_limits:
+                # Paid tiers raise the per-second limit; longer windows still apply
+                rules = (RateLimitRule('second', rate_limits[name], 1),) + tuple(
+                    rule for rule in rules if rule.name != 'second')
+            self.providers[name] = replace(
+                provider,
+                base_url=base_urls.get(name, provider.base_url).rstrip('/'),
+                rules=rules
+            )
+        with self._lock:
+            self._clients.clear()
+
+    def client(self, name: str) -> ProviderClient:
+        client = self._clients.get(name)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(name)
+                if client is None:
+                    client = ProviderClient(self.providers[name], pool_size=self.pool_size,
+                                            failure_threshold=self.failure_threshold,
+                                            reset_timeout=self.reset_timeout, wait_budget=self._wait_budget)
+                    self._clients[name] = client
+        return client
+
+    # === FAN-OUT ===
+
+    def fan_out(self, fn: Callable[[Any], Any], items: Iterable[Any], timeout: float = None) -> List[Any]:
+        """
+        Call ``fn(item)`` for every item concurrently and return the results
+        in input order. A call that raises or misses the deadline yields None.
+        Calls made from inside a fan-out run inline, so nesting cannot
+        exhaust the pool.
+        """
+        items = list(items)
+        if len(items) <= 1 or self._state.in_pool:
+            return [self._call(fn, item, index) for index, item in enumerate(items)]
+
+        deadline = time.monotonic() + (timeout or self.fanout_timeout)
+        futures = [self._pool().submit(self._run, fn, item, deadline) for item in items]
+        results = []
+        for index, future in enumerate(futures):
+            try:
+                results.append(future.result(timeout=max(deadline - time.monotonic(), 0)))
+            except Exception as e:
+                future.cancel()
+                logger.warning(f"Integration fan-out call {index + 1}/{len(items)} failed: {e!r}")
+                results.append(None)
+        return results
+
+    def _run(self, fn, item, deadline: float):
+        self._state.in_pool, self._state.deadline = True, deadline
+        try:
+            return fn(item)
+        finally:
+            self._state.in_pool, self._state.deadline = False, None
+
+    @staticmethod
+    def _call(fn, item, index: int):
+        try:
+            return fn(item)
+        except Exception as e:
+            logger.warning(f"Integration call {index + 1} failed: {e!r}")
+            return None
+
+    @contextmanager
+    def patience(self, seconds: float):
+        """Let each call from the current thread wait up to ``seconds`` for a rate limit token (background jobs)"""
+        previous, self._state.patience = self._state.patience, seconds
+        try:
+            yield
+        finally:
+            self._state.patience = previous
+
+    def _wait_budget(self) -> float:
+        """Fan-out workers may wait for a token until their deadline; request threads never wait"""
+        deadline = self._state.deadline
+        return max(deadline - time.monotonic(), 0.0) if deadline else self._state.patience
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None or self._executor_pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._executor_pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=self.fanout_workers,
+                                                        thread_name_prefix='integration-http')
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: client.get_stats() for name, client in self._clients.items()}
+
+
+# Global integration HTTP layer shared by the Binance, Etherscan and Polygonscan services
+integration_http = IntegrationHttp()
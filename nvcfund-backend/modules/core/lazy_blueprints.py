@@ -0,0 +1,291 @@
+"""
+Lazy Blueprint Loading
+Route manifest, import-time profiling and on-demand registration of module blueprint groups
+"""
+
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from flask import Flask, url_for
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+DEFAULT_MANIFEST_NAME = 'route_manifest.json'
+
+
+def static_prefix(rule: str) -> str:
+    """Literal path before the first converter: '/banking/accounts/<int:id>' -> '/banking/accounts'"""
+    static = rule.split('<', 1)[0]
+    if '<' in rule:
+        static = static.rsplit('/', 1)[0]
+    return static.rstrip('/') or '/'
+
+
+def path_prefixes(path: str) -> List[str]:
+    """'/a/b/c' -> ['/a/b/c', '/a/b', '/a', '/']"""
+    path = path.rstrip('/') or '/'
+    prefixes = [path]
+    while path != '/':
+        path = path.rsplit('/', 1)[0] or '/'
+        prefixes.append(path)
+    return prefixes
+
+
+@dataclass
+class GroupProfile:
+    """What registering one blueprint group cost and what it added"""
+    name: str
+    import_ms: float
+    modules_imported: int
+    third_party: List[str] = field(default_factory=list)
+    blueprints: List[str] = field(default_factory=list)
+    prefixes: List[str] = field(default_factory=list)
+    sources: List[str] = field(default_factory=list)
+
+
+class RegistrationProfiler:
+    """Times each blueprint group during eager registration and records the rules it adds"""
+
+    def __init__(self, app: Flask):
+        self.app = app
+        self.profiles: Dict[str, GroupProfile] = {}
+        app.extensions['blueprint_registration'] = self
+
+    @contextmanager
+    def measure(self, name: str):
+        modules_before = set(sys.modules)
+        rules_before = len(list(self.app.url_map.iter_rules()))
+        blueprints_before = set(self.app.blueprints)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            new_modules = [name for name in sys.modules if name not in modules_before]
+            new_rules = list(self.app.url_map.iter_rules())[rules_before:]
+            self.profiles[name] = GroupProfile(
+                name=name,
+                import_ms=round(elapsed_ms, 2),
+                modules_imported=len(new_modules),
+                third_party=sorted({module.split('.')[0] for module in new_modules
+                                    if not module.startswith('modules')} - set(sys.builtin_module_names)),
+                blueprints=sorted(set(self.app.blueprints) - blueprints_before),
+                prefixes=sorted({static_prefix(rule.rule) for rule in new_rules}),
+                sources=sorted(self._source_paths(new_modules))
+            )
+
+    def _source_paths(self, module_names: List[str]) -> List[str]:
+        paths = []
+        for module_name in module_names:
+            if not module_name.startswith('modules.'):
+                continue
+            path = getattr(sys.modules.get(module_name), '__file__', None)
+            if path:
+                paths.append(os.path.relpath(path, self.app.root_path))
+        return paths
+
+    def log_report(self, limit: int = 15):
+        """Log the most expensive groups; import cost is cumulative, so shared dependencies count once"""
+        total = sum(profile.import_ms for profile in self.profiles.values())
+        logger.info(f"Blueprint registration took {total:.0f} ms across {len(self.profiles)} groups")
+        for profile in sorted(self.profiles.values(), key=lambda p: p.import_ms, reverse=True)[:limit]:
+            heavy = f" (pulls in {', '.join(profile.third_party[:6])})" if profile.third_party else ''
+            logger.info(f"  {profile.name:<20} {profile.import_ms:>8.1f} ms  "
+                        f"{profile.modules_imported:>4} modules{heavy}")
+
+
+class RouteManifest:
+    """
+    Maps URL prefixes and blueprint names to registration groups.
+
+    Built from an eager registration (scripts/build_route_manifest.py) and
+    read at boot in lazy mode. It also lists the model and WebSocket handler
+    modules that must still be imported up front.
+    """
+
+    def __init__(self, data: Dict):
+        self.data = data
+        self.groups: Dict[str, Dict] = data['groups']
+        self.by_prefix: Dict[str, List[str]] = {}
+        self.by_blueprint: Dict[str, str] = {}
+        for name, group in self.groups.items():
+            for prefix in group['prefixes']:
+                self.by_prefix.setdefault(prefix, []).append(name)
+            for blueprint in group['blueprints']:
+                self.by_blueprint[blueprint] = name
+
+    @classmethod
+    def from_profiler(cls, profiler: RegistrationProfiler, websocket_modules: List[str] = None) -> 'RouteManifest':
+        return cls({
+            'version': MANIFEST_VERSION,
+            'built_at': time.time(),
+            'groups': {name: asdict(profile) for name, profile in profiler.profiles.items()},
+            'model_modules': sorted(name for name in sys.modules
+                                    if name.startswith('modules.') and name.rsplit('.', 1)[-1] == 'models'),
+            'websocket_modules': sorted(websocket_modules or [])
+        })
+
+    @classmethod
+    def load(cls, path: str) -> Optional['RouteManifest']:
+        try:
+            with open(path) as handle:
+                return cls(json.load(handle))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Unreadable route manifest {path}: {e}")
+            return None
+
+    def save(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as handle:
+            json.dump(self.data, handle, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def problem(self, group_names: List[str], root_path: str) -> Optional[str]:
+        """Reason the manifest cannot be trusted for this code tree, or None"""
+        if self.data.get('version') != MANIFEST_VERSION:
+            return 'unsupported version'
+        if set(self.groups) != set(group_names):
+            return 'registration groups changed'
+        built_at = self.data.get('built_at', 0)
+        for group in self.groups.values():
+            for source in group['sources']:
+                try:
+                    if os.stat(os.path.join(root_path, source)).st_mtime > built_at:
+                        return f'{source} changed after the manifest was built'
+                except OSError:
+                    return f'{source} is missing'
+        return None
+
+    def groups_for_path(self, path: str) -> List[str]:
+        names = []
+        for prefix in path_prefixes(path):
+            names.extend(self.by_prefix.get(prefix, ()))
+        return names
+
+    def eager_groups(self) -> List[str]:
+        """Groups with rules at the site root cannot be routed by prefix"""
+        return [name for name, group in self.groups.items() if '/' in group['prefixes']]
+
+
+def manifest_path(app: Flask) -> str:
+    return app.config.get('ROUTE_MANIFEST_PATH') or os.path.join(app.root_path, DEFAULT_MANIFEST_NAME)
+
+
+def load_route_manifest(app: Flask) -> Optional[RouteManifest]:
+    """The app's route manifest, read once per process"""
+    if 'route_manifest' not in app.extensions:
+        app.extensions['route_manifest'] = RouteManifest.load(manifest_path(app))
+    return app.extensions['route_manifest']
+
+
+class LazyBlueprintLoader:
+    """
+    WSGI wrapper that registers a blueprint group the first time a request
+    arrives under one of its URL prefixes, and a url_for fallback that loads
+    the group owning an endpoint that is not registered yet.
+    """
+
+    def __init__(self, app: Flask, groups: Dict[str, Callable], manifest: RouteManifest,
+                 registration_results: List[str]):
+        self.app = app
+        self.groups = groups
+        self.manifest = manifest
+        self.registration_results = registration_results
+        self.pending = set(groups)
+        self.load_times: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self.wsgi_app = None
+
+    def install(self):
+        # String relationship() targets only resolve once every model class is imported
+        for module_name in self.manifest.data.get('model_modules', []):
+            try:
+                __import__(module_name)
+            except Exception as e:
+                logger.error(f"Failed to import model module {module_name}: {e}")
+
+        eager = set(self.manifest.eager_groups())
+        for name in [name for name in self.groups if name in eager]:
+            self.load(name, reason='root routes')
+
+        self.wsgi_app = self.app.wsgi_app
+        self.app.wsgi_app = self
+        self.app.url_build_error_handlers.append(self._build_error_handler)
+        self.app.extensions['lazy_blueprints'] = self
+        logger.info(f"Lazy blueprint loading enabled: {len(self.pending)} of {len(self.groups)} groups deferred")
+
+    def __call__(self, environ, start_response):
+        if self.pending:
+            for name in self.manifest.groups_for_path(environ.get('PATH_INFO', '/')):
+                if name in self.pending:
+                    self.load(name, reason=f"first request to {environ.get('PATH_INFO')}")
+        return self.wsgi_app(environ, start_response)
+
+    def load(self, name: str, reason: str = 'on demand'):
+        with self._lock:
+            if name not in self.pending:
+                return
+            register = self.groups.get(name)
+            # Flask refuses setup calls once it has served a request; lazy groups are the exception
+            got_first_request = self.app._got_first_request
+            self.app._got_first_request = False
+            started = time.perf_counter()
+            try:
+                if register is not None:
+                    register(self.app, self.registration_results)
+            except Exception as e:
+                logger.error(f"Lazy registration of blueprint group '{name}' failed: {e}")
+            finally:
+                self.app._got_first_request = got_first_request
+                self.pending.discard(name)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.load_times[name] = round(elapsed_ms, 2)
+            logger.info(f"Loaded blueprint group '{name}' in {elapsed_ms:.1f} ms ({reason})")
+
+    def load_all(self):
+        """Register every deferred group, e.g. for route listings or tests"""
+        for name in list(self.groups):
+            self.load(name, reason='load_all')
+
+    def _build_error_handler(self, error, endpoint: str, values: Dict):
+        blueprint = endpoint.rsplit('.', 1)[0] if '.' in endpoint else None
+        name = self.manifest.by_blueprint.get(blueprint)
+        if name is None or name not in self.pending:
+            return None
+        self.load(name, reason=f"url_for('{endpoint}')")
+        return url_for(endpoint, **values)
+
+    def report(self) -> Dict:
+        return {
+            'loaded': dict(self.load_times),
+            'pending': sorted(self.pending),
+            'manifest_import_ms': {name: group['import_ms'] for name, group in self.manifest.groups.items()}
+        }
+
+
+def install_lazy_blueprints(app: Flask, groups: Dict[str, Callable], registration_results: List[str]) -> bool:
+    """Switch the app to lazy registration; False (register eagerly) without a usable manifest"""
+    manifest = load_route_manifest(app)
+    if manifest is None:
+        logger.warning(f"LAZY_BLUEPRINTS is set but {manifest_path(app)} does not exist; "
+                       f"run scripts/build_route_manifest.py. Registering all blueprints eagerly.")
+        return False
+    problem = manifest.problem(list(groups), app.root_path)
+    if problem:
+        logger.warning(f"Route manifest is stale ({problem}); registering all blueprints eagerly")
+        return False
+
+    LazyBlueprintLoader(app, groups, manifest, registration_results).install()
+    return True
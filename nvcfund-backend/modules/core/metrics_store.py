@@ -0,0 +1,356 @@
+"""
+Ring-Buffer Metrics Store
+Time-bucketed rollups with log-linear latency histograms, mergeable across gunicorn workers
+"""
+
+import atexit
+import glob
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Log-linear (HDR-style) buckets over integer microseconds: values below
+# 2**SUB_BUCKET_BITS get exact buckets, above that every power of two is split
+# into HALF_SUB_BUCKETS buckets, so a bucket is never wider than 1/64 of its value.
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_SUB_BUCKETS = SUB_BUCKETS >> 1
+MAX_TRACKABLE_US = 600_000_000  # 10 minutes
+
+
+def bucket_index(value_us: int) -> int:
+    """Histogram bucket of a non-negative microsecond value (clamped to the trackable range)"""
+    value_us = min(max(int(value_us), 0), MAX_TRACKABLE_US)
+    if value_us < SUB_BUCKETS:
+        return value_us
+    shift = value_us.bit_length() - SUB_BUCKET_BITS
+    return (shift + 1) * HALF_SUB_BUCKETS + (value_us >> shift) - HALF_SUB_BUCKETS
+
+
+def bucket_midpoints(buckets: int) -> np.ndarray:
+    """Representative value (microseconds) of every bucket index"""
+    index = np.arange(buckets)
+    shift = np.maximum(index // HALF_SUB_BUCKETS - 1, 0)
+    lower = np.where(index < SUB_BUCKETS, index, (index % HALF_SUB_BUCKETS + HALF_SUB_BUCKETS) << shift)
+    return lower + ((1 << shift) - 1) / 2.0
+
+
+HISTOGRAM_BUCKETS = bucket_index(MAX_TRACKABLE_US) + 1
+
+
+def histogram_percentiles(counts: np.ndarray, quantiles: Sequence[float]) -> Dict[float, float]:
+    """Percentiles (microseconds) from bucket counts via a cumulative sum; no sorting"""
+    total = counts.sum()
+    if total <= 0:
+        return {q: 0.0 for q in quantiles}
+    cumulative = np.cumsum(counts)
+    midpoints = bucket_midpoints(len(counts))
+    return {
+        q: float(midpoints[np.searchsorted(cumulative, max(math.ceil(q * total), 1))])
+        for q in quantiles
+    }
+
+
+class MetricsStore:
+    """
+    Fixed-size, array-backed rollups for request and system metrics.
+
+    Each resolution (second, minute, hour) is a ring of slots. A slot keeps
+    count/sum/min/max per metric and, for the latency metric, a histogram;
+    slots are tagged with their epoch (``time // width``) and reset when the
+    ring wraps onto them. Samples are accumulated in plain Python for the
+    current second and folded into one slot per resolution when the second
+    changes (or a summary is read), and a window summary reduces at most one
+    ring, so neither depends on traffic.
+
+    All arrays live in one float64 buffer. When ``shared_dir`` is set the
+    buffer is a per-process memory-mapped file in that directory and
+    summaries merge every live worker's file, so the dashboard shows the whole
+    gunicorn pool rather than the worker that served the request.
+    """
+
+    RESOLUTIONS: Tuple[Tuple[str, int, int], ...] = (
+        ('second', 1, 120),
+        ('minute', 60, 180),
+        ('hour', 3600, 72),
+    )
+    HEADER = 4  # pid, last write time, layout version, reserved
+    LAYOUT_VERSION = 1
+    COUNT, SUM, MIN, MAX = range(4)
+
+    def __init__(self, metrics: Sequence[str], latency_metric: str, shared_dir: Optional[str] = None):
+        self.metrics = list(metrics)
+        self.metric_index = {name: i for i, name in enumerate(self.metrics)}
+        self.latency_metric = latency_metric
+        self.shared_dir = shared_dir
+        self._lock = threading.Lock()
+        self._pid = None
+        self._buffer = None
+        self._views = None
+        self._path = None
+        # Samples of the current second, folded into the rings when the second changes
+        self._pending_second: Optional[int] = None
+        self._reset_pending()
+        atexit.register(self.flush)
+
+    def configure(self, shared_dir: Optional[str]):
+        """Switch storage location; the buffer is reallocated on next use"""
+        with self._lock:
+            if shared_dir != self.shared_dir:
+                self.shared_dir = shared_dir
+                self._pid = None
+                self._path = None
+                self._pending_second = None
+                self._reset_pending()
+
+    # === LAYOUT ===
+
+    def _layout_size(self) -> int:
+        metrics = len(self.metrics)
+        size = self.HEADER + 2 * metrics  # header, last value and time per metric
+        for _, _, slots in self.RESOLUTIONS:
+            size += slots * (1 + metrics * 4 + HISTOGRAM_BUCKETS)
+        return size
+
+    def _map_views(self, buffer: np.ndarray) -> Dict[str, Any]:
+        """Named views into a flat buffer: header, last values and one ring per resolution"""
+        metrics = len(self.metrics)
+        views = {'header': buffer[:self.HEADER]}
+        offset = self.HEADER
+        views['last'] = buffer[offset:offset + metrics]
+        views['last_time'] = buffer[offset + metrics:offset + 2 * metrics]
+        offset += 2 * metrics
+        for name, _, slots in self.RESOLUTIONS:
+            epochs = buffer[offset:offset + slots]
+            offset += slots
+            stats = buffer[offset:offset + slots * metrics * 4].reshape(slots, metrics, 4)
+            offset += slots * metrics * 4
+            histograms = buffer[offset:offset + slots * HISTOGRAM_BUCKETS].reshape(slots, HISTOGRAM_BUCKETS)
+            offset += slots * HISTOGRAM_BUCKETS
+            views[name] = (epochs, stats, histograms)
+        return views
+
+    def _ensure_buffer(self):
+        """Allocate this process's buffer (again after a fork, so workers never share one)"""
+        if self._pid == os.getpid():
+            return
+        size = self._layout_size()
+        buffer = None
+        if self.shared_dir:
+            try:
+                os.makedirs(self.shared_dir, exist_ok=True)
+                self._path = os.path.join(self.shared_dir, f"metrics_{os.getpid()}.bin")
+                buffer = np.memmap(self._path, dtype=np.float64, mode='w+', shape=(size,))
+            except Exception as e:
+                logger.warning(f"Shared metrics buffer unavailable, keeping metrics per worker: {e}")
+                self._path = None
+        if buffer is None:
+            buffer = np.zeros(size, dtype=np.float64)
+        views = self._map_views(buffer)
+        for name, _, _ in self.RESOLUTIONS:
+            epochs, stats, _ = views[name]
+            epochs[:] = -1
+            stats[:, :, self.MIN] = np.inf
+            stats[:, :, self.MAX] = -np.inf
+        views['header'][:3] = (os.getpid(), time.time(), self.LAYOUT_VERSION)
+        self._buffer, self._views, self._pid = buffer, views, os.getpid()
+        self._pending_second = None
+        self._reset_pending()
+
+    # === RECORDING ===
+
+    def record(self, values: Dict[str, float], timestamp: Optional[float] = None):
+        """Add one sample per metric in ``values``"""
+        second = int(time.time() if timestamp is None else timestamp)
+        latency = values.get(self.latency_metric)
+        bucket = bucket_index(latency * 1_000_000) if latency is not None else None
+
+        with self._lock:
+            self._ensure_buffer()
+            if second != self._pending_second:
+                self._flush()
+                self._pending_second = second
+            pending = self._pending
+            for name, value in values.items():
+                column = self.metric_index[name]
+                value = float(value)
+                cell = pending[column]
+                cell[self.COUNT] += 1
+                cell[self.SUM] += value
+                if value < cell[self.MIN]:
+                    cell[self.MIN] = value
+                if value > cell[self.MAX]:
+                    cell[self.MAX] = value
+                self._pending_last[column] = value
+            if bucket is not None:
+                self._pending_histogram[bucket] = self._pending_histogram.get(bucket, 0) + 1
+
+    def _reset_pending(self):
+        self._pending = [[0.0, 0.0, math.inf, -math.inf] for _ in self.metrics]
+        self._pending_last: Dict[int, float] = {}
+        self._pending_histogram: Dict[int, int] = {}
+
+    def flush(self):
+        """Publish the pending second now (e.g. before a worker exits)"""
+        with self._lock:
+            if self._pid == os.getpid():
+                self._flush()
+
+    def _flush(self):
+        """Fold the pending second into every resolution's current slot (caller holds the lock)"""
+        if self._pending_second is None or not self._pending_last:
+            return
+        now = self._pending_second
+        pending = np.array(self._pending)
+        buckets = np.fromiter(self._pending_histogram.keys(), dtype=np.int64)
+        counts = np.fromiter(self._pending_histogram.values(), dtype=np.float64)
+        views = self._views
+        for name, width, slots in self.RESOLUTIONS:
+            epochs, stats, histograms = views[name]
+            epoch = now // width
+            slot = epoch % slots
+            if epochs[slot] != epoch:
+                stats[slot, :, :2] = 0.0
+                stats[slot, :, self.MIN] = np.inf
+                stats[slot, :, self.MAX] = -np.inf
+                histograms[slot] = 0.0
+                epochs[slot] = epoch
+            row = stats[slot]
+            row[:, :2] += pending[:, :2]
+            np.minimum(row[:, self.MIN], pending[:, self.MIN], out=row[:, self.MIN])
+            np.maximum(row[:, self.MAX], pending[:, self.MAX], out=row[:, self.MAX])
+            histograms[slot, buckets] += counts
+        for column, value in self._pending_last.items():
+            views['last'][column] = value
+            views['last_time'][column] = now
+        views['header'][1] = now
+        self._reset_pending()
+
+    # === QUERIES ===
+
+    def _resolution_for(self, seconds: float) -> Tuple[str, int, int]:
+        for name, width, slots in self.RESOLUTIONS:
+            if seconds <= width * (slots - 1):
+                return name, width, slots
+        return self.RESOLUTIONS[-1]
+
+    def _sources(self) -> List[Dict[str, Any]]:
+        """Views of this worker plus, in shared mode, every other live worker's buffer"""
+        with self._lock:
+            self._ensure_buffer()
+            self._flush()
+            own = self._views
+        if not self._path:
+            return [own]
+
+        sources = [own]
+        horizon = time.time() - max(width * slots for _, width, slots in self.RESOLUTIONS)
+        size = self._layout_size()
+        for path in glob.glob(os.path.join(self.shared_dir, 'metrics_*.bin')):
+            if path == self._path:
+                continue
+            try:
+                buffer = np.memmap(path, dtype=np.float64, mode='r', shape=(size,))
+                views = self._map_views(buffer)
+                if views['header'][2] != self.LAYOUT_VERSION:
+                    continue
+                if views['header'][1] < horizon:
+                    # Worker gone long enough that none of its slots can be in a window
+                    del buffer, views
+                    os.remove(path)
+                    continue
+                sources.append(views)
+            except Exception as e:
+                logger.debug(f"Skipping metrics buffer {path}: {e}")
+        return sources
+
+    def window(self, seconds: float, now: Optional[float] = None) -> Dict[str, Any]:
+        """Merged stats (per metric), latency histogram and latest values over the last ``seconds``"""
+        now = time.time() if now is None else now
+        name, width, _ = self._resolution_for(seconds)
+        end = int(now // width)
+        start = end - max(int(math.ceil(seconds / width)), 1) + 1
+
+        metrics = len(self.metrics)
+        count = np.zeros(metrics)
+        total = np.zeros(metrics)
+        low = np.full(metrics, np.inf)
+        high = np.full(metrics, -np.inf)
+        histogram = np.zeros(HISTOGRAM_BUCKETS)
+        last = np.zeros(metrics)
+        last_time = np.full(metrics, -np.inf)
+
+        sources = self._sources()
+        for views in sources:
+            epochs, stats, histograms = views[name]
+            mask = (epochs >= start) & (epochs <= end)
+            if mask.any():
+                selected = stats[mask]
+                count += selected[:, :, self.COUNT].sum(axis=0)
+                total += selected[:, :, self.SUM].sum(axis=0)
+                low = np.minimum(low, selected[:, :, self.MIN].min(axis=0))
+                high = np.maximum(high, selected[:, :, self.MAX].max(axis=0))
+                histogram += histograms[mask].sum(axis=0)
+            newer = views['last_time'] > last_time
+            last = np.where(newer, views['last'], last)
+            last_time = np.where(newer, views['last_time'], last_time)
+
+        return {
+            'resolution': name,
+            'workers': len(sources),
+            'count': count, 'sum': total, 'min': low, 'max': high,
+            'histogram': histogram,
+            'last': last, 'last_time': last_time,
+        }
+
+    def summary(self, seconds: float, quantiles: Sequence[float] = (0.5, 0.95, 0.99)) -> Dict[str, Any]:
+        """Per-metric current/average/min/max/count, with percentiles for the latency metric"""
+        merged = self.window(seconds)
+        cutoff = time.time() - seconds
+        summary = {}
+        for name, i in self.metric_index.items():
+            count = int(merged['count'][i])
+            summary[name] = {
+                'current': float(merged['last'][i]) if merged['last_time'][i] >= cutoff else 0,
+                'average': float(merged['sum'][i] / count) if count else 0,
+                'min': float(merged['min'][i]) if count else 0,
+                'max': float(merged['max'][i]) if count else 0,
+                'count': count
+            }
+        percentiles = histogram_percentiles(merged['histogram'], quantiles)
+        summary[self.latency_metric].update({
+            f"p{int(round(q * 100))}": value / 1_000_000 for q, value in percentiles.items()
+        })
+        summary['_meta'] = {'resolution': merged['resolution'], 'workers': merged['workers']}
+        return summary
+
+    def time_series(self, metric: str, seconds: float) -> List[Dict[str, Any]]:
+        """Per-slot averages of ``metric`` across workers at the resolution covering ``seconds``"""
+        if metric not in self.metric_index:
+            return []
+        column = self.metric_index[metric]
+        now = time.time()
+        name, width, _ = self._resolution_for(seconds)
+        end = int(now // width)
+        start = end - max(int(math.ceil(seconds / width)), 1) + 1
+
+        totals: Dict[int, List[float]] = {}
+        for views in self._sources():
+            epochs, stats, _ = views[name]
+            for slot in np.flatnonzero((epochs >= start) & (epochs <= end)):
+                count, total = stats[slot, column, self.COUNT], stats[slot, column, self.SUM]
+                if count:
+                    bucket = totals.setdefault(int(epochs[slot]), [0.0, 0.0])
+                    bucket[0] += count
+                    bucket[1] += total
+        return [
+            {'epoch': epoch * width, 'value': float(total / count)}
+            for epoch, (count, total) in sorted(totals.items())
+        ]
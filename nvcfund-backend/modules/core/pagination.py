@@ -0,0 +1,156 @@
+"""
+Keyset Pagination
+Opaque (sort value, id) cursors for deep listings and streaming exports without OFFSET scans
+"""
+
+import base64
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import tuple_
+
+logger = logging.getLogger(__name__)
+
+CURSOR_VERSION = 1
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a client sends a cursor that was not issued by encode_cursor"""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'dec': str(value)}
+    if isinstance(value, UUID):
+        return {'uuid': str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        if 'dec' in value:
+            return Decimal(value['dec'])
+        if 'uuid' in value:
+            return UUID(value['uuid'])
+        raise InvalidCursorError('Unknown cursor value')
+    return value
+
+
+def encode_cursor(values: Tuple[Any, ...]) -> str:
+    """Encode the sort key of the last row on a page as an opaque URL-safe token"""
+    payload = json.dumps([CURSOR_VERSION, [_encode_value(value) for value in values]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int = 2) -> Tuple[Any, ...]:
+    """Inverse of encode_cursor; raises InvalidCursorError on anything malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        version, values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if version != CURSOR_VERSION or not isinstance(values, list) or len(values) != size:
+            raise InvalidCursorError('Unsupported cursor')
+        return tuple(_decode_value(value) for value in values)
+    except InvalidCursorError:
+        raise
+    except Exception:
+        raise InvalidCursorError('Malformed cursor')
+
+
+@dataclass
+class CursorPage:
+    """One page of a keyset listing"""
+    items: List[Any]
+    per_page: int
+    next_cursor: Optional[str] = None
+    cursor: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+    def pagination(self) -> Dict[str, Any]:
+        """Response metadata in the shape API callers receive"""
+        return {
+            'per_page': self.per_page,
+            'cursor': self.cursor,
+            'next_cursor': self.next_cursor,
+            'has_more': self.has_more,
+            **self.extra
+        }
+
+
+def _keyset_filter(query, sort_column, id_column, after: Tuple[Any, Any], descending: bool):
+    key = tuple_(sort_column, id_column)
+    return query.filter(key < tuple_(*after) if descending else key > tuple_(*after))
+
+
+def _ordered(query, sort_column, id_column, descending: bool):
+    if descending:
+        return query.order_by(None).order_by(sort_column.desc(), id_column.desc())
+    return query.order_by(None).order_by(sort_column.asc(), id_column.asc())
+
+
+def keyset_paginate(query, sort_column, id_column, cursor: Optional[str] = None, per_page: int = 20,
+                    max_per_page: int = 100, descending: bool = True) -> CursorPage:
+    """
+    Return the page of ``query`` after ``cursor``, ordered by
+    ``(sort_column, id_column)``.
+
+    The continuation is a row-value comparison, e.g.
+    ``(created_at, id) < (:c, :i)``, so with a matching composite index the
+    database seeks straight to the page at any depth. ``id_column`` breaks
+    ties between rows that share a timestamp. ``sort_column`` must be NOT
+    NULL for rows to be reachable.
+    """
+    per_page = max(1, min(per_page or 20, max_per_page))
+    ordered = _ordered(query, sort_column, id_column, descending)
+    if cursor:
+        ordered = _keyset_filter(ordered, sort_column, id_column, decode_cursor(cursor), descending)
+
+    rows = ordered.limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(_row_key(rows[-1], sort_column, id_column))
+    return CursorPage(items=rows, per_page=per_page, next_cursor=next_cursor, cursor=cursor)
+
+
+def iter_keyset(query, sort_column, id_column, batch_size: int = 1000, descending: bool = True,
+                cursor: Optional[str] = None) -> Iterator[Any]:
+    """
+    Yield every row of ``query`` in keyset order, fetching ``batch_size`` rows
+    per statement, so exports do not hold a server-side cursor open. The
+    batches share the query's session and its transaction; a long stream
+    should rather run each batch in its own session with ``keyset_paginate``
+    (see AdminManagementService.iter_audit_logs).
+    """
+    after = decode_cursor(cursor) if cursor else None
+    ordered = _ordered(query, sort_column, id_column, descending)
+    while True:
+        batch_query = ordered if after is None else _keyset_filter(ordered, sort_column, id_column, after, descending)
+        rows = batch_query.limit(batch_size).all()
+        if not rows:
+            return
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        after = _row_key(rows[-1], sort_column, id_column)
+
+
+def _row_key(row, sort_column, id_column) -> Tuple[Any, Any]:
+    """(sort value, id) of an ORM instance or a column row"""
+    return getattr(row, sort_column.key), getattr(row, id_column.key)
@@ -11,6 +11,7 @@ from flask_caching import Cache
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
 from modules.core.extensions import db
+from modules.core.cache_stampede import StampedeGuard
 import logging
 
 # Initialize cache
@@ -130,15 +131,31 @@ class CacheManager:
         return ":".join(key_parts)
     
     @staticmethod
-    def invalidate_pattern(pattern: str):
-        """Invalidate cache keys matching pattern"""
-        # This would require Redis SCAN command for pattern matching
-        # For now, we'll implement basic invalidation
-        if hasattr(cache.cache, 'delete_many'):
-            # Get all keys matching pattern (Redis implementation)
-            keys = cache.cache._read_clients.keys(pattern)
-            if keys:
-                cache.delete_many(*keys)
+    def invalidate_pattern(pattern: str) -> int:
+        """
+        Invalidate cache keys matching pattern.
+        
+        Walks the keyspace with incremental SCAN (never a blocking KEYS); prefer
+        tag invalidation in modules.core.caching_strategy for hot paths.
+        """
+        backend = getattr(cache, 'cache', None)
+        client = getattr(backend, '_write_client', None)
+        if client is None:
+            return 0
+        
+        key_prefix = getattr(backend, 'key_prefix', '') or ''
+        if callable(key_prefix):
+            key_prefix = key_prefix()
+        deleted = 0
+        batch = []
+        for key in client.scan_iter(match=f"{key_prefix}{pattern}", count=1000):
+            batch.append(key)
+            if len(batch) >= 500:
+                deleted += client.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += client.unlink(*batch)
+        return deleted
     
     @staticmethod
     def warm_cache(func: Callable, *args, **kwargs):
@@ -150,32 +167,50 @@ class CacheManager:
             current_app.logger.error(f"Cache warming failed: {e}")
             return None
 
-def cached_query(timeout: int = 300, key_prefix: str = None):
-    """Decorator for caching database query results"""
+def _query_cache_lock_client():
+    """Redis client behind the query cache, if it is Redis-backed"""
+    try:
+        return getattr(cache.cache, '_write_client', None)
+    except Exception:
+        return None
+
+# Single-flight / early-refresh wrapper around the query cache
+query_cache_guard = StampedeGuard(
+    getter=lambda key: cache.get(key),
+    setter=lambda key, value, timeout, tags: cache.set(key, value, timeout=timeout),
+    lock_client=_query_cache_lock_client
+)
+
+def cached_query(timeout: int = 300, key_prefix: str = None, stale_ttl: int = 0, beta: float = 1.0):
+    """
+    Decorator for caching database query results.
+    
+    Concurrent misses for the same arguments run the query once (per process,
+    and across workers when the cache is Redis-backed). ``stale_ttl`` keeps
+    serving an expired result that long while one caller refreshes it.
+    """
     def decorator(func):
+        prefix = key_prefix or f"{func.__module__}.{func.__name__}"
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            # Generate cache key
-            prefix = key_prefix or f"{func.__module__}.{func.__name__}"
             cache_key = f"{prefix}:{CacheManager.cache_key(*args, **kwargs)}"
+            computed = []
             
-            # Try to get from cache
-            result = cache.get(cache_key)
-            if result is not None:
-                perf_monitor.cache_hit()
-                return result
-            
-            # Cache miss - execute function
-            perf_monitor.cache_miss()
-            result = func(*args, **kwargs)
+            def compute():
+                computed.append(True)
+                return func(*args, **kwargs)
             
-            # Store in cache
-            cache.set(cache_key, result, timeout=timeout)
+            result = query_cache_guard.fetch(cache_key, compute, timeout, prefix, stale_ttl=stale_ttl, beta=beta)
+            if computed:
+                perf_monitor.cache_miss()
+            else:
+                perf_monitor.cache_hit()
             return result
         
         # Add cache invalidation method
         wrapper.invalidate = lambda *args, **kwargs: cache.delete(
-            f"{key_prefix or func.__module__}.{func.__name__}:{CacheManager.cache_key(*args, **kwargs)}"
+            f"{prefix}:{CacheManager.cache_key(*args, **kwargs)}"
         )
         
         return wrapper
@@ -207,9 +242,11 @@ class QueryOptimizer:
         """Efficient pagination with limits"""
         per_page = min(per_page, max_per_page)
         
-        # Use window functions for better performance on large datasets
-        if page > 100:  # For very large page numbers, use cursor-based pagination
-            current_app.logger.warning(f"Large page number requested: {page}")
+        # OFFSET makes the database read and discard every earlier row
+        if page > 100:
+            current_app.logger.warning(
+                f"Large page number requested: {page} - use QueryOptimizer.paginate_by_cursor for deep listings"
+            )
         
         return query.paginate(
             page=page,
@@ -218,6 +255,20 @@ class QueryOptimizer:
             max_per_page=max_per_page
         )
     
+    @staticmethod
+    def paginate_by_cursor(query, sort_column, id_column, cursor: Optional[str] = None,
+                           per_page: int = 20, max_per_page: int = 100, descending: bool = True):
+        """Keyset pagination on (sort_column, id_column); cost does not grow with depth"""
+        from modules.core.pagination import keyset_paginate
+        return keyset_paginate(query, sort_column, id_column, cursor=cursor, per_page=per_page,
+                               max_per_page=max_per_page, descending=descending)
+    
+    @staticmethod
+    def iter_by_cursor(query, sort_column, id_column, batch_size: int = 1000, descending: bool = True):
+        """Stream every row of a query in keyset batches, e.g. for CSV exports"""
+        from modules.core.pagination import iter_keyset
+        return iter_keyset(query, sort_column, id_column, batch_size=batch_size, descending=descending)
+    
     @staticmethod
     def bulk_insert(model_class, data_list: List[Dict], batch_size: int = 1000):
         """Efficient bulk insert operation"""
@@ -396,15 +447,8 @@ def get_or_create_cached(model_class, cache_key: str, create_func: Callable, tim
 
 def invalidate_user_cache(user_id: int):
     """Invalidate all cache entries for a specific user"""
-    patterns = [
-        f"user:{user_id}:*",
-        f"accounts:{user_id}:*",
-        f"transactions:{user_id}:*",
-        f"dashboard:{user_id}:*"
-    ]
-    
-    for pattern in patterns:
-        CacheManager.invalidate_pattern(pattern)
+    from modules.core.caching_strategy import CacheManager as TaggedCacheManager
+    return TaggedCacheManager.invalidate_user_cache(user_id)
 
 def warm_user_cache(user_id: int):
     """Pre-warm cache for user data"""
@@ -0,0 +1,246 @@
+"""
+Shared Token-Bucket Rate Limiter for NVC Banking Platform
+Cross-worker rate limiting with a Redis backend and an in-process fallback
+"""
+
+import threading
+import time
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """
+    A single token bucket: ``limit`` requests refilled over ``window`` seconds.
+    A ``weighted`` bucket is charged the weight of each request instead of one
+    token (e.g. Binance's per-minute request weight).
+    """
+    name: str
+    limit: int
+    window: int
+    weighted: bool = False
+
+    def cost(self, weight: int) -> int:
+        """Tokens one request of ``weight`` takes from this bucket (never more than it holds)"""
+        return min(max(int(weight), 1), self.limit) if self.weighted else 1
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of a rate limit check across one or more buckets"""
+    allowed: bool
+    rule: Optional[RateLimitRule] = None
+    remaining: Dict[str, float] = field(default_factory=dict)
+    retry_after: float = 0.0
+
+    def used(self, rule: RateLimitRule) -> int:
+        """Approximate number of requests consumed from a bucket"""
+        return max(0, int(round(rule.limit - self.remaining.get(rule.name, rule.limit))))
+
+
+class InMemoryRateLimitBackend:
+    """Per-process token buckets with TTL expiry and a bounded LRU footprint"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries: int = 100000, evictions_per_call: int = 8):
+        self.max_entries = max_entries
+        self.evictions_per_call = evictions_per_call
+        # key -> [tokens, last_refill, expires_at]
+        self._buckets: 'OrderedDict[str, List[float]]' = OrderedDict()
+        self._blocks: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, keys: Sequence[str], rules: Sequence[RateLimitRule], now: float,
+                costs: Sequence[int]) -> Tuple[int, List[float]]:
+        """Consume ``costs`` tokens from the buckets if all of them have enough available"""
+        with self._lock:
+            levels = []
+            denied = 0
+            for index, (key, rule, cost) in enumerate(zip(keys, rules, costs), start=1):
+                bucket = self._buckets.get(key)
+                if bucket is None or bucket[2] <= now:
+                    tokens = float(rule.limit)
+                else:
+                    tokens = min(float(rule.limit), bucket[0] + (now - bucket[1]) * rule.limit / rule.window)
+                levels.append(tokens)
+                if tokens < cost and not denied:
+                    denied = index
+
+            for key, rule, tokens, cost in zip(keys, rules, levels, costs):
+                self._buckets[key] = [tokens if denied else tokens - cost, now, now + rule.window]
+                self._buckets.move_to_end(key)
+
+            if not denied:
+                levels = [tokens - cost for tokens, cost in zip(levels, costs)]
+
+            self._evict(now)
+            return denied, levels
+
+    def _evict(self, now: float):
+        """Drop a bounded number of expired or least recently used buckets"""
+        for _ in range(self.evictions_per_call):
+            if not self._buckets:
+                return
+            key, bucket = next(iter(self._buckets.items()))
+            if bucket[2] <= now or len(self._buckets) > self.max_entries:
+                del self._buckets[key]
+            else:
+                return
+
+    def block(self, key: str, seconds: float, now: float):
+        with self._lock:
+            self._blocks[key] = now + seconds
+
+    def blocked_until(self, key: str, now: float) -> float:
+        with self._lock:
+            until = self._blocks.get(key, 0.0)
+            if until and until <= now:
+                del self._blocks[key]
+                return 0.0
+            return until
+
+    def size(self) -> int:
+        return len(self._buckets)
+
+
+class RedisRateLimitBackend:
+    """Token buckets stored in Redis hashes and updated atomically with Lua"""
+
+    name = 'redis'
+
+    # KEYS: bucket keys. ARGV: now_ms followed by (limit, window_ms, cost) per key.
+    # Returns the 1-based index of the first short bucket (0 when allowed)
+    # followed by the remaining tokens of every bucket as strings.
+    ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local levels = {}
+local denied = 0
+for i = 1, #KEYS do
+    local limit = tonumber(ARGV[3 * i - 1])
+    local window = tonumber(ARGV[3 * i])
+    local cost = tonumber(ARGV[3 * i + 1])
+    local state = redis.call('HMGET', KEYS[i], 't', 'ts')
+    local tokens = tonumber(state[1])
+    local ts = tonumber(state[2])
+    if tokens == nil or ts == nil then
+        tokens = limit
+    else
+        tokens = math.min(limit, tokens + (now - ts) * limit / window)
+    end
+    levels[i] = tokens
+    if tokens < cost and denied == 0 then
+        denied = i
+    end
+end
+local result = {denied}
+for i = 1, #KEYS do
+    local tokens = levels[i]
+    if denied == 0 then
+        tokens = tokens - tonumber(ARGV[3 * i + 1])
+    end
+    redis.call('HSET', KEYS[i], 't', tostring(tokens), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[i], tonumber(ARGV[3 * i]))
+    result[i + 1] = tostring(tokens)
+end
+return result
+"""
+
+    def __init__(self, client, key_prefix: str = 'nvc_banking:rl:'):
+        self.client = client
+        self.key_prefix = key_prefix
+        self._script = client.register_script(self.ACQUIRE_SCRIPT)
+
+    def acquire(self, keys: Sequence[str], rules: Sequence[RateLimitRule], now: float,
+                costs: Sequence[int]) -> Tuple[int, List[float]]:
+        now_ms = int(now * 1000)
+        args = [now_ms]
+        for rule, cost in zip(rules, costs):
+            args.extend([rule.limit, rule.window * 1000, cost])
+        result = self._script(keys=[self.key_prefix + key for key in keys], args=args)
+        return int(result[0]), [float(level) for level in result[1:]]
+
+    def block(self, key: str, seconds: float, now: float):
+        self.client.set(f"{self.key_prefix}block:{key}", int(now + seconds), px=int(seconds * 1000))
+
+    def blocked_until(self, key: str, now: float) -> float:
+        value = self.client.get(f"{self.key_prefix}block:{key}")
+        return float(value) if value else 0.0
+
+    def size(self) -> int:
+        return -1
+
+
+class TokenBucketRateLimiter:
+    """Rate limiter shared by the security middleware and decorators"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or InMemoryRateLimitBackend()
+        self.fallback = self.backend if isinstance(self.backend, InMemoryRateLimitBackend) else InMemoryRateLimitBackend()
+        self.stats = {'allowed': 0, 'denied': 0, 'backend_errors': 0}
+
+    def init_app(self, app):
+        """Select the backend from ``RATELIMIT_STORAGE_URI`` (``memory://`` or ``redis://``)"""
+        storage_uri = app.config.get('RATELIMIT_STORAGE_URI', 'memory://')
+        if storage_uri.startswith(('redis://', 'rediss://', 'unix://')):
+            try:
+                import redis
+                client = redis.from_url(storage_uri)
+                client.ping()
+                self.backend = RedisRateLimitBackend(client, app.config.get('RATELIMIT_KEY_PREFIX', 'nvc_banking:rl:'))
+                logger.info("Token bucket rate limiter using Redis backend")
+                return
+            except Exception as e:
+                logger.warning(f"Redis rate limiter unavailable, using in-process buckets: {e}")
+        self.backend = self.fallback
+        logger.info("Token bucket rate limiter using in-process backend")
+
+    def hit(self, key: str, rules: Sequence[RateLimitRule], weight: int = 1) -> RateLimitResult:
+        """Consume one request of ``weight`` for ``key`` against every rule atomically"""
+        now = time.time()
+        keys = [f"{key}:{rule.name}" for rule in rules]
+        costs = [rule.cost(weight) for rule in rules]
+        try:
+            denied, levels = self.backend.acquire(keys, rules, now, costs)
+        except Exception as e:
+            self.stats['backend_errors'] += 1
+            logger.error(f"Rate limiter backend error, using in-process buckets: {e}")
+            denied, levels = self.fallback.acquire(keys, rules, now, costs)
+
+        remaining = {rule.name: level for rule, level in zip(rules, levels)}
+        if denied:
+            rule = rules[denied - 1]
+            self.stats['denied'] += 1
+            retry_after = (costs[denied - 1] - levels[denied - 1]) * rule.window / rule.limit
+            return RateLimitResult(False, rule, remaining, max(retry_after, 0.0))
+
+        self.stats['allowed'] += 1
+        return RateLimitResult(True, None, remaining)
+
+    def block(self, key: str, seconds: float):
+        """Block ``key`` for ``seconds`` across all workers sharing the backend"""
+        try:
+            self.backend.block(key, seconds, time.time())
+        except Exception as e:
+            logger.error(f"Rate limiter block failed: {e}")
+            self.fallback.block(key, seconds, time.time())
+
+    def blocked_until(self, key: str) -> float:
+        """Return the unblock timestamp for ``key`` or 0 when not blocked"""
+        try:
+            return self.backend.blocked_until(key, time.time())
+        except Exception as e:
+            logger.error(f"Rate limiter block lookup failed: {e}")
+            return self.fallback.blocked_until(key, time.time())
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, 'backend': self.backend.name, 'tracked_buckets': self.backend.size()}
+
+
+# Global limiter shared by GlobalSecurityMiddleware, api_security and security_enforcement
+token_limiter = TokenBucketRateLimiter()
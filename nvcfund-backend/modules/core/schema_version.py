@@ -0,0 +1,224 @@
+"""
+Schema Version Tracking
+Bootstrap command support and the single-query schema fingerprint check run at worker startup
+"""
+
+import hashlib
+import json
+import logging
+import os
+import socket
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, Text, select, text
+
+from modules.core.extensions import db
+
+logger = logging.getLogger(__name__)
+
+# Bump when a migration step changes what it does without changing the models
+SCHEMA_REVISION = 1
+
+# Boot behaviour on a fingerprint mismatch
+BOOT_ENFORCE = 'enforce'      # refuse to start
+BOOT_WARN = 'warn'            # log and serve anyway
+BOOT_BOOTSTRAP = 'bootstrap'  # run the bootstrap inline (development/testing)
+
+# table_fingerprints entry for SCHEMA_REVISION plus the migration step list
+MIGRATIONS_ENTRY = '@migrations'
+
+# Serializes concurrent bootstraps on PostgreSQL
+BOOTSTRAP_LOCK_KEY = 0x4E5643534348  # "NVCSCH"
+
+# Kept out of db.metadata so it is never part of its own fingerprint
+_version_metadata = MetaData()
+schema_version_table = Table(
+    'schema_version', _version_metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('fingerprint', String(64), nullable=False),
+    Column('revision', Integer, nullable=False),
+    Column('migrations', Text),
+    Column('table_fingerprints', Text),  # JSON {table: sha256} plus MIGRATIONS_ENTRY
+    Column('applied_at', DateTime, nullable=False),
+    Column('applied_by', String(255))
+)
+
+
+class SchemaVersionError(RuntimeError):
+    """The database schema does not match the models this process was built with"""
+
+
+def discover_model_modules(root_path: str) -> List[str]:
+    """Dotted names of every ``*models.py`` module under modules/"""
+    modules_dir = os.path.join(root_path, 'modules')
+    names = []
+    for directory, subdirectories, files in os.walk(modules_dir):
+        subdirectories[:] = [name for name in subdirectories if name != '__pycache__']
+        for filename in files:
+            if filename.endswith('models.py'):
+                relative = os.path.relpath(os.path.join(directory, filename[:-3]), root_path)
+                names.append(relative.replace(os.sep, '.'))
+    return sorted(names)
+
+
+def import_model_modules(root_path: str):
+    for module_name in discover_model_modules(root_path):
+        try:
+            __import__(module_name)
+        except Exception as e:
+            logger.error(f"Failed to import model module {module_name}: {e}")
+
+
+def _type_signature(column_type) -> str:
+    """Type name plus its shape; avoids reprs of custom types that embed object addresses"""
+    parts = [type(column_type).__name__]
+    for attribute in ('length', 'precision', 'scale', 'timezone', 'enums'):
+        value = getattr(column_type, attribute, None)
+        if value is not None:
+            parts.append(f"{attribute}={list(value) if attribute == 'enums' else value}")
+    return ' '.join(parts)
+
+
+def _table_lines(table) -> List[str]:
+    lines = [f"table:{table.fullname}"]
+    for column in table.columns:
+        lines.append(f" {column.name} {_type_signature(column.type)} "
+                     f"null={column.nullable} pk={column.primary_key}")
+    for index in sorted(table.indexes, key=lambda index: index.name or ''):
+        lines.append(f" index {index.name} {[column.name for column in index.columns]} unique={index.unique}")
+    return lines
+
+
+def _migration_lines(migration_steps: Optional[List[str]] = None) -> List[str]:
+    from modules.core.database_migration import DatabaseMigration
+
+    steps = migration_steps if migration_steps is not None else DatabaseMigration.MIGRATION_STEPS
+    return [f"revision:{SCHEMA_REVISION}", *(f"step:{step}" for step in steps)]
+
+
+def _sha256(lines: List[str]) -> str:
+    return hashlib.sha256(''.join(f"{line}\n" for line in lines).encode()).hexdigest()
+
+
+def schema_fingerprint(metadata=None, migration_steps: Optional[List[str]] = None) -> str:
+    """SHA-256 over the model tables, columns and indexes plus the migration step list"""
+    metadata = metadata if metadata is not None else db.metadata
+    lines = _migration_lines(migration_steps)
+    for table in sorted(metadata.tables.values(), key=lambda table: table.fullname):
+        lines.extend(_table_lines(table))
+    return _sha256(lines)
+
+
+def table_fingerprints(metadata=None, migration_steps: Optional[List[str]] = None) -> Dict[str, str]:
+    """Per-table SHA-256 of the same signatures, plus MIGRATIONS_ENTRY for the migration step list"""
+    metadata = metadata if metadata is not None else db.metadata
+    fingerprints = {table.fullname: _sha256(_table_lines(table)) for table in metadata.tables.values()}
+    fingerprints[MIGRATIONS_ENTRY] = _sha256(_migration_lines(migration_steps))
+    return fingerprints
+
+
+def current_schema_version() -> Optional[Dict[str, Any]]:
+    """Latest bootstrap record, or None if the database was never bootstrapped"""
+    try:
+        with db.engine.connect() as connection:
+            row = connection.execute(
+                select(schema_version_table).order_by(schema_version_table.c.id.desc()).limit(1)
+            ).mappings().first()
+            return dict(row) if row else None
+    except Exception:
+        # Distinguish "no schema_version table" from "no database"
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+        return None
+
+
+class SchemaBootstrap:
+    """Creates tables, applies migrations and records the resulting fingerprint"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def run(self) -> Dict[str, Any]:
+        from modules.core.database_migration import DatabaseMigration
+
+        import_model_modules(self.app.root_path)
+        fingerprint = schema_fingerprint()
+        with db.engine.connect() as lock_connection:
+            postgres = lock_connection.dialect.name == 'postgresql'
+            if postgres:
+                lock_connection.execute(text('SELECT pg_advisory_lock(:key)'), {'key': BOOTSTRAP_LOCK_KEY})
+            try:
+                current = current_schema_version()
+                if current and current['fingerprint'] == fingerprint:
+                    logger.info(f"Schema already at {fingerprint[:12]}, nothing to do")
+                    return {'fingerprint': fingerprint, 'changed': False, 'migrations': []}
+
+                db.create_all()
+                migration = DatabaseMigration()
+                if not migration.check_and_apply_migrations():
+                    raise SchemaVersionError('Database migrations failed; schema version not recorded')
+
+                _version_metadata.create_all(db.engine, checkfirst=True)
+                with db.engine.begin() as connection:
+                    connection.execute(schema_version_table.insert().values(
+                        fingerprint=fingerprint,
+                        revision=SCHEMA_REVISION,
+                        migrations=json.dumps(migration.migrations_applied),
+                        table_fingerprints=json.dumps(table_fingerprints(), sort_keys=True),
+                        applied_at=datetime.utcnow(),
+                        applied_by=f"{socket.gethostname()}:{os.getpid()}"
+                    ))
+                logger.info(f"Schema bootstrapped to {fingerprint[:12]} "
+                            f"({len(migration.migrations_applied)} migrations applied)")
+                return {'fingerprint': fingerprint, 'changed': True,
+                        'previous': current['fingerprint'] if current else None,
+                        'migrations': migration.migrations_applied}
+            finally:
+                if postgres:
+                    lock_connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': BOOTSTRAP_LOCK_KEY})
+
+
+def verify_schema_version(app) -> bool:
+    """
+    Worker startup check: one indexed query comparing the fingerprints
+    recorded by the last bootstrap with those of the tables registered on
+    db.metadata by now (run it after blueprint registration). Nothing is
+    imported for the check, and there is no reflection or DDL. Behaviour
+    on a mismatch, or when the database cannot be reached, follows
+    SCHEMA_BOOT_MODE.
+    """
+    mode = app.config.get('SCHEMA_BOOT_MODE', BOOT_ENFORCE)
+    with app.app_context():
+        expected = table_fingerprints()
+        try:
+            current = current_schema_version()
+        except Exception as e:
+            message = f"Schema version could not be verified, database unavailable: {e}"
+            if mode == BOOT_ENFORCE:
+                raise SchemaVersionError(message) from e
+            logger.error(message)
+            return False
+
+        recorded = json.loads(current['table_fingerprints'] or '{}') if current else {}
+        stale = sorted(name for name, fingerprint in expected.items() if recorded.get(name) != fingerprint)
+        if current and not stale:
+            logger.info(f"Schema version {current['fingerprint'][:12]} verified for {len(expected) - 1} tables")
+            return True
+
+        found = current['fingerprint'][:12] if current else 'none'
+        shown = ', '.join(stale[:5]) + (f" and {len(stale) - 5} more" if len(stale) > 5 else '')
+        message = (f"Database schema {found} does not match the application models ({shown}); "
+                   f"run scripts/bootstrap_database.py")
+        if mode == BOOT_BOOTSTRAP:
+            logger.warning(f"{message} - bootstrapping now (SCHEMA_BOOT_MODE=bootstrap)")
+            try:
+                SchemaBootstrap(app).run()
+                return True
+            except Exception as e:
+                logger.error(f"Inline schema bootstrap failed: {e}")
+                return False
+        if mode == BOOT_WARN:
+            logger.error(message)
+            return False
+        raise SchemaVersionError(message)
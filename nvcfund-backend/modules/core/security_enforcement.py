@@ -13,9 +13,9 @@ from typing import Dict, Set, Any, Optional, Callable
 from flask import request, jsonify, g, current_app, abort, render_template, redirect, url_for
 from flask_login import current_user
 from werkzeug.exceptions import TooManyRequests
-from collections import defaultdict, deque
 import bleach
 from markupsafe import Markup
+from modules.core.rate_limiter import RateLimitRule, token_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -28,9 +28,8 @@ class SecurityEnforcement:
     """
     
     def __init__(self):
-        # Rate limiting storage
-        self._rate_limits: Dict[str, deque] = defaultdict(lambda: deque())
-        self._blocked_ips: Dict[str, float] = {}
+        # Rate limiting storage (shared across workers)
+        self._rate_limiter = token_limiter
         
         # Input validation patterns
         self._validation_patterns = {
@@ -193,38 +192,29 @@ class SecurityEnforcement:
     
     def enforce_rate_limit(self, max_requests: int = 10, window_minutes: int = 1, block_duration_minutes: int = 15):
         """Advanced rate limiting with IP blocking"""
+        rule = RateLimitRule(f"{max_requests}per{window_minutes}m", max_requests, window_minutes * 60)
+        
         def rate_limit_wrapper(func: Callable) -> Callable:
             @wraps(func)
             def wrapper(*args, **kwargs):
                 client_ip = self._get_client_ip()
-                current_time = time.time()
+                block_key = f"enforce_block:{client_ip}"
                 
                 # Check if IP is currently blocked
-                if client_ip in self._blocked_ips:
-                    if current_time < self._blocked_ips[client_ip]:
-                        logger.warning(f"Blocked IP {client_ip} attempted access")
-                        raise TooManyRequests("IP temporarily blocked due to excessive requests")
-                    else:
-                        del self._blocked_ips[client_ip]
+                if self._rate_limiter.blocked_until(block_key) > time.time():
+                    logger.warning(f"Blocked IP {client_ip} attempted access")
+                    raise TooManyRequests("IP temporarily blocked due to excessive requests")
                 
                 # Rate limiting logic
-                window_start = current_time - (window_minutes * 60)
-                requests = self._rate_limits[client_ip]
-                
-                # Remove old requests outside the window
-                while requests and requests[0] < window_start:
-                    requests.popleft()
+                result = self._rate_limiter.hit(f"enforce:{client_ip}", (rule,))
                 
                 # Check if limit exceeded
-                if len(requests) >= max_requests:
+                if not result.allowed:
                     # Block the IP
-                    self._blocked_ips[client_ip] = current_time + (block_duration_minutes * 60)
+                    self._rate_limiter.block(block_key, block_duration_minutes * 60)
                     logger.warning(f"Rate limit exceeded for IP {client_ip}, blocking for {block_duration_minutes} minutes")
                     raise TooManyRequests(f"Rate limit exceeded. Blocked for {block_duration_minutes} minutes.")
                 
-                # Record this request
-                requests.append(current_time)
-                
                 return func(*args, **kwargs)
             return wrapper
         return rate_limit_wrapper
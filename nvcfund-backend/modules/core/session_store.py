@@ -0,0 +1,453 @@
+"""
+Tiered Session Store
+Server-side Flask sessions with a version-checked in-process LRU front cache over a shared Redis (or local) store
+"""
+
+import heapq
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer, want_bytes
+from werkzeug.datastructures import CallbackDict
+
+from modules.core.cache_codec import CacheCodec
+
+logger = logging.getLogger(__name__)
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session dict that records whether the request changed it"""
+
+    def __init__(self, initial: Optional[Dict] = None, sid: str = None, new: bool = False):
+        def on_update(session):
+            session.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class LocalSessionBackend:
+    """
+    In-process stand-in for the shared store, for tests and single-process
+    development. Expired sessions are dropped in bulk from an expiry heap
+    rather than checked one by one.
+    """
+
+    def __init__(self, sweep_interval: float = 30.0):
+        self._data: Dict[str, Tuple[bytes, float, str]] = {}  # sid -> (payload, expires_at, version)
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._index: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def get(self, sid: str) -> Optional[Tuple[bytes, str]]:
+        entry = self._data.get(sid)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0], entry[2]
+
+    def version(self, sid: str) -> Optional[str]:
+        found = self.get(sid)
+        return found[1] if found else None
+
+    def set(self, sid: str, payload: bytes, ttl: int) -> str:
+        expires_at = time.monotonic() + ttl
+        version = secrets.token_hex(8)
+        with self._lock:
+            self._data[sid] = (payload, expires_at, version)
+            heapq.heappush(self._expiry_heap, (expires_at, sid))
+        self._maybe_sweep()
+        return version
+
+    def touch(self, sid: str, ttl: int) -> bool:
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            entry = self._data.get(sid)
+            if entry is None:
+                return False
+            self._data[sid] = (entry[0], expires_at, entry[2])
+            heapq.heappush(self._expiry_heap, (expires_at, sid))
+        return True
+
+    def delete(self, *sids: str):
+        with self._lock:
+            for sid in sids:
+                self._data.pop(sid, None)
+
+    def index(self, user_id: str, sid: str, ttl: int):
+        with self._lock:
+            self._index.setdefault(user_id, set()).add(sid)
+
+    def pop_index(self, user_id: str) -> List[str]:
+        with self._lock:
+            return list(self._index.pop(user_id, ()))
+
+    def sweep(self) -> int:
+        """Drop every expired session; heap entries superseded by a later touch are skipped"""
+        now = time.monotonic()
+        removed = 0
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expires_at, sid = heapq.heappop(self._expiry_heap)
+                entry = self._data.get(sid)
+                if entry is not None and entry[1] <= now:
+                    del self._data[sid]
+                    removed += 1
+            self._next_sweep = now + self.sweep_interval
+        return removed
+
+    def _maybe_sweep(self):
+        if time.monotonic() >= self._next_sweep:
+            removed = self.sweep()
+            if removed:
+                logger.debug(f"Swept {removed} expired sessions")
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisSessionBackend:
+    """
+    Shared session store; Redis key TTLs do the bulk expiry. Every write
+    also stores a short random version under ``<key>:v``, so front caches
+    can check an entry is current without fetching the payload.
+    """
+
+    def __init__(self, client, prefix: str):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, sid: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        key = self.prefix + sid
+        pipe = self.client.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.get(key + ':v')
+        payload, version = pipe.execute()
+        if payload is None:
+            return None
+        return payload, version.decode() if isinstance(version, bytes) else version
+
+    def version(self, sid: str) -> Optional[str]:
+        version = self.client.get(self.prefix + sid + ':v')
+        return version.decode() if isinstance(version, bytes) else version
+
+    def set(self, sid: str, payload: bytes, ttl: int) -> str:
+        key = self.prefix + sid
+        version = secrets.token_hex(8)
+        pipe = self.client.pipeline()
+        pipe.set(key, payload, ex=ttl)
+        pipe.set(key + ':v', version, ex=ttl)
+        pipe.execute()
+        return version
+
+    def touch(self, sid: str, ttl: int) -> bool:
+        key = self.prefix + sid
+        pipe = self.client.pipeline(transaction=False)
+        pipe.expire(key, ttl)
+        pipe.expire(key + ':v', ttl)
+        return bool(pipe.execute()[0])
+
+    def delete(self, *sids: str):
+        if sids:
+            self.client.unlink(*[self.prefix + sid + suffix for sid in sids for suffix in ('', ':v')])
+
+    def index(self, user_id: str, sid: str, ttl: int):
+        key = f"{self.prefix}user:{user_id}"
+        pipe = self.client.pipeline(transaction=False)
+        pipe.sadd(key, sid)
+        pipe.expire(key, ttl)
+        pipe.execute()
+
+    def pop_index(self, user_id: str) -> List[str]:
+        key = f"{self.prefix}user:{user_id}"
+        pipe = self.client.pipeline()
+        pipe.smembers(key)
+        pipe.unlink(key)
+        members, _ = pipe.execute()
+        return [member.decode() if isinstance(member, bytes) else member for member in members]
+
+    def sweep(self) -> int:
+        return 0
+
+
+class SessionLRU:
+    """Bounded, short-lived per-process cache of encoded session payloads and their versions"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 2.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: 'OrderedDict[str, List]' = OrderedDict()  # sid -> [payload, cached_at, touched_at, version]
+        self._lock = threading.Lock()
+
+    def get(self, sid: str) -> Optional[List]:
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[1] > self.ttl:
+                del self._entries[sid]
+                return None
+            self._entries.move_to_end(sid)
+            return entry
+
+    def put(self, sid: str, payload: bytes, touched_at: float, version: str):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[sid] = [payload, time.monotonic(), touched_at, version]
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, *sids: str):
+        with self._lock:
+            for sid in sids:
+                self._entries.pop(sid, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TieredSessionInterface(SessionInterface):
+    """
+    Flask session interface over SessionLRU + a shared backend.
+
+    Sessions are written only when the request modified them; unmodified
+    sessions just have their TTL extended, at most once per touch interval.
+    Writes and deletes always go straight to the shared store. A front cache
+    entry is only used after its version matches the one in the shared
+    store, so a login, logout or revocation on another worker is seen on the
+    very next request; the cache saves fetching and decoding the payload.
+    """
+
+    def __init__(self, store: 'TieredSessionStore'):
+        self.store = store
+
+    def _signer(self, app) -> Optional[Signer]:
+        if not app.config.get('SESSION_USE_SIGNER') or not app.secret_key:
+            return None
+        return Signer(app.secret_key, salt='flask-session', key_derivation='hmac')
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        sid = None
+        if cookie:
+            signer = self._signer(app)
+            try:
+                sid = signer.unsign(cookie).decode() if signer else cookie
+            except BadSignature:
+                sid = None
+        if sid:
+            data = self.store.load(sid)
+            if data is not None:
+                return ServerSideSession(data, sid=sid)
+        return ServerSideSession(sid=self.store.new_sid(), new=True)
+
+    def save_session(self, app, session: ServerSideSession, response):
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        name = self.get_cookie_name(app)
+
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.modified:
+            self.store.save(session.sid, dict(session), user_id=session.get('_user_id'))
+        else:
+            self.store.touch(session.sid)
+
+        if session.new or session.modified or self.should_set_cookie(app, session):
+            signer = self._signer(app)
+            cookie = signer.sign(want_bytes(session.sid)).decode() if signer else session.sid
+            response.set_cookie(
+                name, cookie,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app)
+            )
+
+
+class TieredSessionStore:
+    """
+    Session storage shared by the Flask session interface and callers that
+    manage sessions directly (bulk revocation on logout-everywhere or
+    password change).
+    """
+
+    def __init__(self, backend=None, front: SessionLRU = None, codec: CacheCodec = None,
+                 lifetime: int = 900):
+        self.backend = backend if backend is not None else LocalSessionBackend()
+        self.front = front if front is not None else SessionLRU()
+        self.codec = codec if codec is not None else CacheCodec(compression='none')
+        self.lifetime = lifetime
+        self.touch_interval = min(60.0, lifetime / 4)
+        self.stats = {'front_hits': 0, 'stale_front_entries': 0, 'store_hits': 0, 'misses': 0,
+                      'writes': 0, 'touches': 0, 'skipped_touches': 0, 'deletes': 0, 'errors': 0}
+        self._pid = os.getpid()
+
+    def init_app(self, app):
+        lifetime = app.config.get('PERMANENT_SESSION_LIFETIME', timedelta(minutes=15))
+        self.lifetime = int(lifetime.total_seconds() if isinstance(lifetime, timedelta) else lifetime)
+        self.touch_interval = min(60.0, self.lifetime / 4)
+        self.front = SessionLRU(
+            maxsize=app.config.get('SESSION_LOCAL_CACHE_SIZE', 10000),
+            ttl=app.config.get('SESSION_LOCAL_CACHE_TTL', 2.0)
+        )
+        self.codec = CacheCodec(
+            compression=app.config.get('CACHE_COMPRESSION', 'auto'),
+            compression_threshold=app.config.get('CACHE_COMPRESSION_THRESHOLD', 1024)
+        )
+
+        prefix = app.config.get('SESSION_KEY_PREFIX', 'session:')
+        if app.config.get('SESSION_STORE', 'redis') == 'redis':
+            redis_url = app.config.get('SESSION_REDIS_URL') or app.config.get('REDIS_URL', 'redis://localhost:6379/0')
+            try:
+                client = redis.from_url(redis_url, decode_responses=False)
+                client.ping()
+                self.backend = RedisSessionBackend(client, prefix)
+                logger.info("Redis session store initialized successfully")
+            except Exception as e:
+                logger.warning(f"Redis session store unavailable, using process-local sessions: {e}")
+                self.backend = LocalSessionBackend()
+        else:
+            self.backend = LocalSessionBackend()
+
+        app.session_interface = TieredSessionInterface(self)
+        app.extensions['session_store'] = self
+
+    # === SESSION OPERATIONS ===
+
+    @staticmethod
+    def new_sid() -> str:
+        return secrets.token_urlsafe(32)
+
+    def load(self, sid: str) -> Optional[Dict[str, Any]]:
+        self._check_fork()
+        try:
+            entry = self.front.get(sid)
+            if entry is not None:
+                if self.backend.version(sid) == entry[3]:
+                    self.stats['front_hits'] += 1
+                    return self._decode(sid, entry[0])
+                # Saved or deleted by another worker since it was cached
+                self.stats['stale_front_entries'] += 1
+                self.front.discard(sid)
+            found = self.backend.get(sid)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Session load failed: {e}")
+            return None
+        if found is None:
+            self.stats['misses'] += 1
+            return None
+        payload, version = found
+        self.stats['store_hits'] += 1
+        if version is not None:
+            # Unknown last touch: the first unmodified request extends the TTL
+            self.front.put(sid, payload, touched_at=0.0, version=version)
+        return self._decode(sid, payload)
+
+    def save(self, sid: str, data: Dict[str, Any], user_id: Any = None):
+        payload = self.codec.encode(data)
+        try:
+            version = self.backend.set(sid, payload, self.lifetime)
+            if user_id is not None:
+                self.backend.index(str(user_id), sid, self.lifetime)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Session save failed: {e}")
+            self.front.discard(sid)
+            return
+        self.stats['writes'] += 1
+        self.front.put(sid, payload, touched_at=time.monotonic(), version=version)
+
+    def touch(self, sid: str):
+        """Extend an unmodified session's TTL, at most once per touch interval"""
+        entry = self.front.get(sid)
+        now = time.monotonic()
+        if entry is not None and now - entry[2] < self.touch_interval:
+            self.stats['skipped_touches'] += 1
+            return
+        try:
+            self.backend.touch(sid, self.lifetime)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Session touch failed: {e}")
+            return
+        self.stats['touches'] += 1
+        if entry is not None:
+            entry[2] = now
+
+    def delete(self, *sids: str):
+        self.front.discard(*sids)
+        try:
+            self.backend.delete(*sids)
+            self.stats['deletes'] += len(sids)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Session delete failed: {e}")
+
+    def delete_user_sessions(self, user_id: Any) -> int:
+        """Expire every session of a user in one call; other workers see it on their next load"""
+        try:
+            sids = self.backend.pop_index(str(user_id))
+        except Exception as e:
+            logger.error(f"Session revocation failed for user {user_id}: {e}")
+            return 0
+        if sids:
+            self.delete(*sids)
+        return len(sids)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['front_hits'] + self.stats['store_hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'front_hit_rate': round(self.stats['front_hits'] / lookups * 100, 2) if lookups else 0,
+            'front_size': len(self.front),
+            'backend': type(self.backend).__name__
+        }
+
+    # === HELPERS ===
+
+    def _decode(self, sid: str, payload: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            data = self.codec.decode(payload)
+            return data if isinstance(data, dict) else None
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Discarding undecodable session: {e}")
+            self.front.discard(sid)
+            return None
+
+    def _check_fork(self):
+        # The parent's front cache is a snapshot other workers will not invalidate
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self.front.clear()
+
+
+# Global session store instance
+session_store = TieredSessionStore()
@@ -0,0 +1,344 @@
+"""
+Socket.IO Streaming Hub
+Computes each streaming topic once per tick and fans out deltas to subscribed rooms across workers
+"""
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+ROOM_PREFIX = 'hub:'
+
+
+def diff_payload(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Tuple[Dict[str, Any], list]:
+    """Changed keys of ``new`` relative to ``old`` (recursing into dicts) and the removed keys"""
+    if not old:
+        return dict(new), []
+    changed = {}
+    for key, value in new.items():
+        previous = old.get(key)
+        if isinstance(value, dict) and isinstance(previous, dict):
+            nested, removed = diff_payload(previous, value)
+            if nested or removed:
+                changed[key] = nested if not removed else value
+        elif key not in old or previous != value:
+            changed[key] = value
+    return changed, [key for key in old if key not in new]
+
+
+@dataclass
+class StreamTopic:
+    """
+    A streaming topic computed once per ``interval`` seconds.
+
+    ``producer`` returns ``{event: payload}``. Dict payloads are state
+    snapshots and are sent as deltas; list payloads are one-off events and
+    each item is emitted as-is.
+    """
+    name: str
+    producer: Callable[[], Dict[str, Any]]
+    interval: float
+    namespace: str = '/'
+    next_run: float = 0.0
+    subscribers: Set[str] = field(default_factory=set)
+
+    @property
+    def room(self) -> str:
+        return f"{ROOM_PREFIX}{self.name}"
+
+
+class LocalStreamBackend:
+    """Single-process coordination: every tick belongs to this worker"""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._snapshots: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, topic: str, tick: int, ttl: float) -> bool:
+        return True
+
+    def get_snapshot(self, topic: str) -> Tuple[int, Dict[str, Any]]:
+        with self._lock:
+            return self._snapshots.get(topic, (0, {}))
+
+    def set_snapshot(self, topic: str, seq: int, snapshot: Dict[str, Any], ttl: float):
+        with self._lock:
+            self._snapshots[topic] = (seq, snapshot)
+
+
+class RedisStreamBackend:
+    """Cross-worker coordination: a Redis SET NX per tick elects the worker that computes it"""
+
+    name = 'redis'
+
+    def __init__(self, client, key_prefix: str = 'nvc_banking:stream:'):
+        self.client = client
+        self.key_prefix = key_prefix
+
+    def claim(self, topic: str, tick: int, ttl: float) -> bool:
+        key = f"{self.key_prefix}tick:{topic}:{tick}"
+        return bool(self.client.set(key, 1, nx=True, px=max(int(ttl * 1000), 1000)))
+
+    def get_snapshot(self, topic: str) -> Tuple[int, Dict[str, Any]]:
+        raw = self.client.get(f"{self.key_prefix}snapshot:{topic}")
+        if not raw:
+            return 0, {}
+        stored = json.loads(raw)
+        return stored['seq'], stored['snapshot']
+
+    def set_snapshot(self, topic: str, seq: int, snapshot: Dict[str, Any], ttl: float):
+        value = json.dumps({'seq': seq, 'snapshot': snapshot}, default=str)
+        self.client.set(f"{self.key_prefix}snapshot:{topic}", value, px=max(int(ttl * 1000), 1000))
+
+
+class StreamingHub:
+    """
+    One scheduler per worker for every streaming topic.
+
+    Clients subscribe to topics instead of owning polling threads. On each
+    tick exactly one worker (elected through the backend) runs the topic's
+    producer, diffs it against the shared snapshot and emits the delta to the
+    topic room; Flask-SocketIO's message queue delivers room emits to clients
+    on every worker. Payloads carry ``_seq``; full snapshots carry
+    ``_full: True``. Clients that acknowledge sequence numbers with
+    ``stream_ack`` and fall more than ``max_lag`` behind are moved off the live
+    room and receive one coalesced snapshot per acknowledgement until they
+    catch up. The scheduler exits once no topic has local subscribers.
+    """
+
+    def __init__(self, max_lag: int = 3):
+        self.max_lag = max_lag
+        self.socketio = None
+        self.backend = LocalStreamBackend()
+        self.topics: Dict[str, StreamTopic] = {}
+        self.stats = {'ticks': 0, 'skipped_ticks': 0, 'emits': 0, 'coalesced': 0, 'producer_errors': 0}
+        self._acks: Dict[Tuple[str, str], int] = {}
+        self._lagging: Dict[Tuple[str, str], int] = {}  # (topic, sid) -> seq of last snapshot sent
+        self._lock = threading.RLock()
+        self._running = False
+        self._ack_namespaces: Set[str] = set()
+
+    def init_app(self, app, socketio):
+        """Bind to the app's SocketIO server and pick the coordination backend"""
+        self.socketio = socketio
+        queue_url = app.config.get('SOCKETIO_MESSAGE_QUEUE')
+        if queue_url and queue_url.startswith(('redis://', 'rediss://', 'unix://')):
+            try:
+                import redis
+                client = redis.from_url(queue_url)
+                client.ping()
+                self.backend = RedisStreamBackend(client)
+                logger.info("Streaming hub coordinating workers through Redis")
+            except Exception as e:
+                logger.warning(f"Streaming hub Redis backend unavailable, running per worker: {e}")
+        app.extensions['streaming_hub'] = self
+
+    def register_topic(self, name: str, producer: Callable[[], Dict[str, Any]], interval: float,
+                       namespace: str = '/') -> StreamTopic:
+        """Declare a topic; registering the same name again keeps the existing one"""
+        with self._lock:
+            topic = self.topics.get(name)
+            if topic is None:
+                topic = self.topics[name] = StreamTopic(name, producer, interval, namespace)
+                self._register_ack_handler(namespace)
+            return topic
+
+    def _register_ack_handler(self, namespace: str):
+        if self.socketio is None or namespace in self._ack_namespaces:
+            return
+        self._ack_namespaces.add(namespace)
+
+        @self.socketio.on('stream_ack', namespace=namespace)
+        def handle_stream_ack(data):
+            from flask import request
+            self.acknowledge(request.sid, data.get('topic'), int(data.get('seq', 0)))
+
+    # === SUBSCRIPTIONS ===
+
+    def subscribe(self, name: str, sid: Optional[str] = None):
+        """Add the current (or given) client to a topic and send it the latest full snapshot"""
+        from flask import request
+        from flask_socketio import join_room
+
+        topic = self.topics[name]
+        sid = sid or request.sid
+        join_room(topic.room, sid=sid, namespace=topic.namespace)
+        with self._lock:
+            topic.subscribers.add(sid)
+
+        seq, snapshot = self.backend.get_snapshot(name)
+        if not snapshot and not topic.next_run:
+            # First subscriber anywhere: compute now instead of waiting a full interval
+            self._run_topic(topic, force=True)
+        else:
+            self._send_snapshot(topic, sid, seq, snapshot)
+        self._ensure_running()
+
+    def unsubscribe(self, name: str, sid: Optional[str] = None):
+        from flask import request
+        from flask_socketio import leave_room
+
+        topic = self.topics.get(name)
+        if topic is None:
+            return
+        sid = sid or request.sid
+        try:
+            leave_room(topic.room, sid=sid, namespace=topic.namespace)
+        except Exception:
+            pass  # Already disconnected
+        self._forget(topic, sid)
+
+    def unsubscribe_all(self, sid: Optional[str] = None):
+        from flask import request
+        sid = sid or request.sid
+        for name in list(self.topics):
+            self.unsubscribe(name, sid)
+
+    def _forget(self, topic: StreamTopic, sid: str):
+        with self._lock:
+            topic.subscribers.discard(sid)
+            self._acks.pop((topic.name, sid), None)
+            self._lagging.pop((topic.name, sid), None)
+
+    def acknowledge(self, sid: str, name: str, seq: int):
+        """Record a client's progress and send coalesced state to lagging clients"""
+        topic = self.topics.get(name)
+        if topic is None or sid not in topic.subscribers:
+            return
+        key = (name, sid)
+        with self._lock:
+            self._acks[key] = max(seq, self._acks.get(key, 0))
+            sent = self._lagging.get(key)
+        if sent is None or seq < sent:
+            return
+
+        current_seq, snapshot = self.backend.get_snapshot(name)
+        if current_seq <= seq:
+            # Caught up: back to the live room
+            with self._lock:
+                self._lagging.pop(key, None)
+            self.socketio.server.enter_room(sid, topic.room, namespace=topic.namespace)
+        else:
+            self._send_snapshot(topic, sid, current_seq, snapshot)
+            with self._lock:
+                self._lagging[key] = current_seq
+            self.stats['coalesced'] += 1
+
+    # === SCHEDULER ===
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._running or self.socketio is None:
+                return
+            self._running = True
+        self.socketio.start_background_task(self._scheduler)
+
+    def _scheduler(self):
+        logger.info("Streaming hub scheduler started")
+        try:
+            while True:
+                now = time.time()
+                with self._lock:
+                    self._prune_disconnected()
+                    active = [topic for topic in self.topics.values() if topic.subscribers]
+                    if not active:
+                        self._running = False
+                        break
+                for topic in active:
+                    if now >= topic.next_run:
+                        self._run_topic(topic)
+                        self._check_lagging(topic)
+                next_due = min(topic.next_run for topic in active)
+                self.socketio.sleep(min(max(next_due - time.time(), 0.05), 1.0))
+        except Exception as e:
+            logger.error(f"Streaming hub scheduler failed: {e}")
+            with self._lock:
+                self._running = False
+        logger.info("Streaming hub scheduler stopped: no subscribers")
+
+    def _prune_disconnected(self):
+        manager = self.socketio.server.manager
+        for topic in self.topics.values():
+            for sid in list(topic.subscribers):
+                if not manager.is_connected(sid, topic.namespace):
+                    self._forget(topic, sid)
+
+    def _run_topic(self, topic: StreamTopic, force: bool = False):
+        """Compute a tick if this worker wins it and emit the delta to the topic room"""
+        now = time.time()
+        tick = int(now // topic.interval)
+        topic.next_run = (tick + 1) * topic.interval
+        if not force and not self.backend.claim(topic.name, tick, topic.interval):
+            self.stats['skipped_ticks'] += 1
+            return
+
+        try:
+            produced = topic.producer() or {}
+        except Exception as e:
+            self.stats['producer_errors'] += 1
+            logger.error(f"Streaming producer for {topic.name} failed: {e}")
+            return
+
+        seq, previous = self.backend.get_snapshot(topic.name)
+        seq += 1
+        snapshot = {}
+        for event, payload in produced.items():
+            if isinstance(payload, list):
+                for item in payload:
+                    self._emit(topic, event, item)
+                continue
+            snapshot[event] = payload
+            delta, removed = diff_payload(previous.get(event), payload)
+            if not delta and not removed:
+                continue
+            message = {**delta, '_seq': seq, '_full': event not in previous}
+            if removed:
+                message['_removed'] = removed
+            self._emit(topic, event, message)
+
+        self.backend.set_snapshot(topic.name, seq, {**previous, **snapshot}, topic.interval * 10)
+        self.stats['ticks'] += 1
+
+    def _emit(self, topic: StreamTopic, event: str, payload: Any, sid: Optional[str] = None):
+        self.socketio.emit(event, payload, room=sid or topic.room, namespace=topic.namespace)
+        self.stats['emits'] += 1
+
+    def _send_snapshot(self, topic: StreamTopic, sid: str, seq: int, snapshot: Dict[str, Any]):
+        for event, payload in snapshot.items():
+            self._emit(topic, event, {**payload, '_seq': seq, '_full': True}, sid=sid)
+
+    def _check_lagging(self, topic: StreamTopic):
+        """Move acknowledging clients that fell ``max_lag`` ticks behind onto coalesced delivery"""
+        current_seq, snapshot = self.backend.get_snapshot(topic.name)
+        with self._lock:
+            lagging = [
+                sid for sid in topic.subscribers
+                if (topic.name, sid) in self._acks and (topic.name, sid) not in self._lagging
+                and current_seq - self._acks[(topic.name, sid)] > self.max_lag
+            ]
+            for sid in lagging:
+                self._lagging[(topic.name, sid)] = current_seq
+        for sid in lagging:
+            self.socketio.server.leave_room(sid, topic.room, namespace=topic.namespace)
+            self._send_snapshot(topic, sid, current_seq, snapshot)
+            self.stats['coalesced'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'backend': self.backend.name,
+            'running': self._running,
+            'topics': {name: len(topic.subscribers) for name, topic in self.topics.items()},
+            'lagging_clients': len(self._lagging),
+        }
+
+
+# Global hub shared by module socket handlers
+streaming_hub = StreamingHub()
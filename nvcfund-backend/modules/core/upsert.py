@@ -0,0 +1,39 @@
+"""
+Additive Upserts
+Add counters and totals onto existing aggregate rows, inserting the rows that do not exist yet
+"""
+
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import and_
+
+
+def upsert_add(connection, table, keys: Sequence[str], aggregates: Sequence[str], rows: List[Dict[str, Any]]):
+    """
+    Add each row's ``aggregates`` onto the row matched by ``keys``, or insert it.
+
+    PostgreSQL and SQLite use one INSERT ... ON CONFLICT DO UPDATE, which
+    needs a unique constraint on ``keys``; other dialects fall back to an
+    UPDATE per row followed by an INSERT when nothing matched.
+    """
+    if not rows:
+        return
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(table).values(rows)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: table.c[name] + statement.excluded[name] for name in aggregates}
+        ))
+        return
+    for row in rows:
+        key = and_(*(table.c[name] == row[name] for name in keys))
+        updated = connection.execute(
+            table.update().where(key).values({name: table.c[name] + row[name] for name in aggregates})
+        ).rowcount
+        if not updated:
+            connection.execute(table.insert().values(row))
@@ -0,0 +1,459 @@
+"""
+Trading Backtesting Engine
+Replays daily bars from MarketData or a memory-mapped columnar store through vectorized strategies
+"""
+
+import itertools
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+    np = None
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Parameter sweeps run inside a web request, so their size and pool are bounded
+MAX_SWEEP_COMBINATIONS = 200
+MAX_SWEEP_WORKERS = 4
+
+
+# === BAR DATA ===
+
+@dataclass
+class BarData:
+    """Daily bars as (days x symbols) matrices; NaN where a symbol has no bar"""
+    symbols: List[str]
+    dates: Any   # np.ndarray of datetime64[D]
+    close: Any   # np.ndarray (days, symbols)
+    open: Any = None
+
+    def slice(self, start: Optional[date] = None, end: Optional[date] = None) -> 'BarData':
+        mask = np.ones(len(self.dates), dtype=bool)
+        if start:
+            mask &= self.dates >= np.datetime64(start, 'D')
+        if end:
+            mask &= self.dates <= np.datetime64(end, 'D')
+        return BarData(self.symbols, self.dates[mask], self.close[mask],
+                       self.open[mask] if self.open is not None else None)
+
+    def select(self, symbols: Sequence[str]) -> 'BarData':
+        columns = [self.symbols.index(symbol) for symbol in symbols]
+        return BarData(list(symbols), self.dates, self.close[:, columns],
+                       self.open[:, columns] if self.open is not None else None)
+
+
+class ColumnarBarStore:
+    """
+    On-disk bar store: one ``.npy`` file per field plus ``meta.json``.
+
+    Files are opened with ``mmap_mode='r'``, so sweep workers share the page
+    cache instead of each unpickling a private copy of years of bars.
+    """
+
+    FIELDS = ('close', 'open')
+
+    @staticmethod
+    def write(path: str, bars: BarData):
+        directory = Path(path)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / 'dates.npy', bars.dates.astype('datetime64[D]'))
+        np.save(directory / 'close.npy', np.ascontiguousarray(bars.close, dtype=np.float64))
+        if bars.open is not None:
+            np.save(directory / 'open.npy', np.ascontiguousarray(bars.open, dtype=np.float64))
+        with open(directory / 'meta.json', 'w') as meta_file:
+            json.dump({'symbols': bars.symbols, 'fields': ['close'] + (['open'] if bars.open is not None else [])},
+                      meta_file)
+
+    @staticmethod
+    def open(path: str) -> BarData:
+        directory = Path(path)
+        with open(directory / 'meta.json') as meta_file:
+            meta = json.load(meta_file)
+        open_prices = np.load(directory / 'open.npy', mmap_mode='r') if 'open' in meta['fields'] else None
+        return BarData(
+            symbols=meta['symbols'],
+            dates=np.load(directory / 'dates.npy', mmap_mode='r'),
+            close=np.load(directory / 'close.npy', mmap_mode='r'),
+            open=open_prices
+        )
+
+
+def load_bars_from_db(session, symbols: Sequence[str], start: Optional[date] = None,
+                      end: Optional[date] = None) -> BarData:
+    """Load the last MarketData quote of each day for ``symbols`` in a single query"""
+    from sqlalchemy import and_, desc, func
+    from .models import MarketData, TradingInstrument
+
+    day = func.date(MarketData.market_date)
+    filters = [TradingInstrument.symbol.in_([symbol.upper() for symbol in symbols])]
+    if start:
+        filters.append(MarketData.market_date >= start)
+    if end:
+        filters.append(day <= end)
+
+    ranked = session.query(
+        TradingInstrument.symbol.label('symbol'),
+        day.label('day'),
+        func.coalesce(MarketData.close_price, MarketData.current_price).label('close'),
+        MarketData.open_price.label('open'),
+        func.row_number().over(
+            partition_by=(MarketData.instrument_id, day),
+            order_by=desc(MarketData.market_date)
+        ).label('day_rank')
+    ).join(TradingInstrument, TradingInstrument.id == MarketData.instrument_id).filter(and_(*filters)).subquery()
+
+    rows = session.query(ranked.c.symbol, ranked.c.day, ranked.c.close, ranked.c.open).filter(
+        ranked.c.day_rank == 1
+    ).all()
+
+    symbol_list = sorted({row[0] for row in rows})
+    days = np.array(sorted({str(row[1]) for row in rows}), dtype='datetime64[D]')
+    column_index = {symbol: column for column, symbol in enumerate(symbol_list)}
+    row_index = {str(day_value): row for row, day_value in enumerate(days.astype(str))}
+    close = np.full((len(days), len(symbol_list)), np.nan)
+    open_prices = np.full_like(close, np.nan)
+    for symbol, quote_day, close_price, open_price in rows:
+        row, column = row_index[str(quote_day)], column_index[symbol]
+        if close_price is not None:
+            close[row, column] = float(close_price)
+        if open_price is not None:
+            open_prices[row, column] = float(open_price)
+    return BarData(symbol_list, days, close, open_prices)
+
+
+# === VECTOR HELPERS ===
+
+def forward_fill(values: Any) -> Any:
+    """Carry the last valid value down each column"""
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(values.shape[0])[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    filled = values[index, np.arange(values.shape[1])]
+    filled[~np.logical_or.accumulate(valid, axis=0)] = np.nan
+    return filled
+
+
+def rolling_mean(values: Any, window: int) -> Any:
+    """Trailing mean over ``window`` rows; NaN until the window is fully populated"""
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    result = np.full(values.shape, np.nan)
+    if window > values.shape[0]:
+        return result
+    window_sums = sums[window - 1:].copy()
+    window_sums[1:] -= sums[:-window]
+    window_counts = counts[window - 1:].copy()
+    window_counts[1:] -= counts[:-window]
+    result[window - 1:] = np.where(window_counts == window, window_sums / window, np.nan)
+    return result
+
+
+def rolling_std(values: Any, window: int) -> Any:
+    mean = rolling_mean(values, window)
+    mean_of_squares = rolling_mean(values * values, window)
+    return np.sqrt(np.clip(mean_of_squares - mean * mean, 0.0, None))
+
+
+def top_k_weights(score: Any, eligible: Any, k: int) -> Any:
+    """Equal weights across the ``k`` highest-scoring eligible symbols of each row"""
+    score = np.where(eligible & ~np.isnan(score), score, -np.inf)
+    k = max(1, min(k, score.shape[1]))
+    chosen = np.zeros(score.shape, dtype=bool)
+    np.put_along_axis(chosen, np.argpartition(-score, k - 1, axis=1)[:, :k], True, axis=1)
+    chosen &= np.isfinite(score)
+    counts = chosen.sum(axis=1, keepdims=True)
+    return np.where(counts > 0, chosen / np.maximum(counts, 1), 0.0)
+
+
+# === STRATEGIES ===
+
+class Strategy:
+    """
+    Strategy interface.
+
+    Vectorized strategies implement ``target_weights`` and return a (days x
+    symbols) matrix of long-only portfolio weights decided at each close.
+    Strategies that need portfolio state implement ``on_bar`` instead, which
+    the engine calls once per bar.
+    """
+
+    def __init__(self, **params):
+        self.params = params
+        self.top_k = int(params.get('max_positions', 10))
+
+    def target_weights(self, bars: BarData) -> Optional[Any]:
+        return None
+
+    def on_bar(self, index: int, bars: BarData, shares: Any, cash: float) -> Any:
+        raise NotImplementedError
+
+
+class MomentumStrategy(Strategy):
+    """Hold the top-k symbols by positive trailing return"""
+
+    def target_weights(self, bars: BarData) -> Any:
+        lookback = int(self.params.get('lookback', 126))
+        momentum = np.full(bars.close.shape, np.nan)
+        momentum[lookback:] = bars.close[lookback:] / bars.close[:-lookback] - 1.0
+        return top_k_weights(momentum, momentum > self.params.get('min_momentum', 0.0), self.top_k)
+
+
+class MeanReversionStrategy(Strategy):
+    """Hold the most oversold symbols by trailing z-score"""
+
+    def target_weights(self, bars: BarData) -> Any:
+        lookback = int(self.params.get('lookback', 20))
+        mean = rolling_mean(bars.close, lookback)
+        std = rolling_std(bars.close, lookback)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            zscore = (bars.close - mean) / std
+        return top_k_weights(-zscore, zscore < -float(self.params.get('entry_z', 1.0)), self.top_k)
+
+
+class TrendFollowingStrategy(Strategy):
+    """Hold symbols whose fast moving average is above the slow one, strongest trends first"""
+
+    def target_weights(self, bars: BarData) -> Any:
+        fast = rolling_mean(bars.close, int(self.params.get('fast_period', 50)))
+        slow = rolling_mean(bars.close, int(self.params.get('slow_period', 200)))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread = fast / slow - 1.0
+        return top_k_weights(spread, spread > 0, self.top_k)
+
+
+STRATEGIES = {
+    'MOMENTUM': MomentumStrategy,
+    'MEAN_REVERSION': MeanReversionStrategy,
+    'TREND_FOLLOWING': TrendFollowingStrategy,
+}
+
+
+def create_strategy(strategy_type: str, params: Dict[str, Any]) -> Strategy:
+    strategy_class = STRATEGIES.get(str(strategy_type).upper())
+    if strategy_class is None:
+        raise ValueError(f"Unsupported strategy type for backtesting: {strategy_type}")
+    return strategy_class(**params)
+
+
+# === ENGINE ===
+
+@dataclass
+class BacktestResult:
+    """Equity curve and summary statistics of one backtest run"""
+    dates: Any
+    equity: Any
+    total_trades: int = 0
+    closed_trades: int = 0
+    profitable_trades: int = 0
+    trade_returns: List[float] = field(default_factory=list)
+    total_commission: float = 0.0
+    risk_free_rate: float = 0.0
+
+    def summary(self, include_curve: bool = True) -> Dict[str, Any]:
+        equity = np.asarray(self.equity, dtype=float)
+        if len(equity) < 2:
+            return {'error': 'Not enough bars to backtest'}
+        returns = equity[1:] / equity[:-1] - 1.0
+        excess = returns - self.risk_free_rate / TRADING_DAYS_PER_YEAR
+        volatility = float(np.std(returns, ddof=1)) if len(returns) > 1 else 0.0
+        drawdown = equity / np.maximum.accumulate(equity) - 1.0
+        total_return = float(equity[-1] / equity[0] - 1.0)
+        years = len(returns) / TRADING_DAYS_PER_YEAR
+        summary = {
+            'start_date': str(self.dates[0]),
+            'end_date': str(self.dates[-1]),
+            'total_return': total_return,
+            'annual_return': float((1.0 + total_return) ** (1.0 / years) - 1.0) if total_return > -1 else -1.0,
+            'volatility': volatility * float(np.sqrt(TRADING_DAYS_PER_YEAR)),
+            'sharpe_ratio': float(np.mean(excess) / volatility * np.sqrt(TRADING_DAYS_PER_YEAR)) if volatility > 0 else 0.0,
+            'max_drawdown': float(drawdown.min()),
+            'win_rate': self.profitable_trades / self.closed_trades if self.closed_trades else 0.0,
+            'total_trades': self.total_trades,
+            'profitable_trades': self.profitable_trades,
+            'avg_trade_return': float(np.mean(self.trade_returns)) if self.trade_returns else 0.0,
+            'total_commission': self.total_commission,
+        }
+        if include_curve:
+            summary['equity_curve'] = [[str(day), float(value)] for day, value in zip(self.dates, equity)]
+        return summary
+
+
+class BacktestEngine:
+    """
+    Bar-by-bar portfolio simulation.
+
+    Weights decided at the close of bar ``t`` are traded at bar ``t + 1``
+    (its open when available, otherwise its close), so signals never see
+    the price they trade at. Commission follows TradingService: a rate on
+    traded value with a per-trade minimum. A symbol is traded when its
+    target weight changes, a stop is hit, or it drifts more than
+    ``rebalance_threshold`` of equity from target.
+    """
+
+    def __init__(self, initial_capital: float = 100000.0, commission_rate: float = 0.001,
+                 min_commission: float = 1.0, rebalance_threshold: float = 0.02,
+                 stop_loss: Optional[float] = None, take_profit: Optional[float] = None,
+                 risk_free_rate: float = 0.0):
+        self.initial_capital = float(initial_capital)
+        self.commission_rate = commission_rate
+        self.min_commission = min_commission
+        self.rebalance_threshold = rebalance_threshold
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.risk_free_rate = risk_free_rate
+
+    def run(self, bars: BarData, strategy: Strategy) -> BacktestResult:
+        close = forward_fill(np.asarray(bars.close, dtype=float))
+        execution = close
+        if bars.open is not None:
+            execution = np.where(np.isnan(bars.open), close, bars.open)
+        filled = BarData(bars.symbols, np.asarray(bars.dates), close, execution)
+        weights = strategy.target_weights(filled)
+
+        days, symbols = close.shape
+        cash = self.initial_capital
+        shares = np.zeros(symbols)
+        cost_basis = np.zeros(symbols)
+        previous_target = np.zeros(symbols)
+        stopped = np.zeros(symbols, dtype=bool)
+        equity = np.empty(days)
+        result = BacktestResult(dates=filled.dates, equity=equity, risk_free_rate=self.risk_free_rate)
+
+        for t in range(days):
+            if t > 0:
+                if weights is not None:
+                    target = weights[t - 1]
+                else:
+                    target = np.asarray(strategy.on_bar(t - 1, filled, shares.copy(), cash), dtype=float)
+                target = np.clip(np.nan_to_num(target), 0.0, None)
+                price = execution[t]
+                tradable = ~np.isnan(price)
+
+                hit = np.zeros(symbols, dtype=bool)
+                held = (shares > 0) & tradable
+                if held.any() and (self.stop_loss or self.take_profit):
+                    change = np.zeros(symbols)
+                    change[held] = price[held] / cost_basis[held] - 1.0
+                    if self.stop_loss:
+                        hit |= held & (change <= -self.stop_loss)
+                    if self.take_profit:
+                        hit |= held & (change >= self.take_profit)
+
+                changed = target != previous_target
+                previous_target = target
+                # A stopped-out symbol stays flat until the strategy changes its target
+                stopped = (stopped & ~changed) | hit
+                effective = np.where(stopped, 0.0, target)
+
+                mark = np.where(tradable, price, close[t - 1])
+                portfolio_value = cash + float(np.sum(np.where(shares != 0, shares * mark, 0.0)))
+                desired = np.zeros(symbols)
+                desired[tradable] = effective[tradable] * portfolio_value / price[tradable]
+                desired[~tradable] = shares[~tradable]
+                delta = desired - shares
+                traded_value = np.where(tradable, delta * np.nan_to_num(price), 0.0)
+                trade = tradable & (delta != 0) & (
+                    changed | hit | (np.abs(traded_value) >= self.rebalance_threshold * portfolio_value)
+                )
+
+                if trade.any():
+                    self._execute(trade, delta, price, traded_value, shares, cost_basis, result)
+                    cash -= float(np.sum(traded_value[trade]))
+                    commissions = np.maximum(np.abs(traded_value[trade]) * self.commission_rate, self.min_commission)
+                    cash -= float(np.sum(commissions))
+                    result.total_commission += float(np.sum(commissions))
+
+            equity[t] = cash + float(np.sum(np.where(shares != 0, shares * np.nan_to_num(close[t]), 0.0)))
+
+        return result
+
+    @staticmethod
+    def _execute(trade, delta, price, traded_value, shares, cost_basis, result: BacktestResult):
+        """Apply fills, updating average cost and recording closed-trade returns"""
+        sells = trade & (delta < 0) & (shares > 0)
+        if sells.any():
+            trade_returns = price[sells] / cost_basis[sells] - 1.0
+            result.closed_trades += int(sells.sum())
+            result.profitable_trades += int(np.sum(trade_returns > 0))
+            result.trade_returns.extend(trade_returns.tolist())
+
+        buys = trade & (delta > 0)
+        if buys.any():
+            new_shares = shares[buys] + delta[buys]
+            cost_basis[buys] = (shares[buys] * cost_basis[buys] + traded_value[buys]) / new_shares
+
+        shares[trade] += delta[trade]
+        cost_basis[trade & (shares <= 0)] = 0.0
+        result.total_trades += int(trade.sum())
+
+
+# === PARAMETER SWEEPS ===
+
+_worker_bars: Optional[BarData] = None
+_worker_engine: Optional[BacktestEngine] = None
+
+
+def _init_sweep_worker(store_path: str, engine_params: Dict[str, Any]):
+    global _worker_bars, _worker_engine
+    _worker_bars = ColumnarBarStore.open(store_path)
+    _worker_engine = BacktestEngine(**engine_params)
+
+
+def _run_sweep_point(task) -> Dict[str, Any]:
+    strategy_type, params = task
+    try:
+        summary = _worker_engine.run(_worker_bars, create_strategy(strategy_type, params)).summary(include_curve=False)
+    except Exception as e:
+        summary = {'error': str(e)}
+    return {'params': params, **summary}
+
+
+def run_parameter_sweep(store_path: str, strategy_type: str, base_params: Dict[str, Any],
+                        grid: Dict[str, Sequence[Any]], engine_params: Dict[str, Any],
+                        max_workers: Optional[int] = None,
+                        max_combinations: int = MAX_SWEEP_COMBINATIONS,
+                        worker_limit: int = MAX_SWEEP_WORKERS) -> List[Dict[str, Any]]:
+    """
+    Backtest every combination in ``grid`` across a process pool.
+
+    Workers open the columnar store memory-mapped once each, so only the
+    parameter dicts cross process boundaries. Results are sorted by Sharpe.
+    Grids larger than ``max_combinations`` are rejected before any work
+    starts, and the pool never exceeds ``worker_limit`` or the CPU count.
+    """
+    if not isinstance(grid, dict) or not all(isinstance(values, (list, tuple)) for values in grid.values()):
+        raise ValueError('Parameter grid must map parameter names to lists of values')
+    keys = list(grid)
+    combinations = 1
+    for key in keys:
+        combinations *= len(grid[key])
+    if combinations > max_combinations:
+        raise ValueError(f"Parameter grid has {combinations} combinations; the limit is {max_combinations}")
+    tasks = [(strategy_type, {**base_params, **dict(zip(keys, values))})
+             for values in itertools.product(*(grid[key] for key in keys))]
+    if not tasks:
+        return []
+
+    try:
+        requested = int(max_workers) if max_workers else worker_limit
+    except (TypeError, ValueError):
+        raise ValueError('max_workers must be an integer')
+    workers = max(1, min(requested, worker_limit, os.cpu_count() or 1, len(tasks)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker,
+                             initargs=(store_path, engine_params)) as pool:
+        results = list(pool.map(_run_sweep_point, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+    return sorted(results, key=lambda item: item.get('sharpe_ratio', float('-inf')), reverse=True)
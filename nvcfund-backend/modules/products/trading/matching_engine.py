@@ -0,0 +1,370 @@
+"""
+Trading Matching Engine
+In-memory price-time priority limit order books with stop triggers per trading instrument
+"""
+
+import bisect
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0')
+
+# Order sides as stored on TradingOrder mapped to the book side they rest on
+BOOK_SIDES = {'buy': 'buy', 'cover': 'buy', 'sell': 'sell', 'short': 'sell'}
+
+# Statuses mirror OrderStatus values so updates can be written straight to TradingOrder
+SUBMITTED = 'submitted'
+PARTIALLY_FILLED = 'partially_filled'
+FILLED = 'filled'
+CANCELLED = 'cancelled'
+REJECTED = 'rejected'
+
+
+class StaleOrderBook(Exception):
+    """The stored state of an order no longer matches this process's book"""
+
+
+class BookOrder:
+    """Mutable order state held by the book"""
+
+    __slots__ = ('order_id', 'side', 'order_type', 'price', 'stop_price', 'quantity', 'remaining',
+                 'filled_value', 'commission', 'time_in_force', 'account_id', 'user_id', 'ref',
+                 'sequence', 'status', 'triggered')
+
+    def __init__(self, order_id: str, side: str, order_type: str, quantity: Decimal,
+                 price: Optional[Decimal] = None, stop_price: Optional[Decimal] = None,
+                 time_in_force: str = 'GTC', account_id: Any = None, user_id: Any = None,
+                 ref: Any = None, filled: Decimal = ZERO, filled_value: Decimal = ZERO,
+                 commission: Decimal = ZERO):
+        self.order_id = order_id
+        self.side = BOOK_SIDES[side]
+        self.order_type = order_type
+        self.price = price
+        self.stop_price = stop_price
+        self.quantity = quantity
+        self.remaining = quantity - filled
+        self.filled_value = filled_value
+        self.commission = commission
+        self.time_in_force = (time_in_force or 'GTC').upper()
+        self.account_id = account_id
+        self.user_id = user_id
+        self.ref = ref  # TradingOrder primary key
+        self.sequence = 0
+        self.status = PARTIALLY_FILLED if filled > 0 else SUBMITTED
+        self.triggered = False
+
+    @property
+    def filled(self) -> Decimal:
+        return self.quantity - self.remaining
+
+    @property
+    def average_price(self) -> Optional[Decimal]:
+        filled = self.filled
+        return self.filled_value / filled if filled > 0 else None
+
+    @property
+    def is_open(self) -> bool:
+        return self.status in (SUBMITTED, PARTIALLY_FILLED)
+
+
+@dataclass
+class Fill:
+    """A single execution between an incoming (taker) and resting (maker) order"""
+    taker: BookOrder
+    maker: BookOrder
+    price: Decimal
+    quantity: Decimal
+    timestamp: float
+
+
+@dataclass
+class MatchResult:
+    """Fills and order state changes produced by one engine call"""
+    fills: List[Fill] = field(default_factory=list)
+    updated: Dict[str, BookOrder] = field(default_factory=dict)
+    message: str = ''
+
+    def touch(self, order: BookOrder):
+        self.updated[order.order_id] = order
+
+    def merge(self, other: 'MatchResult'):
+        self.fills.extend(other.fills)
+        self.updated.update(other.updated)
+
+
+class PriceLevel:
+    """FIFO queue of resting orders at one price"""
+
+    __slots__ = ('price', 'orders', 'volume')
+
+    def __init__(self, price: Decimal):
+        self.price = price
+        self.orders: deque = deque()
+        self.volume = ZERO
+
+
+class OrderBook:
+    """
+    Price-time priority book for one instrument.
+
+    Bid prices are kept ascending and ask prices as ascending negated keys, so
+    the best level on either side is always the last element of its list.
+    Cancels are lazy: the order is flagged and its volume removed from the
+    level, and the dead entry is skipped when it reaches the front of the queue.
+    """
+
+    def __init__(self, instrument_id: Any, last_price: Optional[Decimal] = None):
+        self.instrument_id = instrument_id
+        self.last_price = last_price
+        self.lock = threading.RLock()
+        self._levels = {'buy': {}, 'sell': {}}
+        self._keys = {'buy': [], 'sell': []}
+        self.orders: Dict[str, BookOrder] = {}
+        self._buy_stops: List = []   # (stop_price, sequence, order) min-heap
+        self._sell_stops: List = []  # (-stop_price, sequence, order) min-heap
+        self._sequence = itertools.count(1)
+
+    # === BOOK STATE ===
+
+    @staticmethod
+    def _key(side: str, price: Decimal) -> Decimal:
+        return price if side == 'buy' else -price
+
+    def best_price(self, side: str) -> Optional[Decimal]:
+        keys = self._keys[side]
+        if not keys:
+            return None
+        return keys[-1] if side == 'buy' else -keys[-1]
+
+    def depth(self, levels: int = 10) -> Dict[str, List[List[Decimal]]]:
+        """Aggregated volume for the best ``levels`` prices on each side"""
+        snapshot = {}
+        for side in ('buy', 'sell'):
+            keys = self._keys[side][-levels:][::-1]
+            snapshot['bids' if side == 'buy' else 'asks'] = [
+                [self._levels[side][key].price, self._levels[side][key].volume] for key in keys
+            ]
+        return snapshot
+
+    def _rest(self, order: BookOrder):
+        side_levels = self._levels[order.side]
+        key = self._key(order.side, order.price)
+        level = side_levels.get(key)
+        if level is None:
+            level = side_levels[key] = PriceLevel(order.price)
+            bisect.insort(self._keys[order.side], key)
+        level.orders.append(order)
+        level.volume += order.remaining
+        self.orders[order.order_id] = order
+
+    def _remove_level(self, side: str, key: Decimal):
+        del self._levels[side][key]
+        keys = self._keys[side]
+        if keys and keys[-1] == key:
+            keys.pop()
+        else:
+            keys.pop(bisect.bisect_left(keys, key))
+
+    # === ORDER ENTRY ===
+
+    def submit(self, order: BookOrder) -> MatchResult:
+        """Match, rest, or park an order according to its type and time in force"""
+        result = MatchResult()
+        order.sequence = next(self._sequence)
+        if order.order_type in ('stop', 'stop_limit') and not order.triggered:
+            self._park_stop(order)
+            result.touch(order)
+            self._trigger_stops(result)
+            return result
+
+        self._match(order, result)
+        self._trigger_stops(result)
+        return result
+
+    def _match(self, taker: BookOrder, result: MatchResult):
+        result.touch(taker)
+        opposite = 'sell' if taker.side == 'buy' else 'buy'
+        limit = taker.price if taker.order_type in ('limit', 'stop_limit') else None
+
+        if taker.time_in_force == 'FOK' and self._available(opposite, limit, taker.remaining) < taker.remaining:
+            taker.status = CANCELLED
+            result.message = 'Fill-or-kill order could not be filled in full'
+            return
+
+        levels = self._levels[opposite]
+        keys = self._keys[opposite]
+        now = time.time()
+        while taker.remaining > 0 and keys:
+            key = keys[-1]
+            level = levels[key]
+            if limit is not None and (level.price > limit if taker.side == 'buy' else level.price < limit):
+                break
+            queue = level.orders
+            while taker.remaining > 0 and queue:
+                maker = queue[0]
+                if not maker.is_open:
+                    queue.popleft()
+                    continue
+                quantity = taker.remaining if taker.remaining < maker.remaining else maker.remaining
+                value = quantity * level.price
+                taker.remaining -= quantity
+                taker.filled_value += value
+                maker.remaining -= quantity
+                maker.filled_value += value
+                level.volume -= quantity
+                if maker.remaining == 0:
+                    maker.status = FILLED
+                    queue.popleft()
+                    del self.orders[maker.order_id]
+                else:
+                    maker.status = PARTIALLY_FILLED
+                result.fills.append(Fill(taker, maker, level.price, quantity, now))
+                result.touch(maker)
+                self.last_price = level.price
+            if not queue or level.volume <= 0:
+                self._remove_level(opposite, key)
+
+        if taker.remaining == 0:
+            taker.status = FILLED
+        elif limit is None or taker.time_in_force in ('IOC', 'FOK'):
+            # Market and immediate-or-cancel remainders never rest
+            taker.status = CANCELLED
+            if not result.message:
+                result.message = 'Unfilled remainder cancelled'
+        else:
+            taker.status = PARTIALLY_FILLED if taker.filled > 0 else SUBMITTED
+            self._rest(taker)
+
+    def _available(self, side: str, limit: Optional[Decimal], needed: Decimal) -> Decimal:
+        """Volume on ``side`` that crosses ``limit``, stopping once ``needed`` is reached"""
+        total = ZERO
+        levels = self._levels[side]
+        for key in reversed(self._keys[side]):
+            level = levels[key]
+            if limit is not None and (level.price < limit if side == 'buy' else level.price > limit):
+                break
+            total += level.volume
+            if total >= needed:
+                break
+        return total
+
+    def cancel(self, order_id: str) -> Optional[BookOrder]:
+        """Cancel a resting or parked order; returns it or None when unknown"""
+        order = self.orders.pop(order_id, None)
+        if order is None or not order.is_open:
+            return None
+        order.status = CANCELLED
+        if order.order_type in ('stop', 'stop_limit') and not order.triggered:
+            return order  # Dropped lazily from the stop heap
+        key = self._key(order.side, order.price)
+        level = self._levels[order.side].get(key)
+        if level is not None:
+            level.volume -= order.remaining
+            if level.volume <= 0:
+                self._remove_level(order.side, key)
+        return order
+
+    # === STOP ORDERS ===
+
+    def _park_stop(self, order: BookOrder):
+        self.orders[order.order_id] = order
+        if order.side == 'buy':
+            heapq.heappush(self._buy_stops, (order.stop_price, order.sequence, order))
+        else:
+            heapq.heappush(self._sell_stops, (-order.stop_price, order.sequence, order))
+
+    def update_price(self, price: Decimal) -> MatchResult:
+        """Record an external price update and fire any stops it triggers"""
+        result = MatchResult()
+        self.last_price = price
+        self._trigger_stops(result)
+        return result
+
+    def _trigger_stops(self, result: MatchResult):
+        """Convert triggered stops to market/limit orders until the price settles"""
+        while self.last_price is not None:
+            order = None
+            if self._buy_stops and self._buy_stops[0][0] <= self.last_price:
+                order = heapq.heappop(self._buy_stops)[2]
+            elif self._sell_stops and -self._sell_stops[0][0] >= self.last_price:
+                order = heapq.heappop(self._sell_stops)[2]
+            if order is None:
+                return
+            if not order.is_open:
+                continue
+            del self.orders[order.order_id]
+            order.triggered = True
+            self._match(order, result)
+
+
+class MatchingEngine:
+    """Registry of per-instrument order books with per-book locking"""
+
+    def __init__(self):
+        self._books: Dict[Any, OrderBook] = {}
+        self._lock = threading.Lock()
+        self.loaded_instruments = set()
+
+    def book(self, instrument_id: Any, last_price: Optional[Decimal] = None) -> OrderBook:
+        book = self._books.get(instrument_id)
+        if book is None:
+            with self._lock:
+                book = self._books.get(instrument_id)
+                if book is None:
+                    book = self._books[instrument_id] = OrderBook(instrument_id, last_price)
+        return book
+
+    def submit(self, instrument_id: Any, order: BookOrder) -> MatchResult:
+        book = self.book(instrument_id)
+        with book.lock:
+            return book.submit(order)
+
+    def cancel(self, instrument_id: Any, order_id: str) -> Optional[BookOrder]:
+        book = self.book(instrument_id)
+        with book.lock:
+            return book.cancel(order_id)
+
+    def update_price(self, instrument_id: Any, price: Decimal) -> MatchResult:
+        book = self.book(instrument_id)
+        with book.lock:
+            return book.update_price(price)
+
+    def discard(self, instrument_id: Any):
+        """Drop a book whose state diverged from the database; the next load rebuilds it"""
+        with self._lock:
+            self._books.pop(instrument_id, None)
+            self.loaded_instruments.discard(instrument_id)
+
+    def load(self, instrument_id: Any, orders: Iterable[BookOrder], last_price: Optional[Decimal] = None) -> OrderBook:
+        """
+        Rebuild a book from open orders in submission order without matching.
+
+        Only the first load of an instrument takes effect; later calls return
+        the live book so orders accepted in the meantime are never dropped.
+        """
+        book = OrderBook(instrument_id, last_price)
+        for order in orders:
+            order.sequence = next(book._sequence)
+            if order.order_type in ('stop', 'stop_limit') and not order.triggered:
+                book._park_stop(order)
+            elif order.price is not None and order.remaining > 0:
+                book._rest(order)
+        with self._lock:
+            if instrument_id in self.loaded_instruments:
+                return self._books[instrument_id]
+            self._books[instrument_id] = book
+            self.loaded_instruments.add(instrument_id)
+        return book
+
+
+# Process-wide engine shared by TradingService instances
+matching_engine = MatchingEngine()
@@ -0,0 +1,257 @@
+"""
+Trading Risk Engine
+Vectorized historical, parametric and Monte Carlo VaR/ES over a cached daily returns matrix
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+    np = None
+
+from sqlalchemy import and_, desc, func
+
+from .models import MarketData
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+@dataclass
+class ReturnsMatrix:
+    """Daily simple returns aligned on a common calendar (NaN where an instrument has no quote)"""
+    instrument_ids: List[Any]
+    days: List[date]
+    returns: Any  # np.ndarray, shape (len(days), len(instrument_ids))
+
+    def column(self, instrument_id: Any) -> int:
+        return self.instrument_ids.index(instrument_id)
+
+
+@dataclass
+class PortfolioRisk:
+    """VaR and expected shortfall of one portfolio, in currency units of loss"""
+    var: Dict[str, Dict[float, float]] = field(default_factory=dict)
+    expected_shortfall: Dict[str, Dict[float, float]] = field(default_factory=dict)
+    component_var: Dict[float, Dict[Any, float]] = field(default_factory=dict)
+    observations: int = 0
+    proxied_instruments: List[Any] = field(default_factory=list)
+    method: str = 'parametric'
+
+    def headline(self, confidence: float) -> Tuple[float, float]:
+        """(VaR, ES) at ``confidence`` from the preferred available method"""
+        return self.var[self.method][confidence], self.expected_shortfall[self.method][confidence]
+
+
+class RiskEngine:
+    """
+    Portfolio risk over a shared returns matrix.
+
+    Close prices for every requested instrument are loaded in one query over
+    the lookback window and cached per trading day, so concurrent risk runs
+    and many accounts share the same data. All methods are vectorized across
+    portfolios: exposures form a (portfolios x instruments) matrix.
+    Instruments without history are not simulated with random data; they are
+    reported as proxied and enter through their quoted (or a default)
+    volatility with zero correlation to everything else.
+    """
+
+    DEFAULT_DAILY_VOLATILITY = 0.02
+
+    def __init__(self, lookback_days: int = TRADING_DAYS_PER_YEAR, confidences: Sequence[float] = (0.95, 0.99),
+                 simulations: int = 10000, seed: int = 42, min_observations: int = 30):
+        self.lookback_days = lookback_days
+        self.confidences = tuple(confidences)
+        self.simulations = simulations
+        self.seed = seed
+        self.min_observations = min_observations
+        self._cache_day: Optional[date] = None
+        # instrument_id -> {day: close}
+        self._prices: Dict[Any, Dict[date, float]] = {}
+        self._lock = threading.Lock()
+
+    # === DATA ===
+
+    def load_returns(self, session, instrument_ids: Sequence[Any]) -> ReturnsMatrix:
+        """Return the returns matrix for ``instrument_ids``, querying only instruments not cached today"""
+        today = datetime.now(timezone.utc).date()
+        with self._lock:
+            if self._cache_day != today:
+                self._prices = {}
+                self._cache_day = today
+            missing = [instrument_id for instrument_id in instrument_ids if instrument_id not in self._prices]
+
+        if missing:
+            loaded = self._query_closes(session, missing, today)
+            with self._lock:
+                if self._cache_day == today:
+                    for instrument_id in missing:
+                        self._prices[instrument_id] = loaded.get(instrument_id, {})
+
+        with self._lock:
+            series = [self._prices.get(instrument_id, {}) for instrument_id in instrument_ids]
+
+        days = sorted(set().union(*series))[-(self.lookback_days + 1):] if series else []
+        prices = np.full((len(days), len(instrument_ids)), np.nan)
+        day_index = {day: row for row, day in enumerate(days)}
+        for column, closes in enumerate(series):
+            for day, close in closes.items():
+                row = day_index.get(day)
+                if row is not None:
+                    prices[row, column] = close
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = prices[1:] / prices[:-1] - 1.0 if len(days) > 1 else np.empty((0, len(instrument_ids)))
+        returns[~np.isfinite(returns)] = np.nan
+        return ReturnsMatrix(list(instrument_ids), days[1:], returns)
+
+    def _query_closes(self, session, instrument_ids: Sequence[Any], today: date) -> Dict[Any, Dict[date, float]]:
+        """Last quote of each day per instrument over the lookback window, in one query"""
+        since = today - timedelta(days=int(self.lookback_days * 365 / TRADING_DAYS_PER_YEAR) + 10)
+        day = func.date(MarketData.market_date)
+        ranked = session.query(
+            MarketData.instrument_id.label('instrument_id'),
+            day.label('day'),
+            func.coalesce(MarketData.close_price, MarketData.current_price).label('price'),
+            func.row_number().over(
+                partition_by=(MarketData.instrument_id, day),
+                order_by=desc(MarketData.market_date)
+            ).label('day_rank')
+        ).filter(
+            and_(
+                MarketData.instrument_id.in_(list(instrument_ids)),
+                MarketData.market_date >= since
+            )
+        ).subquery()
+
+        rows = session.query(ranked.c.instrument_id, ranked.c.day, ranked.c.price).filter(
+            and_(ranked.c.day_rank == 1, ranked.c.price.isnot(None))
+        ).all()
+
+        closes: Dict[Any, Dict[date, float]] = {}
+        for instrument_id, quote_day, price in rows:
+            if isinstance(quote_day, str):
+                quote_day = date.fromisoformat(quote_day)
+            if price and float(price) > 0:
+                closes.setdefault(instrument_id, {})[quote_day] = float(price)
+        return closes
+
+    def invalidate(self):
+        """Drop cached prices (e.g. after a market data backfill)"""
+        with self._lock:
+            self._prices = {}
+            self._cache_day = None
+
+    # === RISK ===
+
+    def covariance(self, returns: Any) -> Any:
+        """Pairwise-complete covariance, repaired to the nearest positive semi-definite matrix"""
+        mask = ~np.isnan(returns)
+        values = np.where(mask, returns, 0.0)
+        present = mask.astype(float)
+        counts = present.T @ present
+        sums = values.T @ present  # sums[i, j]: sum of i's returns on days j also quoted
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = (values.T @ values - sums * sums.T / counts) / (counts - 1)
+        cov[~np.isfinite(cov) | (counts < 2)] = 0.0
+        eigenvalues, eigenvectors = np.linalg.eigh((cov + cov.T) / 2)
+        return (eigenvectors * np.clip(eigenvalues, 0.0, None)) @ eigenvectors.T
+
+    def portfolio_risk(self, returns: ReturnsMatrix, exposures: Sequence[Dict[Any, float]],
+                       annual_volatilities: Optional[Dict[Any, float]] = None,
+                       seed: Optional[int] = None) -> List[PortfolioRisk]:
+        """
+        Risk for each portfolio in ``exposures`` (instrument_id -> signed market value).
+
+        Monte Carlo draws are generated once from ``seed`` (default ``self.seed``)
+        and shared by all portfolios, so results are reproducible.
+        """
+        columns = len(returns.instrument_ids)
+        weights = np.zeros((len(exposures), columns))
+        for row, exposure in enumerate(exposures):
+            for instrument_id, value in exposure.items():
+                weights[row, returns.column(instrument_id)] += value
+
+        observed = np.sum(~np.isnan(returns.returns), axis=0)
+        proxied = observed < 2
+        covariance = self.covariance(returns.returns) if columns else np.zeros((0, 0))
+        annual_volatilities = annual_volatilities or {}
+        proxy_sigma = np.array([
+            annual_volatilities[instrument_id] / np.sqrt(TRADING_DAYS_PER_YEAR)
+            if annual_volatilities.get(instrument_id) else self.DEFAULT_DAILY_VOLATILITY
+            for instrument_id in returns.instrument_ids
+        ])
+        covariance[proxied, :] = 0.0
+        covariance[:, proxied] = 0.0
+        covariance[proxied, proxied] = proxy_sigma[proxied] ** 2
+
+        normal = NormalDist()
+        z_scores = {c: normal.inv_cdf(c) for c in self.confidences}
+        es_factors = {c: normal.pdf(z_scores[c]) / (1 - c) for c in self.confidences}
+
+        # Parametric (delta-normal) and Euler component VaR
+        marginal = weights @ covariance
+        sigma = np.sqrt(np.maximum(np.sum(marginal * weights, axis=1), 0.0))
+        safe_sigma = np.where(sigma > 0, sigma, 1.0)
+        components = weights * marginal / safe_sigma[:, None]
+
+        # Monte Carlo with correlated normal draws
+        rng = np.random.default_rng(self.seed if seed is None else seed)
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        root = eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+        simulated = rng.standard_normal((self.simulations, columns)) @ root.T @ weights.T
+
+        # Historical simulation of instruments with history; proxied risk is added in quadrature
+        proxy_sigma_portfolio = np.sqrt(np.sum((weights[:, proxied] * proxy_sigma[proxied]) ** 2, axis=1))
+
+        results = []
+        for row in range(len(exposures)):
+            risk = PortfolioRisk(
+                proxied_instruments=[returns.instrument_ids[i] for i in np.flatnonzero(proxied & (weights[row] != 0))]
+            )
+            risk.var['parametric'] = {c: float(z_scores[c] * sigma[row]) for c in self.confidences}
+            risk.expected_shortfall['parametric'] = {c: float(es_factors[c] * sigma[row]) for c in self.confidences}
+            risk.component_var = {
+                c: {returns.instrument_ids[i]: float(z_scores[c] * components[row, i])
+                    for i in np.flatnonzero(weights[row])}
+                for c in self.confidences
+            }
+            risk.var['monte_carlo'], risk.expected_shortfall['monte_carlo'] = self._tail(simulated[:, row])
+
+            held = np.flatnonzero((weights[row] != 0) & ~proxied)
+            complete = ~np.any(np.isnan(returns.returns[:, held]), axis=1) if len(held) else np.zeros(0, bool)
+            risk.observations = int(np.sum(complete))
+            if risk.observations >= self.min_observations:
+                pnl = returns.returns[complete][:, held] @ weights[row, held]
+                var, es = self._tail(pnl)
+                extra = proxy_sigma_portfolio[row]
+                risk.var['historical'] = {c: float(np.hypot(var[c], z_scores[c] * extra)) for c in self.confidences}
+                risk.expected_shortfall['historical'] = {
+                    c: float(np.hypot(es[c], es_factors[c] * extra)) for c in self.confidences
+                }
+                risk.method = 'historical'
+            results.append(risk)
+        return results
+
+    def _tail(self, pnl: Any) -> Tuple[Dict[float, float], Dict[float, float]]:
+        """Empirical VaR and ES (as positive losses) of a P&L sample"""
+        var, es = {}, {}
+        for c in self.confidences:
+            threshold = np.quantile(pnl, 1 - c)
+            tail = pnl[pnl <= threshold]
+            var[c] = float(max(-threshold, 0.0))
+            es[c] = float(max(-tail.mean(), 0.0)) if tail.size else var[c]
+        return var, es
+
+
+# Shared engine so the per-day returns cache is reused across requests
+risk_engine = RiskEngine()
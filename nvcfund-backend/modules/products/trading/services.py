@@ -6,7 +6,10 @@ Comprehensive services for order execution, portfolio management, risk analytics
 import asyncio
 import logging
 import math
+import os
 import statistics
+import tempfile
+from collections import defaultdict
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal, ROUND_HALF_UP
 from typing import Dict, List, Optional, Any, Tuple
@@ -21,8 +24,8 @@ except ImportError:
     HAS_NUMPY = False
     np = None
     pd = None
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc, func
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, or_, desc, asc, func, bindparam
 from flask import current_app
 
 from modules.core.database import get_db_session
@@ -31,9 +34,18 @@ from .models import (
     TradingInstrument, TradingAccount, TradingOrder, Trade, Position, 
     Portfolio, RiskMetrics, MarketData, OrderStatus, OrderType, OrderSide
 )
+from .matching_engine import BookOrder, MatchResult, StaleOrderBook, matching_engine
+from .risk_engine import PortfolioRisk, risk_engine
+from .backtesting import (
+    MAX_SWEEP_COMBINATIONS, MAX_SWEEP_WORKERS, BacktestEngine, ColumnarBarStore, create_strategy,
+    load_bars_from_db, run_parameter_sweep
+)
 
 logger = logging.getLogger(__name__)
 
+# Statuses an order can still be filled or cancelled from
+OPEN_ORDER_STATUSES = (OrderStatus.PENDING.value, OrderStatus.SUBMITTED.value, OrderStatus.PARTIALLY_FILLED.value)
+
 @dataclass
 class OrderResult:
     """Result object for order operations"""
@@ -74,6 +86,10 @@ class TradingService:
     risk analytics, and algorithmic trading strategies
     """
     
+    # Commission per fill: a share of trade value with a per-trade floor
+    COMMISSION_RATE = Decimal('0.001')
+    MIN_COMMISSION = Decimal('1.00')
+    
     def __init__(self):
         self.session = get_db_session()
         self._order_validators = {
@@ -156,9 +172,9 @@ class TradingService:
                 and_(
                     TradingOrder.order_id == order_id,
                     TradingOrder.user_id == user_id,
-                    TradingOrder.status.in_(['pending', 'submitted'])
+                    TradingOrder.status.in_(['pending', 'submitted', 'partially_filled'])
                 )
-            ).first()
+            ).with_for_update().first()
             
             if not order:
                 return OrderResult(False, message="Order not found or cannot be cancelled")
@@ -167,6 +183,8 @@ class TradingService:
             order.updated_at = datetime.now(timezone.utc)
             
             self.session.commit()
+            # Only a committed cancel leaves the book; a fill racing it fails its stored-state check
+            matching_engine.cancel(order.instrument_id, order_id)
             
             logger.info(f"Order cancelled: {order_id} by user {user_id}")
             return OrderResult(True, order_id=order_id, message="Order cancelled successfully")
@@ -183,9 +201,9 @@ class TradingService:
                 and_(
                     TradingOrder.order_id == order_id,
                     TradingOrder.user_id == user_id,
-                    TradingOrder.status.in_(['pending', 'submitted'])
+                    TradingOrder.status.in_(['pending', 'submitted', 'partially_filled'])
                 )
-            ).first()
+            ).with_for_update().first()
             
             if not order:
                 return OrderResult(False, message="Order not found or cannot be modified")
@@ -207,6 +225,11 @@ class TradingService:
             order.updated_at = datetime.now(timezone.utc)
             self.session.commit()
             
+            # Modified orders lose their time priority and are matched again
+            resting = matching_engine.cancel(order.instrument_id, order_id)
+            if resting is not None:
+                self._match_order(order, order.instrument)
+            
             logger.info(f"Order modified: {order_id} by user {user_id}")
             return OrderResult(True, order_id=order_id, message="Order modified successfully")
             
@@ -382,103 +405,167 @@ class TradingService:
 
     # === RISK MANAGEMENT ===
     
-    def calculate_risk_metrics(self, user_id: str, account_id: Optional[str] = None) -> Dict[str, Any]:
-        """Calculate comprehensive risk metrics for portfolio"""
+    def calculate_risk_metrics(self, user_id: Optional[str], account_id: Optional[str] = None,
+                               account_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Calculate comprehensive risk metrics for a portfolio.
+        
+        When ``account_ids`` is given, every listed account (of ``user_id``, or of
+        any user when ``user_id`` is None) is evaluated in one pass over a shared
+        returns matrix and the result is keyed by account id.
+        """
         try:
-            account = self._get_trading_account(user_id, account_id)
-            if not account:
-                return {'error': 'Trading account not found'}
-            
-            # Get current positions
-            positions = self.session.query(Position).filter(
-                and_(
-                    Position.account_id == account.id,
-                    Position.is_active == True
+            if account_ids is not None:
+                filters = [TradingAccount.id.in_(account_ids), TradingAccount.is_active == True]
+                if user_id is not None:
+                    filters.append(TradingAccount.user_id == user_id)
+                accounts = self.session.query(TradingAccount).filter(and_(*filters)).all()
+            else:
+                account = self._get_trading_account(user_id, account_id)
+                if not account:
+                    return {'error': 'Trading account not found'}
+                accounts = [account]
+            
+            # Get current positions for all accounts in one query
+            positions_by_account = {account.id: [] for account in accounts}
+            if positions_by_account:
+                for position in self.session.query(Position).options(joinedload(Position.instrument)).filter(
+                    and_(
+                        Position.account_id.in_(list(positions_by_account)),
+                        Position.is_active == True
+                    )
+                ).all():
+                    positions_by_account[position.account_id].append(position)
+            
+            # VaR/ES for every non-empty portfolio in one vectorized run
+            portfolios = [positions for positions in positions_by_account.values() if positions]
+            portfolio_risks = dict(zip(map(id, portfolios), self._calculate_portfolio_risk(portfolios)))
+            
+            results = {
+                str(account.id): self._build_risk_metrics(
+                    account,
+                    positions_by_account[account.id],
+                    portfolio_risks.get(id(positions_by_account[account.id]))
                 )
-            ).all()
-            
-            if not positions:
-                return {
-                    'total_exposure': 0,
-                    'var_1day_95': 0,
-                    'var_1day_99': 0,
-                    'portfolio_beta': 0,
-                    'sharpe_ratio': 0,
-                    'max_drawdown': 0,
-                    'concentration_risk': {},
-                    'currency_exposure': {}
-                }
-            
-            # Calculate exposures
-            total_long_exposure = sum(pos.market_value for pos in positions if pos.is_long)
-            total_short_exposure = sum(abs(pos.market_value) for pos in positions if pos.is_short)
-            net_exposure = total_long_exposure - total_short_exposure
-            gross_exposure = total_long_exposure + total_short_exposure
-            
-            # Calculate VaR using historical simulation
-            var_1day_95, var_1day_99 = self._calculate_portfolio_var(positions)
-            
-            # Calculate portfolio beta
-            portfolio_beta = self._calculate_portfolio_beta(positions)
-            
-            # Calculate Sharpe ratio
-            sharpe_ratio = self._calculate_sharpe_ratio(account.id)
-            
-            # Calculate maximum drawdown
-            max_drawdown = self._calculate_max_drawdown(account.id)
-            
-            # Concentration analysis
-            concentration_risk = self._analyze_concentration_risk(positions)
-            
-            # Currency exposure
-            currency_exposure = self._analyze_currency_exposure(positions)
-            
-            # Risk limit utilization
-            risk_limit_utilization = {
-                'position_size': float((max(pos.market_value for pos in positions) / self.risk_limits['max_position_size']) * 100) if positions else 0,
-                'leverage': float((gross_exposure / account.total_value) * 100) if account.total_value > 0 else 0,
-                'var_utilization': float((var_1day_95 / self.risk_limits['var_limit_95']) * 100),
-                'concentration': max(concentration_risk.values()) if concentration_risk else 0
+                for account in accounts
             }
-            
-            # Store risk metrics
-            risk_metrics = RiskMetrics(
-                account_id=account.id,
-                user_id=user_id,
-                total_exposure=gross_exposure,
-                net_exposure=net_exposure,
-                gross_exposure=gross_exposure,
-                leverage_ratio=gross_exposure / account.total_value if account.total_value > 0 else 0,
-                var_1day_95=var_1day_95,
-                var_1day_99=var_1day_99,
-                largest_position_percent=max(concentration_risk.values()) if concentration_risk else 0,
-                sector_concentration=concentration_risk,
-                currency_exposure=currency_exposure,
-                risk_limit_utilization=max(risk_limit_utilization.values()) / 100,
-                is_risk_limit_breached=any(util > 100 for util in risk_limit_utilization.values())
-            )
-            
-            self.session.add(risk_metrics)
             self.session.commit()
             
-            return {
-                'total_exposure': float(gross_exposure),
-                'net_exposure': float(net_exposure),
-                'leverage_ratio': float(gross_exposure / account.total_value if account.total_value > 0 else 0),
-                'var_1day_95': float(var_1day_95),
-                'var_1day_99': float(var_1day_99),
-                'portfolio_beta': portfolio_beta,
-                'sharpe_ratio': sharpe_ratio,
-                'max_drawdown': max_drawdown,
-                'concentration_risk': {k: float(v) for k, v in concentration_risk.items()},
-                'currency_exposure': {k: float(v) for k, v in currency_exposure.items()},
-                'risk_limit_utilization': {k: float(v) for k, v in risk_limit_utilization.items()},
-                'risk_limit_breached': any(util > 100 for util in risk_limit_utilization.values())
-            }
+            if account_ids is not None:
+                return results
+            return results[str(accounts[0].id)]
             
         except Exception as e:
             logger.error(f"Risk metrics calculation failed for user {user_id}: {str(e)}")
+            self.session.rollback()
             return {'error': 'Failed to calculate risk metrics'}
+    
+    def _build_risk_metrics(self, account: TradingAccount, positions: List[Position],
+                            portfolio_risk: Optional[PortfolioRisk]) -> Dict[str, Any]:
+        """Assemble and stage the RiskMetrics row for one account"""
+        if not positions:
+            return {
+                'total_exposure': 0,
+                'var_1day_95': 0,
+                'var_1day_99': 0,
+                'portfolio_beta': 0,
+                'sharpe_ratio': 0,
+                'max_drawdown': 0,
+                'concentration_risk': {},
+                'currency_exposure': {}
+            }
+        
+        # Calculate exposures
+        total_long_exposure = sum(pos.market_value for pos in positions if pos.is_long)
+        total_short_exposure = sum(abs(pos.market_value) for pos in positions if pos.is_short)
+        net_exposure = total_long_exposure - total_short_exposure
+        gross_exposure = total_long_exposure + total_short_exposure
+        
+        # VaR from the risk engine (historical simulation when enough history exists)
+        if portfolio_risk is not None:
+            var_95, es_95 = portfolio_risk.headline(0.95)
+            var_99, es_99 = portfolio_risk.headline(0.99)
+            var_1day_95, var_1day_99 = Decimal(str(round(var_95, 2))), Decimal(str(round(var_99, 2)))
+            expected_shortfall = Decimal(str(round(es_95, 2)))
+            symbols = {pos.instrument_id: pos.instrument.symbol for pos in positions}
+            var_details = {
+                'method': portfolio_risk.method,
+                'observations': portfolio_risk.observations,
+                'var': {method: {str(c): v for c, v in values.items()} for method, values in portfolio_risk.var.items()},
+                'expected_shortfall': {
+                    method: {str(c): v for c, v in values.items()}
+                    for method, values in portfolio_risk.expected_shortfall.items()
+                },
+                'component_var_95': {
+                    symbols[instrument_id]: value
+                    for instrument_id, value in portfolio_risk.component_var[0.95].items()
+                },
+                'proxied_instruments': [symbols[instrument_id] for instrument_id in portfolio_risk.proxied_instruments]
+            }
+        else:
+            var_1day_95, var_1day_99 = self._calculate_portfolio_var(positions)
+            expected_shortfall = None
+            var_details = {'method': 'fallback'}
+        
+        # Calculate portfolio beta
+        portfolio_beta = self._calculate_portfolio_beta(positions)
+        
+        # Calculate Sharpe ratio
+        sharpe_ratio = self._calculate_sharpe_ratio(account.id)
+        
+        # Calculate maximum drawdown
+        max_drawdown = self._calculate_max_drawdown(account.id)
+        
+        # Concentration analysis
+        concentration_risk = self._analyze_concentration_risk(positions)
+        
+        # Currency exposure
+        currency_exposure = self._analyze_currency_exposure(positions)
+        
+        # Risk limit utilization
+        risk_limit_utilization = {
+            'position_size': float((max(pos.market_value for pos in positions) / self.risk_limits['max_position_size']) * 100) if positions else 0,
+            'leverage': float((gross_exposure / account.total_value) * 100) if account.total_value > 0 else 0,
+            'var_utilization': float((var_1day_95 / self.risk_limits['var_limit_95']) * 100),
+            'concentration': max(concentration_risk.values()) if concentration_risk else 0
+        }
+        
+        # Store risk metrics
+        risk_metrics = RiskMetrics(
+            account_id=account.id,
+            user_id=account.user_id,
+            total_exposure=gross_exposure,
+            net_exposure=net_exposure,
+            gross_exposure=gross_exposure,
+            leverage_ratio=gross_exposure / account.total_value if account.total_value > 0 else 0,
+            var_1day_95=var_1day_95,
+            var_1day_99=var_1day_99,
+            expected_shortfall=expected_shortfall,
+            largest_position_percent=max(concentration_risk.values()) if concentration_risk else 0,
+            sector_concentration=concentration_risk,
+            currency_exposure=currency_exposure,
+            risk_limit_utilization=max(risk_limit_utilization.values()) / 100,
+            is_risk_limit_breached=any(util > 100 for util in risk_limit_utilization.values())
+        )
+        
+        self.session.add(risk_metrics)
+        
+        return {
+            'total_exposure': float(gross_exposure),
+            'net_exposure': float(net_exposure),
+            'leverage_ratio': float(gross_exposure / account.total_value if account.total_value > 0 else 0),
+            'var_1day_95': float(var_1day_95),
+            'var_1day_99': float(var_1day_99),
+            'expected_shortfall_95': float(expected_shortfall) if expected_shortfall is not None else None,
+            'var_details': var_details,
+            'portfolio_beta': portfolio_beta,
+            'sharpe_ratio': sharpe_ratio,
+            'max_drawdown': max_drawdown,
+            'concentration_risk': {k: float(v) for k, v in concentration_risk.items()},
+            'currency_exposure': {k: float(v) for k, v in currency_exposure.items()},
+            'risk_limit_utilization': {k: float(v) for k, v in risk_limit_utilization.items()},
+            'risk_limit_breached': any(util > 100 for util in risk_limit_utilization.values())
+        }
 
     # === MARKET DATA ===
     
@@ -837,20 +924,28 @@ class TradingService:
         )
     
     def _execute_market_order(self, order: TradingOrder, instrument: TradingInstrument) -> OrderResult:
-        """Execute market order immediately"""
+        """Execute market order against the book, filling any remainder at the market price"""
         try:
+            book_order, _ = self._match_order(order, instrument)
+            if book_order.remaining == 0:
+                logger.info(f"Market order matched in book: {order.order_id}, price: {book_order.average_price}")
+                return self._book_order_result(order, book_order)
+            
             current_price = self._get_current_price(instrument.symbol)
             if not current_price:
-                order.status = OrderStatus.REJECTED.value
+                order.status = OrderStatus.REJECTED.value if book_order.filled == 0 else OrderStatus.CANCELLED.value
                 self.session.commit()
+                if book_order.filled > 0:
+                    return self._book_order_result(order, book_order, "Order partially filled; remainder cancelled")
                 return OrderResult(False, message="Unable to get market price")
             
-            # Simulate execution with slippage
+            # Simulate execution of the unmatched remainder with slippage
+            quantity = book_order.remaining
             slippage = Decimal('0.001')  # 0.1% slippage
             execution_price = current_price * (1 + slippage if order.order_side == 'buy' else 1 - slippage)
             
             # Calculate commission
-            commission = self._calculate_commission(order.quantity, execution_price, instrument)
+            commission = self._calculate_commission(quantity, execution_price, instrument)
             
             # Create trade record
             trade = Trade(
@@ -860,21 +955,22 @@ class TradingService:
                 instrument_id=order.instrument_id,
                 user_id=order.user_id,
                 side=order.order_side,
-                quantity=order.quantity,
+                quantity=quantity,
                 price=execution_price,
-                total_value=order.quantity * execution_price,
+                total_value=quantity * execution_price,
                 commission=commission,
                 total_fees=commission,
-                net_amount=order.quantity * execution_price + commission,
-                settlement_date=datetime.now(timezone.utc) + timedelta(days=2)
+                net_amount=quantity * execution_price + commission,
+                settlement_date=datetime.now(timezone.utc) + timedelta(days=2),
+                exchange=instrument.exchange
             )
             
             # Update order status
             order.status = OrderStatus.FILLED.value
             order.filled_quantity = order.quantity
             order.remaining_quantity = Decimal('0')
-            order.average_fill_price = execution_price
-            order.total_commission = commission
+            order.average_fill_price = (book_order.filled_value + trade.total_value) / order.quantity
+            order.total_commission = book_order.commission + commission
             order.executed_at = datetime.now(timezone.utc)
             
             # Update position
@@ -886,34 +982,344 @@ class TradingService:
             self.session.add(trade)
             self.session.commit()
             
-            logger.info(f"Market order executed: {order.order_id}, price: {execution_price}")
+            logger.info(f"Market order executed: {order.order_id}, price: {order.average_fill_price}")
             
             return OrderResult(
                 success=True,
                 order_id=order.order_id,
                 trade_id=trade.trade_id,
                 filled_quantity=order.quantity,
-                average_price=execution_price,
-                total_cost=trade.total_value,
-                commission=commission,
+                average_price=order.average_fill_price,
+                total_cost=book_order.filled_value + trade.total_value,
+                commission=order.total_commission,
                 message="Order executed successfully"
             )
             
         except Exception as e:
             logger.error(f"Market order execution failed: {str(e)}")
+            self.session.rollback()
             order.status = OrderStatus.REJECTED.value
             self.session.commit()
             return OrderResult(False, message="Execution failed")
     
     def _queue_order(self, order: TradingOrder, instrument: TradingInstrument) -> OrderResult:
-        """Queue non-market order for execution"""
-        order.status = OrderStatus.SUBMITTED.value
+        """Submit non-market order to the instrument's order book"""
+        book_order, result = self._match_order(order, instrument)
+        
+        if book_order.status == OrderStatus.CANCELLED.value and book_order.filled == 0:
+            return OrderResult(False, order_id=order.order_id, message=result.message or "Order cancelled")
+        
+        return self._book_order_result(order, book_order)
+    
+    # === ORDER BOOK ===
+    
+    def update_market_price(self, symbol: str, price: Decimal) -> Dict[str, Any]:
+        """Feed an external price update to the order book and execute triggered stops"""
+        try:
+            instrument = self._get_instrument(symbol)
+            if not instrument:
+                return {'success': False, 'message': 'Instrument not found'}
+            
+            self._load_order_book(instrument)
+            result = matching_engine.update_price(instrument.id, Decimal(str(price)))
+            if result.fills or result.updated:
+                self._persist_or_resync(result, instrument)
+            
+            return {'success': True, 'triggered_orders': len(result.updated), 'fills': len(result.fills)}
+            
+        except Exception as e:
+            logger.error(f"Price update failed for {symbol}: {str(e)}")
+            self.session.rollback()
+            return {'success': False, 'message': 'Price update failed'}
+    
+    def _load_order_book(self, instrument: TradingInstrument):
+        """Rebuild the instrument's book from open orders the first time this process touches it"""
+        if instrument.id in matching_engine.loaded_instruments:
+            return
+        
+        open_orders = self.session.query(TradingOrder).filter(
+            and_(
+                TradingOrder.instrument_id == instrument.id,
+                TradingOrder.status.in_([OrderStatus.SUBMITTED.value, OrderStatus.PARTIALLY_FILLED.value]),
+                TradingOrder.order_type != OrderType.MARKET.value
+            )
+        ).order_by(asc(TradingOrder.submitted_at)).all()
+        
+        book = matching_engine.load(
+            instrument.id, [self._to_book_order(order) for order in open_orders], instrument.current_price
+        )
+        logger.info(f"Order book for {instrument.symbol} loaded with {len(book.orders)} open orders")
+    
+    def _to_book_order(self, order: TradingOrder) -> BookOrder:
+        """Build the engine's view of a persisted order"""
+        filled = order.filled_quantity or Decimal('0')
+        return BookOrder(
+            order_id=order.order_id,
+            side=order.order_side,
+            order_type=order.order_type,
+            quantity=order.quantity,
+            price=order.price,
+            stop_price=order.stop_price,
+            time_in_force=order.time_in_force,
+            account_id=order.account_id,
+            user_id=order.user_id,
+            ref=order.id,
+            filled=filled,
+            filled_value=filled * (order.average_fill_price or Decimal('0')),
+            commission=order.total_commission or Decimal('0')
+        )
+    
+    def _match_order(self, order: TradingOrder, instrument: TradingInstrument) -> Tuple[BookOrder, MatchResult]:
+        """Run an order through the matching engine and persist the outcome, once more on a rebuilt book if stale"""
+        for attempt in range(2):
+            self._load_order_book(instrument)
+            if attempt:
+                # The rebuilt book may hold the order itself when it was already resting
+                matching_engine.cancel(instrument.id, order.order_id)
+            book_order = self._to_book_order(order)
+            result = matching_engine.submit(instrument.id, book_order)
+            
+            # Unmatched market orders are completed by the caller in the same transaction
+            if not result.fills and order.order_type == OrderType.MARKET.value:
+                return book_order, result
+            try:
+                self._persist_or_resync(result, instrument, order)
+                return book_order, result
+            except StaleOrderBook as e:
+                if attempt:
+                    raise
+                logger.warning(f"Rematching order {order.order_id} on a rebuilt book: {e}")
+    
+    def _persist_or_resync(self, result: MatchResult, instrument: TradingInstrument,
+                           taker_order: Optional[TradingOrder] = None):
+        """
+        Persist an engine call; when that fails the book has already moved
+        past the database, so it is discarded and rebuilt from stored orders
+        on next use.
+        """
+        try:
+            self._persist_match_result(result, instrument, taker_order)
+        except Exception:
+            self.session.rollback()
+            matching_engine.discard(instrument.id)
+            raise
+    
+    def _lock_match_orders(self, result: MatchResult, instrument: TradingInstrument) -> Dict[str, Decimal]:
+        """
+        Lock the stored rows of every order an engine call touched and check
+        they are in the state the book assumed before the call: still open,
+        same quantity and price, and ``remaining_quantity`` covering this
+        call's fills. Books in other workers can be stale (an order filled or
+        cancelled elsewhere), and persisting their fills would duplicate
+        trades and cash movements. Returns each order's remaining quantity
+        before the call, keyed by order_id.
+        """
+        filled_now: Dict[str, Decimal] = defaultdict(Decimal)
+        for fill in result.fills:
+            filled_now[fill.taker.order_id] += fill.quantity
+            filled_now[fill.maker.order_id] += fill.quantity
+        
+        book_orders = {book_order.ref: book_order for book_order in result.updated.values()}
+        stored = self.session.query(
+            TradingOrder.id, TradingOrder.status, TradingOrder.quantity,
+            TradingOrder.remaining_quantity, TradingOrder.price
+        ).filter(TradingOrder.id.in_(list(book_orders))).with_for_update().all()
+        if len(stored) != len(book_orders):
+            raise StaleOrderBook(f"orders missing from the database for {instrument.symbol}")
+        
+        previous_remaining = {}
+        for order_ref, status, quantity, remaining, price in stored:
+            book_order = book_orders[order_ref]
+            previous = book_order.remaining + filled_now[book_order.order_id]
+            if (status not in OPEN_ORDER_STATUSES or quantity != book_order.quantity
+                    or price != book_order.price or remaining != previous):
+                raise StaleOrderBook(
+                    f"order {book_order.order_id} is {status} with {remaining} remaining, book expected {previous}"
+                )
+            previous_remaining[book_order.order_id] = previous
+        return previous_remaining
+    
+    def _persist_match_result(self, result: MatchResult, instrument: TradingInstrument,
+                              taker_order: Optional[TradingOrder] = None):
+        """Write fills, order states, positions and balances from one engine call in a single batch"""
+        previous_remaining = self._lock_match_orders(result, instrument)
+        now = datetime.now(timezone.utc)
+        settlement_date = now + timedelta(days=2)
+        trade_rows = []
+        # account_id -> [user_id, buy qty, buy value, sell qty, sell value, last price]
+        position_deltas: Dict[Any, List] = {}
+        cash_deltas: Dict[Any, Decimal] = defaultdict(Decimal)
+        
+        for fill in result.fills:
+            value = fill.quantity * fill.price
+            for book_order in (fill.taker, fill.maker):
+                commission = self._calculate_commission(fill.quantity, fill.price, instrument)
+                book_order.commission += commission
+                is_buy = book_order.side == 'buy'
+                net_amount = value + commission if is_buy else value - commission
+                trade_rows.append({
+                    'trade_id': self._generate_trade_id(),
+                    'order_id': book_order.ref,
+                    'account_id': book_order.account_id,
+                    'instrument_id': instrument.id,
+                    'user_id': book_order.user_id,
+                    'side': book_order.side,
+                    'quantity': fill.quantity,
+                    'price': fill.price,
+                    'total_value': value,
+                    'commission': commission,
+                    'total_fees': commission,
+                    'net_amount': net_amount,
+                    'trade_date': now,
+                    'settlement_date': settlement_date,
+                    'exchange': instrument.exchange
+                })
+                
+                delta = position_deltas.setdefault(
+                    book_order.account_id,
+                    [book_order.user_id, Decimal('0'), Decimal('0'), Decimal('0'), Decimal('0'), fill.price]
+                )
+                if is_buy:
+                    delta[1] += fill.quantity
+                    delta[2] += value
+                    cash_deltas[book_order.account_id] -= net_amount
+                else:
+                    delta[3] += fill.quantity
+                    delta[4] += value
+                    cash_deltas[book_order.account_id] += net_amount
+                delta[5] = fill.price
+        
+        if trade_rows:
+            self.session.execute(Trade.__table__.insert(), trade_rows)
+        
+        order_rows = []
+        for book_order in result.updated.values():
+            executed_at = now if book_order.status == OrderStatus.FILLED.value else None
+            if taker_order is not None and book_order.ref == taker_order.id:
+                taker_order.status = book_order.status
+                taker_order.filled_quantity = book_order.filled
+                taker_order.remaining_quantity = book_order.remaining
+                taker_order.average_fill_price = book_order.average_price
+                taker_order.total_commission = book_order.commission
+                taker_order.executed_at = executed_at
+                continue
+            order_rows.append({
+                'b_id': book_order.ref,
+                'b_previous': previous_remaining[book_order.order_id],
+                'b_status': book_order.status,
+                'b_filled': book_order.filled,
+                'b_remaining': book_order.remaining,
+                'b_average': book_order.average_price,
+                'b_commission': book_order.commission,
+                'b_executed_at': executed_at,
+                'b_updated_at': now
+            })
+        
+        if order_rows:
+            orders = TradingOrder.__table__
+            # The rows are locked and checked above; the guard repeats the check for databases without row locks
+            updated = self.session.execute(
+                orders.update()
+                .where(and_(
+                    orders.c.id == bindparam('b_id'),
+                    orders.c.remaining_quantity == bindparam('b_previous'),
+                    orders.c.status.in_(OPEN_ORDER_STATUSES)
+                ))
+                .values(
+                    status=bindparam('b_status'),
+                    filled_quantity=bindparam('b_filled'),
+                    remaining_quantity=bindparam('b_remaining'),
+                    average_fill_price=bindparam('b_average'),
+                    total_commission=bindparam('b_commission'),
+                    executed_at=bindparam('b_executed_at'),
+                    updated_at=bindparam('b_updated_at')
+                ),
+                order_rows
+            )
+            dialect = self.session.get_bind().dialect
+            if (len(order_rows) == 1 or dialect.supports_sane_multi_rowcount) and updated.rowcount != len(order_rows):
+                raise StaleOrderBook(f"{len(order_rows) - updated.rowcount} resting orders changed while matching")
+        
+        if position_deltas:
+            self._apply_position_deltas(instrument, position_deltas, now)
+        
+        if cash_deltas:
+            accounts = self.session.query(TradingAccount).filter(
+                TradingAccount.id.in_(list(cash_deltas))
+            ).all()
+            for account in accounts:
+                account.cash_balance += cash_deltas[account.id]
+                account.available_balance += cash_deltas[account.id]
+        
         self.session.commit()
+    
+    def _apply_position_deltas(self, instrument: TradingInstrument, position_deltas: Dict[Any, List], now: datetime):
+        """Apply aggregated per-account fills to positions with one lookup query"""
+        positions = {
+            position.account_id: position
+            for position in self.session.query(Position).filter(
+                and_(
+                    Position.instrument_id == instrument.id,
+                    Position.account_id.in_(list(position_deltas)),
+                    Position.is_active == True
+                )
+            ).all()
+        }
+        
+        for account_id, (user_id, buy_qty, buy_value, sell_qty, sell_value, last_price) in position_deltas.items():
+            net_quantity = buy_qty - sell_qty
+            position = positions.get(account_id)
+            
+            if not position:
+                if net_quantity == 0:
+                    continue
+                position = Position(
+                    account_id=account_id,
+                    instrument_id=instrument.id,
+                    user_id=user_id,
+                    quantity=net_quantity,
+                    average_cost=buy_value / buy_qty if buy_qty else sell_value / sell_qty,
+                    total_cost=buy_value - sell_value,
+                    current_price=last_price,
+                    market_value=net_quantity * last_price,
+                    position_value=abs(net_quantity) * last_price,
+                    is_long=net_quantity > 0,
+                    is_short=net_quantity < 0
+                )
+                self.session.add(position)
+                continue
+            
+            if buy_qty:
+                bought_quantity = position.quantity + buy_qty
+                if bought_quantity != 0:
+                    position.average_cost = ((position.quantity * position.average_cost) + buy_value) / bought_quantity
+            position.quantity += net_quantity
+            position.total_cost += buy_value - sell_value
+            position.current_price = last_price
+            position.market_value = position.quantity * last_price
+            position.position_value = abs(position.quantity) * last_price
+            position.last_price_update = now
+            if position.quantity == 0:
+                position.is_active = False
+                position.closed_at = now
+    
+    def _book_order_result(self, order: TradingOrder, book_order: BookOrder, message: Optional[str] = None) -> OrderResult:
+        """Build the API result for an order handled by the matching engine"""
+        if not message:
+            message = {
+                OrderStatus.FILLED.value: "Order executed successfully",
+                OrderStatus.PARTIALLY_FILLED.value: "Order partially filled",
+                OrderStatus.CANCELLED.value: "Order partially filled; remainder cancelled",
+            }.get(book_order.status, "Order submitted successfully")
         
         return OrderResult(
             success=True,
             order_id=order.order_id,
-            message="Order submitted successfully"
+            filled_quantity=book_order.filled,
+            average_price=book_order.average_price,
+            total_cost=book_order.filled_value if book_order.filled > 0 else None,
+            commission=book_order.commission if book_order.filled > 0 else None,
+            message=message
         )
     
     def _update_position(self, order: TradingOrder, trade: Trade):
@@ -977,73 +1383,50 @@ class TradingService:
         trade_value = quantity * price
         
         # Simple commission structure: 0.1% with $1 minimum
-        commission_rate = Decimal('0.001')  # 0.1%
-        commission = trade_value * commission_rate
-        min_commission = Decimal('1.00')
+        commission = trade_value * self.COMMISSION_RATE
         
-        return max(commission, min_commission)
+        return max(commission, self.MIN_COMMISSION)
     
     def _calculate_portfolio_var(self, positions: List[Position]) -> Tuple[Decimal, Decimal]:
-        """Calculate portfolio Value at Risk using numpy-optimized historical simulation"""
+        """Calculate 1-day 95%/99% portfolio Value at Risk"""
+        portfolio_risk = self._calculate_portfolio_risk([positions])[0]
+        if portfolio_risk is not None:
+            var_95, _ = portfolio_risk.headline(0.95)
+            var_99, _ = portfolio_risk.headline(0.99)
+            return Decimal(str(round(var_95, 2))), Decimal(str(round(var_99, 2)))
+        
+        # Fallback to basic calculation
+        total_value = sum(pos.market_value for pos in positions)
+        portfolio_volatility = Decimal('0.15')
+        daily_volatility = portfolio_volatility / Decimal('16')
+        var_1day_95 = total_value * daily_volatility * Decimal('1.645')
+        var_1day_99 = total_value * daily_volatility * Decimal('2.326')
+        return var_1day_95, var_1day_99
+    
+    def _calculate_portfolio_risk(self, portfolios: List[List[Position]]) -> List[Optional[PortfolioRisk]]:
+        """Run the risk engine for several portfolios over one shared returns matrix"""
+        if not HAS_NUMPY or not portfolios:
+            return [None] * len(portfolios)
+        
         try:
-            if not HAS_NUMPY:
-                # Fallback to basic calculation
-                total_value = sum(pos.market_value for pos in positions)
-                portfolio_volatility = Decimal('0.15')
-                daily_volatility = portfolio_volatility / Decimal('16')
-                var_1day_95 = total_value * daily_volatility * Decimal('1.645')
-                var_1day_99 = total_value * daily_volatility * Decimal('2.326')
-                return var_1day_95, var_1day_99
-            
-            # High-performance numpy-based VaR calculation
-            position_values = np.array([float(pos.market_value) for pos in positions])
-            position_weights = position_values / np.sum(position_values) if np.sum(position_values) > 0 else np.zeros_like(position_values)
-            
-            # Get historical returns for all instruments
-            instrument_ids = [pos.instrument_id for pos in positions]
-            returns_data = []
-            
-            for instrument_id in instrument_ids:
-                historical_returns = self.session.query(MarketData.return_1d).filter(
-                    MarketData.instrument_id == instrument_id
-                ).order_by(MarketData.market_date.desc()).limit(252).all()  # 1 year of data
-                
-                if historical_returns:
-                    returns = np.array([float(r[0] or 0) for r in historical_returns])
-                    returns_data.append(returns)
-                else:
-                    # Use default volatility if no historical data
-                    returns_data.append(np.random.normal(0, 0.02, 252))  # 2% daily volatility
-            
-            # Create returns matrix
-            if returns_data:
-                min_length = min(len(returns) for returns in returns_data)
-                returns_matrix = np.column_stack([returns[:min_length] for returns in returns_data])
-                
-                # Calculate portfolio returns
-                portfolio_returns = np.dot(returns_matrix, position_weights[:len(returns_data)])
-                
-                # Calculate VaR using percentiles
-                var_95_pct = np.percentile(portfolio_returns, 5)  # 5th percentile for 95% VaR
-                var_99_pct = np.percentile(portfolio_returns, 1)  # 1st percentile for 99% VaR
-                
-                total_portfolio_value = float(np.sum(position_values))
-                var_1day_95 = Decimal(str(abs(var_95_pct * total_portfolio_value)))
-                var_1day_99 = Decimal(str(abs(var_99_pct * total_portfolio_value)))
-                
-                return var_1day_95, var_1day_99
-            
-            # Fallback if no data available
-            total_value = sum(pos.market_value for pos in positions)
-            var_1day_95 = total_value * Decimal('0.025')  # 2.5% of portfolio
-            var_1day_99 = total_value * Decimal('0.04')   # 4% of portfolio
-            return var_1day_95, var_1day_99
+            instruments = {pos.instrument_id: pos.instrument for positions in portfolios for pos in positions}
+            returns = risk_engine.load_returns(self.session, list(instruments))
+            exposures = []
+            for positions in portfolios:
+                exposure = defaultdict(float)
+                for pos in positions:
+                    exposure[pos.instrument_id] += float(pos.market_value or 0)
+                exposures.append(exposure)
+            volatilities = {
+                instrument_id: float(instrument.volatility)
+                for instrument_id, instrument in instruments.items()
+                if instrument is not None and instrument.volatility
+            }
+            return risk_engine.portfolio_risk(returns, exposures, annual_volatilities=volatilities)
             
         except Exception as e:
             logger.error(f"VaR calculation failed: {str(e)}")
-            # Safe fallback
-            total_value = sum(pos.market_value for pos in positions)
-            return total_value * Decimal('0.025'), total_value * Decimal('0.04')
+            return [None] * len(portfolios)
     
     def _calculate_portfolio_beta(self, positions: List[Position]) -> float:
         """Calculate portfolio beta"""
@@ -1486,18 +1869,71 @@ class TradingService:
         }
     
     def _run_algorithm_backtest(self, config: Dict[str, Any]) -> Dict[str, Any]:
-        """Run algorithm backtest"""
-        # Simplified backtest results
-        return {
-            'start_date': '2024-01-01',
-            'end_date': '2024-12-31',
-            'total_return': 0.15,
-            'annual_return': 0.15,
-            'volatility': 0.18,
-            'sharpe_ratio': 0.83,
-            'max_drawdown': -0.08,
-            'win_rate': 0.55,
-            'total_trades': 125,
-            'profitable_trades': 69,
-            'avg_trade_return': 0.0012
-        }
\ No newline at end of file
+        """Run algorithm backtest over daily bars, optionally optimizing over a parameter grid"""
+        if not HAS_NUMPY:
+            return {'error': 'Backtesting requires numpy'}
+        
+        try:
+            universe = config['universe']
+            symbols = [s.strip().upper() for s in (universe.split(',') if isinstance(universe, str) else universe) if s.strip()]
+            start_date = config.get('start_date')
+            end_date = config.get('end_date')
+            if isinstance(start_date, str):
+                start_date = datetime.fromisoformat(start_date).date()
+            if isinstance(end_date, str):
+                end_date = datetime.fromisoformat(end_date).date()
+            
+            # Prefer the columnar bar store; fall back to MarketData
+            bars = None
+            store_path = config.get('bar_store') or current_app.config.get('BACKTEST_BAR_STORE')
+            if store_path and os.path.exists(os.path.join(store_path, 'meta.json')):
+                stored = ColumnarBarStore.open(store_path)
+                available = [symbol for symbol in symbols if symbol in stored.symbols]
+                if len(available) == len(symbols):
+                    bars = stored.select(available)
+            if bars is None:
+                bars = load_bars_from_db(self.session, symbols, start_date, end_date)
+            bars = bars.slice(start_date, end_date)
+            if not bars.symbols or len(bars.dates) < 2:
+                return {'error': 'No market data available for the requested universe'}
+            
+            params = {'max_positions': config['max_positions']}
+            if config.get('lookback_period'):
+                params['lookback'] = int(config['lookback_period'])
+            params.update(config.get('parameters') or {})
+            
+            engine_params = {
+                'initial_capital': float(config.get('capital_allocation') or 100000),
+                'commission_rate': float(self.COMMISSION_RATE),
+                'min_commission': float(self.MIN_COMMISSION),
+                'stop_loss': float(config['stop_loss']) / 100 if config.get('stop_loss') else None,
+                'take_profit': float(config['take_profit']) / 100 if config.get('take_profit') else None,
+            }
+            
+            sweep_results = None
+            if config.get('parameter_grid'):
+                # Workers memory-map the bars instead of receiving pickled copies
+                with tempfile.TemporaryDirectory(prefix='backtest-') as sweep_store:
+                    ColumnarBarStore.write(sweep_store, bars)
+                    sweep_results = run_parameter_sweep(
+                        sweep_store, config['type'], params, config['parameter_grid'], engine_params,
+                        max_workers=config.get('max_workers'),
+                        max_combinations=current_app.config.get('BACKTEST_MAX_COMBINATIONS', MAX_SWEEP_COMBINATIONS),
+                        worker_limit=current_app.config.get('BACKTEST_MAX_WORKERS', MAX_SWEEP_WORKERS)
+                    )
+                if sweep_results and 'error' not in sweep_results[0]:
+                    params = sweep_results[0]['params']
+            
+            result = BacktestEngine(**engine_params).run(bars, create_strategy(config['type'], params))
+            summary = result.summary()
+            summary['parameters'] = params
+            if sweep_results is not None:
+                summary['parameter_sweep'] = sweep_results[:20]
+                summary['combinations_tested'] = len(sweep_results)
+            return summary
+            
+        except ValueError as e:
+            return {'error': str(e)}
+        except Exception as e:
+            logger.error(f"Algorithm backtest failed: {str(e)}")
+            return {'error': 'Backtest failed'}
@@ -3,7 +3,7 @@ Security Center Models
 Database models for security events, incidents, and monitoring
 """
 
-from sqlalchemy import Column, String, Integer, DateTime, Text, Boolean, ForeignKey, ARRAY
+from sqlalchemy import Column, String, Integer, DateTime, Text, Boolean, ForeignKey, ARRAY, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from modules.core.extensions import db
@@ -52,6 +52,12 @@ class SecurityEvent(db.Model):
     # Relationships
     user = relationship("User", foreign_keys=[user_id])
     
+    # Keyset pagination for the admin audit log listing, with and without a type filter
+    __table_args__ = (
+        Index('idx_security_event_timestamp_id', 'event_timestamp', 'id'),
+        Index('idx_security_event_type_timestamp_id', 'event_type', 'event_timestamp', 'id'),
+    )
+    
     def __repr__(self):
         return f"<SecurityEvent {self.event_type}: {self.title}>"
 
@@ -8,11 +8,10 @@ from flask_login import current_user
 from flask_socketio import emit, join_room, leave_room, disconnect
 import logging
 from datetime import datetime
-import threading
-import time
 import json
 import random
 
+from modules.core.streaming_hub import streaming_hub
 from .services import SecurityCenterService
 
 logger = logging.getLogger(__name__)
@@ -20,17 +19,17 @@ logger = logging.getLogger(__name__)
 class SecurityCenterSocketHandler:
     """Handles real-time socket connections for security center operations"""
     
+    STREAM_TOPICS = ('security.metrics', 'security.threat_intel', 'security.new_threats',
+                     'security.incidents', 'security.systems')
+    
     def __init__(self, socketio):
         self.socketio = socketio
         self.security_service = SecurityCenterService()
         self.active_rooms = set()
-        self.streaming_threads = {}
         
-        # Register socket event handlers
+        # Register socket event handlers and streaming topics
         self.register_handlers()
-        
-        # Start background threat intelligence collection
-        self.start_threat_intelligence_feed()
+        self.register_streams()
     
     def register_handlers(self):
         """Register all socket event handlers for security center"""
@@ -61,16 +60,13 @@ class SecurityCenterSocketHandler:
         @self.socketio.on('disconnect', namespace='/security-center')
         def handle_disconnect():
             """Handle client disconnection"""
+            streaming_hub.unsubscribe_all()
+            
             if current_user.is_authenticated:
                 room = f"security_{current_user.id}"
                 leave_room(room)
                 self.active_rooms.discard(room)
                 
-                # Stop streaming thread for this user
-                if room in self.streaming_threads:
-                    self.streaming_threads[room]['stop'] = True
-                    del self.streaming_threads[room]
-                
                 logger.info(f"Admin user {current_user.id} disconnected from security center socket")
         
         @self.socketio.on('request_security_data', namespace='/security-center')
@@ -133,10 +129,9 @@ class SecurityCenterSocketHandler:
             if not current_user.is_authenticated:
                 return
             
-            room = f"security_{current_user.id}"
-            if room not in self.streaming_threads:
-                self.start_security_stream(room)
-                logger.info(f"Started real-time security monitoring for admin user {current_user.id}")
+            for topic in self.STREAM_TOPICS:
+                streaming_hub.subscribe(topic)
+            logger.info(f"Started real-time security monitoring for admin user {current_user.id}")
         
         @self.socketio.on('stop_security_monitoring', namespace='/security-center')
         def handle_stop_security_monitoring():
@@ -144,11 +139,8 @@ class SecurityCenterSocketHandler:
             if not current_user.is_authenticated:
                 return
             
-            room = f"security_{current_user.id}"
-            if room in self.streaming_threads:
-                self.streaming_threads[room]['stop'] = True
-                del self.streaming_threads[room]
-                logger.info(f"Stopped real-time security monitoring for admin user {current_user.id}")
+            streaming_hub.unsubscribe_all()
+            logger.info(f"Stopped real-time security monitoring for admin user {current_user.id}")
         
         @self.socketio.on('block_threat', namespace='/security-center')
         def handle_block_threat(data):
@@ -216,52 +208,17 @@ class SecurityCenterSocketHandler:
         except Exception as e:
             logger.error(f"Error sending initial security data: {e}")
     
-    def start_security_stream(self, room):
-        """Start real-time security data streaming thread for a specific room"""
-        
-        def stream_security_data():
-            stream_data = {'stop': False}
-            self.streaming_threads[room] = stream_data
-            
-            while not stream_data.get('stop', False):
-                try:
-                    # Stream security metrics every 10 seconds
-                    if int(time.time()) % 10 == 0:
-                        metrics = self.get_security_metrics()
-                        self.socketio.emit('security_metrics_update', metrics, room=room, namespace='/security-center')
-                    
-                    # Stream threat intelligence every 30 seconds
-                    if int(time.time()) % 30 == 0:
-                        threat_data = self.get_threat_intelligence_data()
-                        self.socketio.emit('threat_intelligence_update', threat_data, room=room, namespace='/security-center')
-                    
-                    # Check for new threats every 15 seconds
-                    if int(time.time()) % 15 == 0:
-                        new_threats = self.check_new_threats()
-                        for threat in new_threats:
-                            self.socketio.emit('new_threat', threat, room=room, namespace='/security-center')
-                    
-                    # Check for security incidents every 45 seconds
-                    if int(time.time()) % 45 == 0:
-                        incidents = self.check_security_incidents()
-                        for incident in incidents:
-                            self.socketio.emit('security_incident', incident, room=room, namespace='/security-center')
-                    
-                    # Check system status every 60 seconds
-                    if int(time.time()) % 60 == 0:
-                        system_status = self.get_security_systems_status()
-                        for system in system_status:
-                            self.socketio.emit('system_status_update', system, room=room, namespace='/security-center')
-                    
-                    time.sleep(1)  # Sleep for 1 second between iterations
-                    
-                except Exception as e:
-                    logger.error(f"Error in security streaming: {e}")
-                    time.sleep(5)  # Wait longer on error
-        
-        # Start streaming in background thread
-        thread = threading.Thread(target=stream_security_data, daemon=True)
-        thread.start()
+    def register_streams(self):
+        """Register the security monitoring topics with the shared streaming hub"""
+        streams = {
+            'security.metrics': (10, lambda: {'security_metrics_update': self.get_security_metrics()}),
+            'security.threat_intel': (30, lambda: {'threat_intelligence_update': self.get_threat_intelligence_data()}),
+            'security.new_threats': (15, lambda: {'new_threat': self.check_new_threats()}),
+            'security.incidents': (45, lambda: {'security_incident': self.check_security_incidents()}),
+            'security.systems': (60, lambda: {'system_status_update': self.get_security_systems_status()}),
+        }
+        for topic, (interval, producer) in streams.items():
+            streaming_hub.register_topic(topic, producer, interval=interval, namespace='/security-center')
     
     def get_threat_intelligence_data(self):
         """Get real-time threat intelligence data"""
@@ -445,25 +402,6 @@ class SecurityCenterSocketHandler:
             logger.error(f"Error getting security systems status: {e}")
             return []
     
-    def start_threat_intelligence_feed(self):
-        """Start background threat intelligence collection"""
-        
-        def collect_threat_intelligence():
-            while True:
-                try:
-                    # Collect threat intelligence from various sources
-                    # This would connect to real threat intelligence feeds in production
-                    time.sleep(300)  # Update every 5 minutes
-                    
-                except Exception as e:
-                    logger.error(f"Error in threat intelligence collection: {e}")
-                    time.sleep(300)
-        
-        # Start threat intelligence collection in background thread
-        thread = threading.Thread(target=collect_threat_intelligence, daemon=True)
-        thread.start()
-        logger.info("Background threat intelligence collection started")
-    
     def broadcast_security_action(self, action_data):
         """Broadcast security action to all connected security users"""
         try:
@@ -445,13 +445,16 @@ def banking_transactions():
     """Get user's transaction history via API"""
     try:
         service = APIService()
-        page = request.args.get('page', 1, type=int)
+        page = request.args.get('page', type=int)
         per_page = request.args.get('per_page', 20, type=int)
         account_id = request.args.get('account_id', type=int)
+        cursor = request.args.get('cursor')
         
         transactions_data = service.get_user_transactions(
-            current_user.id, page=page, per_page=per_page, account_id=account_id
+            current_user.id, page=page, per_page=per_page, account_id=account_id, cursor=cursor
         )
+        if transactions_data.get('error') == 'Invalid cursor':
+            return jsonify(transactions_data), 400
         return jsonify(transactions_data)
     except Exception as e:
         logger.error(f"Banking transactions API error: {e}")
@@ -18,6 +18,8 @@ import psutil
 import platform
 
 from modules.core.extensions import db
+from modules.core.pagination import InvalidCursorError, encode_cursor
+from modules.core.performance import QueryOptimizer
 from modules.core.constants import APIHealthStatus, APIResponse, DEFAULT_API_VERSION
 from modules.auth.models import User
 from modules.banking.models import Transaction
@@ -293,31 +295,57 @@ class APIService:
             logger.error(f"Error getting account balance: {e}")
             return None
     
-    def get_user_transactions(self, user_id: int, page: int = 1, per_page: int = 20, 
-                            account_id: Optional[int] = None) -> Dict[str, Any]:
-        """Get user's transaction history"""
+    def get_user_transactions(self, user_id: int, page: Optional[int] = None, per_page: int = 20,
+                            account_id: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get user's transaction history, newest first.
+        
+        Pages are numbered (OFFSET, with total/pages/has_next) unless a
+        ``cursor`` is passed, which switches to keyset pages over
+        (created_at, id); an empty cursor starts from the newest row.
+        """
         try:
-            query = Transaction.query.join(BankAccount).filter(BankAccount.user_id == user_id)
+            user_accounts = db.session.query(BankAccount.id).filter(BankAccount.account_holder_id == user_id)
+            query = Transaction.query.filter(Transaction.account_id.in_(user_accounts.scalar_subquery()))
             
             if account_id:
-                query = query.filter(
-                    (Transaction.from_account_id == account_id) | 
-                    (Transaction.to_account_id == account_id)
-                )
+                query = query.filter(Transaction.account_id == account_id)
             
-            paginated = query.order_by(Transaction.created_at.desc()).paginate(
-                page=page, per_page=per_page, error_out=False
-            )
+            if cursor is None:
+                page = page or 1
+                paginated = QueryOptimizer.paginate_efficiently(
+                    query.order_by(Transaction.created_at.desc(), Transaction.id.desc()),
+                    page=page, per_page=per_page
+                )
+                items = paginated.items
+                pagination = {
+                    'page': page,
+                    'per_page': per_page,
+                    'total': paginated.total,
+                    'pages': paginated.pages,
+                    'has_next': paginated.has_next,
+                    'has_prev': paginated.has_prev,
+                    # Lets offset clients switch to cursors from wherever they are
+                    'next_cursor': encode_cursor((items[-1].created_at, items[-1].id))
+                    if items and paginated.has_next else None
+                }
+            else:
+                result = QueryOptimizer.paginate_by_cursor(
+                    query, Transaction.created_at, Transaction.id, cursor=cursor or None, per_page=per_page
+                )
+                items = result.items
+                pagination = result.pagination()
             
             transactions_data = []
-            for transaction in paginated.items:
+            for transaction in items:
                 transactions_data.append({
                     'transaction_id': transaction.id,
+                    'account_id': transaction.account_id,
                     'from_account_id': transaction.from_account_id,
                     'to_account_id': transaction.to_account_id,
                     'amount': float(transaction.amount),
-                    'transaction_type': transaction.transaction_type.value if transaction.transaction_type else 'Unknown',
-                    'status': transaction.status.value if transaction.status else 'Unknown',
+                    'transaction_type': getattr(transaction.transaction_type, 'value', transaction.transaction_type) or 'Unknown',
+                    'status': getattr(transaction.status, 'value', transaction.status) or 'Unknown',
                     'description': transaction.description,
                     'created_at': transaction.created_at.isoformat() if transaction.created_at else None,
                     'processed_at': transaction.processed_at.isoformat() if transaction.processed_at else None
@@ -325,16 +353,11 @@ class APIService:
             
             return {
                 'transactions': transactions_data,
-                'pagination': {
-                    'page': page,
-                    'per_page': per_page,
-                    'total': paginated.total,
-                    'pages': paginated.pages,
-                    'has_next': paginated.has_next,
-                    'has_prev': paginated.has_prev
-                }
+                'pagination': pagination
             }
             
+        except InvalidCursorError:
+            return {'transactions': [], 'pagination': {}, 'error': 'Invalid cursor'}
         except Exception as e:
             logger.error(f"Error getting user transactions: {e}")
             return {'transactions': [], 'pagination': {}}
@@ -0,0 +1,365 @@
+"""
+SendGrid Bulk Sender
+Concurrent, rate-limit aware bulk delivery over pooled keep-alive connections
+"""
+
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+SENDGRID_API_URL = 'https://api.sendgrid.com'
+MAX_PERSONALIZATIONS = 1000  # SendGrid limit per /v3/mail/send request
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# Client errors that reject the account or key rather than a recipient; splitting the batch cannot help
+ACCOUNT_ERRORS = (401, 403)
+
+# SendGrid error fields that name one personalization, e.g. "personalizations.12.to.0.email"
+PERSONALIZATION_FIELD = re.compile(r'^personalizations\.(\d+)(?:\.|$)')
+
+
+@dataclass
+class BulkSendResult:
+    """Delivery outcome for one recipient"""
+    to_email: str
+    success: bool
+    status_code: Optional[int] = None
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'to_email': self.to_email,
+            'success': self.success,
+            'status_code': self.status_code,
+            'message_id': self.message_id,
+            'error': self.error,
+            'attempts': self.attempts
+        }
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency cap shared by all send threads. A 429 halves the cap and
+    pauses every sender until the provider's reset time; each run of ``cap``
+    clean responses raises it by one again, up to ``max_concurrency``.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self.active = 0
+        self.successes = 0
+        self.paused_until = 0.0
+        self.throttled = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    self._condition.wait(pause)
+                elif self.active < self.limit:
+                    self.active += 1
+                    return
+                else:
+                    self._condition.wait()
+
+    def release(self, throttled: bool = False, retry_after: Optional[float] = None):
+        with self._condition:
+            self.active -= 1
+            if throttled:
+                self.throttled += 1
+                self.limit = max(1, self.limit // 2)
+                self.successes = 0
+                if retry_after:
+                    self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+            else:
+                self.successes += 1
+                if self.limit < self.max_concurrency and self.successes >= self.limit:
+                    self.limit += 1
+                    self.successes = 0
+            self._condition.notify_all()
+
+
+class BulkEmailSender:
+    """
+    Sends many emails through /v3/mail/send.
+
+    Messages take the same keyword arguments as
+    ``SendGridEmailService.send_email``. Messages that share a template (or
+    identical pre-rendered content) are packed into one request, up to
+    ``batch_size`` personalizations. Each recipient gets their own ``to``,
+    ``subject`` and ``substitutions``, and SendGrid fills the ``{{key}}`` tags
+    server-side. Requests run on ``concurrency`` threads over one pooled
+    ``requests.Session``, so TLS connections are reused. When a 4xx names
+    the offending personalizations, only those recipients fail and the
+    rest of the batch is sent again. A 4xx about the request as a whole
+    fails the batch. Without usable error fields the batch is split in
+    half until the halves stop failing alike.
+    """
+
+    def __init__(self, api_key: str, from_email: str, from_name: str,
+                 templates: Optional[Dict[str, str]] = None, base_url: str = SENDGRID_API_URL,
+                 concurrency: int = 8, batch_size: int = MAX_PERSONALIZATIONS,
+                 max_retries: int = 4, timeout: float = 30.0):
+        self.from_email = from_email
+        self.from_name = from_name
+        self.templates = templates or {}
+        self.url = f"{base_url.rstrip('/')}/v3/mail/send"
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, min(batch_size, MAX_PERSONALIZATIONS))
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.limiter = AdaptiveConcurrencyLimiter(self.concurrency)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Authorization': f'Bearer {api_key}',
+            'Content-Type': 'application/json'
+        })
+
+    def send(self, messages: Iterable[Dict[str, Any]]) -> Iterator[BulkSendResult]:
+        """
+        Yield one ``BulkSendResult`` per message as requests complete.
+
+        Input is consumed lazily: at most ``2 * concurrency`` requests are
+        queued at once, so the caller can stream recipients from a query.
+        """
+        groups: Dict[Tuple, List[Tuple[str, Dict[str, Any]]]] = {}
+        contents: Dict[Tuple, Tuple[List[Dict[str, str]], Optional[List[Dict[str, Any]]]]] = {}
+        in_flight = set()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='sendgrid-bulk') as pool:
+            def submit(key):
+                batch = groups.pop(key)
+                content, attachments = contents.pop(key) if key[0] == 'single' else contents[key]
+                in_flight.add(pool.submit(self._deliver, batch, content, attachments))
+
+            def drain(limit: int) -> Iterator[BulkSendResult]:
+                while len(in_flight) > limit:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        in_flight.discard(future)
+                        yield from future.result()
+
+            for index, message in enumerate(messages):
+                to_email = message.get('to_email') or ''
+                if not EMAIL_PATTERN.match(to_email):
+                    yield BulkSendResult(to_email, False, 400, error='Invalid email address format')
+                    continue
+                try:
+                    key, content, attachments, personalization = self._personalize(index, message)
+                except ValueError as e:
+                    yield BulkSendResult(to_email, False, 400, error=str(e))
+                    continue
+
+                contents.setdefault(key, (content, attachments))
+                groups.setdefault(key, []).append((to_email, personalization))
+                if len(groups[key]) >= self.batch_size or key[0] == 'single':
+                    submit(key)
+                    yield from drain(2 * self.concurrency)
+
+            for key in list(groups):
+                submit(key)
+            yield from drain(0)
+
+    def _personalize(self, index: int, message: Dict[str, Any]):
+        """Group key, shared content and this recipient's personalization"""
+        template_type = message.get('template_type')
+        personalization = {'to': [{'email': message['to_email']}], 'subject': message.get('subject') or ''}
+        attachments = message.get('attachments')
+
+        if template_type in self.templates:
+            content = [{'type': 'text/html', 'value': self.templates[template_type]}]
+            personalization['substitutions'] = {
+                f'{{{{{key}}}}}': str(value) for key, value in (message.get('template_data') or {}).items()
+            }
+            key = ('template', template_type)
+        elif message.get('html_content'):
+            content = [{'type': 'text/html', 'value': message['html_content']}]
+            key = ('html', hashlib.sha1(message['html_content'].encode('utf-8')).hexdigest())
+        elif message.get('text_content'):
+            content = [{'type': 'text/plain', 'value': message['text_content']}]
+            key = ('text', hashlib.sha1(message['text_content'].encode('utf-8')).hexdigest())
+        else:
+            raise ValueError('No content provided for email')
+
+        if attachments:
+            # Attachments belong to the whole request, so these messages go out on their own
+            key = ('single', index)
+            attachments = [{
+                'content': item['content'],
+                'type': item.get('type', 'application/pdf'),
+                'filename': item['filename'],
+                'disposition': 'attachment'
+            } for item in attachments]
+        return key, content, attachments, personalization
+
+    def _deliver(self, batch: List[Tuple[str, Dict[str, Any]]], content: List[Dict[str, str]],
+                 attachments: Optional[List[Dict[str, Any]]],
+                 outcome: Optional[Tuple[List[BulkSendResult], Optional[List[Dict[str, Any]]]]] = None
+                 ) -> List[BulkSendResult]:
+        """Send one batch (or take the outcome of a send already made) and narrow down rejected requests"""
+        results, errors = outcome or self._post(batch, content, attachments)
+        if not self._splittable(results[0]):
+            return self._finish(batch, results)
+
+        rejected = self._rejected_recipients(errors, len(batch))
+        if rejected is not None:
+            if not rejected:
+                # The request itself is invalid (content, sender, attachments); every subset fails the same way
+                return self._finish(batch, results)
+            logger.warning(f"SendGrid rejected {len(rejected)} of {len(batch)} recipients with "
+                           f"{results[0].status_code}; sending the rest again")
+            accepted = [item for index, item in enumerate(batch) if index not in rejected]
+            retried = iter(self._deliver(accepted, content, attachments) if accepted else ())
+            return [BulkSendResult(email, False, results[0].status_code,
+                                   error=f"SendGrid rejected recipient: {rejected[index]}",
+                                   attempts=results[0].attempts)
+                    if index in rejected else next(retried)
+                    for index, (email, _) in enumerate(batch)]
+
+        if len(batch) == 1:
+            return self._finish(batch, results)
+        middle = len(batch) // 2
+        halves = (batch[:middle], batch[middle:])
+        outcomes = [self._post(half, content, attachments) for half in halves]
+        logger.warning(f"SendGrid rejected a batch of {len(batch)} with {results[0].status_code}; "
+                       f"narrowing down the halves")
+        first, second = (half_results[0] for half_results, _ in outcomes)
+        probe = self._deliver(halves[0], content, attachments, outcomes[0])
+        if not second.success and (first.status_code, first.error) == (second.status_code, second.error) \
+                and not any(result.success for result in probe):
+            # Both halves failed alike and no part of the first one got through: the error is not per recipient
+            return probe + self._finish(halves[1], outcomes[1][0])
+        return probe + self._deliver(halves[1], content, attachments, outcomes[1])
+
+    @staticmethod
+    def _finish(batch: List[Tuple[str, Dict[str, Any]]], results: List[BulkSendResult]) -> List[BulkSendResult]:
+        failed = [result for result in results if not result.success]
+        if failed:
+            logger.error(f"SendGrid bulk batch of {len(batch)}: {len(failed)} failed after "
+                         f"{failed[0].attempts} attempts: {failed[0].error}")
+        return results
+
+    @staticmethod
+    def _splittable(result: BulkSendResult) -> bool:
+        """A 4xx about the request's content, which may come from a single recipient"""
+        status_code = result.status_code
+        return (not result.success and status_code is not None and 400 <= status_code < 500
+                and status_code != 429 and status_code not in ACCOUNT_ERRORS)
+
+    @staticmethod
+    def _rejected_recipients(errors: Optional[List[Dict[str, Any]]], size: int) -> Optional[Dict[int, str]]:
+        """
+        Batch positions SendGrid's error fields blame, with their messages.
+        Empty when an error concerns the whole request, None when the errors
+        do not say (no body, no fields, or positions outside the batch).
+        """
+        if not errors:
+            return None
+        rejected = {}
+        for error in errors:
+            field = error.get('field') if isinstance(error, dict) else None
+            if not field:
+                return None
+            match = PERSONALIZATION_FIELD.match(field)
+            if match is None:
+                return {}
+            index = int(match.group(1))
+            if index >= size:
+                return None
+            rejected.setdefault(index, error.get('message') or field)
+        return rejected
+
+    def _post(self, batch: List[Tuple[str, Dict[str, Any]]], content: List[Dict[str, str]],
+              attachments: Optional[List[Dict[str, Any]]]
+              ) -> Tuple[List[BulkSendResult], Optional[List[Dict[str, Any]]]]:
+        """
+        POST one batch, retrying throttling, 5xx and connection errors with
+        backoff. Returns per-recipient results and, for a final 4xx, the
+        ``errors`` list of SendGrid's response body.
+        """
+        payload = {
+            'personalizations': [personalization for _, personalization in batch],
+            'from': {'email': self.from_email, 'name': self.from_name},
+            'subject': batch[0][1]['subject'],
+            'content': content
+        }
+        if attachments:
+            payload['attachments'] = attachments
+
+        status_code, error, errors = None, None, None
+        for attempt in range(1, self.max_retries + 2):
+            retry_after = None
+            self.limiter.acquire()
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout)
+                status_code = response.status_code
+            except requests.RequestException as e:
+                status_code, error = None, f'Email sending failed: {e}'
+                self.limiter.release()
+            else:
+                throttled = status_code == 429
+                if throttled:
+                    retry_after = self._retry_after(response)
+                self.limiter.release(throttled=throttled, retry_after=retry_after)
+                if status_code < 300:
+                    message_id = response.headers.get('X-Message-Id', 'Unknown')
+                    return [BulkSendResult(email, True, status_code, message_id, attempts=attempt)
+                            for email, _ in batch], None
+                error = f'SendGrid returned {status_code}: {response.text[:500]}'
+                if status_code != 429 and status_code < 500:
+                    errors = self._response_errors(response)
+                    break
+
+            if attempt <= self.max_retries:
+                # Throttled batches wait out the shared pause in acquire(); others back off with jitter
+                time.sleep(0 if retry_after else min(30.0, 0.5 * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0))
+
+        return [BulkSendResult(email, False, status_code, error=error, attempts=attempt) for email, _ in batch], errors
+
+    @staticmethod
+    def _response_errors(response) -> Optional[List[Dict[str, Any]]]:
+        try:
+            errors = response.json().get('errors')
+        except (ValueError, AttributeError):
+            return None
+        return errors if isinstance(errors, list) else None
+
+    @staticmethod
+    def _retry_after(response) -> float:
+        """Seconds until SendGrid's rate limit window resets"""
+        header = response.headers.get('Retry-After')
+        if header:
+            try:
+                return max(0.0, float(header))
+            except ValueError:
+                pass
+        reset = response.headers.get('X-RateLimit-Reset')
+        if reset:
+            try:
+                return max(0.0, min(60.0, float(reset) - time.time()))
+            except ValueError:
+                pass
+        return 1.0
+
+    def close(self):
+        self.session.close()
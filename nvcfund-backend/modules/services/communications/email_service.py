@@ -7,12 +7,14 @@ import os
 import sys
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, Iterator, List, Optional, Any
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail, Email, To, Content, Attachment, FileContent, FileName, FileType, Disposition
 import base64
 import json
 
+from .template_engine import TAG_SYNTAX, template_engine
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -43,6 +45,10 @@ class SendGridEmailService:
             'card_application': self._get_card_application_template(),
             'compliance_notification': self._get_compliance_template()
         }
+        template_engine.register_all('sendgrid', self.templates, syntax=TAG_SYNTAX)
+        
+        # Concurrent bulk sender, created on first bulk send
+        self._bulk_sender = None
     
     def send_email(
         self,
@@ -213,7 +219,7 @@ class SendGridEmailService:
             template_data=template_data
         )
     
-    def send_bulk_emails(self, email_list: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def send_bulk_emails(self, email_list: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
         """Send bulk emails for marketing or notifications"""
         
         results = {
@@ -223,31 +229,42 @@ class SendGridEmailService:
             'errors': []
         }
         
-        for email_data in email_list:
-            try:
-                result = self.send_email(**email_data)
-                results['total_sent'] += 1
-                
-                if result['success']:
-                    results['successful'] += 1
-                else:
-                    results['failed'] += 1
-                    results['errors'].append({
-                        'email': email_data.get('to_email', 'Unknown'),
-                        'error': result['error']
-                    })
-                    
-            except Exception as e:
-                results['total_sent'] += 1
+        for result in self.iter_bulk_emails(email_list):
+            results['total_sent'] += 1
+            if result.success:
+                results['successful'] += 1
+            else:
                 results['failed'] += 1
                 results['errors'].append({
-                    'email': email_data.get('to_email', 'Unknown'),
-                    'error': str(e)
+                    'email': result.to_email or 'Unknown',
+                    'error': result.error
                 })
         
         logger.info(f"📧 Bulk email results: {results['successful']}/{results['total_sent']} successful")
         return results
     
+    def iter_bulk_emails(self, email_list: Iterable[Dict[str, Any]]) -> Iterator['BulkSendResult']:
+        """
+        Stream per-recipient results for a bulk send as batches complete.
+        
+        Each item takes the same arguments as send_email. Recipients sharing a
+        template are sent as one multi-personalization request, with up to
+        SENDGRID_BULK_CONCURRENCY requests in flight over reused connections.
+        """
+        return self._get_bulk_sender().send(email_list)
+    
+    def _get_bulk_sender(self) -> 'BulkEmailSender':
+        if self._bulk_sender is None:
+            from .bulk_sender import SENDGRID_API_URL, BulkEmailSender
+            self._bulk_sender = BulkEmailSender(
+                self.api_key, self.from_email, self.from_name,
+                templates=self.templates,
+                base_url=os.environ.get('SENDGRID_API_BASE_URL', SENDGRID_API_URL),
+                concurrency=int(os.environ.get('SENDGRID_BULK_CONCURRENCY', '8')),
+                batch_size=int(os.environ.get('SENDGRID_BULK_BATCH_SIZE', '1000'))
+            )
+        return self._bulk_sender
+    
     def _validate_email(self, email: str) -> bool:
         """Basic email validation"""
         import re
@@ -256,13 +273,15 @@ class SendGridEmailService:
     
     def _process_template(self, template_type: str, data: Dict[str, Any]) -> str:
         """Process email template with data substitution"""
-        template = self.templates.get(template_type, '')
-        
-        for key, value in data.items():
-            placeholder = f'{{{{{key}}}}}'
-            template = template.replace(placeholder, str(value))
-        
-        return template
+        if template_type not in self.templates:
+            return ''
+        return template_engine.render(f'sendgrid.{template_type}', data)
+    
+    def render_batch(self, template_type: str, contexts: List[Dict[str, Any]]) -> List[str]:
+        """Render many recipients' data against one template in a single pass"""
+        if template_type not in self.templates:
+            return ['' for _ in contexts]
+        return template_engine.render_many(f'sendgrid.{template_type}', contexts)
     
     def _add_attachment(self, message: Mail, attachment_data: Dict[str, str]):
         """Add file attachment to email"""
@@ -14,6 +14,7 @@ from flask_login import login_required, current_user
 from modules.services.communications import communications_bp
 from modules.services.communications.services import EmailService, PersonalizedMessageService, CommunicationScheduler
 from modules.services.communications.models import CommunicationLog, CommunicationPreference, EmailTemplate
+from modules.services.communications.template_engine import template_engine
 from modules.core.security_enforcement import secure_banking_route
 from modules.core.extensions import db
 import logging
@@ -390,7 +391,8 @@ def api_status():
                 'emails_sent_today': total_today,
                 'successful_today': successful_today,
                 'success_rate': (successful_today / total_today * 100) if total_today > 0 else 0
-            }
+            },
+            'template_rendering': template_engine.timing_report()
         })
         
     except Exception as e:
@@ -18,6 +18,7 @@ from flask import render_template, current_app
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail, Email, To, Content, Attachment
 from modules.core.extensions import db
+from .template_engine import template_engine
 import base64
 
 logger = logging.getLogger(__name__)
@@ -51,6 +52,20 @@ class EmailService:
             'card_application': self._get_card_application_template(),
             'compliance_notification': self._get_compliance_template()
         }
+        # Compiled once per process; later instances hit the cache by source hash
+        template_engine.register_all('email', self.email_templates)
+    
+    def render_email_template(self, template_name: str, context: Dict[str, Any]) -> str:
+        """Render one of the banking templates with its compiled render function"""
+        if template_name not in self.email_templates:
+            return ''
+        return template_engine.render(f'email.{template_name}', context)
+    
+    def render_email_batch(self, template_name: str, contexts: List[Dict[str, Any]]) -> List[str]:
+        """Render many contexts against one template, e.g. for statement or holiday runs"""
+        if template_name not in self.email_templates:
+            return ['' for _ in contexts]
+        return template_engine.render_many(f'email.{template_name}', contexts)
     
     def send_email(self, 
                    to_email: str,
@@ -59,7 +74,8 @@ class EmailService:
                    from_email: str = None,
                    attachments: List[Dict] = None,
                    template_name_for_log: str = 'custom',
-                   context_for_log: Dict[str, Any] = None) -> bool:
+                   context_for_log: Dict[str, Any] = None,
+                   log_communication: bool = True) -> bool:
         """
         Send email using SendGrid with pre-rendered HTML content.
         
@@ -71,6 +87,8 @@ class EmailService:
             attachments: List of attachment dictionaries.
             template_name_for_log: The name of the template used, for logging.
             context_for_log: The context dictionary used, for logging.
+            log_communication: Write the CommunicationLog row here; batch jobs
+                pass False and record their own rows in bulk.
             
         Returns:
             bool: True if email sent successfully
@@ -109,13 +127,14 @@ class EmailService:
                 logger.info(f"Email sent successfully to {to_email} using template {template_name_for_log}")
                 
                 # Log communication for audit
-                self._log_communication(
-                    to_email=to_email,
-                    subject=subject,
-                    template_name=template_name_for_log,
-                    status='sent',
-                    context=context_for_log
-                )
+                if log_communication:
+                    self._log_communication(
+                        to_email=to_email,
+                        subject=subject,
+                        template_name=template_name_for_log,
+                        status='sent',
+                        context=context_for_log
+                    )
                 return True
             else:
                 logger.error(f"Failed to send email to {to_email}. Status: {response.status_code}")
@@ -149,264 +168,6 @@ class EmailService:
             
         except Exception as e:
             logger.error(f"Error logging communication: {str(e)}")
-
-
-class PersonalizedMessageService:
-    """
-    Service for generating personalized messages and communications
-    """
-    
-    @staticmethod
-    def generate_welcome_email_context(user) -> Dict[str, Any]:
-        """Generate context for welcome email"""
-        return {
-            'first_name': getattr(user, 'first_name', 'Valued Customer'),
-            'last_name': getattr(user, 'last_name', ''),
-            'email': getattr(user, 'email', ''),
-            'account_number': getattr(user, 'account_number', 'Not Available'),
-            'signup_date': datetime.utcnow().strftime('%B %d, %Y'),
-            'login_url': current_app.config.get('BASE_URL', '') + '/auth/login',
-            'support_email': 'support@nvcfund.com',
-            'current_year': datetime.utcnow().year
-        }
-    
-    @staticmethod
-    def generate_login_notification_context(user, ip_address: str = None) -> Dict[str, Any]:
-        """Generate context for login notification email"""
-        return {
-            'first_name': getattr(user, 'first_name', 'Valued Customer'),
-            'login_time': datetime.utcnow().strftime('%B %d, %Y at %I:%M %p UTC'),
-            'ip_address': ip_address or 'Unknown',
-            'location': 'Unknown Location',  # Could integrate with IP geolocation service
-            'device_info': 'Unknown Device',  # Could parse user agent
-            'security_url': current_app.config.get('BASE_URL', '') + '/security',
-            'support_email': 'security@nvcfund.com',
-            'current_year': datetime.utcnow().year
-        }
-    
-    @staticmethod
-    def generate_transaction_receipt_context(transaction, user) -> Dict[str, Any]:
-        """Generate context for transaction receipt email"""
-        return {
-            'first_name': getattr(user, 'first_name', 'Valued Customer'),
-            'transaction_id': getattr(transaction, 'id', 'N/A'),
-            'transaction_type': getattr(transaction, 'transaction_type', 'Transaction'),
-            'amount': f"${getattr(transaction, 'amount', 0):,.2f}",
-            'transaction_date': getattr(transaction, 'created_at', datetime.utcnow()).strftime('%B %d, %Y at %I:%M %p'),
-            'description': getattr(transaction, 'description', 'Banking transaction'),
-            'account_balance': f"${getattr(user, 'account_balance', 0):,.2f}",
-            'reference_number': getattr(transaction, 'reference_number', 'N/A'),
-            'support_email': 'support@nvcfund.com',
-            'current_year': datetime.utcnow().year
-        }
-    
-    @staticmethod
-    def generate_birthday_message_context(user) -> Dict[str, Any]:
-        """Generate context for birthday message"""
-        return {
-            'first_name': getattr(user, 'first_name', 'Valued Customer'),
-            'birthday_year': datetime.utcnow().year,
-            'special_offers': [
-                {'title': 'Birthday Bonus', 'description': '0.5% extra interest on savings for 30 days'},
-                {'title': 'Free Wire Transfers', 'description': 'No fees on international transfers this month'},
-                {'title': 'Premium Support', 'description': 'Priority customer service access'}
-            ],
-            'customer_since': getattr(user, 'created_at', datetime.utcnow()).strftime('%Y'),
-            'support_email': 'support@nvcfund.com',
-            'current_year': datetime.utcnow().year
-        }
-    
-    @staticmethod
-    def generate_holiday_message_context(user, holiday_name: str) -> Dict[str, Any]:
-        """Generate context for holiday message"""
-        return {
-            'first_name': getattr(user, 'first_name', 'Valued Customer'),
-            'holiday_name': holiday_name,
-            'holiday_year': datetime.utcnow().year,
-            'holiday_message': f"Wishing you and your family a wonderful {holiday_name}!",
-            'special_hours': 'Our branches will have modified hours during the holiday. Please check our website for details.',
-            'emergency_contact': '+1-800-NVC-BANK',
-            'support_email': 'support@nvcfund.com',
-            'current_year': datetime.utcnow().year
-        }
-    
-    @staticmethod
-    def generate_monthly_statement_context(user, account, transactions) -> Dict[str, Any]:
-        """Generate context for monthly statement"""
-        total_deposits = sum(t.amount for t in transactions if t.amount > 0)
-        total_withdrawals = abs(sum(t.amount for t in transactions if t.amount < 0))
-        
-        return {
-            'first_name': getattr(user, 'first_name', 'Valued Customer'),
-            'last_name': getattr(user, 'last_name', ''),
-            'account_number': getattr(account, 'account_number', 'N/A'),
-            'statement_period': datetime.utcnow().strftime('%B %Y'),
-            'opening_balance': f"${getattr(account, 'opening_balance', 0):,.2f}",
-            'closing_balance': f"${getattr(account, 'balance', 0):,.2f}",
-            'total_deposits': f"${total_deposits:,.2f}",
-            'total_withdrawals': f"${total_withdrawals:,.2f}",
-            'transaction_count': len(transactions),
-            'transactions': [{
-                'date': t.created_at.strftime('%m/%d/%Y'),
-                'description': t.description,
-                'amount': f"${t.amount:,.2f}" if t.amount > 0 else f"-${abs(t.amount):,.2f}",
-                'balance': f"${t.running_balance:,.2f}" if hasattr(t, 'running_balance') else 'N/A'
-            } for t in transactions],
-            'support_email': 'support@nvcfund.com',
-            'current_year': datetime.utcnow().year
-        }
-
-
-class CommunicationScheduler:
-    """
-    Service for scheduling automated communications
-    """
-    
-    @staticmethod
-    def schedule_birthday_messages():
-        """Schedule birthday messages for users with today's birthday"""
-        try:
-            from modules.auth.models import User
-            
-            today = date.today()
-            # Find users with birthday today
-            birthday_users = User.query.filter(
-                db.extract('month', User.date_of_birth) == today.month,
-                db.extract('day', User.date_of_birth) == today.day
-            ).all()
-            
-            email_service = EmailService()
-            message_service = PersonalizedMessageService()
-            
-            for user in birthday_users:
-                try:
-                    context = message_service.generate_birthday_message_context(user)
-                    success = email_service.send_email(
-                        to_email=user.email,
-                        subject=f"Happy Birthday, {user.first_name}! 🎉",
-                        template_name="birthday_message",
-                        context=context
-                    )
-                    
-                    if success:
-                        logger.info(f"Birthday message sent to {user.email}")
-                    else:
-                        logger.error(f"Failed to send birthday message to {user.email}")
-                        
-                except Exception as e:
-                    logger.error(f"Error sending birthday message to user {user.id}: {str(e)}")
-            
-            return len(birthday_users)
-            
-        except Exception as e:
-            logger.error(f"Error scheduling birthday messages: {str(e)}")
-            return 0
-    
-    @staticmethod
-    def schedule_holiday_messages(holiday_name: str, target_users: List = None):
-        """Schedule holiday messages for all users or specified users"""
-        try:
-            from modules.auth.models import User
-            
-            if target_users is None:
-                # Send to all active users
-                users = User.query.filter_by(is_active=True).all()
-            else:
-                users = target_users
-            
-            email_service = EmailService()
-            message_service = PersonalizedMessageService()
-            
-            sent_count = 0
-            for user in users:
-                try:
-                    context = message_service.generate_holiday_message_context(user, holiday_name)
-                    success = email_service.send_email(
-                        to_email=user.email,
-                        subject=f"Happy {holiday_name} from NVC Banking!",
-                        template_name="holiday_message",
-                        context=context
-                    )
-                    
-                    if success:
-                        sent_count += 1
-                        logger.info(f"Holiday message sent to {user.email}")
-                    else:
-                        logger.error(f"Failed to send holiday message to {user.email}")
-                        
-                except Exception as e:
-                    logger.error(f"Error sending holiday message to user {user.id}: {str(e)}")
-            
-            return sent_count
-            
-        except Exception as e:
-            logger.error(f"Error scheduling holiday messages: {str(e)}")
-            return 0
-    
-    @staticmethod
-    def schedule_monthly_statements():
-        """Generate and send monthly statements for all users"""
-        try:
-            from modules.auth.models import User
-            from modules.banking.models import BankAccount, Transaction
-            
-            # Get all active users with bank accounts
-            users_with_accounts = db.session.query(User).join(BankAccount).filter(
-                User.is_active == True,
-                BankAccount.is_active == True
-            ).all()
-            
-            email_service = EmailService()
-            message_service = PersonalizedMessageService()
-            
-            sent_count = 0
-            for user in users_with_accounts:
-                try:
-                    # Get user's primary account
-                    account = BankAccount.query.filter_by(
-                        user_id=user.id, 
-                        is_primary=True
-                    ).first()
-                    
-                    if not account:
-                        account = BankAccount.query.filter_by(user_id=user.id).first()
-                    
-                    if account:
-                        # Get last month's transactions
-                        last_month = datetime.utcnow().replace(day=1) - timedelta(days=1)
-                        first_day_last_month = last_month.replace(day=1)
-                        
-                        transactions = Transaction.query.filter(
-                            Transaction.account_id == account.id,
-                            Transaction.created_at >= first_day_last_month,
-                            Transaction.created_at < datetime.utcnow().replace(day=1)
-                        ).order_by(Transaction.created_at).all()
-                        
-                        context = message_service.generate_monthly_statement_context(
-                            user, account, transactions
-                        )
-                        
-                        success = email_service.send_email(
-                            to_email=user.email,
-                            subject=f"Monthly Statement - {last_month.strftime('%B %Y')}",
-                            template_name="monthly_statement",
-                            context=context
-                        )
-                        
-                        if success:
-                            sent_count += 1
-                            logger.info(f"Monthly statement sent to {user.email}")
-                        else:
-                            logger.error(f"Failed to send monthly statement to {user.email}")
-                            
-                except Exception as e:
-                    logger.error(f"Error sending monthly statement to user {user.id}: {str(e)}")
-            
-            return sent_count
-            
-        except Exception as e:
-            logger.error(f"Error scheduling monthly statements: {str(e)}")
-            return 0
     
     # Banking-specific email template methods for comprehensive communication
     def send_signup_verification_email(self, to_email: str, user_name: str, verification_token: str) -> bool:
@@ -422,7 +183,7 @@ class CommunicationScheduler:
                 'platform_name': 'NVC Banking Platform'
             }
             
-            html_content = self.email_templates.get('signup_verification', '').format(**template_data)
+            html_content = self.render_email_template('signup_verification', template_data)
             
             return self.send_email(
                 to_email=to_email,
@@ -446,7 +207,7 @@ class CommunicationScheduler:
                 'platform_name': 'NVC Banking Platform'
             }
             
-            html_content = self.email_templates.get('two_factor_code', '').format(**template_data)
+            html_content = self.render_email_template('two_factor_code', template_data)
             
             return self.send_email(
                 to_email=to_email,
@@ -474,7 +235,7 @@ class CommunicationScheduler:
                 'location': transaction_data.get('location', 'N/A')
             }
             
-            html_content = self.email_templates.get('transaction_alert', '').format(**template_data)
+            html_content = self.render_email_template('transaction_alert', template_data)
             
             return self.send_email(
                 to_email=to_email,
@@ -502,7 +263,7 @@ class CommunicationScheduler:
                 'support_phone': '+1-800-NVC-SECURITY'
             }
             
-            html_content = self.email_templates.get('security_alert', '').format(**template_data)
+            html_content = self.render_email_template('security_alert', template_data)
             
             return self.send_email(
                 to_email=to_email,
@@ -1300,4 +1061,216 @@ class CommunicationScheduler:
             </div>
         </body>
         </html>
-        """
\ No newline at end of file
+        """
+
+
+class PersonalizedMessageService:
+    """
+    Service for generating personalized messages and communications
+    """
+    
+    @staticmethod
+    def generate_welcome_email_context(user) -> Dict[str, Any]:
+        """Generate context for welcome email"""
+        return {
+            'first_name': getattr(user, 'first_name', 'Valued Customer'),
+            'last_name': getattr(user, 'last_name', ''),
+            'email': getattr(user, 'email', ''),
+            'account_number': getattr(user, 'account_number', 'Not Available'),
+            'signup_date': datetime.utcnow().strftime('%B %d, %Y'),
+            'login_url': current_app.config.get('BASE_URL', '') + '/auth/login',
+            'support_email': 'support@nvcfund.com',
+            'current_year': datetime.utcnow().year
+        }
+    
+    @staticmethod
+    def generate_login_notification_context(user, ip_address: str = None) -> Dict[str, Any]:
+        """Generate context for login notification email"""
+        return {
+            'first_name': getattr(user, 'first_name', 'Valued Customer'),
+            'login_time': datetime.utcnow().strftime('%B %d, %Y at %I:%M %p UTC'),
+            'ip_address': ip_address or 'Unknown',
+            'location': 'Unknown Location',  # Could integrate with IP geolocation service
+            'device_info': 'Unknown Device',  # Could parse user agent
+            'security_url': current_app.config.get('BASE_URL', '') + '/security',
+            'support_email': 'security@nvcfund.com',
+            'current_year': datetime.utcnow().year
+        }
+    
+    @staticmethod
+    def generate_transaction_receipt_context(transaction, user) -> Dict[str, Any]:
+        """Generate context for transaction receipt email"""
+        return {
+            'first_name': getattr(user, 'first_name', 'Valued Customer'),
+            'transaction_id': getattr(transaction, 'id', 'N/A'),
+            'transaction_type': getattr(transaction, 'transaction_type', 'Transaction'),
+            'amount': f"${getattr(transaction, 'amount', 0):,.2f}",
+            'transaction_date': getattr(transaction, 'created_at', datetime.utcnow()).strftime('%B %d, %Y at %I:%M %p'),
+            'description': getattr(transaction, 'description', 'Banking transaction'),
+            'account_balance': f"${getattr(user, 'account_balance', 0):,.2f}",
+            'reference_number': getattr(transaction, 'reference_number', 'N/A'),
+            'support_email': 'support@nvcfund.com',
+            'current_year': datetime.utcnow().year
+        }
+    
+    @staticmethod
+    def generate_birthday_message_context(user) -> Dict[str, Any]:
+        """Generate context for birthday message"""
+        return {
+            'first_name': getattr(user, 'first_name', 'Valued Customer'),
+            'birthday_year': datetime.utcnow().year,
+            'special_offers': [
+                {'title': 'Birthday Bonus', 'description': '0.5% extra interest on savings for 30 days'},
+                {'title': 'Free Wire Transfers', 'description': 'No fees on international transfers this month'},
+                {'title': 'Premium Support', 'description': 'Priority customer service access'}
+            ],
+            'customer_since': getattr(user, 'created_at', datetime.utcnow()).strftime('%Y'),
+            'support_email': 'support@nvcfund.com',
+            'current_year': datetime.utcnow().year
+        }
+    
+    @staticmethod
+    def generate_holiday_message_context(user, holiday_name: str) -> Dict[str, Any]:
+        """Generate context for holiday message"""
+        return {
+            'first_name': getattr(user, 'first_name', 'Valued Customer'),
+            'holiday_name': holiday_name,
+            'holiday_year': datetime.utcnow().year,
+            'holiday_message': f"Wishing you and your family a wonderful {holiday_name}!",
+            'special_hours': 'Our branches will have modified hours during the holiday. Please check our website for details.',
+            'emergency_contact': '+1-800-NVC-BANK',
+            'support_email': 'support@nvcfund.com',
+            'current_year': datetime.utcnow().year
+        }
+    
+    @staticmethod
+    def generate_monthly_statement_context(user, account, transactions) -> Dict[str, Any]:
+        """Generate context for monthly statement"""
+        total_deposits = sum(t.amount for t in transactions if t.amount > 0)
+        total_withdrawals = abs(sum(t.amount for t in transactions if t.amount < 0))
+        
+        return {
+            'first_name': getattr(user, 'first_name', 'Valued Customer'),
+            'last_name': getattr(user, 'last_name', ''),
+            'account_number': getattr(account, 'account_number', 'N/A'),
+            'statement_period': datetime.utcnow().strftime('%B %Y'),
+            'opening_balance': f"${getattr(account, 'opening_balance', 0):,.2f}",
+            'closing_balance': f"${getattr(account, 'balance', 0):,.2f}",
+            'total_deposits': f"${total_deposits:,.2f}",
+            'total_withdrawals': f"${total_withdrawals:,.2f}",
+            'transaction_count': len(transactions),
+            'transactions': [{
+                'date': t.created_at.strftime('%m/%d/%Y'),
+                'description': t.description,
+                'amount': f"${t.amount:,.2f}" if t.amount > 0 else f"-${abs(t.amount):,.2f}",
+                'balance': f"${t.running_balance:,.2f}" if hasattr(t, 'running_balance') else 'N/A'
+            } for t in transactions],
+            'support_email': 'support@nvcfund.com',
+            'current_year': datetime.utcnow().year
+        }
+
+
+class CommunicationScheduler:
+    """
+    Service for scheduling automated communications
+    """
+    
+    @staticmethod
+    def schedule_birthday_messages():
+        """Schedule birthday messages for users with today's birthday"""
+        try:
+            from modules.auth.models import User
+            
+            today = date.today()
+            # Find users with birthday today
+            birthday_users = User.query.filter(
+                db.extract('month', User.date_of_birth) == today.month,
+                db.extract('day', User.date_of_birth) == today.day
+            ).all()
+            
+            email_service = EmailService()
+            message_service = PersonalizedMessageService()
+            
+            for user in birthday_users:
+                try:
+                    context = message_service.generate_birthday_message_context(user)
+                    success = email_service.send_email(
+                        to_email=user.email,
+                        subject=f"Happy Birthday, {user.first_name}! 🎉",
+                        template_name="birthday_message",
+                        context=context
+                    )
+                    
+                    if success:
+                        logger.info(f"Birthday message sent to {user.email}")
+                    else:
+                        logger.error(f"Failed to send birthday message to {user.email}")
+                        
+                except Exception as e:
+                    logger.error(f"Error sending birthday message to user {user.id}: {str(e)}")
+            
+            return len(birthday_users)
+            
+        except Exception as e:
+            logger.error(f"Error scheduling birthday messages: {str(e)}")
+            return 0
+    
+    @staticmethod
+    def schedule_holiday_messages(holiday_name: str, target_users: List = None):
+        """Schedule holiday messages for all users or specified users"""
+        try:
+            from modules.auth.models import User
+            
+            if target_users is None:
+                # Send to all active users
+                users = User.query.filter_by(is_active=True).all()
+            else:
+                users = target_users
+            
+            email_service = EmailService()
+            message_service = PersonalizedMessageService()
+            
+            sent_count = 0
+            for user in users:
+                try:
+                    context = message_service.generate_holiday_message_context(user, holiday_name)
+                    success = email_service.send_email(
+                        to_email=user.email,
+                        subject=f"Happy {holiday_name} from NVC Banking!",
+                        template_name="holiday_message",
+                        context=context
+                    )
+                    
+                    if success:
+                        sent_count += 1
+                        logger.info(f"Holiday message sent to {user.email}")
+                    else:
+                        logger.error(f"Failed to send holiday message to {user.email}")
+                        
+                except Exception as e:
+                    logger.error(f"Error sending holiday message to user {user.id}: {str(e)}")
+            
+            return sent_count
+            
+        except Exception as e:
+            logger.error(f"Error scheduling holiday messages: {str(e)}")
+            return 0
+    
+    @staticmethod
+    def schedule_monthly_statements(resume: bool = True):
+        """
+        Generate and send last month's statements for all active users.
+        
+        Runs through StatementPipeline: users are streamed in keyset chunks and
+        sent on a bounded worker pool, with a per-month checkpoint so a crashed
+        run picks up where it stopped.
+        """
+        try:
+            from .statement_pipeline import StatementPipeline
+            
+            pipeline = StatementPipeline.from_config(current_app, email_service=EmailService())
+            return pipeline.run(resume=resume)['sent']
+            
+        except Exception as e:
+            logger.error(f"Error scheduling monthly statements: {str(e)}")
+            return 0
@@ -0,0 +1,294 @@
+"""
+Monthly Statement Pipeline
+Streams active users in keyset chunks and renders/sends statements on a bounded worker pool
+"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, exists, func, or_
+
+from modules.core.extensions import db
+
+logger = logging.getLogger(__name__)
+
+# Transaction types that take money out of the account they are posted on
+DEBIT_TYPES = ('withdrawal', 'payment', 'fee')
+
+
+@dataclass
+class StatementJob:
+    """Everything needed to render and send one statement, detached from the DB session"""
+    user_id: int
+    email: str
+    first_name: Optional[str]
+    last_name: Optional[str]
+    account: SimpleNamespace
+    transactions: List[SimpleNamespace] = field(default_factory=list)
+
+
+def statement_period(today: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """[start, end) of the calendar month before ``today``"""
+    end = (today or datetime.utcnow()).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    start = (end - timedelta(days=1)).replace(day=1)
+    return start, end
+
+
+class StatementCheckpoint:
+    """
+    JSON checkpoint for one statement run, rewritten atomically after each
+    fully sent chunk. A restarted run continues after ``last_user_id``; users
+    in the chunk that was in flight when the process died may be sent again.
+    """
+
+    def __init__(self, directory: Optional[str], run_id: str):
+        self.path = os.path.join(directory, f"{run_id}.json") if directory else None
+        self.state = {'run_id': run_id, 'last_user_id': 0, 'sent': 0, 'failed': 0, 'skipped': 0,
+                      'completed': False, 'started_at': datetime.utcnow().isoformat(), 'updated_at': None}
+
+    def load(self) -> Dict[str, Any]:
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path) as handle:
+                    self.state.update(json.load(handle))
+            except (OSError, ValueError) as e:
+                logger.error(f"Unreadable statement checkpoint {self.path}, starting over: {e}")
+        return self.state
+
+    def reset(self):
+        self.state.update(last_user_id=0, sent=0, failed=0, skipped=0, completed=False,
+                          started_at=datetime.utcnow().isoformat())
+
+    def save(self, **changes):
+        self.state.update(changes, updated_at=datetime.utcnow().isoformat())
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as handle:
+            json.dump(self.state, handle)
+        os.replace(tmp_path, self.path)
+
+
+class StatementPipeline:
+    """
+    Monthly statement job.
+
+    The driver thread walks active users by primary key (``id > last_id``
+    ``LIMIT chunk_size``) and loads the chunk's accounts together with their
+    last-month transactions in a single outer-join query, then releases its
+    DB connection. Rendering and SendGrid calls run on ``max_workers``
+    threads. At most ``max_pending_chunks`` chunks are in flight, so memory
+    stays bounded, and chunks are checkpointed in order as they finish.
+    """
+
+    def __init__(self, email_service=None, chunk_size: int = 500, max_workers: int = 8,
+                 max_pending_chunks: int = 2, checkpoint_dir: Optional[str] = None):
+        self.email_service = email_service
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_pending_chunks = max_pending_chunks
+        self.checkpoint_dir = checkpoint_dir
+
+    @classmethod
+    def from_config(cls, app, email_service=None) -> 'StatementPipeline':
+        return cls(
+            email_service=email_service,
+            chunk_size=app.config.get('STATEMENT_CHUNK_SIZE', 500),
+            max_workers=app.config.get('STATEMENT_WORKERS', 8),
+            checkpoint_dir=app.config.get('STATEMENT_CHECKPOINT_DIR')
+                           or os.path.join(app.instance_path, 'statement_runs')
+        )
+
+    def run(self, today: Optional[datetime] = None, resume: bool = True) -> Dict[str, Any]:
+        """Send last month's statements; resumes an interrupted run for the same month by default"""
+        if self.email_service is None:
+            from .services import EmailService
+            self.email_service = EmailService()
+
+        start, end = statement_period(today)
+        checkpoint = StatementCheckpoint(self.checkpoint_dir, f"statements-{start.strftime('%Y-%m')}")
+        state = checkpoint.load() if resume else checkpoint.state
+        if state['completed'] and resume:
+            logger.info(f"Statements for {start.strftime('%B %Y')} already sent ({state['sent']}), skipping")
+            return state
+        if not resume:
+            checkpoint.reset()
+        if state['last_user_id']:
+            logger.info(f"Resuming statement run {state['run_id']} after user {state['last_user_id']}")
+
+        subject = f"Monthly Statement - {start.strftime('%B %Y')}"
+        started = time.perf_counter()
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='statements') as pool:
+            last_id = state['last_user_id']
+            try:
+                while True:
+                    jobs, skipped, last_id = self._load_chunk(last_id, start, end)
+                    if last_id is None:
+                        break
+                    futures = [pool.submit(self._render_and_send, job, subject) for job in jobs]
+                    pending.append((last_id, skipped, jobs, futures))
+                    while len(pending) >= self.max_pending_chunks:
+                        self._finish_chunk(checkpoint, subject, *pending.popleft())
+            finally:
+                # Chunks already handed to the pool are sent either way; record them before failing
+                while pending:
+                    self._finish_chunk(checkpoint, subject, *pending.popleft())
+
+        checkpoint.save(completed=True)
+        elapsed = time.perf_counter() - started
+        logger.info(f"Statement run {state['run_id']} finished: {state['sent']} sent, {state['failed']} failed, "
+                    f"{state['skipped']} without accounts in {elapsed:.1f}s")
+        return state
+
+    # === DRIVER ===
+
+    def _load_chunk(self, after_id: int, start: datetime, end: datetime):
+        """One keyset page of users plus their accounts and period transactions"""
+        from modules.auth.models import User
+        from modules.banking.models import BankAccount, Transaction
+
+        try:
+            users = db.session.query(User.id, User.email, User.first_name, User.last_name).filter(
+                User.id > after_id,
+                User.is_active == True,
+                exists().where(and_(BankAccount.account_holder_id == User.id, BankAccount.status == 'active'))
+            ).order_by(User.id).limit(self.chunk_size).all()
+            if not users:
+                return [], 0, None
+
+            rows = db.session.query(
+                BankAccount.id, BankAccount.account_holder_id, BankAccount.account_number,
+                BankAccount.account_type, BankAccount.currency, BankAccount.current_balance,
+                Transaction.created_at, Transaction.description, Transaction.amount,
+                Transaction.transaction_type, Transaction.from_account_id
+            ).outerjoin(Transaction, and_(
+                Transaction.account_id == BankAccount.id,
+                Transaction.status == 'completed',
+                Transaction.created_at >= start,
+                Transaction.created_at < end
+            )).filter(
+                BankAccount.account_holder_id.in_([user.id for user in users]),
+                BankAccount.status == 'active'
+            ).order_by(BankAccount.account_holder_id, BankAccount.id, Transaction.created_at).all()
+
+            # Movements after the period, to walk the live balance back to the balance at ``end``
+            signed_amount = case((or_(
+                Transaction.transaction_type.in_(DEBIT_TYPES),
+                and_(Transaction.transaction_type == 'transfer', Transaction.from_account_id == Transaction.account_id)
+            ), -Transaction.amount), else_=Transaction.amount)
+            later_movements = dict(db.session.query(Transaction.account_id, func.sum(signed_amount)).join(
+                BankAccount, BankAccount.id == Transaction.account_id
+            ).filter(
+                BankAccount.account_holder_id.in_([user.id for user in users]),
+                BankAccount.status == 'active',
+                Transaction.status == 'completed',
+                Transaction.created_at >= end
+            ).group_by(Transaction.account_id).all())
+        finally:
+            # Hand the connection back to the pool while the chunk is being sent
+            db.session.close()
+
+        accounts = self._primary_accounts(rows, later_movements)
+        jobs = [
+            StatementJob(user.id, user.email, user.first_name, user.last_name, *accounts[user.id])
+            for user in users if user.email and user.id in accounts
+        ]
+        return jobs, len(users) - len(jobs), users[-1].id
+
+    @staticmethod
+    def _primary_accounts(rows, later_movements: Dict[int, Any]
+                          ) -> Dict[int, Tuple[SimpleNamespace, List[SimpleNamespace]]]:
+        """
+        Per holder: the checking account (else the oldest account) with signed
+        transactions, and its balances at the end and start of the period
+        """
+        by_account: Dict[int, Tuple[Any, List[SimpleNamespace]]] = {}
+        for row in rows:
+            if row.id not in by_account:
+                by_account[row.id] = (row, [])
+            if row.created_at is None:
+                continue
+            amount = Decimal(row.amount or 0)
+            outgoing = row.transaction_type in DEBIT_TYPES or (
+                row.transaction_type == 'transfer' and row.from_account_id == row.id)
+            by_account[row.id][1].append(SimpleNamespace(
+                created_at=row.created_at, description=row.description or '', amount=-amount if outgoing else amount
+            ))
+
+        primary: Dict[int, Tuple[SimpleNamespace, List[SimpleNamespace]]] = {}
+        for account, transactions in by_account.values():
+            current = primary.get(account.account_holder_id)
+            if current is not None and not (account.account_type == 'checking'
+                                            and current[0].account_type != 'checking'):
+                continue
+            closing = Decimal(account.current_balance or 0) - Decimal(later_movements.get(account.id) or 0)
+            primary[account.account_holder_id] = (SimpleNamespace(
+                account_number=account.account_number, account_type=account.account_type,
+                currency=account.currency or 'USD', balance=closing,
+                opening_balance=closing - sum((t.amount for t in transactions), Decimal('0'))
+            ), transactions)
+        return primary
+
+    def _finish_chunk(self, checkpoint: StatementCheckpoint, subject: str, last_id: int, skipped: int,
+                      jobs: List[StatementJob], futures):
+        """Wait for a chunk, write its audit rows in one commit and advance the checkpoint"""
+        from .models import CommunicationLog
+
+        outcomes = [future.result() for future in futures]
+        sent = sum(1 for ok in outcomes if ok)
+        try:
+            now = datetime.utcnow()
+            db.session.add_all([
+                CommunicationLog(recipient_email=job.email, recipient_user_id=job.user_id, subject=subject,
+                                 template_name='account_statement', status='sent' if ok else 'failed',
+                                 sent_at=now, context_data={'account_number': job.account.account_number})
+                for job, ok in zip(jobs, outcomes)
+            ])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error logging statement chunk ending at user {last_id}: {e}")
+        finally:
+            db.session.close()
+
+        state = checkpoint.state
+        checkpoint.save(last_user_id=last_id, sent=state['sent'] + sent,
+                        failed=state['failed'] + len(jobs) - sent, skipped=state['skipped'] + skipped)
+
+    # === WORKERS ===
+
+    def _render_and_send(self, job: StatementJob, subject: str) -> bool:
+        """Runs on the pool; touches no DB state"""
+        from .services import PersonalizedMessageService
+
+        try:
+            user = SimpleNamespace(first_name=job.first_name or 'Valued Customer', last_name=job.last_name or '')
+            context = PersonalizedMessageService.generate_monthly_statement_context(
+                user, job.account, job.transactions
+            )
+            context['statement_period'] = subject.split(' - ', 1)[1]
+            context['user_name'] = f"{user.first_name} {user.last_name}".strip()
+            html_content = self.email_service.render_email_template('account_statement', context)
+            return self.email_service.send_email(
+                to_email=job.email,
+                subject=subject,
+                html_content=html_content,
+                template_name_for_log='account_statement',
+                log_communication=False
+            )
+        except Exception as e:
+            logger.error(f"Error sending monthly statement to user {job.user_id}: {str(e)}")
+            return False
@@ -0,0 +1,188 @@
+"""
+Communications Template Engine
+Compiles email templates once into cached render functions and tracks per-template render timing
+"""
+
+import hashlib
+import logging
+import re
+import string
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# EmailService templates are str.format sources ({name}, CSS braces doubled);
+# SendGridEmailService templates use {{name}} tags and leave unknown tags in place
+FORMAT_SYNTAX = 'format'
+TAG_SYNTAX = 'tags'
+
+TAG_PATTERN = re.compile(r'\{\{(\w+)\}\}')
+_formatter = string.Formatter()
+
+
+def _format_field(context: Dict[str, Any], field_name: str, conversion: Optional[str], format_spec: str) -> str:
+    """Slow path for format fields with attribute/index access, conversions or specs"""
+    value, _ = _formatter.get_field(field_name, (), context)
+    if conversion:
+        value = _formatter.convert_field(value, conversion)
+    return format(value, format_spec)
+
+
+def _tag_value(context: Dict[str, Any], key: str) -> str:
+    return str(context[key]) if key in context else f'{{{{{key}}}}}'
+
+
+class CompiledTemplate:
+    """A template parsed once into literal chunks and slots, with a generated render function"""
+
+    def __init__(self, source: str, syntax: str = FORMAT_SYNTAX):
+        self.syntax = syntax
+        self.source_hash = template_hash(source, syntax)
+        self.fields: List[str] = []
+        self.render: Callable[[Dict[str, Any]], str] = self._compile(source)
+
+    def _compile(self, source: str) -> Callable[[Dict[str, Any]], str]:
+        namespace = {'_format_field': _format_field, '_tag_value': _tag_value}
+        parts = []
+
+        def literal(text: str):
+            if text:
+                name = f'_L{len(namespace)}'
+                namespace[name] = text
+                parts.append(name)
+
+        if self.syntax == FORMAT_SYNTAX:
+            for text, field_name, format_spec, conversion in _formatter.parse(source):
+                literal(text)
+                if field_name is None:
+                    continue
+                if not field_name.isidentifier():
+                    raise ValueError(f"Positional field '{{{field_name}}}' is not supported in email templates")
+                self.fields.append(field_name)
+                if format_spec or conversion:
+                    parts.append(f'_format_field(c, {field_name!r}, {conversion!r}, {format_spec!r})')
+                else:
+                    parts.append(f'format(c[{field_name!r}])')
+        elif self.syntax == TAG_SYNTAX:
+            position = 0
+            for match in TAG_PATTERN.finditer(source):
+                literal(source[position:match.start()])
+                self.fields.append(match.group(1))
+                parts.append(f'_tag_value(c, {match.group(1)!r})')
+                position = match.end()
+            literal(source[position:])
+        else:
+            raise ValueError(f"Unknown template syntax: {self.syntax}")
+
+        code = f"def render(c):\n    return ''.join(({', '.join(parts)}{',' if parts else ''}))\n"
+        exec(compile(code, f'<template {self.source_hash[:12]}>', 'exec'), namespace)
+        return namespace['render']
+
+
+def template_hash(source: str, syntax: str = FORMAT_SYNTAX) -> str:
+    return hashlib.sha1(f'{syntax}\0{source}'.encode('utf-8')).hexdigest()
+
+
+class TemplateEngine:
+    """
+    Process-wide cache of compiled templates.
+
+    Compiled templates are keyed by a hash of their source, so services that
+    are instantiated per request re-register the same sources for free.
+    Names map to the current source and carry render timing statistics.
+    """
+
+    def __init__(self):
+        self._compiled: Dict[str, CompiledTemplate] = {}
+        self._named: Dict[str, CompiledTemplate] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, source: str, syntax: str = FORMAT_SYNTAX) -> CompiledTemplate:
+        """Compile (or reuse) ``source`` and bind it to ``name``"""
+        current = self._named.get(name)
+        if current is not None and current.syntax == syntax and current.source_hash == template_hash(source, syntax):
+            return current
+
+        key = template_hash(source, syntax)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            started = time.perf_counter()
+            compiled = CompiledTemplate(source, syntax)
+            with self._lock:
+                self._compiled[key] = compiled
+                stats = self._stats.setdefault(name, self._empty_stats())
+                stats['compile_ms'] = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._named[name] = compiled
+            self._stats.setdefault(name, self._empty_stats())
+        return compiled
+
+    def register_all(self, prefix: str, sources: Dict[str, str], syntax: str = FORMAT_SYNTAX):
+        for name, source in sources.items():
+            self.register(f'{prefix}.{name}', source, syntax)
+
+    def has(self, name: str) -> bool:
+        return name in self._named
+
+    def render(self, name: str, context: Dict[str, Any]) -> str:
+        """Render one context against a registered template"""
+        compiled = self._named[name]
+        started = time.perf_counter()
+        try:
+            return compiled.render(context)
+        finally:
+            self._record(name, 1, time.perf_counter() - started)
+
+    def render_many(self, name: str, contexts: Iterable[Dict[str, Any]]) -> List[str]:
+        """Render many contexts against one template with a single timing update"""
+        render = self._named[name].render
+        started = time.perf_counter()
+        rendered = [render(context) for context in contexts]
+        self._record(name, len(rendered), time.perf_counter() - started, batch=True)
+        return rendered
+
+    def timing_report(self) -> Dict[str, Dict[str, Any]]:
+        """Per-template render counts and timings"""
+        with self._lock:
+            snapshot = {name: dict(stats) for name, stats in self._stats.items()}
+        report = {}
+        for name, stats in sorted(snapshot.items()):
+            renders = int(stats['renders'])
+            compiled = self._named.get(name)
+            report[name] = {
+                'renders': renders,
+                'batches': int(stats['batches']),
+                'total_ms': round(stats['total_seconds'] * 1000, 3),
+                'avg_us': round(stats['total_seconds'] / renders * 1e6, 2) if renders else 0.0,
+                'max_us': round(stats['max_seconds'] * 1e6, 2),
+                'compile_ms': round(stats['compile_ms'], 3),
+                'fields': len(compiled.fields) if compiled else 0,
+                'source_hash': compiled.source_hash[:12] if compiled else None
+            }
+        return report
+
+    def reset_stats(self):
+        with self._lock:
+            for stats in self._stats.values():
+                stats.update(renders=0, batches=0, total_seconds=0.0, max_seconds=0.0)
+
+    def _record(self, name: str, count: int, elapsed: float, batch: bool = False):
+        with self._lock:
+            stats = self._stats[name]
+            stats['renders'] += count
+            stats['batches'] += 1 if batch else 0
+            stats['total_seconds'] += elapsed
+            per_render = elapsed / count if count else 0.0
+            if per_render > stats['max_seconds']:
+                stats['max_seconds'] = per_render
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, float]:
+        return {'renders': 0, 'batches': 0, 'total_seconds': 0.0, 'max_seconds': 0.0, 'compile_ms': 0.0}
+
+
+# Shared engine for all communications services
+template_engine = TemplateEngine()
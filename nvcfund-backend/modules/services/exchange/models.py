@@ -136,6 +136,7 @@ class ExchangeTransaction(db.Model):
         Index('idx_exchange_tx_type', 'exchange_type'),
         Index('idx_exchange_tx_date', 'created_at'),
         Index('idx_exchange_user', 'user_id'),
+        Index('idx_exchange_tx_user_created_id', 'user_id', 'created_at', 'id'),  # Keyset history pages
         UniqueConstraint('transaction_uuid', name='uq_exchange_transaction_uuid'),
         CheckConstraint('from_amount > 0', name='chk_positive_from_amount'),
         CheckConstraint('to_amount >= 0', name='chk_non_negative_to_amount'),
@@ -438,4 +439,38 @@ class ExchangeAlert(db.Model):
         elif self.alert_type == 'below':
             return current_rate <= self.target_rate
         
-        return False
\ No newline at end of file
+        return False
+
+
+class ExchangeRollup(db.Model):
+    """
+    Pre-aggregated exchange activity per time bucket, currency pair and status
+    Maintained incrementally as exchange transactions are written (see rollups.py)
+    """
+    __tablename__ = 'exchange_rollups'
+    __table_args__ = (
+        UniqueConstraint('granularity', 'bucket_start', 'from_currency', 'to_currency', 'status',
+                         name='uq_exchange_rollup_bucket'),
+        Index('idx_exchange_rollup_window', 'granularity', 'bucket_start'),
+        {'extend_existing': True}
+    )
+    
+    id = Column(Integer, primary_key=True)
+    
+    # Bucket: 'minute', 'hour' or 'day', starting at bucket_start (UTC)
+    granularity = Column(String(10), nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    
+    # Dimensions
+    from_currency = Column(String(10), nullable=False)
+    to_currency = Column(String(10), nullable=False)
+    status = Column(String(20), nullable=False)
+    
+    # Aggregates
+    exchange_count = Column(Integer, nullable=False, default=0)
+    from_volume = Column(Numeric(38, 18), nullable=False, default=Decimal('0'))
+    to_volume = Column(Numeric(38, 18), nullable=False, default=Decimal('0'))
+    fee_total = Column(Numeric(38, 18), nullable=False, default=Decimal('0'))
+    
+    def __repr__(self):
+        return f'<ExchangeRollup {self.granularity} {self.bucket_start} {self.from_currency}/{self.to_currency} {self.status}>'
@@ -0,0 +1,285 @@
+"""
+FX Rate Matrix
+Process-local snapshot of internal exchange rates with lazily priced pivot cross rates
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from modules.core.extensions import db
+from .models import ExchangeProvider, ExchangeRate
+
+logger = logging.getLogger(__name__)
+
+# Cache namespace bumped on every committed ExchangeRate change
+RATE_NAMESPACE = 'fx_rates'
+
+# Currencies tried in order to bridge a pair with no direct or inverse rate
+DEFAULT_PIVOTS = ('USD', 'NVCT')
+
+
+class RateEdge(NamedTuple):
+    """One usable conversion: a stored rate row, or the inverse of one"""
+    from_currency: str
+    to_currency: str
+    rate: Decimal
+    provider: str
+    timestamp: Optional[datetime]
+    valid_until: Optional[datetime]
+    spread: float
+    inverted: bool = False
+
+
+class RateQuote(NamedTuple):
+    """Rate for a currency pair and the legs it was derived from"""
+    from_currency: str
+    to_currency: str
+    rate: Decimal
+    path: Tuple[str, ...]
+    legs: Tuple[RateEdge, ...]
+    valid_until: Optional[datetime]
+
+    @property
+    def is_direct(self) -> bool:
+        return len(self.legs) == 1 and not self.legs[0].inverted
+
+    @property
+    def provider(self) -> str:
+        return self.legs[0].provider
+
+
+class RateSnapshot:
+    """
+    Immutable view of the rate graph at one point in time.
+
+    Pairs are priced on first use by a fixed policy rather than by searching
+    for the best path: the direct row when there is one, otherwise the
+    inverse of the opposite row, otherwise two legs through the first
+    configured pivot currency that connects them (e.g. EUR -> USD -> NVCT).
+    A stored rate already has its spread taken against the customer, so an
+    inverted leg takes it off twice (once to undo the original, once for the
+    new direction); no round trip through the snapshot can end above 1.
+    """
+
+    def __init__(self, edges: List[RateEdge], pivots: Iterable[str] = DEFAULT_PIVOTS, built_at: float = None,
+                 generation: int = 0):
+        self.built_at = built_at if built_at is not None else time.time()
+        self.generation = generation
+        self.pivots = tuple(pivots)
+        self.direct: Dict[Tuple[str, str], RateEdge] = {}
+        for edge in edges:
+            self.direct.setdefault((edge.from_currency, edge.to_currency), edge)
+
+        self.graph: Dict[str, Dict[str, RateEdge]] = {}
+        for (from_currency, to_currency), edge in self.direct.items():
+            self.graph.setdefault(from_currency, {})[to_currency] = edge
+            self.graph.setdefault(to_currency, {})
+        for (from_currency, to_currency), edge in self.direct.items():
+            if (to_currency, from_currency) not in self.direct and edge.rate:
+                spread = 1 - Decimal(str(edge.spread)) / 100
+                self.graph[to_currency][from_currency] = edge._replace(
+                    from_currency=to_currency, to_currency=from_currency,
+                    rate=Decimal(1) / edge.rate * spread * spread, inverted=True
+                )
+
+        # Memoised per pair (None for pairs that cannot be priced)
+        self.quotes: Dict[Tuple[str, str], Optional[RateQuote]] = {}
+
+        valid_untils = [edge.valid_until for edge in self.direct.values() if edge.valid_until]
+        self.earliest_expiry = min(valid_untils) if valid_untils else None
+
+    @property
+    def currencies(self) -> List[str]:
+        return sorted(self.graph)
+
+    def _price(self, from_currency: str, to_currency: str) -> Optional[RateQuote]:
+        edges = self.graph.get(from_currency)
+        if not edges or from_currency == to_currency:
+            return None
+        legs = None
+        if to_currency in edges:
+            legs = (edges[to_currency],)
+        else:
+            for pivot in self.pivots:
+                if pivot in edges and to_currency in self.graph.get(pivot, {}):
+                    legs = (edges[pivot], self.graph[pivot][to_currency])
+                    break
+        if legs is None:
+            return None
+
+        rate = Decimal(1)
+        for leg in legs:
+            rate *= leg.rate
+        valid_untils = [leg.valid_until for leg in legs if leg.valid_until]
+        return RateQuote(
+            from_currency=from_currency,
+            to_currency=to_currency,
+            rate=rate,
+            path=(from_currency,) + tuple(leg.to_currency for leg in legs),
+            legs=legs,
+            valid_until=min(valid_untils) if valid_untils else None
+        )
+
+    def quote(self, from_currency: str, to_currency: str) -> Optional[RateQuote]:
+        key = (from_currency, to_currency)
+        try:
+            return self.quotes[key]
+        except KeyError:
+            quote = self.quotes[key] = self._price(from_currency, to_currency)
+            return quote
+
+
+class FxRateMatrix:
+    """
+    Shared, lazily refreshed RateSnapshot.
+
+    A snapshot is rebuilt from ExchangeRate when it is older than
+    FX_RATE_MATRIX_TTL seconds, when its earliest rate expires, or when the
+    ``fx_rates`` cache namespace moves on (bumped after any committed
+    ExchangeRate change and broadcast to every worker). Readers never
+    block on a rebuild that another thread is already running; they keep
+    the previous snapshot until the new one is swapped in.
+    """
+
+    def __init__(self, ttl: float = 5.0, pivots: Iterable[str] = DEFAULT_PIVOTS):
+        self.ttl = ttl
+        self.pivots = tuple(pivots)
+        self._snapshot: Optional[RateSnapshot] = None
+        self._refresh_lock = threading.Lock()
+        self.stats = {'refreshes': 0, 'refresh_errors': 0, 'last_load_ms': 0.0, 'last_build_ms': 0.0,
+                      'quotes': 0, 'misses': 0}
+
+    def init_app(self, app):
+        self.ttl = app.config.get('FX_RATE_MATRIX_TTL', self.ttl)
+        self.pivots = tuple(app.config.get('FX_PIVOT_CURRENCIES', self.pivots))
+
+    # === SNAPSHOTS ===
+
+    def snapshot(self) -> Optional[RateSnapshot]:
+        snapshot = self._snapshot
+        if snapshot is not None and not self._is_stale(snapshot):
+            return snapshot
+        if snapshot is not None and not self._refresh_lock.acquire(blocking=False):
+            return snapshot
+        if snapshot is None:
+            self._refresh_lock.acquire()
+        try:
+            if self._snapshot is not snapshot and self._snapshot is not None:
+                return self._snapshot
+            return self.refresh()
+        finally:
+            self._refresh_lock.release()
+
+    def refresh(self) -> Optional[RateSnapshot]:
+        """Rebuild the snapshot from the database now"""
+        generation = self._generation()
+        started = time.perf_counter()
+        try:
+            edges = self.load_edges()
+        except Exception as e:
+            self.stats['refresh_errors'] += 1
+            logger.error(f"FX rate matrix refresh failed: {e}")
+            return self._snapshot
+        loaded = time.perf_counter()
+        snapshot = RateSnapshot(edges, pivots=self.pivots, generation=generation)
+        self._snapshot = snapshot
+        self.stats['refreshes'] += 1
+        self.stats['last_load_ms'] = round((loaded - started) * 1000, 3)
+        self.stats['last_build_ms'] = round((time.perf_counter() - loaded) * 1000, 3)
+        return snapshot
+
+    @staticmethod
+    def load_edges() -> List[RateEdge]:
+        """Currently valid internal rates, newest first per pair"""
+        rows = db.session.query(
+            ExchangeRate.from_currency, ExchangeRate.to_currency, ExchangeRate.exchange_rate,
+            ExchangeRate.timestamp, ExchangeRate.valid_until, ExchangeRate.spread_percentage
+        ).filter(
+            ExchangeRate.provider == ExchangeProvider.INTERNAL_LIQUIDITY,
+            ExchangeRate.valid_until > datetime.utcnow()
+        ).order_by(ExchangeRate.timestamp.desc()).all()
+        provider = ExchangeProvider.INTERNAL_LIQUIDITY.value
+        return [RateEdge(row[0], row[1], row[2], provider, row[3], row[4], float(row[5]) if row[5] else 0.0)
+                for row in rows]
+
+    def invalidate(self):
+        """Drop this process's snapshot and tell the other workers to drop theirs"""
+        self._snapshot = None
+        try:
+            from modules.core.caching_strategy import cache
+            cache.bump_namespace(RATE_NAMESPACE)
+        except Exception as e:
+            logger.error(f"FX rate change broadcast failed: {e}")
+
+    def _is_stale(self, snapshot: RateSnapshot) -> bool:
+        if time.time() - snapshot.built_at > self.ttl:
+            return True
+        if snapshot.earliest_expiry is not None and snapshot.earliest_expiry <= datetime.utcnow():
+            return True
+        return snapshot.generation != self._generation()
+
+    @staticmethod
+    def _generation() -> int:
+        try:
+            from modules.core.caching_strategy import cache
+            return cache.generation(RATE_NAMESPACE)
+        except Exception:
+            return 0
+
+    # === QUOTING ===
+
+    def quote(self, from_currency: str, to_currency: str) -> Optional[RateQuote]:
+        """Direct, inverse or pivot cross rate for a pair, None if the snapshot cannot price it"""
+        snapshot = self.snapshot()
+        quote = snapshot.quote(from_currency, to_currency) if snapshot else None
+        self.stats['quotes'] += 1
+        if quote is None:
+            self.stats['misses'] += 1
+        return quote
+
+    def quote_many(self, pairs: Iterable[Tuple[str, str]]) -> List[Optional[RateQuote]]:
+        """Quotes for many pairs against a single snapshot"""
+        snapshot = self.snapshot()
+        quotes = [snapshot.quote(from_currency, to_currency) if snapshot else None
+                  for from_currency, to_currency in pairs]
+        self.stats['quotes'] += len(quotes)
+        self.stats['misses'] += sum(1 for quote in quotes if quote is None)
+        return quotes
+
+    def get_stats(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            **self.stats,
+            'currencies': len(snapshot.graph) if snapshot else 0,
+            'direct_pairs': len(snapshot.direct) if snapshot else 0,
+            'priced_pairs': sum(1 for quote in snapshot.quotes.values() if quote) if snapshot else 0,
+            'snapshot_age_seconds': round(time.time() - snapshot.built_at, 3) if snapshot else None
+        }
+
+
+# Global rate matrix instance
+fx_rate_matrix = FxRateMatrix()
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_rate_changes(session, flush_context):
+    if any(isinstance(obj, ExchangeRate) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['fx_rates_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_rate_changes(session):
+    if session.info.pop('fx_rates_changed', False):
+        fx_rate_matrix.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rate_changes(session):
+    session.info.pop('fx_rates_changed', None)
@@ -0,0 +1,331 @@
+"""
+Exchange Rollups
+Per-minute/hour/day exchange aggregates maintained incrementally and summed to answer window queries
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, event, func, or_, select
+from sqlalchemy.orm import Session
+
+from modules.core.extensions import db
+from modules.core.upsert import upsert_add
+from .models import ExchangeRollup, ExchangeStatus, ExchangeTransaction
+
+logger = logging.getLogger(__name__)
+
+# Coarsest first; the window planner tiles ranges with the coarsest buckets that fit
+GRANULARITIES = ('day', 'hour', 'minute')
+
+# How long each granularity is kept; older windows fall back to coarser buckets
+RETENTION = {
+    'minute': timedelta(hours=48),
+    'hour': timedelta(days=90),
+    'day': None
+}
+
+# Seconds between retention sweeps piggybacked on exchange flushes (per process)
+PRUNE_INTERVAL = 3600
+
+DIMENSIONS = ('from_currency', 'to_currency', 'status')
+AGGREGATES = ('exchange_count', 'from_volume', 'to_volume', 'fee_total')
+
+# Transaction attributes that decide which bucket a row counts towards and how much
+TRACKED_ATTRIBUTES = ('created_at', 'from_currency', 'to_currency', 'status', 'from_amount', 'to_amount',
+                      'exchange_fee')
+
+
+def bucket_floor(moment: datetime, granularity: str) -> datetime:
+    if granularity == 'minute':
+        return moment.replace(second=0, microsecond=0)
+    if granularity == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def bucket_ceil(moment: datetime, granularity: str) -> datetime:
+    floor = bucket_floor(moment, granularity)
+    if floor == moment:
+        return floor
+    step = {'minute': timedelta(minutes=1), 'hour': timedelta(hours=1), 'day': timedelta(days=1)}[granularity]
+    return floor + step
+
+
+def _retained(granularity: str, moment: datetime, now: datetime) -> bool:
+    retention = RETENTION[granularity]
+    return retention is None or moment >= now - retention
+
+
+def plan_window(start: Optional[datetime], end: datetime, now: datetime = None) -> List[Tuple[str, datetime, datetime]]:
+    """
+    Split [start, end) into (granularity, from, to) bucket ranges: whole
+    days in the middle, whole hours around them, minutes at the edges.
+    Edges older than a granularity's retention use the next coarser
+    bucket instead, so very old windows are accurate to the hour or day.
+    """
+    now = now or datetime.utcnow()
+    if start is None:
+        return [('day', datetime.min, end)]
+
+    def tile(range_start, range_end, levels):
+        if range_start >= range_end:
+            return []
+        level, finer = levels[0], levels[1:]
+        if not finer or not _retained(finer[0], range_start, now):
+            return [(level, bucket_floor(range_start, level), range_end)]
+        inner_start, inner_end = bucket_ceil(range_start, level), bucket_floor(range_end, level)
+        if inner_start >= inner_end:
+            return tile(range_start, range_end, finer)
+        return tile(range_start, inner_start, finer) + [(level, inner_start, inner_end)] + tile(inner_end, range_end, finer)
+
+    return tile(start, end, GRANULARITIES)
+
+
+class _Deltas:
+    """Aggregate changes keyed by (granularity, bucket_start, from, to, status)"""
+
+    def __init__(self):
+        self.rows: Dict[Tuple, List] = defaultdict(lambda: [0, Decimal('0'), Decimal('0'), Decimal('0')])
+
+    def add(self, contribution: Optional[Tuple], sign: int, granularities: Sequence[str] = GRANULARITIES):
+        if contribution is None:
+            return
+        created_at, from_currency, to_currency, status, from_amount, to_amount, fee = contribution
+        for granularity in granularities:
+            row = self.rows[(granularity, bucket_floor(created_at, granularity), from_currency, to_currency, status)]
+            row[0] += sign
+            row[1] += sign * from_amount
+            row[2] += sign * to_amount
+            row[3] += sign * fee
+
+    def values(self) -> List[Dict[str, Any]]:
+        """Non-zero rows in key order, so concurrent writers lock buckets in the same order"""
+        return [{
+            'granularity': key[0], 'bucket_start': key[1], 'from_currency': key[2], 'to_currency': key[3],
+            'status': key[4], 'exchange_count': row[0], 'from_volume': row[1], 'to_volume': row[2], 'fee_total': row[3]
+        } for key, row in sorted(self.rows.items()) if any(row)]
+
+
+def _status_value(status) -> str:
+    if status is None:
+        return ExchangeStatus.PENDING.value
+    return status.value if isinstance(status, ExchangeStatus) else str(status)
+
+
+def _contribution(values: Dict[str, Any]) -> Optional[Tuple]:
+    if values['created_at'] is None or not values['from_currency'] or not values['to_currency']:
+        return None
+    return (values['created_at'], values['from_currency'], values['to_currency'], _status_value(values['status']),
+            Decimal(values['from_amount'] or 0), Decimal(values['to_amount'] or 0), Decimal(values['exchange_fee'] or 0))
+
+
+def _current_values(obj) -> Dict[str, Any]:
+    return {name: getattr(obj, name) for name in TRACKED_ATTRIBUTES}
+
+
+class ExchangeRollups:
+    """
+    Maintains exchange_rollups from session events and answers window
+    queries from them.
+
+    Every flush that inserts, updates or deletes ExchangeTransaction rows
+    upserts the matching minute/hour/day buckets in the same database
+    transaction. A status change moves the row from the old status bucket
+    to the new one, so the aggregates always match the committed data.
+    The same flushes drop buckets past their retention, at most once per
+    PRUNE_INTERVAL.
+    """
+
+    def __init__(self):
+        self._prune_lock = threading.Lock()
+        self._next_prune = 0.0
+
+    # === INCREMENTAL MAINTENANCE ===
+
+    def stored_values(self, session) -> Dict[int, Dict[str, Any]]:
+        """
+        Database values of the ExchangeTransaction rows this flush will
+        change or delete. Attribute history cannot be used: objects expired
+        by a commit are updated without their old values being loaded.
+        """
+        ids = [obj.id for obj in (*session.dirty, *session.deleted)
+               if isinstance(obj, ExchangeTransaction) and obj.id is not None]
+        if not ids:
+            return {}
+        table = ExchangeTransaction.__table__
+        rows = session.connection().execute(
+            select(table.c.id, *(table.c[name] for name in TRACKED_ATTRIBUTES)).where(table.c.id.in_(ids))
+        ).all()
+        return {row[0]: dict(zip(TRACKED_ATTRIBUTES, row[1:])) for row in rows}
+
+    def collect(self, session, stored: Dict[int, Dict[str, Any]]) -> _Deltas:
+        deltas = _Deltas()
+        for obj in session.new:
+            if isinstance(obj, ExchangeTransaction):
+                deltas.add(_contribution(_current_values(obj)), +1)
+        for obj in session.dirty:
+            if isinstance(obj, ExchangeTransaction) and obj.id in stored:
+                before, after = stored[obj.id], _current_values(obj)
+                if before != after:
+                    deltas.add(_contribution(before), -1)
+                    deltas.add(_contribution(after), +1)
+        for obj in session.deleted:
+            if isinstance(obj, ExchangeTransaction) and obj.id in stored:
+                deltas.add(_contribution(stored[obj.id]), -1)
+        return deltas
+
+    def apply(self, connection, rows: List[Dict[str, Any]]):
+        """Add the deltas to their buckets"""
+        upsert_add(connection, ExchangeRollup.__table__, ('granularity', 'bucket_start', *DIMENSIONS), AGGREGATES, rows)
+
+    # === QUERIES ===
+
+    def totals(self, start: Optional[datetime], end: datetime = None,
+               group_by: Iterable[str] = ('status',)) -> Dict[str, Any]:
+        """
+        Count, volumes and fees for [start, end), overall and per group
+        (any of from_currency, to_currency, status). ``start=None`` means
+        all time.
+        """
+        end = end or datetime.utcnow()
+        group_by = tuple(group_by)
+        columns = [getattr(ExchangeRollup, name) for name in group_by]
+        conditions = [and_(ExchangeRollup.granularity == granularity,
+                           ExchangeRollup.bucket_start >= bucket_start,
+                           ExchangeRollup.bucket_start < bucket_end)
+                      for granularity, bucket_start, bucket_end in plan_window(start, end)]
+        rows = db.session.query(
+            *columns,
+            func.sum(ExchangeRollup.exchange_count),
+            func.sum(ExchangeRollup.from_volume),
+            func.sum(ExchangeRollup.to_volume),
+            func.sum(ExchangeRollup.fee_total)
+        ).filter(or_(*conditions)).group_by(*columns).all()
+
+        result = {'count': 0, 'from_volume': Decimal('0'), 'to_volume': Decimal('0'), 'fee_total': Decimal('0'),
+                  'groups': {}}
+        for row in rows:
+            key = row[:len(group_by)]
+            count, from_volume, to_volume, fees = (value or 0 for value in row[len(group_by):])
+            if not count and not from_volume and not fees:
+                continue
+            result['count'] += int(count)
+            result['from_volume'] += Decimal(from_volume)
+            result['to_volume'] += Decimal(to_volume)
+            result['fee_total'] += Decimal(fees)
+            result['groups'][key[0] if len(key) == 1 else key] = {
+                'count': int(count), 'from_volume': Decimal(from_volume),
+                'to_volume': Decimal(to_volume), 'fee_total': Decimal(fees)
+            }
+        return result
+
+    # === BACKFILL AND RETENTION ===
+
+    def backfill(self, since: Optional[datetime] = None, batch_size: int = 5000) -> Dict[str, int]:
+        """
+        Rebuild rollups from exchange_transactions, for all history or from
+        the start of the day containing ``since``. Runs in one transaction;
+        exchanges committed while it runs are picked up by their own events
+        only if they land after the scan, so run it when exchange traffic is low.
+        """
+        now = datetime.utcnow()
+        scan_start = bucket_floor(since, 'day') if since else None
+        table = ExchangeRollup.__table__
+
+        delete = table.delete()
+        if scan_start is not None:
+            delete = delete.where(table.c.bucket_start >= scan_start)
+        db.session.execute(delete)
+
+        deltas = _Deltas()
+        scanned = 0
+        last_id = 0
+        while True:
+            query = db.session.query(
+                ExchangeTransaction.id, *(getattr(ExchangeTransaction, name) for name in TRACKED_ATTRIBUTES)
+            ).filter(ExchangeTransaction.id > last_id)
+            if scan_start is not None:
+                query = query.filter(ExchangeTransaction.created_at >= scan_start)
+            batch = query.order_by(ExchangeTransaction.id).limit(batch_size).all()
+            if not batch:
+                break
+            for row in batch:
+                values = dict(zip(TRACKED_ATTRIBUTES, row[1:]))
+                contribution = _contribution(values)
+                if contribution is not None:
+                    deltas.add(contribution, +1, [granularity for granularity in GRANULARITIES
+                                                 if _retained(granularity, contribution[0], now)])
+            scanned += len(batch)
+            last_id = batch[-1][0]
+
+        rows = deltas.values()
+        for offset in range(0, len(rows), batch_size):
+            db.session.execute(table.insert(), rows[offset:offset + batch_size])
+        db.session.commit()
+        logger.info(f"Exchange rollups rebuilt from {scanned} transactions into {len(rows)} buckets")
+        return {'transactions': scanned, 'buckets': len(rows)}
+
+    def prune(self, now: datetime = None) -> int:
+        """Drop minute and hour buckets past their retention"""
+        removed = self._delete_expired(db.session.connection(), now or datetime.utcnow())
+        db.session.commit()
+        return removed
+
+    def prune_due(self, connection) -> int:
+        """
+        Prune inside the caller's transaction at most once per
+        PRUNE_INTERVAL; called from the flush that maintains the buckets,
+        so retention holds without a separate job.
+        """
+        with self._prune_lock:
+            if time.monotonic() < self._next_prune:
+                return 0
+            self._next_prune = time.monotonic() + PRUNE_INTERVAL
+        removed = self._delete_expired(connection, datetime.utcnow())
+        if removed:
+            logger.info(f"Pruned {removed} expired exchange rollup buckets")
+        return removed
+
+    def _delete_expired(self, connection, now: datetime) -> int:
+        table = ExchangeRollup.__table__
+        removed = 0
+        for granularity, retention in RETENTION.items():
+            if retention is None:
+                continue
+            removed += connection.execute(table.delete().where(
+                table.c.granularity == granularity,
+                table.c.bucket_start < bucket_floor(now - retention, granularity)
+            )).rowcount or 0
+        return removed
+
+
+# Global rollup instance
+exchange_rollups = ExchangeRollups()
+
+
+@event.listens_for(Session, 'before_flush')
+def _snapshot_exchange_rows(session, flush_context, instances):
+    stored = exchange_rollups.stored_values(session)
+    if stored:
+        session.info.setdefault('exchange_rollup_rows', {}).update(stored)
+
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_exchange_rollups(session, flush_context):
+    stored = session.info.pop('exchange_rollup_rows', {})
+    rows = exchange_rollups.collect(session, stored).values()
+    if rows:
+        # Same connection and transaction as the flush: rolled back together
+        exchange_rollups.apply(session.connection(), rows)
+        exchange_rollups.prune_due(session.connection())
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_exchange_rows(session):
+    session.info.pop('exchange_rollup_rows', None)
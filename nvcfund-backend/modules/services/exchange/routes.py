@@ -24,12 +24,16 @@ from modules.core.security_enforcement import secure_banking_route, treasury_sec
 from modules.core.rbac import has_permission, require_permission
 from modules.services.integrations.blockchain.services import BlockchainIntegrationService
 from .services import ExchangeService
+from .rate_matrix import fx_rate_matrix
 
 logger = logging.getLogger(__name__)
 
 # Create blueprint with unique name
 exchange_bp = Blueprint('exchange', __name__, url_prefix='/exchange')
 
+# Rate matrix TTL and cross-rate hop limit come from the app config
+exchange_bp.record_once(lambda state: fx_rate_matrix.init_app(state.app))
+
 @exchange_bp.route('/')
 @exchange_bp.route('/dashboard') 
 @login_required
@@ -171,6 +175,33 @@ def get_exchange_quote():
         logger.error(f"Error getting exchange quote: {e}")
         return jsonify({'error': 'Unable to get quote'}), 500
 
+@exchange_bp.route('/quote/batch', methods=['POST'])
+@secure_banking_route()
+@login_required
+def get_exchange_quotes_batch():
+    """Internal quotes for many currency pairs and amounts in one call"""
+    try:
+        data = request.get_json() or {}
+        items = data.get('quotes', [])
+        if not items or len(items) > 500:
+            return jsonify({'error': 'Provide between 1 and 500 quote requests'}), 400
+        
+        quote_requests = []
+        for item in items:
+            amount = Decimal(str(item.get('amount', 0)))
+            if amount <= 0:
+                return jsonify({'error': 'Amount must be greater than zero'}), 400
+            quote_requests.append((item.get('from_currency'), item.get('to_currency'), amount))
+        
+        quotes = ExchangeService().get_internal_quotes(quote_requests)
+        return jsonify({'quotes': quotes, 'unavailable': sum(1 for quote in quotes if quote is None)}), 200
+        
+    except (ValueError, ArithmeticError):
+        return jsonify({'error': 'Invalid amount format'}), 400
+    except Exception as e:
+        logger.error(f"Error getting batch exchange quotes: {e}")
+        return jsonify({'error': 'Unable to get quotes'}), 500
+
 @exchange_bp.route('/execute', methods=['POST'])
 @secure_banking_route()
 @login_required
@@ -216,6 +247,7 @@ def exchange_history():
         exchange_type = request.args.get('type')  # internal, external, all
         from_date = request.args.get('from_date')
         to_date = request.args.get('to_date')
+        cursor = request.args.get('cursor')  # Keyset paging; takes precedence over page
         
         # Get exchange history
         history = service.get_user_exchange_history(
@@ -224,7 +256,8 @@ def exchange_history():
             per_page=per_page,
             exchange_type=exchange_type,
             from_date=from_date,
-            to_date=to_date
+            to_date=to_date,
+            cursor=cursor
         )
         
         return render_template('exchange/history.html',
@@ -233,7 +266,12 @@ def exchange_history():
                                  'page': page,
                                  'per_page': per_page,
                                  'total': history['total'],
-                                 'pages': history['pages']
+                                 'pages': history['pages'],
+                                 'cursor': cursor,
+                                 'next_cursor': history.get('next_cursor'),
+                                 # Filters carried over by pagination links
+                                 'args': {key: value for key, value in request.args.items()
+                                          if key not in ('page', 'cursor')}
                              })
                              
     except Exception as e:
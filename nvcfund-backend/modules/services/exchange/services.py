@@ -10,16 +10,29 @@ Handles all exchange operations:
 - Transaction processing and compliance logging
 """
 
+import json
 from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Dict, List, Optional, Any, Tuple
 import logging
 
 from modules.core.extensions import db
+from modules.core.pagination import InvalidCursorError
+from modules.core.performance import QueryOptimizer
 from .models import ExchangeRate, ExchangeTransaction, ExchangeType, ExchangeStatus, ExchangeProvider, LiquidityPool, ExchangeAlert
+from .rate_matrix import fx_rate_matrix
+from .rollups import exchange_rollups
 
 logger = logging.getLogger(__name__)
 
+# (from_account_type, to_account_type) recorded on ExchangeTransaction per exchange type
+ACCOUNT_TYPES = {
+    ExchangeType.FIAT_TO_DIGITAL: ('bank_account', 'digital_account'),
+    ExchangeType.DIGITAL_TO_FIAT: ('digital_account', 'bank_account'),
+    ExchangeType.DIGITAL_TO_DIGITAL: ('digital_account', 'digital_account'),
+    ExchangeType.FIAT_TO_FIAT: ('bank_account', 'bank_account')
+}
+
 class ExchangeService:
     """
     Comprehensive exchange service handling internal and external exchange operations
@@ -36,25 +49,20 @@ class ExchangeService:
     def get_current_rates(self) -> List[Dict[str, Any]]:
         """Get current internal exchange rates"""
         try:
-            current_time = datetime.utcnow()
-            rates = ExchangeRate.query.filter(
-                ExchangeRate.provider == ExchangeProvider.INTERNAL_LIQUIDITY,
-                ExchangeRate.valid_until > current_time
-            ).order_by(ExchangeRate.timestamp.desc()).all()
-            
-            rate_data = []
-            for rate in rates:
-                rate_data.append({
-                    'from_currency': rate.from_currency,
-                    'to_currency': rate.to_currency,
-                    'exchange_rate': float(rate.exchange_rate),
-                    'provider': rate.provider.value,
-                    'timestamp': rate.timestamp.isoformat(),
-                    'valid_until': rate.valid_until.isoformat() if rate.valid_until else None,
-                    'spread': float(rate.spread) if rate.spread else 0.0
-                })
-            
-            return rate_data
+            snapshot = fx_rate_matrix.snapshot()
+            if snapshot is None:
+                return []
+            
+            rates = sorted(snapshot.direct.values(), key=lambda edge: edge.timestamp or datetime.min, reverse=True)
+            return [{
+                'from_currency': rate.from_currency,
+                'to_currency': rate.to_currency,
+                'exchange_rate': float(rate.rate),
+                'provider': rate.provider,
+                'timestamp': rate.timestamp.isoformat() if rate.timestamp else None,
+                'valid_until': rate.valid_until.isoformat() if rate.valid_until else None,
+                'spread': rate.spread
+            } for rate in rates]
             
         except Exception as e:
             logger.error(f"Error getting current rates: {e}")
@@ -99,47 +107,53 @@ class ExchangeService:
         return pairs
     
     def get_internal_quote(self, from_currency: str, to_currency: str, amount: Decimal) -> Optional[Dict[str, Any]]:
-        """Get quote for internal exchange"""
+        """Get quote for internal exchange, triangulating through pivot currencies if there is no direct rate"""
         try:
-            # Get current exchange rate
-            rate = ExchangeRate.query.filter_by(
-                from_currency=from_currency,
-                to_currency=to_currency,
-                provider=ExchangeProvider.INTERNAL_LIQUIDITY
-            ).filter(
-                ExchangeRate.valid_until > datetime.utcnow()
-            ).order_by(ExchangeRate.timestamp.desc()).first()
-            
-            if not rate:
-                return None
-            
-            # Calculate amounts
-            destination_amount = amount * rate.exchange_rate
+            return self.get_internal_quotes([(from_currency, to_currency, amount)])[0]
+        except Exception as e:
+            logger.error(f"Error getting internal quote: {e}")
+            return None
+    
+    def get_internal_quotes(self, requests: List[Tuple[str, str, Decimal]]) -> List[Optional[Dict[str, Any]]]:
+        """Quote many (from_currency, to_currency, amount) requests against one rate snapshot"""
+        rate_quotes = fx_rate_matrix.quote_many((from_currency, to_currency) for from_currency, to_currency, _ in requests)
+        now = datetime.utcnow()
+        expires_at = (now + timedelta(minutes=5)).isoformat()
+        
+        priced = {}
+        for index, ((from_currency, to_currency, amount), rate) in enumerate(zip(requests, rate_quotes)):
+            if rate is None or (rate.valid_until and rate.valid_until <= now):
+                continue
+            priced[index] = amount * rate.rate
+        
+        # One liquidity lookup per destination currency for the whole batch
+        liquidity = self._available_liquidity({requests[index][1] for index in priced})
+        
+        quotes = []
+        for index, ((from_currency, to_currency, amount), rate) in enumerate(zip(requests, rate_quotes)):
+            if index not in priced:
+                quotes.append(None)
+                continue
+            destination_amount = priced[index]
             exchange_fee = amount * self.exchange_fee_rate
-            
-            # Check liquidity
-            liquidity_sufficient = self._check_liquidity(to_currency, destination_amount)
-            
-            quote = {
-                'quote_id': f"internal_{datetime.utcnow().timestamp()}",
+            available = liquidity.get(to_currency)
+            quotes.append({
+                'quote_id': f"internal_{now.timestamp()}_{index}" if len(requests) > 1 else f"internal_{now.timestamp()}",
                 'exchange_type': 'internal',
                 'from_currency': from_currency,
                 'to_currency': to_currency,
                 'source_amount': float(amount),
                 'destination_amount': float(destination_amount),
-                'exchange_rate': float(rate.exchange_rate),
+                'exchange_rate': float(rate.rate),
+                'rate_path': list(rate.path),
+                'cross_rate': not rate.is_direct,
                 'exchange_fee': float(exchange_fee),
                 'total_cost': float(amount + exchange_fee),
-                'expires_at': (datetime.utcnow() + timedelta(minutes=5)).isoformat(),
-                'rate_provider': rate.provider.value,
-                'liquidity_sufficient': liquidity_sufficient
-            }
-            
-            return quote
-            
-        except Exception as e:
-            logger.error(f"Error getting internal quote: {e}")
-            return None
+                'expires_at': expires_at,
+                'rate_provider': rate.provider,
+                'liquidity_sufficient': available is not None and available >= destination_amount
+            })
+        return quotes
     
     def get_external_quote(self, from_currency: str, to_currency: str, amount: Decimal, binance_service) -> Optional[Dict[str, Any]]:
         """Get quote for external exchange via Binance"""
@@ -191,20 +205,14 @@ class ExchangeService:
             # Determine exchange type
             exchange_type = self._determine_exchange_type(from_currency, to_currency)
             
-            # Get fresh exchange rate
-            rate = ExchangeRate.query.filter_by(
-                from_currency=from_currency,
-                to_currency=to_currency,
-                provider=ExchangeProvider.INTERNAL_LIQUIDITY
-            ).filter(
-                ExchangeRate.valid_until > datetime.utcnow()
-            ).order_by(ExchangeRate.timestamp.desc()).first()
+            # Price along the same rate path the quote used (direct, inverse or pivot cross rate)
+            rate = fx_rate_matrix.quote(from_currency, to_currency)
             
-            if not rate:
+            if not rate or (rate.valid_until and rate.valid_until <= datetime.utcnow()):
                 return {'success': False, 'error': 'Exchange rate expired'}
             
             # Calculate amounts
-            destination_amount = amount * rate.exchange_rate
+            destination_amount = amount * rate.rate
             exchange_fee = amount * self.exchange_fee_rate
             
             # Verify accounts and balances
@@ -222,17 +230,21 @@ class ExchangeService:
             exchange_transaction = ExchangeTransaction(
                 user_id=user_id,
                 exchange_type=exchange_type,
-                source_fiat_account_id=source_account_id if exchange_type in [ExchangeType.FIAT_TO_DIGITAL] else None,
-                source_digital_account_id=source_account_id if exchange_type in [ExchangeType.DIGITAL_TO_FIAT, ExchangeType.DIGITAL_TO_DIGITAL] else None,
-                destination_fiat_account_id=destination_account_id if exchange_type in [ExchangeType.DIGITAL_TO_FIAT] else None,
-                destination_digital_account_id=destination_account_id if exchange_type in [ExchangeType.FIAT_TO_DIGITAL, ExchangeType.DIGITAL_TO_DIGITAL] else None,
+                from_account_id=source_account_id,
+                to_account_id=destination_account_id,
+                from_account_type=ACCOUNT_TYPES[exchange_type][0],
+                to_account_type=ACCOUNT_TYPES[exchange_type][1],
                 from_currency=from_currency,
                 to_currency=to_currency,
-                source_amount=amount,
-                destination_amount=destination_amount,
-                quoted_rate=rate.exchange_rate,
-                executed_rate=rate.exchange_rate,
-                rate_provider=rate.provider,
+                from_amount=amount,
+                to_amount=destination_amount,
+                exchange_rate=rate.rate,
+                quoted_rate=rate.rate,
+                executed_rate=rate.rate,
+                rate_provider=ExchangeProvider(rate.provider),
+                quote_expires_at=rate.valid_until,
+                fee_amount=exchange_fee,
+                fee_currency=from_currency,
                 exchange_fee=exchange_fee,
                 status=ExchangeStatus.PROCESSING,
                 quote_requested_at=datetime.utcnow(),
@@ -294,14 +306,20 @@ class ExchangeService:
                 exchange_type=ExchangeType.EXTERNAL_EXCHANGE,
                 from_currency=from_currency,
                 to_currency=to_currency,
-                source_amount=amount,
-                destination_amount=Decimal(str(order_result.get('executedQty', 0))),
+                from_account_type='external',
+                to_account_type='external',
+                from_amount=amount,
+                to_amount=Decimal(str(order_result.get('executedQty', 0))),
+                exchange_rate=Decimal(str(order_result.get('price', 0))),
                 quoted_rate=Decimal(str(order_result.get('price', 0))),
                 executed_rate=Decimal(str(order_result.get('price', 0))),
                 rate_provider=ExchangeProvider.BINANCE,
+                fee_amount=Decimal(str(order_result.get('commission', 0))),
+                fee_currency=order_result.get('commissionAsset'),
                 exchange_fee=Decimal(str(order_result.get('commission', 0))),
                 status=ExchangeStatus.COMPLETED,
-                external_order_id=order_result.get('orderId'),
+                external_transaction_id=str(order_result.get('orderId')),
+                external_order_data=json.dumps(order_result, default=str),
                 quote_requested_at=datetime.utcnow(),
                 quote_accepted_at=datetime.utcnow(),
                 processing_started_at=datetime.utcnow(),
@@ -315,7 +333,7 @@ class ExchangeService:
                 'success': True,
                 'exchange_id': exchange_transaction.transaction_uuid,
                 'source_amount': float(amount),
-                'destination_amount': float(exchange_transaction.destination_amount),
+                'destination_amount': float(exchange_transaction.to_amount),
                 'exchange_fee': float(exchange_transaction.exchange_fee),
                 'status': 'COMPLETED',
                 'exchange_type': 'external',
@@ -375,8 +393,9 @@ class ExchangeService:
     
     # Transaction History and Analytics
     def get_user_exchange_history(self, user_id: int, limit: int = 20, page: int = 1, per_page: int = 20, 
-                                 exchange_type: str = None, from_date: str = None, to_date: str = None) -> Dict[str, Any]:
-        """Get user's exchange transaction history"""
+                                 exchange_type: str = None, from_date: str = None, to_date: str = None,
+                                 cursor: str = None) -> Dict[str, Any]:
+        """Get user's exchange transaction history (pass ``cursor`` for keyset pages over (created_at, id))"""
         try:
             query = ExchangeTransaction.query.filter_by(user_id=user_id)
             
@@ -397,8 +416,19 @@ class ExchangeService:
             if to_date:
                 query = query.filter(ExchangeTransaction.created_at <= datetime.fromisoformat(to_date))
             
+            next_cursor = None
+            
             # Apply pagination if requested
-            if page and per_page:
+            if cursor is not None:
+                result = QueryOptimizer.paginate_by_cursor(
+                    query, ExchangeTransaction.created_at, ExchangeTransaction.id,
+                    cursor=cursor or None, per_page=per_page
+                )
+                transactions = result.items
+                next_cursor = result.next_cursor
+                total = None  # Counting would scan the full history this pagination avoids
+                pages = None
+            elif page and per_page:
                 paginated = query.order_by(ExchangeTransaction.created_at.desc()).paginate(
                     page=page, per_page=per_page, error_out=False
                 )
@@ -431,60 +461,42 @@ class ExchangeService:
                 'transactions': history_data,
                 'total': total,
                 'pages': pages,
-                'current_page': page if page else 1
+                'current_page': page if page else 1,
+                'next_cursor': next_cursor
             }
             
+        except InvalidCursorError:
+            return {'transactions': [], 'total': 0, 'pages': 0, 'current_page': 1, 'error': 'Invalid cursor'}
         except Exception as e:
             logger.error(f"Error getting exchange history: {e}")
             return {'transactions': [], 'total': 0, 'pages': 0, 'current_page': 1}
     
     def get_exchange_statistics(self) -> Dict[str, Any]:
-        """Get comprehensive exchange statistics for admin dashboard"""
+        """Get comprehensive exchange statistics for admin dashboard (summed from rollup buckets)"""
         try:
             current_time = datetime.utcnow()
             last_24h = current_time - timedelta(hours=24)
             last_30d = current_time - timedelta(days=30)
             
-            # Basic statistics
-            total_exchanges = ExchangeTransaction.query.count()
-            exchanges_24h = ExchangeTransaction.query.filter(ExchangeTransaction.created_at >= last_24h).count()
-            exchanges_30d = ExchangeTransaction.query.filter(ExchangeTransaction.created_at >= last_30d).count()
-            
-            # Volume statistics
-            volume_24h = db.session.query(
-                db.func.sum(ExchangeTransaction.source_amount)
-            ).filter(ExchangeTransaction.created_at >= last_24h).scalar() or 0
-            
-            volume_30d = db.session.query(
-                db.func.sum(ExchangeTransaction.source_amount)
-            ).filter(ExchangeTransaction.created_at >= last_30d).scalar() or 0
-            
-            # Fee revenue
-            fees_24h = db.session.query(
-                db.func.sum(ExchangeTransaction.exchange_fee)
-            ).filter(ExchangeTransaction.created_at >= last_24h).scalar() or 0
-            
-            fees_30d = db.session.query(
-                db.func.sum(ExchangeTransaction.exchange_fee)
-            ).filter(ExchangeTransaction.created_at >= last_30d).scalar() or 0
+            all_time = exchange_rollups.totals(None, current_time, group_by=())
+            window_24h = exchange_rollups.totals(last_24h, current_time)
+            window_30d = exchange_rollups.totals(last_30d, current_time, group_by=())
             
             # Success rate
-            completed_24h = ExchangeTransaction.query.filter(
-                ExchangeTransaction.created_at >= last_24h,
-                ExchangeTransaction.status == ExchangeStatus.COMPLETED
-            ).count()
-            
+            exchanges_24h = window_24h['count']
+            completed_24h = window_24h['groups'].get(ExchangeStatus.COMPLETED.value, {}).get('count', 0)
             success_rate_24h = (completed_24h / exchanges_24h * 100) if exchanges_24h > 0 else 100
             
             return {
-                'total_exchanges': total_exchanges,
+                'total_exchanges': all_time['count'],
                 'exchanges_24h': exchanges_24h,
-                'exchanges_30d': exchanges_30d,
-                'volume_24h': float(volume_24h),
-                'volume_30d': float(volume_30d),
-                'fees_24h': float(fees_24h),
-                'fees_30d': float(fees_30d),
+                'exchanges_30d': window_30d['count'],
+                'volume_24h': float(window_24h['from_volume']),
+                'volume_30d': float(window_30d['from_volume']),
+                'fees_24h': float(window_24h['fee_total']),
+                'fees_30d': float(window_30d['fee_total']),
                 'success_rate_24h': round(success_rate_24h, 2),
+                'status_breakdown_24h': {status: group['count'] for status, group in window_24h['groups'].items()},
                 'active_liquidity_pools': LiquidityPool.query.filter_by(is_active=True).count(),
                 'last_updated': current_time.isoformat()
             }
@@ -533,6 +545,23 @@ class ExchangeService:
             logger.error(f"Error checking liquidity: {e}")
             return False
     
+    def _available_liquidity(self, currencies) -> Dict[str, Decimal]:
+        """Usable liquidity per currency from active pools, in one query"""
+        if not currencies:
+            return {}
+        try:
+            pools = LiquidityPool.query.filter(
+                LiquidityPool.currency.in_(list(currencies)),
+                LiquidityPool.is_active == True
+            ).all()
+            available = {}
+            for pool in pools:
+                available.setdefault(pool.currency, (pool.available_reserves or 0) - (pool.minimum_reserves or 0))
+            return available
+        except Exception as e:
+            logger.error(f"Error checking liquidity: {e}")
+            return {}
+    
     def _determine_exchange_type(self, from_currency: str, to_currency: str) -> ExchangeType:
         """Determine exchange type based on currencies"""
         if from_currency in self.supported_fiat_currencies and to_currency in self.supported_digital_currencies:
@@ -725,6 +754,8 @@ class ExchangeService:
         try:
             from flask_login import current_user
             
+            # A cross rate is as old as its oldest leg
+            rate_timestamp = min((leg.timestamp for leg in rate.legs if leg.timestamp), default=None)
             ExchangeComplianceLogger.log_exchange_transaction(
                 user=current_user,
                 exchange_data={
@@ -732,15 +763,16 @@ class ExchangeService:
                     'exchange_type': exchange_transaction.exchange_type.value,
                     'from_currency': exchange_transaction.from_currency,
                     'to_currency': exchange_transaction.to_currency,
-                    'source_amount': exchange_transaction.source_amount,
-                    'destination_amount': exchange_transaction.destination_amount,
+                    'source_amount': exchange_transaction.from_amount,
+                    'destination_amount': exchange_transaction.to_amount,
                     'exchange_rate': exchange_transaction.executed_rate,
                     'exchange_fee': exchange_transaction.exchange_fee,
-                    'rate_provider': rate.provider.value
+                    'rate_provider': rate.provider
                 },
                 quote_data={
-                    'quoted_rate': rate.exchange_rate,
-                    'rate_timestamp': rate.timestamp.isoformat(),
+                    'quoted_rate': rate.rate,
+                    'rate_path': list(rate.path),
+                    'rate_timestamp': rate_timestamp.isoformat() if rate_timestamp else None,
                     'rate_valid_until': rate.valid_until.isoformat() if rate.valid_until else None
                 }
             )
@@ -776,27 +808,19 @@ class ExchangeService:
     def get_liquidity_analytics(self) -> Dict[str, Any]:
         """Get liquidity analytics (admin only)"""
         try:
-            # Total liquidity across all pools
-            total_liquidity = db.session.query(
-                db.func.sum(LiquidityPool.current_liquidity)
-            ).filter_by(is_active=True).scalar() or 0
-            
-            # Average utilization rate
-            avg_utilization = db.session.query(
-                db.func.avg(LiquidityPool.utilization_rate)
-            ).filter_by(is_active=True).scalar() or 0
-            
-            # Pools below minimum threshold
-            low_liquidity_pools = LiquidityPool.query.filter(
-                LiquidityPool.is_active == True,
-                LiquidityPool.current_liquidity < LiquidityPool.minimum_liquidity
-            ).count()
+            # One pass over the active pools
+            total_liquidity, avg_utilization, low_liquidity_pools, active_pools = db.session.query(
+                db.func.sum(LiquidityPool.available_reserves),
+                db.func.avg(LiquidityPool.utilization_rate),
+                db.func.count(db.case((LiquidityPool.available_reserves < LiquidityPool.minimum_reserves, 1))),
+                db.func.count(LiquidityPool.id)
+            ).filter(LiquidityPool.is_active == True).one()
             
             return {
-                'total_liquidity': float(total_liquidity),
-                'average_utilization_rate': float(avg_utilization),
+                'total_liquidity': float(total_liquidity or 0),
+                'average_utilization_rate': float(avg_utilization or 0),
                 'low_liquidity_pools': low_liquidity_pools,
-                'active_pools': LiquidityPool.query.filter_by(is_active=True).count(),
+                'active_pools': active_pools,
                 'last_updated': datetime.utcnow().isoformat()
             }
             
@@ -879,7 +903,7 @@ class ExchangeService:
                     'from_currency': rate.from_currency,
                     'to_currency': rate.to_currency,
                     'exchange_rate': float(rate.exchange_rate),
-                    'spread': float(rate.spread) if rate.spread else 0.0,
+                    'spread': float(rate.spread_percentage) if rate.spread_percentage else 0.0,
                     'provider': rate.provider.value,
                     'timestamp': rate.timestamp.isoformat(),
                     'valid_until': rate.valid_until.isoformat() if rate.valid_until else None
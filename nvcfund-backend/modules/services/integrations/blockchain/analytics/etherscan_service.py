@@ -5,11 +5,13 @@ Provides comprehensive token analytics and ERC-20 token management
 
 import os
 import requests
-import time
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from modules.core.constants import APIHealthStatus
+from modules.core.integration_http import integration_http
+from .response_cache import explorer_cache
+from .transfer_index import transfer_index, transfer_page
 
 
 @dataclass
@@ -49,24 +51,18 @@ class EtherscanService:
     
     def __init__(self):
         self.api_key = os.getenv('ETHERSCAN_API_KEY')
-        self.base_url = "https://api.etherscan.io/api"
-        self.rate_limit_delay = 0.2  # 5 requests per second for free tier
-        self.last_request_time = 0
         
     def _make_request(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Make rate-limited request to Etherscan API"""
-        # Rate limiting
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        if time_since_last_request < self.rate_limit_delay:
-            time.sleep(self.rate_limit_delay - time_since_last_request)
-        
+        """Etherscan API answer, served from the response cache when fresh"""
+        return explorer_cache.fetch('etherscan', params, self._request_upstream)
+    
+    def _request_upstream(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Make rate-limited request to Etherscan API over the shared connection pool"""
         params['apikey'] = self.api_key
         
         try:
-            response = requests.get(self.base_url, params=params, timeout=30)
+            response = integration_http.client('etherscan').get('/api', params=params, timeout=30)
             response.raise_for_status()
-            self.last_request_time = time.time()
             return response.json()
         except requests.exceptions.RequestException as e:
             return {
@@ -78,7 +74,7 @@ class EtherscanService:
     def get_token_info(self, contract_address: str) -> Optional[TokenInfo]:
         """Get comprehensive token information"""
         params = {
-            'app_module': 'token',
+            'module': 'token',
             'action': 'tokeninfo',
             'contractaddress': contract_address
         }
@@ -98,7 +94,7 @@ class EtherscanService:
     def get_token_supply(self, contract_address: str) -> Optional[str]:
         """Get token total supply"""
         params = {
-            'app_module': 'stats',
+            'module': 'stats',
             'action': 'tokensupply',
             'contractaddress': contract_address
         }
@@ -111,7 +107,7 @@ class EtherscanService:
     def get_token_balance(self, contract_address: str, address: str) -> Optional[str]:
         """Get token balance for specific address"""
         params = {
-            'app_module': 'account',
+            'module': 'account',
             'action': 'tokenbalance',
             'contractaddress': contract_address,
             'address': address,
@@ -126,7 +122,7 @@ class EtherscanService:
     def get_token_holders(self, contract_address: str, page: int = 1, offset: int = 100) -> List[TokenHolder]:
         """Get token holders list (requires Pro API)"""
         params = {
-            'app_module': 'token',
+            'module': 'token',
             'action': 'tokenholderlist',
             'contractaddress': contract_address,
             'page': page,
@@ -152,7 +148,7 @@ class EtherscanService:
                           page: int = 1, offset: int = 100) -> List[Dict[str, Any]]:
         """Get token transfer events"""
         params = {
-            'app_module': 'account',
+            'module': 'account',
             'action': 'tokentx',
             'contractaddress': contract_address,
             'startblock': start_block,
@@ -173,7 +169,7 @@ class EtherscanService:
     def get_address_token_balances(self, address: str) -> List[TokenBalance]:
         """Get all token balances for an address"""
         params = {
-            'app_module': 'account',
+            'module': 'account',
             'action': 'addresstokenbalance',
             'address': address,
             'page': 1,
@@ -196,12 +192,14 @@ class EtherscanService:
         return balances
     
     def get_historical_token_data(self, contract_address: str, days: int = 30) -> List[Dict[str, Any]]:
-        """Get historical token transfer data for analysis"""
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
+        """Get historical token transfer data for analysis, from the local transfer index once it has caught up"""
+        cursor = transfer_index.lookup('etherscan', contract_address)
+        if cursor is not None and transfer_index.is_caught_up(cursor):
+            return transfer_index.get_transfers('etherscan', contract_address,
+                                                since=datetime.utcnow() - timedelta(days=days), limit=1000)
         
-        # Get recent blocks (approximate)
-        current_block = self._get_latest_block_number()
+        # Not indexed (yet): one cached explorer page over the approximate block range
+        current_block = self.get_latest_block_number()
         if not current_block:
             return []
         
@@ -209,38 +207,56 @@ class EtherscanService:
         blocks_per_day = 86400 // 13.5
         start_block = int(current_block - (days * blocks_per_day))
         
-        transfers = self.get_token_transfers(
+        return self.get_token_transfers(
             contract_address=contract_address,
             start_block=start_block,
             end_block=current_block,
             offset=1000
         )
-        
-        return transfers
     
-    def _get_latest_block_number(self) -> Optional[int]:
-        """Get the latest block number"""
+    def get_transfer_page(self, contract_address: str, start_block: int, end_block: int,
+                          page: int = 1, offset: int = 1000) -> Optional[List[Dict[str, Any]]]:
+        """One page of a contract's transfers in block order; None when the request failed"""
         params = {
-            'app_module': 'proxy',
-            'action': 'eth_blockNumber'
+            'module': 'account',
+            'action': 'tokentx',
+            'contractaddress': contract_address,
+            'startblock': start_block,
+            'endblock': end_block,
+            'page': page,
+            'offset': offset,
+            'sort': 'asc'
         }
         
-        response = self._make_request(params)
-        if response.get('status') == '1':
-            return int(response.get('result', '0x0'), 16)
-        return None
+        # Index pages are read once, so they skip the response cache
+        return transfer_page(self._request_upstream(params))
+    
+    def get_latest_block_number(self) -> Optional[int]:
+        """Get the latest block number (cached for one block time)"""
+        return explorer_cache.block_height('etherscan', self._request_upstream)
     
     def get_token_analytics(self, contract_address: str) -> Dict[str, Any]:
-        """Get comprehensive token analytics"""
-        token_info = self.get_token_info(contract_address)
+        """
+        Get comprehensive token analytics: from the local transfer index for
+        tracked tokens that have caught up, otherwise from cached explorer calls
+        """
+        analytics = transfer_index.get_token_analytics('etherscan', contract_address)
+        if analytics.get('indexed') is False or analytics.get('indexing'):
+            return self._explorer_token_analytics(contract_address, index=analytics.get('index'))
+        return analytics
+    
+    def _explorer_token_analytics(self, contract_address: str, index: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Analytics from the latest explorer pages (cached per action TTL); ``index`` is the sync progress, if tracked"""
+        # Token info, recent transfers and holders are independent lookups
+        token_info, recent_transfers, holders = integration_http.fan_out(lambda call: call(), [
+            lambda: self.get_token_info(contract_address),
+            lambda: self.get_token_transfers(contract_address=contract_address, offset=100),
+            lambda: self.get_token_holders(contract_address, offset=50)
+        ])
         if not token_info:
             return {'error': 'Token not found'}
-        
-        # Get recent transfers for activity analysis
-        recent_transfers = self.get_token_transfers(
-            contract_address=contract_address,
-            offset=100
-        )
+        recent_transfers = recent_transfers or []
+        holders = holders or []
         
         # Calculate basic metrics
         total_transfers = len(recent_transfers)
@@ -249,9 +265,6 @@ class EtherscanService:
             [tx['to'] for tx in recent_transfers]
         ))
         
-        # Get holders (if available)
-        holders = self.get_token_holders(contract_address, offset=50)
-        
         return {
             'token_info': {
                 'name': token_info.name,
@@ -267,27 +280,36 @@ class EtherscanService:
             },
             'recent_transfers': recent_transfers[:10],  # Last 10 transfers
             'top_holders': holders[:10] if holders else [],
+            'source': 'explorer',
+            'index': index,
             'timestamp': datetime.now().isoformat()
         }
     
     def get_multi_token_balances(self, address: str, contract_addresses: List[str]) -> List[TokenBalance]:
-        """Get balances for multiple tokens for a single address"""
-        balances = []
-        
-        for contract_address in contract_addresses:
+        """Get balances for multiple tokens for a single address, looked up concurrently"""
+        def token_balance(contract_address: str) -> Optional[TokenBalance]:
             balance = self.get_token_balance(contract_address, address)
-            if balance:
-                token_info = self.get_token_info(contract_address)
-                if token_info:
-                    balances.append(TokenBalance(
-                        contract_address=contract_address,
-                        token_name=token_info.name,
-                        token_symbol=token_info.symbol,
-                        balance=balance,
-                        decimals=token_info.decimals
-                    ))
+            if not balance:
+                return None
+            token_info = self.get_token_info(contract_address)
+            if not token_info:
+                return None
+            return TokenBalance(
+                contract_address=contract_address,
+                token_name=token_info.name,
+                token_symbol=token_info.symbol,
+                balance=balance,
+                decimals=token_info.decimals
+            )
         
-        return balances
+        return [balance for balance in integration_http.fan_out(token_balance, contract_addresses) if balance]
+    
+    def get_holder_balances(self, contract_address: str, addresses: List[str]) -> Dict[str, Optional[str]]:
+        """Get one token's balance for many addresses, looked up concurrently"""
+        balances = integration_http.fan_out(
+            lambda address: self.get_token_balance(contract_address, address), addresses
+        )
+        return dict(zip(addresses, balances))
     
     def health_check(self) -> Dict[str, Any]:
         """Check if Etherscan API is accessible"""
@@ -299,7 +321,7 @@ class EtherscanService:
         
         # Simple API test
         params = {
-            'app_module': 'stats',
+            'module': 'stats',
             'action': 'ethsupply'
         }
         
@@ -0,0 +1,121 @@
+"""
+Blockchain Analytics Models
+Local ERC-20 transfer index: per-contract sync cursors, transfers, holder balances and daily volume
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Date, Text, Numeric, UniqueConstraint, Index
+
+from modules.core.extensions import db
+
+# uint256 token amounts in base units
+TokenAmount = Numeric(78, 0)
+
+
+class TokenIndexCursor(db.Model):
+    """
+    One indexed contract on one explorer: how far its transfers are ingested
+    plus the running totals the analytics read without scanning transfers
+    """
+    __tablename__ = 'token_index_cursors'
+    __table_args__ = (
+        UniqueConstraint('provider', 'contract_address', name='uq_token_index_cursor'),
+        {'extend_existing': True}
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    # 'etherscan' or 'polygonscan'; addresses are stored lowercased
+    provider = Column(String(20), nullable=False)
+    contract_address = Column(String(42), nullable=False)
+
+    # Token metadata, taken from the first transfer page
+    token_name = Column(String(100))
+    token_symbol = Column(String(20))
+    token_decimals = Column(Integer)
+
+    # Blocks [start_block, last_block] are fully ingested; last_block is NULL until the first page lands
+    start_block = Column(BigInteger, nullable=False, default=0)
+    last_block = Column(BigInteger)
+    head_block = Column(BigInteger)
+
+    # Running totals
+    transfer_count = Column(BigInteger, nullable=False, default=0)
+    holder_count = Column(Integer, nullable=False, default=0)
+    indexed_supply = Column(TokenAmount, nullable=False, default=Decimal('0'))
+
+    # Sync bookkeeping; lease_until keeps two workers from syncing the same contract
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_synced_at = Column(DateTime)
+    lease_until = Column(DateTime)
+    last_error = Column(Text)
+
+    def __repr__(self):
+        return f'<TokenIndexCursor {self.provider} {self.contract_address} @{self.last_block}>'
+
+
+class IndexedTokenTransfer(db.Model):
+    """A single ERC-20 Transfer event as reported by the explorer's tokentx action"""
+    __tablename__ = 'token_transfers'
+    __table_args__ = (
+        UniqueConstraint('provider', 'contract_address', 'block_number', 'log_position',
+                         name='uq_token_transfer_position'),
+        Index('idx_token_transfer_time', 'provider', 'contract_address', 'block_timestamp'),
+        {'extend_existing': True}
+    )
+
+    id = Column(Integer, primary_key=True)
+    provider = Column(String(20), nullable=False)
+    contract_address = Column(String(42), nullable=False)
+
+    # Position of the transfer among this contract's transfers in the block
+    block_number = Column(BigInteger, nullable=False)
+    log_position = Column(Integer, nullable=False)
+    block_timestamp = Column(DateTime, nullable=False)
+    tx_hash = Column(String(66), nullable=False)
+
+    from_address = Column(String(42), nullable=False)
+    to_address = Column(String(42), nullable=False)
+    value = Column(TokenAmount, nullable=False)
+
+    def __repr__(self):
+        return f'<IndexedTokenTransfer {self.contract_address} {self.block_number}:{self.log_position}>'
+
+
+class TokenHolderBalance(db.Model):
+    """Balance per holder derived from the indexed transfers"""
+    __tablename__ = 'token_holder_balances'
+    __table_args__ = (
+        UniqueConstraint('provider', 'contract_address', 'address', name='uq_token_holder_balance'),
+        Index('idx_token_holder_rank', 'provider', 'contract_address', 'balance'),
+        {'extend_existing': True}
+    )
+
+    id = Column(Integer, primary_key=True)
+    provider = Column(String(20), nullable=False)
+    contract_address = Column(String(42), nullable=False)
+    address = Column(String(42), nullable=False)
+    balance = Column(TokenAmount, nullable=False, default=Decimal('0'))
+
+    def __repr__(self):
+        return f'<TokenHolderBalance {self.contract_address} {self.address}>'
+
+
+class TokenTransferDaily(db.Model):
+    """Transfer count and volume per contract and UTC day"""
+    __tablename__ = 'token_transfer_daily'
+    __table_args__ = (
+        UniqueConstraint('provider', 'contract_address', 'day', name='uq_token_transfer_day'),
+        {'extend_existing': True}
+    )
+
+    id = Column(Integer, primary_key=True)
+    provider = Column(String(20), nullable=False)
+    contract_address = Column(String(42), nullable=False)
+    day = Column(Date, nullable=False)
+    transfer_count = Column(Integer, nullable=False, default=0)
+    volume = Column(TokenAmount, nullable=False, default=Decimal('0'))
+
+    def __repr__(self):
+        return f'<TokenTransferDaily {self.contract_address} {self.day}>'
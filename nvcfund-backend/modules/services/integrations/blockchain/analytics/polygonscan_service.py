@@ -5,11 +5,13 @@ Provides comprehensive token analytics and ERC-20 token management for Polygon n
 
 import os
 import requests
-import time
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from modules.core.constants import APIHealthStatus
+from modules.core.integration_http import integration_http
+from .response_cache import explorer_cache
+from .transfer_index import EMPTY_RESULT_MESSAGES, transfer_index, transfer_page
 
 
 @dataclass
@@ -49,31 +51,24 @@ class PolygonscanService:
     
     def __init__(self):
         self.api_key = os.getenv('POLYGONSCAN_API_KEY', 'YourApiKeyToken')
-        self.base_url = 'https://api.polygonscan.com/api'
-        self.rate_limit_delay = 0.2  # 5 requests per second for free tier
-        self.last_request_time = 0
         
-    def _rate_limit(self):
-        """Implement rate limiting to avoid API throttling"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.rate_limit_delay:
-            time.sleep(self.rate_limit_delay - time_since_last)
-        self.last_request_time = time.time()
-    
     def _make_request(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Make API request with rate limiting and error handling"""
-        self._rate_limit()
-        
+        """Polygonscan API answer, served from the response cache when fresh"""
+        return explorer_cache.fetch('polygonscan', params, self._request_upstream)
+    
+    def _request_upstream(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Make API request over the shared connection pool with rate limiting and error handling"""
         params['apikey'] = self.api_key
         
         try:
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = integration_http.client('polygonscan').get('/api', params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
             
-            if data.get('status') == '1':
+            # Proxy (JSON-RPC) answers carry no status field; "No transactions found" is an empty result, not an outage
+            if data.get('status') == '1' or 'jsonrpc' in data or \
+                    str(data.get('message', '')).lower() in EMPTY_RESULT_MESSAGES:
                 return data
             else:
                 print(f"Polygonscan API error: {data.get('message', 'Unknown error')}")
@@ -96,7 +91,7 @@ class PolygonscanService:
         try:
             # Test with a simple API call
             params = {
-                'app_module': 'stats',
+                'module': 'stats',
                 'action': 'tokenbalance',
                 'contractaddress': '0x2791bca1f2de4661ed88a30c99a7a9449aa84174',  # USDC on Polygon
                 'address': '0x0000000000000000000000000000000000000000',
@@ -131,27 +126,23 @@ class PolygonscanService:
     def get_token_info(self, contract_address: str) -> Optional[PolygonTokenInfo]:
         """Get comprehensive token information"""
         try:
-            # Get token name
             name_params = {
-                'app_module': 'token',
+                'module': 'token',
                 'action': 'tokeninfo',
                 'contractaddress': contract_address
             }
-            
-            response = self._make_request(name_params)
-            if not response or 'result' not in response:
-                return None
-            
-            token_data = response['result'][0] if response['result'] else {}
-            
-            # Get token supply
             supply_params = {
-                'app_module': 'stats',
+                'module': 'stats',
                 'action': 'tokensupply',
                 'contractaddress': contract_address
             }
             
-            supply_response = self._make_request(supply_params)
+            # Token name and supply are fetched concurrently
+            response, supply_response = integration_http.fan_out(self._make_request, [name_params, supply_params])
+            if not response or 'result' not in response:
+                return None
+            
+            token_data = response['result'][0] if response['result'] else {}
             total_supply = supply_response.get('result', '0') if supply_response else '0'
             
             return PolygonTokenInfo(
@@ -170,7 +161,7 @@ class PolygonscanService:
         """Get token balance for a specific wallet"""
         try:
             params = {
-                'app_module': 'account',
+                'module': 'account',
                 'action': 'tokenbalance',
                 'contractaddress': contract_address,
                 'address': wallet_address,
@@ -190,7 +181,7 @@ class PolygonscanService:
         """Get token holders (requires Pro API subscription)"""
         try:
             params = {
-                'app_module': 'token',
+                'module': 'token',
                 'action': 'tokenholderlist',
                 'contractaddress': contract_address,
                 'page': page,
@@ -220,7 +211,7 @@ class PolygonscanService:
         """Get token transfer history"""
         try:
             params = {
-                'app_module': 'account',
+                'module': 'account',
                 'action': 'tokentx',
                 'contractaddress': contract_address,
                 'page': page,
@@ -251,28 +242,58 @@ class PolygonscanService:
             print(f"Error getting token transfers: {e}")
             return []
     
-    def get_multiple_token_balances(self, wallet_address: str, contract_addresses: List[str]) -> List[PolygonTokenBalance]:
-        """Get balances for multiple tokens"""
-        balances = []
+    def get_transfer_page(self, contract_address: str, start_block: int, end_block: int,
+                          page: int = 1, offset: int = 1000) -> Optional[List[Dict[str, Any]]]:
+        """One page of a contract's transfers in block order; None when the request failed"""
+        params = {
+            'module': 'account',
+            'action': 'tokentx',
+            'contractaddress': contract_address,
+            'startblock': start_block,
+            'endblock': end_block,
+            'page': page,
+            'offset': offset,
+            'sort': 'asc'
+        }
         
-        for contract_address in contract_addresses:
+        # Index pages are read once, so they skip the response cache
+        return transfer_page(self._request_upstream(params))
+    
+    def get_latest_block_number(self) -> Optional[int]:
+        """Get the latest block number (cached for one block time)"""
+        return explorer_cache.block_height('polygonscan', self._request_upstream)
+    
+    def get_token_analytics(self, contract_address: str) -> Dict[str, Any]:
+        """Get token analytics from the local transfer index"""
+        return transfer_index.get_token_analytics('polygonscan', contract_address)
+    
+    def get_multiple_token_balances(self, wallet_address: str, contract_addresses: List[str]) -> List[PolygonTokenBalance]:
+        """Get balances for multiple tokens, looked up concurrently"""
+        def token_balance(contract_address: str) -> Optional[PolygonTokenBalance]:
             try:
                 balance = self.get_token_balance(contract_address, wallet_address)
                 if balance:
                     token_info = self.get_token_info(contract_address)
                     if token_info:
-                        balances.append(PolygonTokenBalance(
+                        return PolygonTokenBalance(
                             contract_address=contract_address,
                             token_name=token_info.name,
                             token_symbol=token_info.symbol,
                             balance=balance,
                             decimals=token_info.decimals
-                        ))
+                        )
             except Exception as e:
                 print(f"Error getting balance for {contract_address}: {e}")
-                continue
+            return None
         
-        return balances
+        return [balance for balance in integration_http.fan_out(token_balance, contract_addresses) if balance]
+    
+    def get_holder_balances(self, contract_address: str, wallet_addresses: List[str]) -> Dict[str, Optional[str]]:
+        """Get one token's balance for many wallets, looked up concurrently"""
+        balances = integration_http.fan_out(
+            lambda wallet_address: self.get_token_balance(contract_address, wallet_address), wallet_addresses
+        )
+        return dict(zip(wallet_addresses, balances))
     
     def get_popular_tokens(self) -> List[Dict[str, Any]]:
         """Get popular Polygon tokens"""
@@ -317,7 +338,7 @@ class PolygonscanService:
         try:
             # Get MATIC price
             params = {
-                'app_module': 'stats',
+                'module': 'stats',
                 'action': 'maticprice'
             }
             
@@ -0,0 +1,175 @@
+"""
+Explorer Response Cache
+Read-through cache for Etherscan/Polygonscan calls keyed by (provider, action, params) with per-action TTL tiers
+"""
+
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from modules.core.cache_stampede import StampedeGuard, key_stats
+from modules.core.caching_strategy import CacheConfig, cache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'explorer'
+
+# Seconds per block; block-keyed entries are only reused within one block
+BLOCK_TIMES = {'etherscan': 12, 'polygonscan': 2}
+
+# Actions whose answer changes with every block: cached under the current block height
+BLOCK_KEYED_ACTIONS = frozenset({'tokenbalance', 'addresstokenbalance', 'balance', 'balancemulti', 'tokentx'})
+
+# TTL tiers (seconds) for everything else
+ACTION_TTLS = {
+    'tokeninfo': 3 * CacheConfig.DAILY_CACHE,       # name/symbol/decimals practically never change
+    'tokensupply': CacheConfig.MEDIUM_CACHE,
+    'tokenholderlist': CacheConfig.MEDIUM_CACHE,
+    'ethsupply': CacheConfig.MEDIUM_CACHE,
+    'maticprice': CacheConfig.SHORT_CACHE,
+    'ethprice': CacheConfig.SHORT_CACHE,
+}
+DEFAULT_TTL = 30
+
+# Provider-reported errors (bad address, unknown token) and transport failures/throttling
+NEGATIVE_TTL = 60
+TRANSIENT_TTL = 5
+
+TRANSIENT_MESSAGES = ('request failed', 'temporarily unavailable', 'rate limit')
+
+
+class ExplorerResponseCache:
+    """
+    Wraps a service's upstream request function.
+
+    Answers are stored in the shared multi-level cache and concurrent
+    identical lookups are coalesced into one upstream call, within the
+    process and across workers (StampedeGuard). Balances and transfers are
+    keyed by the provider's current block height, which is itself cached
+    for one block time, so they are reused exactly until the chain moves on.
+    Provider errors are cached for NEGATIVE_TTL seconds and transport
+    failures or throttling for TRANSIENT_TTL, so a failing lookup does not
+    reach the provider on every request either.
+    """
+
+    def __init__(self, enabled: bool = True, negative_ttl: int = NEGATIVE_TTL):
+        self.enabled = enabled
+        self.negative_ttl = negative_ttl
+        self.guard = StampedeGuard(
+            getter=lambda key: cache.get(key),
+            setter=self._store,
+            lock_client=lambda: cache.l2_cache,
+            stats=key_stats
+        )
+        self.stats = {'negative_entries': 0, 'transient_entries': 0, 'bypassed': 0, 'block_height_failures': 0}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('EXPLORER_CACHE_ENABLED', self.enabled)
+        self.negative_ttl = app.config.get('EXPLORER_CACHE_NEGATIVE_TTL', self.negative_ttl)
+
+    def fetch(self, provider: str, params: Dict[str, Any], upstream: Callable[[Dict[str, Any]], Any]) -> Any:
+        """``upstream(params)``'s answer, from cache when a fresh one exists"""
+        if not self.enabled:
+            self._count('bypassed')
+            return upstream(params)
+
+        action = params.get('action', '')
+        ttl = ACTION_TTLS.get(action, DEFAULT_TTL)
+        block = None
+        if action in BLOCK_KEYED_ACTIONS:
+            block = self.block_height(provider, upstream)
+            # A few blocks of slack only matters if the block height lookup starts failing
+            ttl = BLOCK_TIMES.get(provider, DEFAULT_TTL) * (5 if block is not None else 1)
+
+        key = self._key(provider, action, params, block)
+        try:
+            entry = self.guard.fetch(key, lambda: self._call(upstream, params, ttl), ttl,
+                                     f"{KEY_PREFIX}:{provider}:{action}")
+        except Exception as e:
+            logger.error(f"Explorer cache lookup failed for {provider} {action}: {e}")
+            return upstream(params)
+        return entry['response'] if entry else None
+
+    def block_height(self, provider: str, upstream: Callable[[Dict[str, Any]], Any]) -> Optional[int]:
+        """Latest block number, cached for one block time"""
+        params = {'module': 'proxy', 'action': 'eth_blockNumber'}
+        block_time = BLOCK_TIMES.get(provider, DEFAULT_TTL)
+        try:
+            if self.enabled:
+                entry = self.guard.fetch(self._key(provider, 'eth_blockNumber', params), lambda: self._call(
+                    upstream, dict(params), block_time), block_time, f"{KEY_PREFIX}:{provider}:eth_blockNumber", beta=0)
+            else:
+                entry = {'response': upstream(dict(params))}
+            result = (entry or {}).get('response') or {}
+            return int(result['result'], 16)
+        except (KeyError, TypeError, ValueError):
+            self._count('block_height_failures')
+            return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        actions = {name: entry for name, entry in key_stats.snapshot().items() if name.startswith(f"{KEY_PREFIX}:")}
+        hits = sum(entry['hits'] + entry['stale_hits'] for entry in actions.values())
+        misses = sum(entry['misses'] for entry in actions.values())
+        saved = sum(entry['hits'] + entry['stale_hits'] + entry['coalesced'] + entry['peer_waits']
+                    for entry in actions.values())
+        upstream_calls = sum(entry['computes'] for entry in actions.values())
+        return {
+            **self.stats,
+            'enabled': self.enabled,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses) * 100, 2) if hits + misses else 0,
+            'upstream_calls': upstream_calls,
+            'upstream_calls_saved': saved,
+            'actions': actions
+        }
+
+    # === HELPERS ===
+
+    def _call(self, upstream, params, ttl: int) -> Dict[str, Any]:
+        """Upstream answer wrapped with the TTL its outcome earns (None is cached too)"""
+        response = upstream(params)
+        outcome = self._outcome(response)
+        if outcome == 'transient':
+            self._count('transient_entries')
+            ttl = min(TRANSIENT_TTL, ttl)
+        elif outcome == 'negative':
+            self._count('negative_entries')
+            ttl = min(self.negative_ttl, ttl)
+        return {'response': response, 'ttl': ttl}
+
+    @staticmethod
+    def _outcome(response: Any) -> str:
+        if not isinstance(response, dict):
+            return 'transient'
+        if response.get('status') != '0':
+            # Successful answers, and proxy (JSON-RPC) answers, which carry no status
+            return 'ok'
+        text = f"{response.get('message', '')} {response.get('result', '')}".lower()
+        return 'transient' if any(marker in text for marker in TRANSIENT_MESSAGES) else 'negative'
+
+    @staticmethod
+    def _store(key: str, envelope: Dict[str, Any], timeout: int, tags):
+        # Error outcomes expire sooner than the action's TTL the guard was called with
+        ttl = envelope['v'].get('ttl', timeout)
+        envelope['exp'] = time.time() + ttl
+        return cache.set(key, envelope, int(math.ceil(ttl)), tags=tags)
+
+    @staticmethod
+    def _key(provider: str, action: str, params: Dict[str, Any], block: Optional[int] = None) -> str:
+        identity = {name: str(value).lower() for name, value in params.items() if name != 'apikey'}
+        digest = hashlib.sha1(json.dumps(identity, sort_keys=True).encode()).hexdigest()
+        return f"{KEY_PREFIX}:{provider}:{action}:{block if block is not None else '-'}:{digest}"
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+
+# Global response cache shared by EtherscanService and PolygonscanService
+explorer_cache = ExplorerResponseCache()
@@ -10,7 +10,11 @@ from typing import Dict, Any, List
 
 from .etherscan_service import EtherscanService
 from .polygonscan_service import PolygonscanService
+from .response_cache import explorer_cache
+from .transfer_index import TokenIndexFull, transfer_index
 from modules.core.constants import APIHealthStatus
+from modules.core.integration_http import integration_http
+from modules.core.rbac import admin_access
 
 # Create blueprint
 blockchain_analytics_bp = Blueprint(
@@ -20,19 +24,44 @@ blockchain_analytics_bp = Blueprint(
     template_folder='templates'
 )
 
+
+@blockchain_analytics_bp.record_once
+def init_analytics_state(state):
+    explorer_cache.init_app(state.app)
+    transfer_index.init_app(state.app)
+
+
 # Initialize services
 etherscan_service = EtherscanService()
 polygonscan_service = PolygonscanService()
 
+# Token analytics are served from the local transfer index, which these services keep in sync;
+# Etherscan tokens outside the index fall back to cached explorer calls
+transfer_index.register_source('etherscan', etherscan_service)
+transfer_index.register_source('polygonscan', polygonscan_service)
+
+
+def indexed_analytics_response(analytics: Dict[str, Any]):
+    """404 for a token nobody tracks, 202 while a tracked token is still being indexed"""
+    if analytics.get('indexed') is False:
+        return jsonify(analytics), 404
+    if analytics.get('indexing'):
+        return jsonify({'status': 'indexing', 'data': analytics}), 202
+    return jsonify({
+        'status': 'success',
+        'data': analytics
+    })
+
 
 @blockchain_analytics_bp.route('/')
 @login_required
 def dashboard():
     """Blockchain Analytics Dashboard"""
     try:
-        # Get health status for both networks
-        etherscan_health = etherscan_service.health_check()
-        polygonscan_health = polygonscan_service.health_check()
+        # Get health status for both networks concurrently
+        etherscan_health, polygonscan_health = integration_http.fan_out(
+            lambda service: service.health_check(), [etherscan_service, polygonscan_service]
+        )
         
         context = {
             'page_title': 'Blockchain Analytics Dashboard',
@@ -70,11 +99,10 @@ def token_analytics(contract_address: str):
             
         analytics = etherscan_service.get_token_analytics(contract_address)
         
-        return jsonify({
-            'status': 'success',
-            'data': analytics
-        })
+        return indexed_analytics_response(analytics)
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Token analytics request failed'}), 500
 
@@ -269,6 +297,33 @@ def multi_token_balance():
         return jsonify({'error': 'Multi-token balance request failed'}), 500
 
 
+@blockchain_analytics_bp.route('/api/token/<contract_address>/holder-balances', methods=['POST'])
+@login_required
+def holder_balances(contract_address: str):
+    """Get one token's balance for multiple addresses"""
+    try:
+        data = request.get_json()
+        
+        if not data or 'addresses' not in data:
+            return jsonify({'error': 'Addresses are required'}), 400
+            
+        addresses = data['addresses']
+        
+        if not isinstance(addresses, list) or len(addresses) > 100:
+            return jsonify({'error': 'Addresses must be a list of at most 100 addresses'}), 400
+            
+        balances = etherscan_service.get_holder_balances(contract_address, addresses)
+        
+        return jsonify({
+            'status': 'success',
+            'contract_address': contract_address,
+            'data': balances
+        })
+        
+    except Exception as e:
+        return jsonify({'error': 'Holder balance request failed'}), 500
+
+
 @blockchain_analytics_bp.route('/api/health')
 def api_health():
     """Blockchain Analytics API health check"""
@@ -290,6 +345,69 @@ def api_health():
         }), 500
 
 
+@blockchain_analytics_bp.route('/api/cache/stats')
+@login_required
+def cache_stats():
+    """Explorer response cache hit/miss counts and upstream calls saved"""
+    return jsonify({
+        'status': 'success',
+        'data': {
+            'response_cache': explorer_cache.get_stats(),
+            'http': integration_http.get_stats()
+        },
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@blockchain_analytics_bp.route('/api/index/status')
+@login_required
+def index_status():
+    """Transfer index progress per tracked contract"""
+    return jsonify({
+        'status': 'success',
+        'data': transfer_index.get_stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@blockchain_analytics_bp.route('/api/index/contracts', methods=['POST'])
+@login_required
+@admin_access(api_mode=True)
+def track_indexed_contract():
+    """Start indexing a contract (admin only); JSON provider, contract_address and optional start_block"""
+    try:
+        data = request.get_json() or {}
+        start_block = int(data.get('start_block') or 0)
+        if start_block < 0:
+            return jsonify({'error': 'start_block must not be negative'}), 400
+        cursor = transfer_index.track(data.get('provider', 'etherscan'), data.get('contract_address'),
+                                      start_block=start_block)
+        return jsonify({'status': 'success', 'data': transfer_index.cursor_status(cursor)}), 201
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except TokenIndexFull as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'error': 'Tracking request failed'}), 500
+
+
+@blockchain_analytics_bp.route('/api/index/contracts/<provider>/<contract_address>', methods=['DELETE'])
+@login_required
+@admin_access(api_mode=True)
+def untrack_indexed_contract(provider: str, contract_address: str):
+    """Stop indexing a contract and drop its indexed data (admin only)"""
+    try:
+        if not transfer_index.untrack(provider, contract_address):
+            return jsonify({'error': 'Token is not indexed'}), 404
+        return jsonify({'status': 'success'})
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Untracking request failed'}), 500
+
+
 @blockchain_analytics_bp.route('/api/token/<contract_address>/live-data')
 @login_required
 def live_token_data(contract_address: str):
@@ -307,6 +425,8 @@ def live_token_data(contract_address: str):
             'timestamp': datetime.now().isoformat()
         })
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Live data request failed'}), 500
 
@@ -390,6 +510,20 @@ def polygon_token_analytics(contract_address: str):
         return jsonify({'error': 'Token analytics request failed'}), 500
 
 
+@blockchain_analytics_bp.route('/api/polygon/token/<contract_address>/analytics')
+@login_required
+def polygon_indexed_token_analytics(contract_address: str):
+    """Polygon token activity, volume and holders from the local transfer index"""
+    try:
+        analytics = polygonscan_service.get_token_analytics(contract_address)
+        return indexed_analytics_response(analytics)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Token analytics request failed'}), 500
+
+
 @blockchain_analytics_bp.route('/api/polygon/token/<contract_address>/info')
 @login_required  
 def polygon_token_info(contract_address: str):
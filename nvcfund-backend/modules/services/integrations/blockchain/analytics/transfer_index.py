@@ -0,0 +1,568 @@
+"""
+Token Transfer Index
+Incremental local index of ERC-20 transfers per contract; token analytics are answered from it instead of the explorers
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from modules.core.extensions import db
+from modules.core.integration_http import integration_http
+from modules.core.rate_limiter import RateLimitRule, token_limiter
+from modules.core.upsert import upsert_add
+from .models import IndexedTokenTransfer, TokenHolderBalance, TokenIndexCursor, TokenTransferDaily
+
+logger = logging.getLogger(__name__)
+
+ZERO_ADDRESS = '0x' + '0' * 40
+ADDRESS_PATTERN = re.compile(r'^0x[0-9a-fA-F]{40}$')
+
+# Blocks behind the head treated as final; nothing newer is indexed, so reorgs never have to be unwound
+CONFIRMATIONS = {'etherscan': 12, 'polygonscan': 128}
+
+# Explorer answers with status "0" that mean "nothing in this range" rather than a failure
+EMPTY_RESULT_MESSAGES = ('no transactions found', 'no records found')
+
+PAGE_SIZE = 1000
+PAGES_PER_ROUND = 20          # per contract per background round, so one backfill cannot starve the others
+LEASE_SECONDS = 300
+PAGE_WAIT = 10.0              # seconds a page request may wait for a provider rate limit token
+
+RECENT_TRANSFERS = 100
+TOP_HOLDERS = 10
+VOLUME_DAYS = 30
+
+
+class TokenIndexFull(Exception):
+    """The index already tracks its maximum number of contracts"""
+
+
+class IndexSyncError(Exception):
+    """An explorer call needed to advance a cursor failed"""
+
+
+def transfer_page(response: Any) -> Optional[List[Dict[str, Any]]]:
+    """Rows of a tokentx answer; [] for an empty range and None when the call failed"""
+    if not isinstance(response, dict):
+        return None
+    result = response.get('result')
+    if response.get('status') == '1' and isinstance(result, list):
+        return result
+    if str(response.get('message', '')).lower() in EMPTY_RESULT_MESSAGES:
+        return []
+    return None
+
+
+class TokenTransferIndex:
+    """
+    Local index of transfers for the contracts an operator chose to track
+    (TOKEN_INDEX_CONTRACTS, scripts/sync_token_index.py or the admin API).
+
+    Each contract's transfers are read from the explorer in block order
+    (tokentx, ascending) from its cursor up to the confirmed head, one page
+    at a time. Only whole blocks are ingested, and every page commits its
+    transfers, holder balance changes, daily volume and the cursor advance in
+    a single transaction, so a cursor never points past data it does not
+    hold. Syncing runs in a background thread per worker (or in
+    scripts/sync_token_index.py); a lease on the cursor row keeps workers
+    from syncing the same contract. Analytics read only the local tables and
+    are withheld until a contract's cursor has caught up with the confirmed
+    head; request handlers never register contracts.
+    """
+
+    def __init__(self, page_size: int = PAGE_SIZE, sync_interval: float = 30.0, page_rate: int = 2,
+                 max_contracts: int = 100, background: bool = True, contracts: Tuple[str, ...] = ()):
+        self.page_size = page_size
+        self.sync_interval = sync_interval
+        self.page_rate = page_rate
+        self.max_contracts = max_contracts
+        self.background = background
+        self.contracts = tuple(contracts)  # 'provider:contract_address' entries tracked at startup
+        self.app = None
+        self.sources: Dict[str, Any] = {}
+        self.stats = {'sync_rounds': 0, 'pages': 0, 'transfers': 0, 'sync_errors': 0, 'lease_conflicts': 0}
+        self._pid = None
+        self._thread: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.background = app.config.get('TOKEN_INDEX_BACKGROUND_SYNC', self.background)
+        self.sync_interval = app.config.get('TOKEN_INDEX_SYNC_INTERVAL', self.sync_interval)
+        self.page_size = app.config.get('TOKEN_INDEX_PAGE_SIZE', self.page_size)
+        self.page_rate = app.config.get('TOKEN_INDEX_PAGE_RATE', self.page_rate)
+        self.max_contracts = app.config.get('TOKEN_INDEX_MAX_CONTRACTS', self.max_contracts)
+        self.contracts = tuple(entry.strip() for entry in app.config.get('TOKEN_INDEX_CONTRACTS', self.contracts)
+                               if entry.strip())
+        app.extensions['token_index'] = self
+        # The sync thread registers TOKEN_INDEX_CONTRACTS before its first round
+        self._ensure_started()
+
+    def register_source(self, provider: str, service):
+        """``service`` provides get_transfer_page() and get_latest_block_number() for ``provider``"""
+        self.sources[provider] = service
+
+    # === TRACKING ===
+
+    def track(self, provider: str, contract_address: str, start_block: int = 0) -> TokenIndexCursor:
+        """
+        Cursor for the contract, registering it for indexing if it is new (no
+        explorer call). Operator entry point only; request handlers use lookup().
+        """
+        contract_address = self._validate(provider, contract_address)
+        cursor = self._cursor(provider, contract_address)
+        if cursor is None:
+            if db.session.query(TokenIndexCursor.id).count() >= self.max_contracts:
+                raise TokenIndexFull(f"Token index is limited to {self.max_contracts} contracts")
+            db.session.add(TokenIndexCursor(provider=provider, contract_address=contract_address,
+                                            start_block=start_block))
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Registered by a concurrent request
+                db.session.rollback()
+            cursor = self._cursor(provider, contract_address)
+            self._wake.set()
+        self._ensure_started()
+        return cursor
+
+    def track_configured(self):
+        """Register the TOKEN_INDEX_CONTRACTS allow-list"""
+        for entry in self.contracts:
+            provider, _, contract_address = entry.partition(':')
+            try:
+                self.track(provider, contract_address)
+            except (ValueError, TokenIndexFull) as e:
+                logger.warning(f"Not tracking configured token {entry}: {e}")
+
+    def lookup(self, provider: str, contract_address: str) -> Optional[TokenIndexCursor]:
+        """Cursor for an already tracked contract, None when it is not indexed"""
+        cursor = self._cursor(provider, self._validate(provider, contract_address))
+        self._ensure_started()
+        return cursor
+
+    def untrack(self, provider: str, contract_address: str) -> bool:
+        """Stop indexing a contract and delete everything indexed for it"""
+        contract_address = self._validate(provider, contract_address)
+        with db.engine.begin() as connection:
+            for model in (IndexedTokenTransfer, TokenHolderBalance, TokenTransferDaily):
+                table = model.__table__
+                connection.execute(table.delete().where(and_(
+                    table.c.provider == provider, table.c.contract_address == contract_address
+                )))
+            table = TokenIndexCursor.__table__
+            return connection.execute(table.delete().where(and_(
+                table.c.provider == provider, table.c.contract_address == contract_address
+            ))).rowcount == 1
+
+    # === SYNC ===
+
+    def sync_all(self, max_pages: Optional[int] = PAGES_PER_ROUND) -> Dict[str, int]:
+        """One round over every tracked contract whose lease is free"""
+        totals = {'contracts': 0, 'pages': 0, 'transfers': 0}
+        cursors = db.session.query(TokenIndexCursor.provider, TokenIndexCursor.contract_address).order_by(
+            TokenIndexCursor.id).all()
+        db.session.commit()
+        for provider, contract_address in cursors:
+            result = self.sync_contract(provider, contract_address, max_pages=max_pages)
+            if result:
+                totals['contracts'] += 1
+                totals['pages'] += result['pages']
+                totals['transfers'] += result['transfers']
+        self._count('sync_rounds')
+        return totals
+
+    def sync_contract(self, provider: str, contract_address: str,
+                      max_pages: Optional[int] = None) -> Optional[Dict[str, int]]:
+        """
+        Ingest the contract's blocks from its cursor up to the confirmed head,
+        stopping after ``max_pages`` explorer pages. None when another worker
+        holds the contract's lease.
+        """
+        source = self.sources.get(provider)
+        if source is None:
+            raise ValueError(f"Unknown explorer: {provider}")
+        contract_address = contract_address.lower()
+        if not self._claim(provider, contract_address):
+            self._count('lease_conflicts')
+            return None
+
+        result = {'pages': 0, 'transfers': 0}
+        error = None
+        try:
+            with integration_http.patience(PAGE_WAIT):
+                head = source.get_latest_block_number()
+                if head is None:
+                    raise IndexSyncError('latest block number unavailable')
+                safe_head = head - CONFIRMATIONS.get(provider, 0)
+                last_block, start_block = self._position(provider, contract_address)
+                next_block = last_block + 1 if last_block is not None else start_block
+
+                while next_block <= safe_head and (max_pages is None or result['pages'] < max_pages):
+                    rows, through_block, pages = self._next_blocks(source, provider, contract_address,
+                                                                   next_block, safe_head)
+                    self._ingest(provider, contract_address, rows, last_block, through_block, head)
+                    result['pages'] += pages
+                    result['transfers'] += len(rows)
+                    last_block, next_block = through_block, through_block + 1
+        except Exception as e:
+            error = str(e)
+            self._count('sync_errors')
+            logger.error(f"Token index sync failed for {provider} {contract_address}: {e}")
+        finally:
+            self._release(provider, contract_address, error)
+
+        with self._stats_lock:
+            self.stats['pages'] += result['pages']
+            self.stats['transfers'] += result['transfers']
+        return result
+
+    def _next_blocks(self, source, provider: str, contract_address: str,
+                     start_block: int, end_block: int) -> Tuple[List[Dict[str, Any]], int, int]:
+        """Transfers of the next run of whole blocks from ``start_block``, the last block covered, pages used"""
+        rows = self._fetch(source, provider, contract_address, start_block, end_block, 1)
+        if len(rows) < self.page_size:
+            return rows, end_block, 1
+
+        # A full page may stop in the middle of its last block; that block is read again by the next page
+        last_block = int(rows[-1]['blockNumber'])
+        complete = [row for row in rows if int(row['blockNumber']) < last_block]
+        if complete:
+            return complete, last_block - 1, 1
+
+        # A single block holds a page or more of this token's transfers: page through that block alone
+        rows, page = [], 0
+        while True:
+            page += 1
+            batch = self._fetch(source, provider, contract_address, last_block, last_block, page)
+            rows.extend(batch)
+            if len(batch) < self.page_size:
+                return rows, last_block, page + 1
+
+    def _fetch(self, source, provider: str, contract_address: str, start_block: int, end_block: int,
+               page: int) -> List[Dict[str, Any]]:
+        self._pace(provider)
+        rows = source.get_transfer_page(contract_address, start_block, end_block, page, self.page_size)
+        if rows is None:
+            raise IndexSyncError(f"transfer page {page} of blocks {start_block}-{end_block} unavailable")
+        return rows
+
+    def _pace(self, provider: str):
+        """Hold the indexer to page_rate requests per second so request threads keep most of the provider's budget"""
+        rules = (RateLimitRule('second', self.page_rate, 1),)
+        while True:
+            result = token_limiter.hit(f"token_index:{provider}", rules)
+            if result.allowed:
+                return
+            time.sleep(result.retry_after)
+
+    def _ingest(self, provider: str, contract_address: str, rows: List[Dict[str, Any]],
+                previous_block: Optional[int], through_block: int, head_block: int):
+        """Store one run of whole blocks and advance the cursor, all in one transaction"""
+        transfers = self._parse(provider, contract_address, rows)
+        balances: Dict[str, Decimal] = defaultdict(Decimal)
+        daily: Dict[Any, List] = defaultdict(lambda: [0, Decimal('0')])
+        supply = Decimal('0')
+        for transfer in transfers:
+            value = transfer['value']
+            if transfer['from_address'] == ZERO_ADDRESS:
+                supply += value
+            else:
+                balances[transfer['from_address']] -= value
+            if transfer['to_address'] == ZERO_ADDRESS:
+                supply -= value
+            else:
+                balances[transfer['to_address']] += value
+            bucket = daily[transfer['block_timestamp'].date()]
+            bucket[0] += 1
+            bucket[1] += value
+
+        cursor_table = TokenIndexCursor.__table__
+        holder_table = TokenHolderBalance.__table__
+        scope = {'provider': provider, 'contract_address': contract_address}
+        with db.engine.begin() as connection:
+            if transfers:
+                connection.execute(IndexedTokenTransfer.__table__.insert(), transfers)
+
+            # Holders gained or lost: balances crossing zero
+            holder_change = 0
+            if balances:
+                current = dict(connection.execute(
+                    select(holder_table.c.address, holder_table.c.balance).where(and_(
+                        holder_table.c.provider == provider,
+                        holder_table.c.contract_address == contract_address,
+                        holder_table.c.address.in_(list(balances))
+                    ))
+                ).all())
+                for address, delta in balances.items():
+                    before = Decimal(current.get(address) or 0)
+                    holder_change += int(before + delta > 0) - int(before > 0)
+                upsert_add(connection, holder_table, ('provider', 'contract_address', 'address'), ('balance',),
+                           [{**scope, 'address': address, 'balance': delta} for address, delta in balances.items()])
+            if daily:
+                upsert_add(connection, TokenTransferDaily.__table__, ('provider', 'contract_address', 'day'),
+                           ('transfer_count', 'volume'),
+                           [{**scope, 'day': day, 'transfer_count': count, 'volume': volume}
+                            for day, (count, volume) in daily.items()])
+
+            now = datetime.utcnow()
+            values = {
+                'last_block': through_block,
+                'head_block': head_block,
+                'transfer_count': cursor_table.c.transfer_count + len(transfers),
+                'holder_count': cursor_table.c.holder_count + holder_change,
+                'indexed_supply': cursor_table.c.indexed_supply + supply,
+                'last_synced_at': now,
+                'lease_until': now + timedelta(seconds=LEASE_SECONDS)
+            }
+            if rows:
+                values.update({
+                    'token_name': func.coalesce(cursor_table.c.token_name, rows[0].get('tokenName')),
+                    'token_symbol': func.coalesce(cursor_table.c.token_symbol, rows[0].get('tokenSymbol')),
+                    'token_decimals': func.coalesce(cursor_table.c.token_decimals,
+                                                       int(rows[0].get('tokenDecimal') or 0))
+                })
+            # The cursor must still be where this run started, or another writer got here first
+            unchanged = (cursor_table.c.last_block.is_(None) if previous_block is None
+                         else cursor_table.c.last_block == previous_block)
+            advanced = connection.execute(cursor_table.update().where(and_(
+                cursor_table.c.provider == provider,
+                cursor_table.c.contract_address == contract_address,
+                unchanged
+            )).values(values)).rowcount
+            if advanced != 1:
+                raise IndexSyncError(f"cursor moved past block {previous_block} during sync")
+
+    @staticmethod
+    def _parse(provider: str, contract_address: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """tokentx rows as token_transfers rows; rows carry no log index, so position counts within the block"""
+        positions: Dict[int, int] = defaultdict(int)
+        transfers = []
+        for row in rows:
+            block_number = int(row['blockNumber'])
+            transfers.append({
+                'provider': provider,
+                'contract_address': contract_address,
+                'block_number': block_number,
+                'log_position': positions[block_number],
+                'block_timestamp': datetime.utcfromtimestamp(int(row.get('timeStamp') or 0)),
+                'tx_hash': row.get('hash', ''),
+                'from_address': (row.get('from') or ZERO_ADDRESS).lower(),
+                'to_address': (row.get('to') or ZERO_ADDRESS).lower(),
+                'value': Decimal(int(row.get('value') or 0))
+            })
+            positions[block_number] += 1
+        return transfers
+
+    def _claim(self, provider: str, contract_address: str) -> bool:
+        now = datetime.utcnow()
+        table = TokenIndexCursor.__table__
+        with db.engine.begin() as connection:
+            return connection.execute(table.update().where(and_(
+                table.c.provider == provider,
+                table.c.contract_address == contract_address,
+                or_(table.c.lease_until.is_(None), table.c.lease_until < now)
+            )).values(lease_until=now + timedelta(seconds=LEASE_SECONDS))).rowcount == 1
+
+    def _release(self, provider: str, contract_address: str, error: Optional[str]):
+        table = TokenIndexCursor.__table__
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(table.update().where(and_(
+                    table.c.provider == provider, table.c.contract_address == contract_address
+                )).values(lease_until=None, last_error=error[:500] if error else None))
+        except Exception as e:
+            logger.error(f"Failed to release token index lease for {provider} {contract_address}: {e}")
+
+    def _position(self, provider: str, contract_address: str) -> Tuple[Optional[int], int]:
+        table = TokenIndexCursor.__table__
+        with db.engine.connect() as connection:
+            row = connection.execute(select(table.c.last_block, table.c.start_block).where(and_(
+                table.c.provider == provider, table.c.contract_address == contract_address
+            ))).one()
+        return row.last_block, row.start_block
+
+    # === BACKGROUND SYNC ===
+
+    def _ensure_started(self):
+        """Start the sync thread in the current process (safe across gunicorn forks)"""
+        if not self.background or self.app is None:
+            return
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._wake = threading.Event()
+            self._thread = threading.Thread(target=self._sync_loop, name='token-index-sync', daemon=True)
+            self._thread.start()
+
+    def _sync_loop(self):
+        registered = False
+        while True:
+            with self.app.app_context():
+                try:
+                    if not registered:
+                        # Retried every round until the database is reachable
+                        self.track_configured()
+                        registered = True
+                    self.sync_all()
+                except Exception as e:
+                    logger.error(f"Token index sync round failed: {e}")
+                finally:
+                    db.session.remove()
+            self._wake.wait(self.sync_interval)
+            self._wake.clear()
+
+    # === QUERIES ===
+
+    def get_token_analytics(self, provider: str, contract_address: str) -> Dict[str, Any]:
+        """Token metadata, activity, volume and top holders from the local index only"""
+        cursor = self.lookup(provider, contract_address)
+        if cursor is None:
+            return {'error': 'Token is not indexed', 'indexed': False}
+        status = self.cursor_status(cursor)
+        # Totals, holders and "recent" transfers are partial until the backfill reaches the confirmed head
+        if not status['caught_up']:
+            return {'error': 'Token is being indexed', 'indexing': True, 'index': status}
+
+        recent = self.get_transfers(provider, cursor.contract_address, limit=RECENT_TRANSFERS)
+        since = datetime.utcnow().date() - timedelta(days=VOLUME_DAYS - 1)
+        days = db.session.query(TokenTransferDaily).filter(
+            TokenTransferDaily.provider == provider,
+            TokenTransferDaily.contract_address == cursor.contract_address,
+            TokenTransferDaily.day >= since
+        ).order_by(TokenTransferDaily.day).all()
+
+        return {
+            'token_info': {
+                'name': cursor.token_name or '',
+                'symbol': cursor.token_symbol or '',
+                'decimals': cursor.token_decimals or 0,
+                'total_supply': str(cursor.indexed_supply),
+                'contract_address': cursor.contract_address
+            },
+            'activity_metrics': {
+                'recent_transfers': len(recent),
+                'unique_addresses': len({tx['from'] for tx in recent} | {tx['to'] for tx in recent}),
+                'holders_count': cursor.holder_count,
+                'total_transfers': cursor.transfer_count,
+                f'transfers_{VOLUME_DAYS}d': sum(day.transfer_count for day in days),
+                f'volume_{VOLUME_DAYS}d': str(sum((Decimal(day.volume) for day in days), Decimal('0')))
+            },
+            'daily_volume': [{'day': day.day.isoformat(), 'transfers': day.transfer_count, 'volume': str(day.volume)}
+                             for day in days],
+            'recent_transfers': recent[:10],
+            'top_holders': self.get_top_holders(provider, cursor.contract_address, cursor.indexed_supply),
+            'index': status,
+            'timestamp': datetime.now().isoformat()
+        }
+
+    def get_transfers(self, provider: str, contract_address: str, since: Optional[datetime] = None,
+                      limit: int = 1000) -> List[Dict[str, Any]]:
+        """Indexed transfers newest first, in the explorer's tokentx field names"""
+        cursor = self._cursor(provider, contract_address.lower())
+        query = db.session.query(IndexedTokenTransfer).filter(
+            IndexedTokenTransfer.provider == provider,
+            IndexedTokenTransfer.contract_address == contract_address.lower()
+        )
+        if since is not None:
+            query = query.filter(IndexedTokenTransfer.block_timestamp >= since)
+        rows = query.order_by(IndexedTokenTransfer.block_number.desc(),
+                              IndexedTokenTransfer.log_position.desc()).limit(limit).all()
+        return [{
+            'hash': row.tx_hash,
+            'blockNumber': str(row.block_number),
+            'timeStamp': str(int((row.block_timestamp - datetime(1970, 1, 1)).total_seconds())),
+            'from': row.from_address,
+            'to': row.to_address,
+            'value': str(row.value),
+            'tokenName': cursor.token_name if cursor else '',
+            'tokenSymbol': cursor.token_symbol if cursor else '',
+            'tokenDecimal': str(cursor.token_decimals or 0) if cursor else '0'
+        } for row in rows]
+
+    def get_top_holders(self, provider: str, contract_address: str, supply: Decimal,
+                        limit: int = TOP_HOLDERS) -> List[Dict[str, Any]]:
+        rows = db.session.query(TokenHolderBalance.address, TokenHolderBalance.balance).filter(
+            TokenHolderBalance.provider == provider,
+            TokenHolderBalance.contract_address == contract_address,
+            TokenHolderBalance.balance > 0
+        ).order_by(TokenHolderBalance.balance.desc()).limit(limit).all()
+        supply = Decimal(supply or 0)
+        return [{
+            'rank': rank,
+            'address': address,
+            'balance': str(balance),
+            'percentage': float(Decimal(balance) / supply * 100) if supply > 0 else 0.0
+        } for rank, (address, balance) in enumerate(rows, start=1)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        cursors = db.session.query(TokenIndexCursor).order_by(TokenIndexCursor.id).all()
+        return {
+            **self.stats,
+            'background_sync': self.background,
+            'contracts': [self.cursor_status(cursor) for cursor in cursors]
+        }
+
+    # === HELPERS ===
+
+    def _validate(self, provider: str, contract_address: str) -> str:
+        if provider not in self.sources:
+            raise ValueError(f"Unknown explorer: {provider}")
+        if not ADDRESS_PATTERN.match(contract_address or ''):
+            raise ValueError('Invalid contract address')
+        return contract_address.lower()
+
+    @staticmethod
+    def _cursor(provider: str, contract_address: str) -> Optional[TokenIndexCursor]:
+        return db.session.query(TokenIndexCursor).filter_by(provider=provider,
+                                                            contract_address=contract_address).first()
+
+    @staticmethod
+    def is_caught_up(cursor: TokenIndexCursor) -> bool:
+        """Indexed to within the confirmation depth of the head seen by the last sync"""
+        if cursor.last_block is None or cursor.head_block is None:
+            return False
+        return cursor.head_block - cursor.last_block <= CONFIRMATIONS.get(cursor.provider, 0)
+
+    @staticmethod
+    def cursor_status(cursor: TokenIndexCursor) -> Dict[str, Any]:
+        lag = cursor.head_block - cursor.last_block if cursor.head_block is not None and \
+            cursor.last_block is not None else None
+        caught_up = TokenTransferIndex.is_caught_up(cursor)
+        return {
+            'provider': cursor.provider,
+            'contract_address': cursor.contract_address,
+            'start_block': cursor.start_block,
+            'last_block': cursor.last_block,
+            'head_block': cursor.head_block,
+            'lag_blocks': lag,
+            'caught_up': caught_up,
+            # Supply and balances are exact only when the index starts at the contract's first transfer
+            'complete_history': cursor.start_block == 0 and caught_up,
+            'transfers': cursor.transfer_count,
+            'last_synced_at': cursor.last_synced_at.isoformat() if cursor.last_synced_at else None,
+            'last_error': cursor.last_error
+        }
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+
+# Global transfer index shared by EtherscanService and PolygonscanService
+transfer_index = TokenTransferIndex()
@@ -14,8 +14,32 @@ from datetime import datetime, timedelta
 from urllib.parse import urlencode, parse_qs, urlparse
 import json
 
+from modules.core.integration_http import integration_http
+
 logger = logging.getLogger(__name__)
 
+# Request weight per endpoint, charged against Binance's per-minute weight limit
+REQUEST_WEIGHTS = {
+    '/api/v3/account': 20,
+    '/api/v3/ticker/24hr': 80,  # All symbols; 2 with a symbol
+    '/api/v3/ticker/price': 2,  # One symbol
+    '/api/v3/exchangeInfo': 20,
+    '/api/v3/trades': 25,
+    '/api/v3/klines': 2,
+}
+
+
+def depth_weight(limit: int) -> int:
+    """Request weight of /api/v3/depth, which grows with the number of levels asked for"""
+    if limit <= 100:
+        return 5
+    if limit <= 500:
+        return 25
+    if limit <= 1000:
+        return 50
+    return 250
+
+
 class BinanceOAuthService:
     """
     Binance OAuth 2.0 authentication service
@@ -266,7 +290,6 @@ class BinanceAPIService:
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
         self.api_key = os.environ.get('BINANCE_API_KEY')
         self.secret_key = os.environ.get('BINANCE_SECRET_KEY')
-        self.base_url = "https://api.binance.com"
         
     def get_account_info(self) -> Dict[str, Any]:
         """
@@ -295,7 +318,7 @@ class BinanceAPIService:
                 hashlib.sha256
             ).hexdigest()
             
-            url = f"{self.base_url}/api/v3/account"
+            path = "/api/v3/account"
             headers = {
                 'X-MBX-APIKEY': self.api_key
             }
@@ -304,7 +327,8 @@ class BinanceAPIService:
                 'signature': signature
             }
             
-            response = requests.get(url, headers=headers, params=params, timeout=30)
+            response = integration_http.client('binance').get(path, headers=headers, params=params, timeout=30,
+                                                              weight=REQUEST_WEIGHTS[path])
             
             if response.status_code == 200:
                 account_data = response.json()
@@ -339,8 +363,8 @@ class BinanceAPIService:
         """
         try:
             # Try Binance first
-            url = f"{self.base_url}/api/v3/ticker/24hr"
-            response = requests.get(url, timeout=10)
+            path = "/api/v3/ticker/24hr"
+            response = integration_http.client('binance').get(path, timeout=10, weight=REQUEST_WEIGHTS[path])
             
             if response.status_code == 200:
                 ticker_data = response.json()
@@ -391,7 +415,7 @@ class BinanceAPIService:
         """
         try:
             # Get top 50 cryptocurrencies by market cap
-            url = "https://api.coingecko.com/api/v3/coins/markets"
+            path = "/api/v3/coins/markets"
             params = {
                 'vs_currency': 'usd',
                 'order': 'market_cap_desc',
@@ -401,7 +425,7 @@ class BinanceAPIService:
                 'price_change_percentage': '24h'
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = integration_http.client('coingecko').get(path, params=params, timeout=10)
             
             if response.status_code == 200:
                 coin_data = response.json()
@@ -456,9 +480,10 @@ class BinanceAPIService:
             Price data for the symbol
         """
         try:
-            url = f"{self.base_url}/api/v3/ticker/price"
+            path = "/api/v3/ticker/price"
             params = {'symbol': symbol}
-            response = requests.get(url, params=params, timeout=30)
+            response = integration_http.client('binance').get(path, params=params, timeout=30,
+                                                              weight=REQUEST_WEIGHTS[path])
             
             if response.status_code == 200:
                 price_data = response.json()
@@ -522,8 +547,8 @@ class BinanceAPIService:
     def get_exchange_info(self) -> Dict[str, Any]:
         """Get current exchange trading rules and symbol information"""
         try:
-            url = f"{self.base_url}/api/v3/exchangeInfo"
-            response = requests.get(url, timeout=30)
+            path = "/api/v3/exchangeInfo"
+            response = integration_http.client('binance').get(path, timeout=30, weight=REQUEST_WEIGHTS[path])
             
             if response.status_code == 200:
                 exchange_data = response.json()
@@ -549,9 +574,10 @@ class BinanceAPIService:
     def get_order_book(self, symbol: str, limit: int = 20) -> Dict[str, Any]:
         """Get order book depth for a symbol"""
         try:
-            url = f"{self.base_url}/api/v3/depth"
+            path = "/api/v3/depth"
             params = {'symbol': symbol, 'limit': limit}
-            response = requests.get(url, params=params, timeout=30)
+            response = integration_http.client('binance').get(path, params=params, timeout=30,
+                                                              weight=depth_weight(limit))
             
             if response.status_code == 200:
                 order_book = response.json()
@@ -573,9 +599,10 @@ class BinanceAPIService:
     def get_recent_trades(self, symbol: str, limit: int = 20) -> Dict[str, Any]:
         """Get recent trades for a symbol"""
         try:
-            url = f"{self.base_url}/api/v3/trades"
+            path = "/api/v3/trades"
             params = {'symbol': symbol, 'limit': limit}
-            response = requests.get(url, params=params, timeout=30)
+            response = integration_http.client('binance').get(path, params=params, timeout=30,
+                                                              weight=REQUEST_WEIGHTS[path])
             
             if response.status_code == 200:
                 trades = response.json()
@@ -597,9 +624,10 @@ class BinanceAPIService:
     def get_kline_data(self, symbol: str, interval: str = '1h', limit: int = 24) -> Dict[str, Any]:
         """Get kline/candlestick data for a symbol"""
         try:
-            url = f"{self.base_url}/api/v3/klines"
+            path = "/api/v3/klines"
             params = {'symbol': symbol, 'interval': interval, 'limit': limit}
-            response = requests.get(url, params=params, timeout=30)
+            response = integration_http.client('binance').get(path, params=params, timeout=30,
+                                                              weight=REQUEST_WEIGHTS[path])
             
             if response.status_code == 200:
                 klines = response.json()
@@ -636,8 +664,8 @@ class BinanceAPIService:
     def _get_coingecko_exchange_info(self) -> Dict[str, Any]:
         """Get exchange info from CoinGecko (fallback)"""
         try:
-            url = "https://api.coingecko.com/api/v3/exchanges/binance"
-            response = requests.get(url, timeout=10)
+            path = "/api/v3/exchanges/binance"
+            response = integration_http.client('coingecko').get(path, timeout=10)
             
             if response.status_code == 200:
                 exchange_data = response.json()
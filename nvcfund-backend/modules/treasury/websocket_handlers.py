@@ -6,24 +6,25 @@ Real-time streaming for $30T NVCT operations and asset management
 from flask_socketio import emit, join_room, leave_room
 from flask_login import current_user
 import json
-import threading
-import time
 from decimal import Decimal
 from datetime import datetime, timedelta
 import random
 
 from modules.core.rbac import can_access
 from modules.utils.services import BankingLogger
+from modules.core.streaming_hub import streaming_hub
 
 logger = BankingLogger()
 
 # Active WebSocket connections
 treasury_connections = {}
-streaming_threads = {}
 
 def handle_treasury_connection(socketio):
     """Handle treasury module WebSocket connections"""
     
+    # One producer for every treasury client; the data does not depend on the room
+    streaming_hub.register_topic('treasury.live', collect_treasury_stream, interval=30, namespace='/treasury')
+    
     @socketio.on('connect', namespace='/treasury')
     def on_connect():
         if not current_user.is_authenticated:
@@ -56,6 +57,7 @@ def handle_treasury_connection(socketio):
     def on_disconnect():
         if current_user.is_authenticated and current_user.id in treasury_connections:
             del treasury_connections[current_user.id]
+        streaming_hub.unsubscribe_all()
             
         logger.log_api_event(
             event_type='websocket_disconnect',
@@ -71,14 +73,8 @@ def handle_treasury_connection(socketio):
         room = data.get('room', 'treasury_dashboard')
         join_room(room)
         
-        # Start streaming for this room if not already active
-        if room not in streaming_threads:
-            streaming_threads[room] = threading.Thread(
-                target=start_treasury_streaming,
-                args=(socketio, room),
-                daemon=True
-            )
-            streaming_threads[room].start()
+        # Live metrics come from the shared treasury topic
+        streaming_hub.subscribe('treasury.live')
         
         emit('joined_room', {'room': room, 'status': 'success'})
     
@@ -100,130 +96,121 @@ def handle_treasury_connection(socketio):
         liquidity_data = get_live_liquidity_metrics()
         emit('liquidity_update', liquidity_data)
 
-def start_treasury_streaming(socketio, room):
-    """Start real-time streaming for treasury operations"""
+def collect_treasury_stream():
+    """Compute one tick of the treasury live stream as {event: payload}"""
     
-    while room in streaming_threads:
-        try:
-            # NVCT Supply Management Updates
-            nvct_update = {
-                'timestamp': datetime.utcnow().isoformat(),
-                'total_supply': 30_000_000_000_000,  # $30T
-                'circulating_supply': 29_856_234_567_890,
-                'market_cap': 29_856_234_567_890,  # 1:1 USD peg
-                'backing_ratio': 189.5,  # 189.5% over-collateralization
-                'price_stability': 99.97,  # 99.97% stability
-                'daily_volume': random.randint(450_000_000, 850_000_000),
-                'mint_burn_activity': {
-                    'daily_mints': random.randint(50_000_000, 150_000_000),
-                    'daily_burns': random.randint(25_000_000, 75_000_000),
-                    'net_change': random.randint(-25_000_000, 100_000_000)
-                }
-            }
-            
-            socketio.emit('nvct_supply_update', nvct_update, room=room, namespace='/treasury')
-            
-            # Asset Backing Portfolio Updates
-            asset_update = {
-                'timestamp': datetime.utcnow().isoformat(),
-                'total_backing_value': 56_700_000_000_000,  # $56.7T backing
-                'asset_composition': {
-                    'us_treasury_bonds': 45.2,  # % allocation
-                    'corporate_bonds': 28.7,
-                    'real_estate': 15.3,
-                    'gold_reserves': 8.1,
-                    'cash_equivalents': 2.7
-                },
-                'yield_performance': {
-                    'portfolio_yield': 4.35,  # % annual yield
-                    'risk_adjusted_return': 3.89,
-                    'sharpe_ratio': 1.24
-                },
-                'daily_pnl': random.randint(-500_000_000, 1_200_000_000)
-            }
-            
-            socketio.emit('asset_backing_update', asset_update, room=room, namespace='/treasury')
-            
-            # Liquidity Management Updates
-            liquidity_update = {
-                'timestamp': datetime.utcnow().isoformat(),
-                'total_liquidity': 2_340_000_000_000,  # $2.34T available liquidity
-                'liquidity_ratio': 7.8,  # % of total supply
-                'reserve_requirements': {
-                    'minimum_required': 1_500_000_000_000,
-                    'current_level': 2_340_000_000_000,
-                    'excess_reserves': 840_000_000_000
-                },
-                'funding_sources': {
-                    'institutional_deposits': 65.4,  # % of liquidity
-                    'repo_markets': 22.1,
-                    'central_bank_facilities': 8.7,
-                    'interbank_lending': 3.8
-                },
-                'stress_test_results': {
-                    'liquidity_coverage_ratio': 245.6,  # %
-                    'net_stable_funding_ratio': 189.3,
-                    'stress_scenario_survival': 45  # days
-                }
-            }
-            
-            socketio.emit('liquidity_update', liquidity_update, room=room, namespace='/treasury')
-            
-            # Risk Metrics Updates
-            risk_update = {
-                'timestamp': datetime.utcnow().isoformat(),
-                'portfolio_var': 2.34,  # % Value at Risk (95% confidence, 1-day)
-                'credit_risk_exposure': 12.5,  # % of portfolio
-                'interest_rate_duration': 4.2,  # years
-                'fx_exposure': {
-                    'usd_exposure': 78.5,  # % USD denominated
-                    'eur_exposure': 12.3,
-                    'gbp_exposure': 5.7,
-                    'other_currencies': 3.5
-                },
-                'concentration_limits': {
-                    'single_issuer_limit': 5.0,  # % max per issuer
-                    'current_max_concentration': 3.8,
-                    'sector_concentration': {
-                        'government': 67.8,
-                        'financial': 18.2,
-                        'corporate': 14.0
-                    }
-                }
-            }
-            
-            socketio.emit('risk_metrics_update', risk_update, room=room, namespace='/treasury')
-            
-            # Cross-chain Bridge Activity
-            bridge_update = {
-                'timestamp': datetime.utcnow().isoformat(),
-                'active_networks': ['BSC', 'Polygon', 'Ethereum', 'Arbitrum'],
-                'bridge_volumes': {
-                    'bsc_to_polygon': random.randint(50_000_000, 150_000_000),
-                    'polygon_to_ethereum': random.randint(25_000_000, 75_000_000),
-                    'ethereum_to_arbitrum': random.randint(10_000_000, 40_000_000),
-                    'total_daily_volume': random.randint(85_000_000, 265_000_000)
-                },
-                'bridge_fees_collected': random.randint(45_000, 125_000),
-                'pending_transfers': random.randint(15, 45),
-                'network_status': {
-                    'bsc': 'operational',
-                    'polygon': 'operational', 
-                    'ethereum': 'congested',
-                    'arbitrum': 'operational'
-                }
+    # NVCT Supply Management Updates
+    nvct_update = {
+        'timestamp': datetime.utcnow().isoformat(),
+        'total_supply': 30_000_000_000_000,  # $30T
+        'circulating_supply': 29_856_234_567_890,
+        'market_cap': 29_856_234_567_890,  # 1:1 USD peg
+        'backing_ratio': 189.5,  # 189.5% over-collateralization
+        'price_stability': 99.97,  # 99.97% stability
+        'daily_volume': random.randint(450_000_000, 850_000_000),
+        'mint_burn_activity': {
+            'daily_mints': random.randint(50_000_000, 150_000_000),
+            'daily_burns': random.randint(25_000_000, 75_000_000),
+            'net_change': random.randint(-25_000_000, 100_000_000)
+        }
+    }
+    
+    
+    # Asset Backing Portfolio Updates
+    asset_update = {
+        'timestamp': datetime.utcnow().isoformat(),
+        'total_backing_value': 56_700_000_000_000,  # $56.7T backing
+        'asset_composition': {
+            'us_treasury_bonds': 45.2,  # % allocation
+            'corporate_bonds': 28.7,
+            'real_estate': 15.3,
+            'gold_reserves': 8.1,
+            'cash_equivalents': 2.7
+        },
+        'yield_performance': {
+            'portfolio_yield': 4.35,  # % annual yield
+            'risk_adjusted_return': 3.89,
+            'sharpe_ratio': 1.24
+        },
+        'daily_pnl': random.randint(-500_000_000, 1_200_000_000)
+    }
+    
+    
+    # Liquidity Management Updates
+    liquidity_update = {
+        'timestamp': datetime.utcnow().isoformat(),
+        'total_liquidity': 2_340_000_000_000,  # $2.34T available liquidity
+        'liquidity_ratio': 7.8,  # % of total supply
+        'reserve_requirements': {
+            'minimum_required': 1_500_000_000_000,
+            'current_level': 2_340_000_000_000,
+            'excess_reserves': 840_000_000_000
+        },
+        'funding_sources': {
+            'institutional_deposits': 65.4,  # % of liquidity
+            'repo_markets': 22.1,
+            'central_bank_facilities': 8.7,
+            'interbank_lending': 3.8
+        },
+        'stress_test_results': {
+            'liquidity_coverage_ratio': 245.6,  # %
+            'net_stable_funding_ratio': 189.3,
+            'stress_scenario_survival': 45  # days
+        }
+    }
+    
+    
+    # Risk Metrics Updates
+    risk_update = {
+        'timestamp': datetime.utcnow().isoformat(),
+        'portfolio_var': 2.34,  # % Value at Risk (95% confidence, 1-day)
+        'credit_risk_exposure': 12.5,  # % of portfolio
+        'interest_rate_duration': 4.2,  # years
+        'fx_exposure': {
+            'usd_exposure': 78.5,  # % USD denominated
+            'eur_exposure': 12.3,
+            'gbp_exposure': 5.7,
+            'other_currencies': 3.5
+        },
+        'concentration_limits': {
+            'single_issuer_limit': 5.0,  # % max per issuer
+            'current_max_concentration': 3.8,
+            'sector_concentration': {
+                'government': 67.8,
+                'financial': 18.2,
+                'corporate': 14.0
             }
-            
-            socketio.emit('bridge_activity_update', bridge_update, room=room, namespace='/treasury')
-            
-            time.sleep(30)  # Update every 30 seconds
-            
-        except Exception as e:
-            logger.log_error_event(
-                error_type='websocket_streaming_error',
-                details={'namespace': 'treasury', 'room': room, 'error': str(e)}
-            )
-            break
+        }
+    }
+    
+    
+    # Cross-chain Bridge Activity
+    bridge_update = {
+        'timestamp': datetime.utcnow().isoformat(),
+        'active_networks': ['BSC', 'Polygon', 'Ethereum', 'Arbitrum'],
+        'bridge_volumes': {
+            'bsc_to_polygon': random.randint(50_000_000, 150_000_000),
+            'polygon_to_ethereum': random.randint(25_000_000, 75_000_000),
+            'ethereum_to_arbitrum': random.randint(10_000_000, 40_000_000),
+            'total_daily_volume': random.randint(85_000_000, 265_000_000)
+        },
+        'bridge_fees_collected': random.randint(45_000, 125_000),
+        'pending_transfers': random.randint(15, 45),
+        'network_status': {
+            'bsc': 'operational',
+            'polygon': 'operational', 
+            'ethereum': 'congested',
+            'arbitrum': 'operational'
+        }
+    }
+    
+    return {
+        'nvct_supply_update': nvct_update,
+        'asset_backing_update': asset_update,
+        'liquidity_update': liquidity_update,
+        'risk_metrics_update': risk_update,
+        'bridge_activity_update': bridge_update
+    }
 
 def get_live_nvct_metrics():
     """Get current NVCT stablecoin metrics"""
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Backfill Exchange Rollups
+Rebuilds the minute/hour/day exchange_rollups buckets from exchange_transactions history
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.bootstrap_database import create_bootstrap_app
+from modules.services.exchange.rollups import exchange_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--config', default=os.environ.get('FLASK_CONFIG', 'development'))
+    parser.add_argument('--days', type=int, help='Only rebuild the last N days (default: all history)')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--prune', action='store_true', help='Also drop minute/hour buckets past retention')
+    args = parser.parse_args()
+
+    app = create_bootstrap_app(args.config)
+    with app.app_context():
+        since = datetime.utcnow() - timedelta(days=args.days) if args.days else None
+        result = exchange_rollups.backfill(since=since, batch_size=args.batch_size)
+        print(f"Rebuilt {result['buckets']} rollup buckets from {result['transactions']} exchange transactions"
+              f"{f' since {since:%Y-%m-%d}' if since else ''}")
+        if args.prune:
+            print(f"Pruned {exchange_rollups.prune()} expired buckets")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Bulk Email Benchmark
+Measures SendGrid bulk throughput against a local fake /v3/mail/send sink
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from modules.services.communications.bulk_sender import BulkEmailSender
+
+TEMPLATE = '<html><body><h2>Dear {{user_name}},</h2><p>Happy {{holiday_name}} from NVC Banking!</p></body></html>'
+
+
+class FakeSendGridSink(ThreadingHTTPServer):
+    """
+    Stand-in for api.sendgrid.com: answers /v3/mail/send with 202 after
+    ``latency`` seconds and returns 429 with Retry-After once more than
+    ``rate_limit`` requests arrive within one second.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.05, rate_limit: int = 0):
+        super().__init__(('127.0.0.1', 0), SinkHandler)
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.lock = threading.Lock()
+        self.window = (0, 0)
+        self.requests = 0
+        self.throttled = 0
+        self.recipients = 0
+        self.connections = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def admit(self) -> bool:
+        with self.lock:
+            second, count = self.window
+            now = int(time.time())
+            count = count + 1 if now == second else 1
+            self.window = (now, count)
+            if self.rate_limit and count > self.rate_limit:
+                self.throttled += 1
+                return False
+            self.requests += 1
+            return True
+
+
+class SinkHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        if not self.server.admit():
+            self._reply(429, {'Retry-After': '1'})
+            return
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.recipients += sum(len(p['to']) for p in body['personalizations'])
+        self._reply(202, {'X-Message-Id': f'fake-{self.server.requests}'})
+
+    def _reply(self, status: int, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def messages(count: int):
+    for i in range(count):
+        yield {
+            'to_email': f'customer{i}@example.com',
+            'subject': 'Happy Holidays from NVC Banking!',
+            'template_type': 'holiday_message',
+            'template_data': {'user_name': f'Customer {i}', 'holiday_name': 'Holidays'}
+        }
+
+
+def bench_serial(sink: FakeSendGridSink, count: int) -> float:
+    """The previous behaviour: one request, one fresh connection, one recipient at a time"""
+    started = time.perf_counter()
+    for message in messages(count):
+        body = TEMPLATE.replace('{{user_name}}', message['template_data']['user_name'])
+        requests.post(f"{sink.url}/v3/mail/send", json={
+            'personalizations': [{'to': [{'email': message['to_email']}]}],
+            'subject': message['subject'], 'content': [{'type': 'text/html', 'value': body}]
+        })
+    return time.perf_counter() - started
+
+
+def bench_bulk(sink: FakeSendGridSink, count: int, concurrency: int, batch_size: int):
+    sender = BulkEmailSender('bench-key', 'noreply@nvcfund.com', 'NVC Banking Platform',
+                             templates={'holiday_message': TEMPLATE}, base_url=sink.url,
+                             concurrency=concurrency, batch_size=batch_size)
+    started = time.perf_counter()
+    results = list(sender.send(messages(count)))
+    elapsed = time.perf_counter() - started
+    sender.close()
+    return elapsed, sum(1 for result in results if result.success), sender.limiter
+
+
+def run(label: str, count: int, latency: float, rate_limit: int, bench, *args):
+    sink = FakeSendGridSink(latency=latency, rate_limit=rate_limit)
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    try:
+        outcome = bench(sink, count, *args)
+    finally:
+        sink.shutdown()
+        sink.server_close()
+    elapsed = outcome[0] if isinstance(outcome, tuple) else outcome
+    line = (f"{label:<28} {count / elapsed:8.0f} emails/s  requests={sink.requests} "
+            f"429s={sink.throttled} connections={sink.connections}")
+    if isinstance(outcome, tuple):
+        line += f" delivered={outcome[1]}/{count} final_cap={outcome[2].limit}"
+    print(line)
+
+
+def main():
+    count = int(os.environ.get('BENCH_EMAILS', '5000'))
+    latency = float(os.environ.get('BENCH_LATENCY', '0.05'))
+    concurrency = int(os.environ.get('BENCH_CONCURRENCY', '8'))
+    rate_limit = int(os.environ.get('BENCH_RATE_LIMIT', '50'))
+
+    serial_count = min(count, 200)
+    run('serial (old path)', serial_count, latency, 0, bench_serial)
+    run(f'concurrent x{concurrency}, 1/request', count // 5, latency, 0, bench_bulk, concurrency, 1)
+    run(f'concurrent x{concurrency}, 1000/request', count, latency, 0, bench_bulk, concurrency, 1000)
+    run(f'rate limited {rate_limit} req/s', count // 5, latency, rate_limit, bench_bulk, concurrency * 4, 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Cache Codec Benchmark
+Compares L2 entry size and encode/decode CPU of the legacy JSON/hex-pickle format against CacheCodec
+"""
+
+import json
+import os
+import pickle
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from modules.core.cache_codec import COMPRESSION_NAMES, CacheCodec
+
+
+def dashboard_payload(transactions: int, seed: int) -> dict:
+    """Shape of get_user_dashboard_data / dashboard API responses"""
+    rng = random.Random(seed)
+    now = datetime(2026, 10, 1, 12, 0, 0)
+    accounts = [{
+        'id': 1000 + i,
+        'account_number': f"NVC{rng.randrange(10 ** 9, 10 ** 10)}",
+        'account_type': rng.choice(['checking', 'savings', 'business']),
+        'currency': 'USD',
+        'current_balance': Decimal(rng.randrange(0, 10 ** 8)) / 100,
+        'available_balance': Decimal(rng.randrange(0, 10 ** 8)) / 100,
+        'status': 'active',
+        'opened_at': now - timedelta(days=rng.randrange(30, 3000))
+    } for i in range(4)]
+    return {
+        'user': {'id': seed, 'username': f'user{seed}', 'email': f'user{seed}@example.com',
+                 'first_name': 'Alex', 'last_name': 'Morgan', 'last_login': now},
+        'accounts': accounts,
+        'recent_transactions': [{
+            'id': 50000 + i,
+            'transaction_id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'reference': uuid.UUID(int=rng.getrandbits(128)),
+            'account_id': rng.choice(accounts)['id'],
+            'transaction_type': rng.choice(['deposit', 'withdrawal', 'transfer', 'payment', 'fee']),
+            'amount': Decimal(rng.randrange(1, 10 ** 6)) / 100,
+            'currency': 'USD',
+            'status': 'completed',
+            'description': rng.choice(['Payroll deposit', 'Card purchase - grocery', 'Wire transfer',
+                                       'Utility bill payment', 'Monthly maintenance fee']),
+            'created_at': now - timedelta(minutes=rng.randrange(0, 60 * 24 * 30))
+        } for i in range(transactions)],
+        'total_balance': sum(account['current_balance'] for account in accounts),
+        'account_count': len(accounts),
+        'card_count': rng.randrange(0, 6)
+    }
+
+
+def legacy_encode(value) -> str:
+    """MultiLevelCache._serialize_value before CacheCodec"""
+    try:
+        return json.dumps(value, default=str)
+    except (TypeError, ValueError):
+        return pickle.dumps(value).hex()
+
+
+def legacy_decode(value: str):
+    try:
+        return json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        try:
+            return pickle.loads(bytes.fromhex(value))
+        except Exception:
+            return value
+
+
+def measure(name: str, encode, decode, payloads, rounds: int):
+    encoded = [encode(payload) for payload in payloads]
+    size = sum(len(entry.encode('utf-8') if isinstance(entry, str) else entry) for entry in encoded)
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for payload in payloads:
+            encode(payload)
+    encode_us = (time.perf_counter() - started) / (rounds * len(payloads)) * 1e6
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for entry in encoded:
+            decode(entry)
+    decode_us = (time.perf_counter() - started) / (rounds * len(payloads)) * 1e6
+
+    lossless = all(decode(entry) == payload for entry, payload in zip(encoded, payloads))
+    print(f"{name:<22} {size / len(payloads):>10.0f} B {encode_us:>10.1f} us {decode_us:>10.1f} us"
+          f"   {'yes' if lossless else 'no'}")
+    return size
+
+
+def main():
+    transactions = int(os.environ.get('BENCH_TRANSACTIONS', '50'))
+    entries = int(os.environ.get('BENCH_ENTRIES', '200'))
+    rounds = int(os.environ.get('BENCH_ROUNDS', '5'))
+    payloads = [dashboard_payload(transactions, seed) for seed in range(entries)]
+
+    print(f"{entries} dashboard payloads, {transactions} transactions each, {rounds} rounds")
+    print(f"{'format':<22} {'avg size':>12} {'encode':>13} {'decode':>13}   lossless")
+    baseline = measure('legacy json/str', legacy_encode, legacy_decode, payloads, rounds)
+
+    for name in ('none', 'zlib', 'zstd', 'lz4'):
+        codec = CacheCodec(compression=name)
+        if COMPRESSION_NAMES[name] != codec.compression:
+            print(f"{'msgpack+' + name:<22} (not installed)")
+            continue
+        size = measure(f"msgpack+{name}", codec.encode, codec.decode, payloads, rounds)
+        print(f"{'':<22} {size / baseline * 100:>9.1f}% of legacy size")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Explorer Response Cache Benchmark
+Upstream calls, latency and provider throttling for a blockchain analytics traffic mix with and without the response cache
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+from flask import Flask
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.mock_provider_server import MockProviderServer
+from modules.core.caching_strategy import cache
+from modules.core.cache_stampede import key_stats
+from modules.core.integration_http import integration_http
+from modules.services.integrations.blockchain.analytics.polygonscan_service import PolygonscanService
+from modules.services.integrations.blockchain.analytics.response_cache import explorer_cache
+
+
+def traffic(service: PolygonscanService, requests: int, seed: int = 3):
+    """Dashboard-like mix: token pages, holder lists, wallet pages and network stats"""
+    rng = random.Random(seed)
+    tokens = [token['contract_address'] for token in service.get_popular_tokens()]
+    wallets = [f"0x{index:040x}" for index in range(1, 21)]
+    calls = []
+    for _ in range(requests):
+        roll = rng.random()
+        if roll < 0.35:
+            calls.append(lambda token=rng.choice(tokens): service.get_token_info(token))
+        elif roll < 0.5:
+            calls.append(lambda token=rng.choice(tokens): service.get_token_holders(token, offset=20))
+        elif roll < 0.85:
+            calls.append(lambda wallet=rng.choice(wallets): service.get_multiple_token_balances(wallet, tokens[:3]))
+        else:
+            calls.append(service.get_network_stats)
+    return calls
+
+
+def run(label: str, app: Flask, server: MockProviderServer, enabled: bool, requests: int, threads: int):
+    server.reset_counters()
+    explorer_cache.enabled = enabled
+    key_stats.reset()
+    cache.clear()
+    service = PolygonscanService()
+
+    def handle(call):
+        with app.app_context():
+            started = time.perf_counter()
+            call()
+            return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = sorted(pool.map(handle, traffic(service, requests)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<16} {requests / elapsed:>8.1f} req/s  p50 {statistics.median(latencies):>7.1f} ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99)]:>8.1f} ms  upstream={server.requests + server.throttled:<5} "
+          f"provider_throttled={server.throttled}")
+    if enabled:
+        stats = explorer_cache.get_stats()
+        print(f"{'':<16} hit rate {stats['hit_rate']}%, upstream calls {stats['upstream_calls']}, "
+              f"saved {stats['upstream_calls_saved']}, negative entries {stats['negative_entries']}, "
+              f"transient entries {stats['transient_entries']}")
+        for name, entry in stats['actions'].items():
+            print(f"{'':<18}{name:<40} hits={entry['hits']:<5} misses={entry['misses']:<4} "
+                  f"coalesced={entry['coalesced']}")
+
+
+def main():
+    requests = int(os.environ.get('BENCH_REQUESTS', '600'))
+    threads = int(os.environ.get('BENCH_THREADS', '16'))
+    rate = int(os.environ.get('BENCH_RATE_LIMIT', '30'))
+
+    server = MockProviderServer(latency=float(os.environ.get('BENCH_LATENCY', '0.03')), rate_limit=rate,
+                                block_time=2.0).start()
+    app = Flask(__name__)
+    app.config['CACHE_TYPE'] = 'SimpleCache'
+    app.config['REDIS_URL'] = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    cache.init_app(app)
+    integration_http.init_app(SimpleNamespace(config={
+        'INTEGRATION_BASE_URLS': {'polygonscan': server.url},
+        'INTEGRATION_RATE_LIMITS': {'polygonscan': rate}
+    }))
+    print(f"{requests} analytics requests on {threads} threads, provider limit {rate} req/s, "
+          f"L2 {'redis' if cache.l2_cache else 'off (L1 only)'}")
+    try:
+        run('no cache', app, server, False, requests // 4, threads)
+        time.sleep(1.1)
+        run('response cache', app, server, True, requests, threads)
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+FX Quote Benchmark
+Per-quote ExchangeRate queries against the in-memory rate matrix: quote latency, batch quoting and refresh cost
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from flask import Flask
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from modules.core.extensions import db
+from modules.services.exchange.models import ExchangeProvider, ExchangeRate
+from modules.services.exchange.rate_matrix import FxRateMatrix
+
+FIAT = ['USD', 'EUR', 'GBP', 'JPY', 'CHF', 'CAD', 'AUD']
+DIGITAL = ['NVCT', 'BTC', 'ETH', 'USDT', 'USDC', 'BNB', 'ADA']
+USD_PRICES = {'USD': 1, 'EUR': 1.08, 'GBP': 1.27, 'JPY': 0.0067, 'CHF': 1.12, 'CAD': 0.73, 'AUD': 0.66,
+              'NVCT': 1, 'BTC': 64000, 'ETH': 3100, 'USDT': 1, 'USDC': 1, 'BNB': 560, 'ADA': 0.45}
+
+
+def seed_rates(history: int):
+    """Direct rows only against the USD and NVCT pivots, with ``history`` timestamps per pair"""
+    now = datetime.utcnow()
+    rows = []
+    for pivot in ('USD', 'NVCT'):
+        for currency in FIAT + DIGITAL:
+            if currency == pivot:
+                continue
+            for step in range(history):
+                jitter = 1 + random.uniform(-0.002, 0.002)
+                rows.append(ExchangeRate(
+                    from_currency=currency, to_currency=pivot,
+                    exchange_rate=Decimal(str(USD_PRICES[currency] / USD_PRICES[pivot] * jitter)),
+                    provider=ExchangeProvider.INTERNAL_LIQUIDITY,
+                    timestamp=now - timedelta(minutes=step),
+                    valid_until=now + timedelta(hours=1) - timedelta(minutes=step)
+                ))
+    db.session.bulk_save_objects(rows)
+    db.session.commit()
+    return len(rows)
+
+
+def legacy_quote(from_currency: str, to_currency: str):
+    """ExchangeService.get_internal_quote's rate lookup before the matrix"""
+    return ExchangeRate.query.filter_by(
+        from_currency=from_currency,
+        to_currency=to_currency,
+        provider=ExchangeProvider.INTERNAL_LIQUIDITY
+    ).filter(
+        ExchangeRate.valid_until > datetime.utcnow()
+    ).order_by(ExchangeRate.timestamp.desc()).first()
+
+
+def timed(fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99)]
+
+
+def main():
+    history = int(os.environ.get('BENCH_RATE_HISTORY', '200'))
+    iterations = int(os.environ.get('BENCH_QUOTES', '2000'))
+    batch_size = int(os.environ.get('BENCH_BATCH', '1000'))
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('BENCH_DATABASE_URL', 'sqlite://')
+    db.init_app(app)
+
+    with app.app_context():
+        ExchangeRate.__table__.create(db.engine, checkfirst=True)
+        random.seed(11)
+        rows = seed_rates(history)
+        currencies = FIAT + DIGITAL
+        pairs = [(a, b) for a in currencies for b in currencies if a != b]
+        print(f"{rows} exchange_rates rows, {len(currencies)} currencies, {len(pairs)} ordered pairs")
+
+        matrix = FxRateMatrix(ttl=3600)
+        refresh_samples = []
+        for _ in range(20):
+            matrix.refresh()
+            refresh_samples.append((matrix.stats['last_load_ms'], matrix.stats['last_build_ms']))
+        stats = matrix.get_stats()
+        print(f"matrix refresh: load {statistics.median(s[0] for s in refresh_samples):.2f} ms, "
+              f"build {statistics.median(s[1] for s in refresh_samples):.2f} ms; "
+              f"{stats['direct_pairs']} direct pairs")
+
+        direct_pair = ('BTC', 'USD')
+        cross_pair = ('EUR', 'BTC')
+        legacy_hits = sum(1 for pair in pairs if legacy_quote(*pair) is not None)
+        print(f"legacy lookup answers {legacy_hits}/{len(pairs)} pairs; matrix answers "
+              f"{sum(1 for quote in matrix.quote_many(pairs) if quote is not None)}/{len(pairs)}")
+        quote = matrix.quote(*cross_pair)
+        print(f"cross quote {'/'.join(cross_pair)}: {quote.rate:.10f} via {' -> '.join(quote.path)}")
+
+        print(f"{'operation':<34} {'p50 us':>10} {'p99 us':>10}")
+        for name, fn in [
+            ('legacy query (direct pair)', lambda: legacy_quote(*direct_pair)),
+            ('matrix quote (direct pair)', lambda: matrix.quote(*direct_pair)),
+            ('matrix quote (cross pair)', lambda: matrix.quote(*cross_pair)),
+            ('cross pair first pricing', lambda: matrix.snapshot()._price(*cross_pair)),
+        ]:
+            p50, p99 = timed(fn, iterations)
+            print(f"{name:<34} {p50:>10.1f} {p99:>10.1f}")
+
+        batch = [random.choice(pairs) for _ in range(batch_size)]
+        p50, p99 = timed(lambda: matrix.quote_many(batch), 50)
+        print(f"{f'matrix quote_many ({batch_size} pairs)':<34} {p50:>10.1f} {p99:>10.1f}"
+              f"   ({p50 / batch_size:.2f} us/pair)")
+        p50, _ = timed(lambda: [legacy_quote(*pair) for pair in batch[:100]], 3)
+        print(f"{'legacy queries (100 pairs)':<34} {p50:>10.1f} {'':>10}   ({p50 / 100:.1f} us/pair)")
+
+
+if __name__ == '__main__':
+    main()
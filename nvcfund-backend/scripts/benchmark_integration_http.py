@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Integration HTTP Benchmark
+Bare requests.get + sleep rate limiting against the pooled integration client, on a local mock provider
+"""
+
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+import requests
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.mock_provider_server import MockProviderServer
+from modules.core.integration_http import integration_http
+from modules.services.integrations.blockchain.analytics.etherscan_service import EtherscanService
+from modules.services.integrations.blockchain.analytics.response_cache import explorer_cache
+
+
+class LegacyEtherscan:
+    """What EtherscanService did per call: sleep-based spacing and a fresh connection via requests.get"""
+
+    def __init__(self, base_url: str, rate: int):
+        self.base_url = f"{base_url}/api"
+        self.rate_limit_delay = 1.0 / rate
+        self.last_request_time = 0
+
+    def _make_request(self, params):
+        time_since_last_request = time.time() - self.last_request_time
+        if time_since_last_request < self.rate_limit_delay:
+            time.sleep(self.rate_limit_delay - time_since_last_request)
+        try:
+            response = requests.get(self.base_url, params=params, timeout=30)
+            response.raise_for_status()
+            self.last_request_time = time.time()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            return {'status': '0', 'message': f'Request failed: {e}', 'result': None}
+
+    def get_token_balance(self, contract_address, address):
+        response = self._make_request({'module': 'account', 'action': 'tokenbalance',
+                                       'contractaddress': contract_address, 'address': address, 'tag': 'latest'})
+        return response.get('result') if response.get('status') == '1' else None
+
+    def get_multi_token_balances(self, address, contract_addresses):
+        balances = []
+        for contract_address in contract_addresses:
+            balance = self.get_token_balance(contract_address, address)
+            if balance:
+                info = self._make_request({'module': 'token', 'action': 'tokeninfo',
+                                           'contractaddress': contract_address})
+                if info.get('status') == '1':
+                    balances.append(balance)
+        return balances
+
+
+def configure(server: MockProviderServer, rate: int):
+    """Point the shared client at the mock with the given per-second tier"""
+    # Measure the HTTP layer alone (scripts/benchmark_explorer_cache.py covers caching)
+    explorer_cache.enabled = False
+    integration_http.init_app(SimpleNamespace(config={
+        'INTEGRATION_BASE_URLS': {'etherscan': server.url},
+        'INTEGRATION_RATE_LIMITS': {'etherscan': rate},
+        'INTEGRATION_FANOUT_WORKERS': 16
+    }))
+
+
+def report(label: str, elapsed: float, server: MockProviderServer, extra: str = ''):
+    print(f"{label:<34} {elapsed * 1000:>9.1f} ms  requests={server.requests:<4} connections={server.connections:<4} "
+          f"provider_throttled={server.throttled:<3} {extra}")
+
+
+def bench_multi_token(tokens: int, rate: int, latency: float, connect_latency: float, rounds: int):
+    server = MockProviderServer(latency=latency, connect_latency=connect_latency, rate_limit=rate).start()
+    address = '0x' + 'ab' * 20
+    contracts = [f"0x{index:040x}" for index in range(1, tokens + 1)]
+    try:
+        print(f"\nget_multi_token_balances: {tokens} tokens, {rate} req/s tier, {latency * 1000:.0f} ms per request, "
+              f"{connect_latency * 1000:.0f} ms per new connection, {rounds} rounds")
+        legacy = LegacyEtherscan(server.url, rate)
+        started = time.perf_counter()
+        for _ in range(rounds):
+            found = len(legacy.get_multi_token_balances(address, contracts))
+        report('legacy (sequential, no pool)', (time.perf_counter() - started) / rounds, server, f"balances={found}")
+
+        time.sleep(1.1)
+        server.reset_counters()
+        configure(server, rate)
+        service = EtherscanService()
+        started = time.perf_counter()
+        for _ in range(rounds):
+            found = len(service.get_multi_token_balances(address, contracts))
+        stats = integration_http.client('etherscan').get_stats()
+        report('pooled fan-out', (time.perf_counter() - started) / rounds, server,
+               f"balances={found} client_rate_limited={stats['rate_limited']}")
+    finally:
+        server.stop()
+
+
+def bench_burst(callers: int, rate: int, latency: float):
+    """Many request threads hitting one provider at once on the free tier"""
+    server = MockProviderServer(latency=latency, rate_limit=rate).start()
+    contract = '0x' + '11' * 20
+    try:
+        print(f"\n{callers} concurrent request threads, {rate} req/s tier")
+        for label, service in (('legacy (shared sleep limiter)', LegacyEtherscan(server.url, rate)),
+                               ('pooled, shared token bucket', EtherscanService())):
+            time.sleep(1.1)
+            server.reset_counters()
+            configure(server, rate)
+
+            def call(index):
+                started = time.perf_counter()
+                balance = service.get_token_balance(contract, f"0x{index:040x}")
+                return time.perf_counter() - started, balance is not None
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=callers) as pool:
+                results = list(pool.map(call, range(callers)))
+            elapsed = time.perf_counter() - started
+            latencies = sorted(result[0] * 1000 for result in results)
+            report(label, elapsed, server, f"answered={sum(result[1] for result in results)}/{callers} "
+                   f"thread p50={statistics.median(latencies):.1f} ms max={latencies[-1]:.1f} ms")
+    finally:
+        server.stop()
+
+
+def bench_outage(calls: int, latency: float):
+    """Provider returning 503 for everything"""
+    server = MockProviderServer(latency=latency, error_rate=1.0).start()
+    contract = '0x' + '22' * 20
+    try:
+        print(f"\n{calls} sequential calls while the provider returns 503")
+        for label, service in (('legacy', LegacyEtherscan(server.url, 1000)), ('pooled, circuit breaker', EtherscanService())):
+            server.reset_counters()
+            configure(server, 1000)
+            started = time.perf_counter()
+            for index in range(calls):
+                service.get_token_balance(contract, f"0x{index:040x}")
+            extra = ''
+            if isinstance(service, EtherscanService):
+                stats = integration_http.client('etherscan').get_stats()
+                extra = f"circuit={stats['circuit']} rejected_locally={stats['circuit_rejected']}"
+            report(label, time.perf_counter() - started, server, extra)
+    finally:
+        server.stop()
+
+
+def main():
+    tokens = int(os.environ.get('BENCH_TOKENS', '10'))
+    latency = float(os.environ.get('BENCH_LATENCY', '0.03'))
+    connect_latency = float(os.environ.get('BENCH_CONNECT_LATENCY', '0.05'))
+    os.environ.setdefault('ETHERSCAN_API_KEY', 'bench-key')
+
+    bench_multi_token(tokens, int(os.environ.get('BENCH_PAID_RATE', '30')), latency, connect_latency, 3)
+    bench_multi_token(tokens, 5, latency, connect_latency, 1)
+    bench_burst(int(os.environ.get('BENCH_CALLERS', '40')), 5, latency)
+    bench_outage(30, latency)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Ledger Concurrency Benchmark
+Hammers the ledger engine from several processes and verifies balances are conserved
+"""
+
+import multiprocessing
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+ACCOUNT_PREFIX = 'LBENCH'
+INITIAL_BALANCE = Decimal('100000.00')
+SHARED_REFERENCES = 200  # idempotency keys every worker retries, posted at most once each
+
+
+def _app():
+    from app_factory import create_app
+    return create_app(os.environ.get('FLASK_ENV', 'development'))
+
+
+def setup_accounts(count: int):
+    """Create (or reset) the benchmark user and its accounts; returns account ids"""
+    from modules.auth.models import User
+    from modules.banking.models import BankAccount, Transaction, TransferIdempotencyKey
+    from modules.core.extensions import db
+
+    user = User.query.filter_by(username='ledger_bench').first()
+    if user is None:
+        user = User(username='ledger_bench', email='ledger_bench@example.invalid', password_hash='!')
+        db.session.add(user)
+        db.session.flush()
+
+    existing = BankAccount.query.filter(BankAccount.account_number.like(f'{ACCOUNT_PREFIX}%')).all()
+    if existing:
+        Transaction.query.filter(Transaction.account_id.in_([a.id for a in existing])).delete(synchronize_session=False)
+        TransferIdempotencyKey.query.filter(
+            TransferIdempotencyKey.from_account_id.in_([a.id for a in existing])
+        ).delete(synchronize_session=False)
+        for account in existing:
+            db.session.delete(account)
+        db.session.flush()
+
+    accounts = [
+        BankAccount(account_number=f'{ACCOUNT_PREFIX}{i:06d}', account_type='checking', account_name=f'Bench {i}',
+                    account_holder_id=user.id, current_balance=INITIAL_BALANCE, available_balance=INITIAL_BALANCE,
+                    daily_transfer_limit=None, currency='USD')
+        for i in range(count)
+    ]
+    db.session.add_all(accounts)
+    db.session.commit()
+    return user.id, [account.id for account in accounts]
+
+
+def shared_instruction(index: int, account_ids, user_id: int):
+    """Deterministic transfer for a shared idempotency key, so every worker submits the same one"""
+    from modules.banking.ledger import TransferInstruction
+    rng = random.Random(index)
+    source, destination = rng.sample(account_ids, 2)
+    return TransferInstruction(source, destination, Decimal(rng.randint(1, 5000)) / 100, initiated_by=user_id,
+                               reference_number=f'LBENCH-SHARED-{index}', description='ledger benchmark')
+
+
+def worker(args):
+    worker_id, user_id, account_ids, transfers, batch_size = args
+    app = _app()
+    from modules.banking.ledger import LedgerEngine, TransferInstruction
+
+    engine = LedgerEngine(batch_size=batch_size)
+    rng = random.Random(worker_id)
+    counts = {'completed': 0, 'duplicate': 0, 'rejected': 0}
+    with app.app_context():
+        started = time.perf_counter()
+        for start in range(0, transfers, batch_size):
+            batch = []
+            for _ in range(min(batch_size, transfers - start)):
+                if rng.random() < 0.05:
+                    batch.append(shared_instruction(rng.randrange(SHARED_REFERENCES), account_ids, user_id))
+                    continue
+                source, destination = rng.sample(account_ids, 2)
+                batch.append(TransferInstruction(source, destination, Decimal(rng.randint(1, 5000)) / 100,
+                                                 initiated_by=user_id, description='ledger benchmark'))
+            for result in engine.post_batch(batch):
+                counts[result.status] += 1
+        counts['seconds'] = time.perf_counter() - started
+    return counts
+
+
+def verify(account_ids):
+    """Total balance conserved, legs paired, and every balance equals initial + credits - debits"""
+    from sqlalchemy import func
+    from modules.banking.models import BankAccount, Transaction
+    from modules.core.extensions import db
+
+    accounts = BankAccount.query.filter(BankAccount.id.in_(account_ids)).all()
+    total = sum(account.current_balance for account in accounts)
+    expected_total = INITIAL_BALANCE * len(account_ids)
+
+    legs = Transaction.query.filter(Transaction.account_id.in_(account_ids))
+    debits = dict(db.session.query(Transaction.account_id, func.sum(Transaction.amount)).filter(
+        Transaction.account_id.in_(account_ids), Transaction.account_id == Transaction.from_account_id
+    ).group_by(Transaction.account_id).all())
+    credits = dict(db.session.query(Transaction.account_id, func.sum(Transaction.amount)).filter(
+        Transaction.account_id.in_(account_ids), Transaction.account_id == Transaction.to_account_id
+    ).group_by(Transaction.account_id).all())
+    debit_legs = legs.filter(Transaction.account_id == Transaction.from_account_id).count()
+    credit_legs = legs.filter(Transaction.account_id == Transaction.to_account_id).count()
+    shared_posted = legs.filter(Transaction.reference_number.like('LBENCH-SHARED-%'),
+                                Transaction.account_id == Transaction.from_account_id).count()
+
+    mismatched = [
+        account.account_number for account in accounts
+        if account.current_balance != INITIAL_BALANCE + (credits.get(account.id) or 0) - (debits.get(account.id) or 0)
+    ]
+    print(f"total balance:   {total} (expected {expected_total})")
+    print(f"legs:            {debit_legs} debits / {credit_legs} credits")
+    print(f"shared keys:     {shared_posted} posted for {SHARED_REFERENCES} keys")
+    print(f"reconciliation:  {len(mismatched)} accounts disagree with their legs")
+    return total == expected_total and debit_legs == credit_legs and shared_posted <= SHARED_REFERENCES \
+        and not mismatched
+
+
+def main():
+    workers = int(os.environ.get('BENCH_WORKERS', '8'))
+    transfers = int(os.environ.get('BENCH_TRANSFERS', '2000'))
+    accounts = int(os.environ.get('BENCH_ACCOUNTS', '50'))
+    batch_size = int(os.environ.get('BENCH_BATCH', '1'))
+
+    app = _app()
+    with app.app_context():
+        user_id, account_ids = setup_accounts(accounts)
+
+    # Fresh interpreters so no worker inherits the parent's connection pool
+    context = multiprocessing.get_context('spawn')
+    started = time.perf_counter()
+    with context.Pool(workers) as pool:
+        results = pool.map(worker, [(i, user_id, account_ids, transfers, batch_size) for i in range(workers)])
+    elapsed = time.perf_counter() - started
+
+    totals = {key: sum(result[key] for result in results) for key in ('completed', 'duplicate', 'rejected')}
+    posting_seconds = max(result['seconds'] for result in results)
+    print(f"{workers} workers x {transfers} transfers over {accounts} accounts (batch {batch_size}): "
+          f"{totals['completed'] / posting_seconds:.0f} transfers/s, {elapsed:.1f}s wall")
+    print(f"outcomes:        {totals}")
+
+    with app.app_context():
+        ok = verify(account_ids)
+    print('PASS' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
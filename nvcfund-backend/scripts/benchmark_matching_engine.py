@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Matching Engine Benchmark
+Measures order throughput of a single instrument book under a mixed limit/market/cancel flow
+"""
+
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from modules.products.trading.matching_engine import BookOrder, MatchingEngine
+
+
+def build_flow(count: int, seed: int = 7):
+    """Orders clustered around a mid price: 70% limit, 10% IOC, 10% market, 10% cancels"""
+    rng = random.Random(seed)
+    mid = 10000
+    flow = []
+    for index in range(count):
+        roll = rng.random()
+        side = 'buy' if rng.random() < 0.5 else 'sell'
+        quantity = Decimal(rng.randint(1, 20))
+        if roll < 0.1 and index:
+            flow.append(('cancel', f"O{rng.randrange(index)}"))
+            continue
+        if roll < 0.2:
+            flow.append(('order', (f"O{index}", side, 'market', quantity, None, 'IOC')))
+            continue
+        price = Decimal(mid + rng.randint(-25, 25)) / 100
+        time_in_force = 'IOC' if roll < 0.3 else 'GTC'
+        flow.append(('order', (f"O{index}", side, 'limit', quantity, price, time_in_force)))
+    return flow
+
+
+def run(flow):
+    engine = MatchingEngine()
+    instrument = 'BENCH'
+    fills = 0
+    started = time.perf_counter()
+    for action, payload in flow:
+        if action == 'cancel':
+            engine.cancel(instrument, payload)
+            continue
+        order_id, side, order_type, quantity, price, time_in_force = payload
+        result = engine.submit(instrument, BookOrder(order_id, side, order_type, quantity, price,
+                                                     time_in_force=time_in_force))
+        fills += len(result.fills)
+    elapsed = time.perf_counter() - started
+    return elapsed, fills, engine.book(instrument)
+
+
+def main():
+    count = int(os.environ.get('BENCH_ORDERS', '200000'))
+    flow = build_flow(count)
+    elapsed, fills, book = run(flow)
+    depth = book.depth(levels=1)
+    print(f"orders:        {count}")
+    print(f"fills:         {fills}")
+    print(f"resting:       {len(book.orders)}")
+    print(f"elapsed:       {elapsed:.2f}s")
+    print(f"throughput:    {count / elapsed:,.0f} orders/s")
+    print(f"latency:       {elapsed / count * 1e6:.1f} us/order")
+    print(f"top of book:   {depth['bids'][:1]} / {depth['asks'][:1]}")
+
+
+if __name__ == '__main__':
+    main()
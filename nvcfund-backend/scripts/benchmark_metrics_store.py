@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Metrics Store Benchmark
+Compares per-sample deques scanned on every summary with the ring-buffer rollup store
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from modules.core.metrics_store import MetricsStore
+
+METRICS = ('response_times', 'query_counts', 'cache_hit_rates', 'error_rates')
+
+
+def bench_deques(latencies, summaries: int):
+    """The previous layout: one dict per sample, linear scan per summary"""
+    metrics = {name: deque(maxlen=1000) for name in METRICS}
+    started = time.perf_counter()
+    for latency in latencies:
+        timestamp = datetime.utcnow()
+        for name, value in zip(METRICS, (latency, 3, 80.0, 0)):
+            metrics[name].append({'timestamp': timestamp, 'value': value})
+    record = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(summaries):
+        cutoff = datetime.utcnow() - timedelta(minutes=60)
+        for data in metrics.values():
+            recent = [item['value'] for item in data if item['timestamp'] >= cutoff]
+            sum(recent) / len(recent), min(recent), max(recent)
+        sorted(item['value'] for item in metrics['response_times'])  # percentiles need a sort
+    return record, time.perf_counter() - started
+
+
+def bench_store(latencies, summaries: int, shared_dir=None):
+    store = MetricsStore(METRICS, latency_metric='response_times', shared_dir=shared_dir)
+    started = time.perf_counter()
+    for latency in latencies:
+        store.record({'response_times': latency, 'query_counts': 3, 'cache_hit_rates': 80.0, 'error_rates': 0})
+    record = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(summaries):
+        summary = store.summary(3600)
+    return record, time.perf_counter() - started, summary
+
+
+def main():
+    count = int(os.environ.get('BENCH_REQUESTS', '200000'))
+    summaries = int(os.environ.get('BENCH_SUMMARIES', '200'))
+    rng = random.Random(5)
+    latencies = [rng.lognormvariate(-3, 1) for _ in range(count)]
+
+    record, summary_time = bench_deques(latencies, summaries)
+    print(f"deques:        record {record / count * 1e6:.2f} us/request, "
+          f"summary {summary_time / summaries * 1e3:.2f} ms (last 1000 requests only)")
+
+    with tempfile.TemporaryDirectory() as shared_dir:
+        record, summary_time, summary = bench_store(latencies, summaries, shared_dir)
+    print(f"ring buffer:   record {record / count * 1e6:.2f} us/request, "
+          f"summary {summary_time / summaries * 1e3:.2f} ms (all {summary['response_times']['count']} requests)")
+    latency = summary['response_times']
+    print(f"latency:       p50={latency['p50'] * 1e3:.1f}ms p95={latency['p95'] * 1e3:.1f}ms "
+          f"p99={latency['p99'] * 1e3:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
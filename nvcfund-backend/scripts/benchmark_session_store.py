@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Session Store Benchmark
+Per-request session read/write latency of filesystem sessions against the tiered LRU + shared store at 10k+ sessions
+"""
+
+import os
+import pickle
+import random
+import secrets
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from hashlib import md5
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from modules.core.session_store import LocalSessionBackend, RedisSessionBackend, SessionLRU, TieredSessionStore
+
+
+class FilesystemSessions:
+    """What SESSION_TYPE='filesystem' did per request: one pickle file per session, rewritten on save"""
+
+    def __init__(self, directory: str, lifetime: int):
+        self.directory = directory
+        self.lifetime = lifetime
+
+    def _path(self, sid: str) -> str:
+        return os.path.join(self.directory, md5(sid.encode()).hexdigest())
+
+    def load(self, sid: str):
+        try:
+            with open(self._path(sid), 'rb') as handle:
+                expires_at = pickle.load(handle)
+                if expires_at < time.time():
+                    return None
+                return pickle.load(handle)
+        except (OSError, EOFError, pickle.PickleError):
+            return None
+
+    def save(self, sid: str, data, user_id=None):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'wb') as handle:
+            pickle.dump(time.time() + self.lifetime, handle)
+            pickle.dump(data, handle, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(sid))
+
+    # The filesystem interface rewrote the file on every request
+    touch = None
+
+
+def session_payload(user_id: int) -> dict:
+    """Shape of a logged-in Flask-Login session"""
+    return {
+        '_user_id': str(user_id),
+        '_fresh': True,
+        '_id': secrets.token_hex(64),
+        '_csrf_token': secrets.token_hex(20),
+        '_permanent': True,
+        'csrf_token': secrets.token_hex(20),
+        'role': random.choice(['customer', 'business', 'admin']),
+        'last_activity': datetime(2026, 10, 1, 12, 0, 0).isoformat()
+    }
+
+
+def run(name: str, store, sids, requests: int, write_ratio: float, threads: int):
+    rng = random.Random(7)
+    plan = [(rng.choice(sids), rng.random() < write_ratio) for _ in range(requests)]
+
+    def handle(item):
+        sid, dirty = item
+        started = time.perf_counter()
+        data = store.load(sid)
+        read_us = (time.perf_counter() - started) * 1e6
+        started = time.perf_counter()
+        if dirty or store.touch is None:
+            data = dict(data or {})
+            data['last_activity'] = datetime.now().isoformat()
+            store.save(sid, data, user_id=data.get('_user_id'))
+        else:
+            store.touch(sid)
+        return read_us, (time.perf_counter() - started) * 1e6
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(handle, plan, chunksize=64))
+    elapsed = time.perf_counter() - started
+
+    reads = sorted(result[0] for result in results)
+    writes = sorted(result[1] for result in results)
+    p99 = lambda values: values[int(len(values) * 0.99)]
+    print(f"{name:<26} {requests / elapsed:>10.0f} req/s  read p50 {statistics.median(reads):>7.1f} "
+          f"p99 {p99(reads):>8.1f} us  save/touch p50 {statistics.median(writes):>7.1f} p99 {p99(writes):>8.1f} us")
+
+
+def main():
+    sessions = int(os.environ.get('BENCH_SESSIONS', '12000'))
+    requests = int(os.environ.get('BENCH_REQUESTS', '100000'))
+    write_ratio = float(os.environ.get('BENCH_WRITE_RATIO', '0.1'))
+    threads = int(os.environ.get('BENCH_THREADS', '32'))
+    lifetime = 900
+
+    sids = [TieredSessionStore.new_sid() for _ in range(sessions)]
+    payloads = {sid: session_payload(user_id) for user_id, sid in enumerate(sids)}
+    print(f"{sessions} sessions, {requests} requests, {write_ratio:.0%} modify the session, {threads} threads")
+
+    directory = tempfile.mkdtemp(prefix='bench_sessions_')
+    try:
+        filesystem = FilesystemSessions(directory, lifetime)
+        for sid, payload in payloads.items():
+            filesystem.save(sid, payload)
+        run('filesystem (pickle files)', filesystem, sids, requests, write_ratio, threads)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    backends = [('local', LocalSessionBackend)]
+    redis_url = os.environ.get('REDIS_URL')
+    if redis_url:
+        import redis
+        client = redis.from_url(redis_url)
+        backends.append(('redis', lambda: RedisSessionBackend(client, 'bench_session:')))
+
+    for backend_name, make_backend in backends:
+        for front_size in (sessions * 2, sessions // 2, 0):
+            store = TieredSessionStore(backend=make_backend(), front=SessionLRU(maxsize=front_size, ttl=2.0),
+                                       lifetime=lifetime)
+            for sid, payload in payloads.items():
+                store.save(sid, payload, user_id=payload['_user_id'])
+            store.front.clear()
+            run(f"tiered {backend_name}, lru {front_size}", store, sids, requests, write_ratio, threads)
+            stats = store.get_stats()
+            print(f"{'':<26} front hit rate {stats['front_hit_rate']}%, writes {stats['writes'] - sessions}, "
+                  f"touches {stats['touches']}, skipped touches {stats['skipped_touches']}")
+        if backend_name == 'redis':
+            for key in client.scan_iter(match='bench_session:*', count=1000):
+                client.unlink(key)
+
+
+if __name__ == '__main__':
+    main()
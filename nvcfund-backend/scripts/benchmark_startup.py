@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Measures create_app() cold-start time with eager and lazy blueprint registration in fresh interpreters
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+# Runs in a fresh interpreter per sample so nothing is already imported
+PROBE = r"""
+import json, os, sys, time
+sys.path.insert(0, os.environ['BENCH_ROOT'])
+started = time.perf_counter()
+from app_factory import create_app
+app = create_app(os.environ.get('FLASK_CONFIG', 'development'))
+boot = time.perf_counter() - started
+rules = len(list(app.url_map.iter_rules()))
+first_hits = {}
+client = app.test_client()
+for path in os.environ.get('BENCH_PATHS', '').split(','):
+    if path:
+        hit = time.perf_counter()
+        status = client.get(path).status_code
+        first_hits[path] = [round((time.perf_counter() - hit) * 1000, 1), status]
+print('BENCH' + json.dumps({'boot_s': boot, 'modules': len(sys.modules),
+                           'rules': rules, 'first_hits': first_hits}))
+"""
+
+
+def sample(lazy: bool, paths: str) -> dict:
+    env = dict(os.environ, BENCH_ROOT=str(project_root), BENCH_PATHS=paths,
+               LAZY_BLUEPRINTS='true' if lazy else 'false')
+    output = subprocess.run([sys.executable, '-c', PROBE], env=env, cwd=project_root,
+                            capture_output=True, text=True, check=True).stdout
+    line = next(line for line in output.splitlines() if line.startswith('BENCH'))
+    return json.loads(line[len('BENCH'):])
+
+
+def main():
+    runs = int(os.environ.get('BENCH_RUNS', '5'))
+    paths = os.environ.get('BENCH_PATHS', '/banking/,/products/trading/,/admin/')
+
+    subprocess.run([sys.executable, str(project_root / 'scripts' / 'build_route_manifest.py')],
+                   cwd=project_root, check=True, capture_output=True)
+
+    results = {}
+    for lazy in (False, True):
+        mode = 'lazy' if lazy else 'eager'
+        samples = [sample(lazy, paths) for _ in range(runs)]
+        boots = [s['boot_s'] for s in samples]
+        results[mode] = statistics.median(boots)
+        print(f"{mode:<6} boot median {statistics.median(boots) * 1000:8.0f} ms  "
+              f"min {min(boots) * 1000:8.0f} ms  modules {samples[-1]['modules']:>5}  "
+              f"rules at boot {samples[-1]['rules']:>5}")
+        for path, (ms, status) in samples[-1]['first_hits'].items():
+            print(f"        first GET {path:<28} {ms:8.1f} ms  ({status})")
+
+    print(f"cold start reduced by {(1 - results['lazy'] / results['eager']) * 100:.0f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Token Transfer Index Benchmark
+Explorer-backed token analytics against the local transfer index: backfill, incremental sync and query latency on a mock explorer
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from collections import defaultdict
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+
+from flask import Flask
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.mock_provider_server import MockProviderServer, token_transfers
+from modules.core.caching_strategy import cache
+from modules.core.extensions import db
+from modules.core.integration_http import integration_http
+from modules.services.integrations.blockchain.analytics.etherscan_service import EtherscanService
+from modules.services.integrations.blockchain.analytics.models import (
+    IndexedTokenTransfer, TokenHolderBalance, TokenIndexCursor, TokenTransferDaily
+)
+from modules.services.integrations.blockchain.analytics.response_cache import explorer_cache
+from modules.services.integrations.blockchain.analytics.transfer_index import ZERO_ADDRESS, transfer_index
+
+CONTRACT = '0x' + '5e' * 20
+
+
+def legacy_analytics(service: EtherscanService, contract_address: str):
+    """
+    What get_token_analytics and get_historical_token_data did per call:
+    three lookups plus a 1000-transfer window. Calls wait for rate limit
+    tokens so every query completes.
+    """
+    with integration_http.patience(10):
+        integration_http.fan_out(lambda call: call(), [
+            lambda: service.get_token_info(contract_address),
+            lambda: service.get_token_transfers(contract_address=contract_address, offset=100),
+            lambda: service.get_token_holders(contract_address, offset=50)
+        ])
+        current_block = service.get_latest_block_number()
+        if current_block:
+            start_block = int(current_block - 30 * (86400 // 13.5))
+            service.get_token_transfers(contract_address=contract_address, start_block=start_block,
+                                        end_block=current_block, offset=1000)
+
+
+def timed(fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+        db.session.remove()
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99)]
+
+
+def report(label: str, latency, upstream: int, queries: int):
+    p50, p99 = latency
+    print(f"{label:<34} p50 {p50:>8.2f} ms  p99 {p99:>8.2f} ms  explorer calls/query {upstream / queries:>6.2f}")
+
+
+def expected_holders(server: MockProviderServer, last_block: int):
+    """Balances recomputed from the mock's full transfer history"""
+    balances = defaultdict(int)
+    supply = 0
+    rows = token_transfers({'contractaddress': CONTRACT, 'startblock': 0, 'endblock': last_block,
+                            'offset': 10000, 'page': 1}, server.first_block, server.block_height, server.block_time)
+    for row in rows:
+        value = int(row['value'])
+        if row['from'] == ZERO_ADDRESS:
+            supply += value
+        else:
+            balances[row['from']] -= value
+        balances[row['to']] += value
+    return len(rows), sum(1 for balance in balances.values() if balance > 0), supply
+
+
+def main():
+    queries = int(os.environ.get('BENCH_QUERIES', '200'))
+    history = int(os.environ.get('BENCH_HISTORY_BLOCKS', '4000'))
+    warnings.filterwarnings('ignore', message='.*Decimal objects natively.*')
+
+    server = MockProviderServer(latency=float(os.environ.get('BENCH_LATENCY', '0.03')), rate_limit=5,
+                                block_time=1.0, history_blocks=history).start()
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('BENCH_DATABASE_URL', f"sqlite:///{database.name}")
+    app.config['CACHE_TYPE'] = 'SimpleCache'
+    app.config['REDIS_URL'] = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    app.config['TOKEN_INDEX_BACKGROUND_SYNC'] = False
+    app.config['TOKEN_INDEX_PAGE_RATE'] = 5
+    db.init_app(app)
+    cache.init_app(app)
+    transfer_index.init_app(app)
+    integration_http.init_app(SimpleNamespace(config={
+        'INTEGRATION_BASE_URLS': {'etherscan': server.url},
+        'INTEGRATION_RATE_LIMITS': {'etherscan': 5}
+    }))
+    service = EtherscanService()
+    transfer_index.register_source('etherscan', service)
+
+    tables = [model.__table__ for model in (TokenIndexCursor, IndexedTokenTransfer, TokenHolderBalance,
+                                            TokenTransferDaily)]
+    try:
+        with app.app_context():
+            db.metadata.create_all(db.engine, tables=tables)
+            print(f"mock explorer: {history} blocks of history, 1s blocks, 5 req/s; "
+                  f"database {db.engine.dialect.name}")
+
+            explorer_cache.enabled = False
+            server.reset_counters()
+            legacy_queries = max(queries // 20, 5)
+            latency = timed(lambda: legacy_analytics(service, CONTRACT), legacy_queries)
+            report('explorer analytics (no cache)', latency, server.requests + server.throttled, legacy_queries)
+
+            time.sleep(1.1)
+            explorer_cache.enabled = True
+            server.reset_counters()
+            latency = timed(lambda: legacy_analytics(service, CONTRACT), queries)
+            report('explorer analytics (response cache)', latency, server.requests + server.throttled, queries)
+
+            time.sleep(1.1)
+            server.reset_counters()
+            transfer_index.track('etherscan', CONTRACT)
+            started = time.perf_counter()
+            result = transfer_index.sync_contract('etherscan', CONTRACT)
+            print(f"{'index backfill':<34} {time.perf_counter() - started:>8.2f} s  pages {result['pages']}  "
+                  f"transfers {result['transfers']}  explorer calls {server.requests + server.throttled}")
+
+            # Past the 12s block height cache, so the sync sees new blocks
+            time.sleep(13)
+            server.reset_counters()
+            indexed_through = transfer_index.lookup('etherscan', CONTRACT).last_block
+            db.session.remove()
+            started = time.perf_counter()
+            result = transfer_index.sync_contract('etherscan', CONTRACT)
+            elapsed = time.perf_counter() - started
+            blocks = transfer_index.lookup('etherscan', CONTRACT).last_block - indexed_through
+            print(f"{f'incremental sync ({blocks} new blocks)':<34} {elapsed * 1000:>8.1f} ms  "
+                  f"pages {result['pages']}  transfers {result['transfers']}  "
+                  f"explorer calls {server.requests + server.throttled}")
+
+            server.reset_counters()
+            latency = timed(lambda: service.get_token_analytics(CONTRACT), queries)
+            report('indexed analytics', latency, server.requests + server.throttled, queries)
+            latency = timed(lambda: service.get_historical_token_data(CONTRACT, days=30), queries)
+            report('indexed 30-day history', latency, server.requests + server.throttled, queries)
+
+            analytics = service.get_token_analytics(CONTRACT)
+            cursor = analytics['index']
+            transfers, holders, supply = expected_holders(server, cursor['last_block'])
+            metrics = analytics['activity_metrics']
+            indexed_supply = Decimal(analytics['token_info']['total_supply'])
+            print(f"\nthrough block {cursor['last_block']} ({cursor['lag_blocks']} behind head): "
+                  f"transfers {metrics['total_transfers']}/{transfers}, holders {metrics['holders_count']}/{holders}, "
+                  f"supply {'matches' if abs(indexed_supply - supply) <= supply * Decimal('1e-9') else 'DIFFERS'}; "
+                  f"30-day volume {metrics['volume_30d']} over {metrics['transfers_30d']} transfers")
+            top = analytics['top_holders'][0]
+            print(f"top holder {top['address']} with {top['percentage']:.2f}% of supply")
+    finally:
+        server.stop()
+        os.unlink(database.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Database Bootstrap
+Creates tables, applies migrations and records the schema fingerprint that workers verify at startup
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from flask import Flask
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import config
+from modules.core.extensions import db
+from modules.core.schema_version import (
+    SchemaBootstrap, current_schema_version, import_model_modules, schema_fingerprint
+)
+
+
+def create_bootstrap_app(config_name: str) -> Flask:
+    """Database-only app: no blueprints, caches or background services"""
+    app = Flask(__name__, root_path=str(project_root))
+    app.config.from_object(config.get(config_name, config['default']))
+    db.init_app(app)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--config', default=os.environ.get('FLASK_CONFIG', 'development'))
+    parser.add_argument('--check', action='store_true',
+                        help='Only compare the recorded fingerprint; exit 1 if a bootstrap is needed')
+    args = parser.parse_args()
+
+    app = create_bootstrap_app(args.config)
+    with app.app_context():
+        if args.check:
+            import_model_modules(app.root_path)
+            expected = schema_fingerprint()
+            current = current_schema_version()
+            found = current['fingerprint'] if current else None
+            print(f"application schema: {expected}")
+            print(f"database schema:    {found or 'not bootstrapped'}")
+            if current:
+                print(f"applied at {current['applied_at']} by {current['applied_by']}")
+            sys.exit(0 if found == expected else 1)
+
+        result = SchemaBootstrap(app).run()
+
+    if not result['changed']:
+        print(f"Schema already at {result['fingerprint']}")
+        return
+    print(f"Schema bootstrapped: {result.get('previous') or 'empty'} -> {result['fingerprint']}")
+    for migration in result['migrations']:
+        print(f"  applied {migration}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Build Route Manifest
+Registers every blueprint group eagerly and writes the prefix -> group manifest used by LAZY_BLUEPRINTS
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# The manifest is recorded from an eager registration
+os.environ['LAZY_BLUEPRINTS'] = 'false'
+
+from app_factory import create_app
+from modules.core.lazy_blueprints import RouteManifest, manifest_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--config', default=os.environ.get('FLASK_CONFIG', 'development'))
+    parser.add_argument('--output', help='Manifest path (defaults to ROUTE_MANIFEST_PATH or <app root>/route_manifest.json)')
+    args = parser.parse_args()
+
+    app = create_app(args.config)
+    profiler = app.extensions['blueprint_registration']
+    manifest = RouteManifest.from_profiler(profiler, app.extensions.get('websocket_handler_modules', []))
+    output = args.output or manifest_path(app)
+    manifest.save(output)
+
+    print(f"\nRoute manifest written to {output}")
+    print(f"{'group':<20} {'import ms':>10} {'modules':>8} {'prefixes':>9}  heavy imports")
+    for profile in sorted(profiler.profiles.values(), key=lambda p: p.import_ms, reverse=True):
+        print(f"{profile.name:<20} {profile.import_ms:>10.1f} {profile.modules_imported:>8} "
+              f"{len(profile.prefixes):>9}  {', '.join(profile.third_party[:8])}")
+    print(f"eager (root routes): {', '.join(manifest.eager_groups()) or 'none'}")
+    print(f"model modules: {len(manifest.data['model_modules'])}, "
+          f"websocket handler modules: {len(manifest.data['websocket_modules'])}")
+
+
+if __name__ == '__main__':
+    main()
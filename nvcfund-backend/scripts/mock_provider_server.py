@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Mock Provider Server
+Local stand-in for the Etherscan/Polygonscan and Binance/CoinGecko APIs with their rate limiting behaviour
+
+Point the integrations at it with e.g. ETHERSCAN_BASE_URL=http://127.0.0.1:8545
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+RATE_LIMITED_RESULT = 'Max rate limit reached, please use API Key for higher rate limit'
+
+
+class MockProviderServer(ThreadingHTTPServer):
+    """
+    Answers explorer calls (/api?module=...&action=...) and Binance or
+    CoinGecko style calls (/api/v3/...) after ``latency`` seconds. Each new
+    connection costs ``connect_latency`` once, standing in for the TCP+TLS
+    handshake that keep-alive saves. More than ``rate_limit`` requests
+    within one second are throttled the way the real providers do it:
+    explorers answer 200 with "Max rate limit reached", the rest 429 with
+    Retry-After. ``error_rate`` of the admitted requests fail with 503.
+    The block height reported by the proxy module advances every
+    ``block_time`` seconds; every token has transfers in the last
+    ``history_blocks`` blocks, and more as new blocks appear.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.03, connect_latency: float = 0.0,
+                 rate_limit: int = 0, error_rate: float = 0.0, block_time: float = 2.0,
+                 history_blocks: int = 2000):
+        super().__init__(('127.0.0.1', port), MockProviderHandler)
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.block_time = block_time
+        self.first_block = self.block_height - history_blocks
+        self.lock = threading.Lock()
+        self.window = (0, 0)
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.connections = 0
+
+    @property
+    def block_height(self) -> int:
+        return 19000000 + int(time.time() / self.block_time)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> 'MockProviderServer':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def admit(self) -> bool:
+        with self.lock:
+            second, count = self.window
+            now = int(time.time())
+            count = count + 1 if now == second else 1
+            self.window = (now, count)
+            if self.rate_limit and count > self.rate_limit:
+                self.throttled += 1
+                return False
+            self.requests += 1
+            return True
+
+    def reset_counters(self):
+        with self.lock:
+            self.window = (0, 0)
+            self.requests = self.throttled = self.errors = self.connections = 0
+
+
+def _number(*parts: str, digits: int = 21) -> str:
+    """Stable pseudo-random integer string for an address/contract combination"""
+    return str(int(hashlib.sha256(':'.join(parts).encode()).hexdigest(), 16) % 10 ** digits)
+
+
+def _address(*parts: str) -> str:
+    return f"0x{int(_number(*parts, digits=40)):040x}"
+
+
+def block_transfers(contract: str, block: int, first_block: int, block_time: float):
+    """The token's transfers in ``block``: up to three per block, a mint every 50 blocks"""
+    mint_block = (block - first_block) % 50 == 0
+    count = int(_number(contract, 'count', str(block), digits=6)) % 4
+    rows = []
+    for position in range(max(count, 1) if mint_block else count):
+        mint = mint_block and position == 0
+        key = (contract, str(block), str(position))
+        rows.append({
+            'blockNumber': str(block),
+            'timeStamp': str(int((block - 19000000) * block_time)),
+            'hash': f"0x{int(_number(*key, 'hash', digits=64)):064x}",
+            'from': '0x' + '0' * 40 if mint else _address(contract, 'holder', str(int(_number(*key, 'f')) % 40)),
+            'to': _address(contract, 'holder', str(int(_number(*key, 't')) % 40)),
+            'value': str(10 ** 24) if mint else str(int(_number(*key, 'v')) % 10 ** 20),
+            'contractAddress': contract,
+            'tokenName': f'Token {contract[-4:]}',
+            'tokenSymbol': contract[-4:].upper(),
+            'tokenDecimal': '18'
+        })
+    return rows
+
+
+def token_transfers(params, first_block: int, head: int, block_time: float):
+    """tokentx with startblock/endblock, sort and page/offset like the explorers"""
+    contract = params.get('contractaddress', '0x0').lower()
+    address = params.get('address', '').lower()
+    start = max(int(params.get('startblock', 0)), first_block)
+    end = min(int(params.get('endblock', head)), head)
+    page, offset = int(params.get('page', 1)), min(int(params.get('offset', 10)), 10000)
+    ascending = params.get('sort', 'asc') == 'asc'
+    rows = []
+    for block in (range(start, end + 1) if ascending else range(end, start - 1, -1)):
+        found = block_transfers(contract, block, first_block, block_time)
+        if address:
+            found = [row for row in found if address in (row['from'], row['to'])]
+        rows.extend(found if ascending else reversed(found))
+        if len(rows) >= page * offset:
+            break
+    return rows[(page - 1) * offset:page * offset]
+
+
+def explorer_result(params, server: 'MockProviderServer'):
+    module, action = params.get('module', ''), params.get('action', '')
+    contract = params.get('contractaddress', '0x0')
+    if action == 'tokenbalance':
+        return _number(contract, params.get('address', ''))
+    if action == 'tokeninfo':
+        return [{'contractAddress': contract, 'tokenName': f'Token {contract[-4:]}', 'symbol': contract[-4:].upper(),
+                 'divisor': '18', 'decimals': '18', 'totalSupply': _number(contract, digits=27)}]
+    if action == 'tokensupply':
+        return _number(contract, digits=27)
+    if action == 'tokenholderlist':
+        return [{'TokenHolderAddress': f'0x{_number(contract, str(rank), digits=40):0>40}',
+                 'TokenHolderQuantity': _number(contract, str(rank)), 'TokenHolderPercentage': '0.5'}
+                for rank in range(int(params.get('offset', 10)))]
+    if action == 'tokentx':
+        return token_transfers(params, server.first_block, server.block_height, server.block_time)
+    if action == 'maticprice':
+        return {'maticusd': '0.52', 'maticbtc': '0.0000081'}
+    if module == 'stats':
+        return _number('supply', digits=27)
+    return []
+
+
+def market_result(path, params):
+    if path.endswith('/ticker/price'):
+        return {'symbol': params.get('symbol', 'BTCUSDT'), 'price': '64000.00'}
+    if path.endswith('/ticker/24hr'):
+        return [{'symbol': symbol, 'lastPrice': '1.0', 'priceChangePercent': '0.1', 'volume': '1000'}
+                for symbol in ('BTCUSDT', 'ETHUSDT', 'BNBUSDT')]
+    if path.endswith('/depth'):
+        return {'lastUpdateId': 1, 'bids': [['63999.0', '1.0']], 'asks': [['64001.0', '1.0']]}
+    return {}
+
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        time.sleep(self.server.connect_latency)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        explorer = url.path.rstrip('/') == '/api'
+        if not explorer and not url.path.startswith('/api/v3/'):
+            self._reply(404, {'message': 'Not found'})
+            return
+
+        if not self.server.admit():
+            if explorer:
+                self._reply(200, {'status': '0', 'message': 'NOTOK', 'result': RATE_LIMITED_RESULT})
+            else:
+                self._reply(429, {'code': -1003, 'msg': 'Too many requests'}, {'Retry-After': '1'})
+            return
+
+        time.sleep(self.server.latency)
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            with self.server.lock:
+                self.server.errors += 1
+            self._reply(503, {'message': 'Service unavailable'})
+            return
+
+        if explorer and params.get('module') == 'proxy':
+            self._reply(200, {'jsonrpc': '2.0', 'id': 83, 'result': hex(self.server.block_height)})
+        elif explorer:
+            result = explorer_result(params, self.server)
+            if result == []:
+                self._reply(200, {'status': '0', 'message': 'No transactions found', 'result': []})
+            else:
+                self._reply(200, {'status': '1', 'message': 'OK', 'result': result})
+        else:
+            self._reply(200, market_result(url.path, params))
+
+    def _reply(self, status: int, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock Etherscan/Polygonscan/Binance/CoinGecko API')
+    parser.add_argument('--port', type=int, default=8545)
+    parser.add_argument('--latency', type=float, default=0.03, help='Seconds per request')
+    parser.add_argument('--connect-latency', type=float, default=0.05, help='Seconds per new connection')
+    parser.add_argument('--rate-limit', type=int, default=5, help='Requests per second before throttling (0: off)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    parser.add_argument('--block-time', type=float, default=2.0, help='Seconds between reported block heights')
+    parser.add_argument('--history-blocks', type=int, default=2000, help='Blocks of token transfers before startup')
+    args = parser.parse_args()
+
+    server = MockProviderServer(args.port, args.latency, args.connect_latency, args.rate_limit, args.error_rate,
+                                args.block_time, args.history_blocks)
+    print(f"Mock provider API on {server.url} (rate limit {args.rate_limit or 'off'} req/s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
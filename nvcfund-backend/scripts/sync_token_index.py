@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Sync Token Index
+Tracks or drops contracts and runs token transfer index syncs outside the web workers (one-off backfill or a --loop process)
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scripts.bootstrap_database import create_bootstrap_app
+from modules.core.caching_strategy import cache
+from modules.core.extensions import db
+from modules.core.integration_http import integration_http
+from modules.core.rate_limiter import token_limiter
+from modules.services.integrations.blockchain.analytics.etherscan_service import EtherscanService
+from modules.services.integrations.blockchain.analytics.polygonscan_service import PolygonscanService
+from modules.services.integrations.blockchain.analytics.response_cache import explorer_cache
+from modules.services.integrations.blockchain.analytics.transfer_index import PAGES_PER_ROUND, transfer_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--config', default=os.environ.get('FLASK_CONFIG', 'development'))
+    parser.add_argument('--track', action='append', default=[], metavar='PROVIDER:CONTRACT',
+                        help='Start indexing a contract, e.g. etherscan:0xdAC1...; repeatable')
+    parser.add_argument('--untrack', action='append', default=[], metavar='PROVIDER:CONTRACT',
+                        help='Stop indexing a contract and delete its indexed data; repeatable')
+    parser.add_argument('--start-block', type=int, default=0,
+                        help='First block for newly tracked contracts (holder balances are exact only from 0)')
+    parser.add_argument('--loop', action='store_true', help='Keep syncing every TOKEN_INDEX_SYNC_INTERVAL seconds')
+    args = parser.parse_args()
+
+    app = create_bootstrap_app(args.config)
+    app.config['TOKEN_INDEX_BACKGROUND_SYNC'] = False
+    cache.init_app(app)
+    token_limiter.init_app(app)
+    integration_http.init_app(app)
+    explorer_cache.init_app(app)
+    transfer_index.init_app(app)
+    transfer_index.register_source('etherscan', EtherscanService())
+    transfer_index.register_source('polygonscan', PolygonscanService())
+
+    with app.app_context():
+        for entry in args.untrack:
+            provider, _, contract_address = entry.partition(':')
+            dropped = transfer_index.untrack(provider, contract_address)
+            print(f"{'Dropped' if dropped else 'Not tracked:'} {provider} {contract_address.lower()}")
+
+        transfer_index.track_configured()
+        for entry in args.track:
+            provider, _, contract_address = entry.partition(':')
+            cursor = transfer_index.track(provider, contract_address, start_block=args.start_block)
+            print(f"Tracking {cursor.provider} {cursor.contract_address} from block {cursor.start_block}")
+
+        while True:
+            # A one-off run backfills every contract completely; the loop shares rounds between them
+            result = transfer_index.sync_all(max_pages=PAGES_PER_ROUND if args.loop else None)
+            print(f"Synced {result['contracts']} contracts: {result['pages']} pages, {result['transfers']} transfers")
+            db.session.remove()
+            if not args.loop:
+                break
+            time.sleep(transfer_index.sync_interval)
+
+
+if __name__ == '__main__':
+    main()